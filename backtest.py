@@ -146,6 +146,12 @@ Examples:
         help="缓存 LLM 响应以节省费用 (默认: True)"
     )
     
+    parser.add_argument(
+        "--llm-replay-only",
+        action="store_true",
+        help="仅从 LLM 缓存回放，缓存未命中时回测失败 (不产生 API 调用)"
+    )
+    
     return parser.parse_args()
 
 
@@ -189,7 +195,7 @@ async def main():
     if args.strategy_mode == "agent":
         print(f"🤖 LLM Enhanced: {'Yes' if args.use_llm else 'No (Quant Only)'}")
         if args.use_llm:
-            print(f"💾 LLM Cache: {'Enabled' if args.llm_cache else 'Disabled'}")
+            print(f"💾 LLM Cache: {'Replay Only' if args.llm_replay_only else ('Enabled' if args.llm_cache else 'Disabled')}")
     print(f"🛡️ Stop Loss: {args.stop_loss}%")
     print(f"🎯 Take Profit: {args.take_profit}%")
     print("=" * 60)
@@ -255,7 +261,8 @@ async def main():
             step=args.step,
             strategy_mode=args.strategy_mode,
             use_llm=args.use_llm,
-            llm_cache=args.llm_cache
+            llm_cache=args.llm_cache,
+            llm_cache_mode="replay_only" if args.llm_replay_only else "read_write"
         )
         
         # 创建引擎
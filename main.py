@@ -64,6 +64,7 @@ from src.api.binance_client import BinanceClient
 from src.execution.engine import ExecutionEngine
 from src.risk.manager import RiskManager
 from src.utils.logger import log, setup_logger
+from src.llm import close_async_http_client
 from src.utils.trade_logger import trade_logger
 from src.utils.data_saver import DataSaver
 from src.data.processor import MarketDataProcessor  # ✅ Corrected Import
@@ -107,7 +108,7 @@ from src.agents import (
 print("[DEBUG] Importing StrategyEngine...")
 from src.strategy.llm_engine import StrategyEngine
 print("[DEBUG] Importing PredictAgent...")
-from src.agents.predict_agent import PredictAgent
+from src.agents.predict_agent import PredictAgent, PredictBatcher
 from src.agents.contracts import SuggestedTrade
 print("[DEBUG] Importing symbol_selector_agent...")
 from src.agents.symbol_selector_agent import get_selector  # 🔝 AUTO3 Support
@@ -246,6 +247,7 @@ class MultiAgentTradingBot:
             self.primary_symbol = self.symbols[0]
             log.info(f"Primary symbol {configured_primary} not in symbols list, using {self.primary_symbol}")
         
+        self._current_symbol = self.primary_symbol
         self.current_symbol = self.primary_symbol  # 当前处理的交易对
         global_state.current_symbol = self.current_symbol
         self.test_mode = test_mode
@@ -344,6 +346,8 @@ class MultiAgentTradingBot:
         
         # 🆕 Optional Agent: PredictAgent (per symbol)
         self.predict_agents = {}
+        # 并发分析的各 symbol 预测请求合批推理（仅当多个 symbol 共享同一模型文件时才等待合批）
+        self.predict_batcher = PredictBatcher(peers=lambda: self.predict_agents.values())
         if self.agent_config.predict_agent:
             print("[DEBUG] Creating PredictAgents...")
             for symbol in self.symbols:
@@ -397,6 +401,7 @@ class MultiAgentTradingBot:
         # ✅ Load initial trade history
         recent_trades = self.saver.get_recent_trades(limit=20)
         global_state.trade_history = recent_trades
+        global_state.mark_changed('trade_history')
         print(f"  📜 Loaded {len(recent_trades)} historical trades")
         
         # 🆕 Initialize Chatroom with a boot message
@@ -410,6 +415,24 @@ class MultiAgentTradingBot:
         # [NEW] Initialize LLM metadata
         self._update_llm_metadata()
 
+    @property
+    def current_symbol(self) -> str:
+        """
+        当前处理的交易对
+
+        Inside a concurrent per-symbol pipeline this resolves to the symbol bound
+        to the running task (see `_analyze_symbol`), so parallel pipelines never
+        observe each other's symbol.
+        """
+        return global_state.scoped_symbol() or self._current_symbol
+
+    @current_symbol.setter
+    def current_symbol(self, symbol: str) -> None:
+        if global_state.scoped_symbol():
+            global_state.enter_symbol_scope(symbol)
+        else:
+            self._current_symbol = symbol
+
     def _update_llm_metadata(self):
         """Collect current LLM provider/model and agent system prompts for UI display"""
         try:
@@ -770,6 +793,7 @@ class MultiAgentTradingBot:
         if added:
             if len(global_state.trade_history) > 50:
                 global_state.trade_history = global_state.trade_history[:50]
+            global_state.mark_changed('trade_history')
             log.info(f"📜 Synced open positions into trade history: {', '.join(added)}")
             global_state.add_log(f"[📜 SYSTEM] Synced open positions: {', '.join(added)}")
 
@@ -1118,16 +1142,10 @@ class MultiAgentTradingBot:
 
         async def predict_task():
             if self.agent_config.predict_agent and self.current_symbol in self.predict_agents:
-                df_15m_features = self.feature_engineer.build_features(processed_dfs['15m'])
-                latest_features = {}
-                if not df_15m_features.empty:
-                    latest = df_15m_features.iloc[-1].to_dict()
-                    latest_features = {
-                        k: v for k, v in latest.items()
-                        if isinstance(v, (int, float)) and not isinstance(v, bool)
-                    }
+                # 只计算最新一根 15m K 线的特征（尾部最小窗口，不复制整段 DataFrame）
+                latest_features = self.feature_engineer.build_latest_features(processed_dfs['15m'])
 
-                res = await self.predict_agents[self.current_symbol].predict(latest_features)
+                res = await self.predict_batcher.predict(self.predict_agents[self.current_symbol], latest_features)
                 global_state.prophet_probability = res.probability_up
                 p_up_pct = res.probability_up * 100
                 direction = "↗UP" if res.probability_up > 0.55 else ("↘DN" if res.probability_up < 0.45 else "➖NEU")
@@ -1138,23 +1156,7 @@ class MultiAgentTradingBot:
             return None
 
         async def reflection_task():
-            total_trades = len(global_state.trade_history)
-            if self.reflection_agent and self.reflection_agent.should_reflect(total_trades):
-                global_state.add_agent_message("reflection_agent", "🔍 Reflecting on recent trade performance...", level="info")
-                trades_to_analyze = global_state.trade_history[-10:]
-                res = await self.reflection_agent.generate_reflection(trades_to_analyze)
-                if res:
-                    reflection_text = res.to_prompt_text()
-                    global_state.last_reflection = res.raw_response
-                    global_state.last_reflection_text = reflection_text
-                    global_state.reflection_count = self.reflection_agent.reflection_count
-                    global_state.add_agent_message(
-                        "reflection_agent",
-                        f"Reflected on {len(trades_to_analyze)} trades. Insight: {res.insight}",
-                        level="info"
-                    )
-                return res
-            return None
+            return await self._reflect_once()
 
         quant_timeout = self._get_agent_timeout('quant_analyst', 25.0)
         predict_timeout = self._get_agent_timeout('predict_agent', 30.0)
@@ -1193,6 +1195,38 @@ class MultiAgentTradingBot:
         reflection_text = reflection_result.to_prompt_text() if reflection_result else global_state.last_reflection_text
         return quant_analysis, predict_result, reflection_result, reflection_text
 
+    async def _reflect_once(self):
+        """
+        Reflection is global, not per symbol: concurrent symbol pipelines share one in-flight call.
+
+        should_reflect() is checked before the LLM call but the agent's trade counter only moves
+        after it returns, so without sharing every pipeline of a cycle would send the same call.
+        """
+        inflight = getattr(self, '_reflection_inflight', None)
+        if inflight is None or inflight.done():
+            total_trades = len(global_state.trade_history)
+            if not (self.reflection_agent and self.reflection_agent.should_reflect(total_trades)):
+                return None
+            inflight = asyncio.ensure_future(self._reflect(global_state.trade_history[-10:]))
+            self._reflection_inflight = inflight
+        # shield: one pipeline timing out does not cancel the call the others are waiting on
+        return await asyncio.shield(inflight)
+
+    async def _reflect(self, trades_to_analyze: List[Dict]):
+        global_state.add_agent_message("reflection_agent", "🔍 Reflecting on recent trade performance...", level="info")
+        res = await self.reflection_agent.generate_reflection(trades_to_analyze)
+        if res:
+            reflection_text = res.to_prompt_text()
+            global_state.last_reflection = res.raw_response
+            global_state.last_reflection_text = reflection_text
+            global_state.reflection_count = self.reflection_agent.reflection_count
+            global_state.add_agent_message(
+                "reflection_agent",
+                f"Reflected on {len(trades_to_analyze)} trades. Insight: {res.insight}",
+                level="info"
+            )
+        return res
+
     async def _run_semantic_analysis(
         self,
         *,
@@ -1537,35 +1571,19 @@ class MultiAgentTradingBot:
 
                 log.info("🐂🐻 Gathering Bull/Bear perspectives in PARALLEL...")
                 llm_perspective_timeout = self._get_agent_timeout('llm_perspective', 45.0)
-                loop = asyncio.get_running_loop()
-                bull_p, bear_p = await asyncio.gather(
-                    self._run_task_with_timeout(
-                        run_id=run_id,
-                        cycle_id=cycle_id,
-                        agent_name="bull_agent",
-                        timeout_seconds=llm_perspective_timeout,
-                        task_factory=lambda: loop.run_in_executor(
-                            None, self.strategy_engine.get_bull_perspective, market_context_text
-                        ),
-                        fallback={
-                            "stance": "NEUTRAL",
-                            "bullish_reasons": "Perspective timeout",
-                            "bull_confidence": 50
-                        }
+                # Debate pipeline: both perspectives in flight together; proceeds with
+                # one side if the other is still pending after the grace period.
+                bull_p, bear_p = await self._run_task_with_timeout(
+                    run_id=run_id,
+                    cycle_id=cycle_id,
+                    agent_name="bull_bear_debate",
+                    timeout_seconds=llm_perspective_timeout + 5.0,
+                    task_factory=lambda: self.strategy_engine.async_debate(
+                        market_context_text, timeout=llm_perspective_timeout
                     ),
-                    self._run_task_with_timeout(
-                        run_id=run_id,
-                        cycle_id=cycle_id,
-                        agent_name="bear_agent",
-                        timeout_seconds=llm_perspective_timeout,
-                        task_factory=lambda: loop.run_in_executor(
-                            None, self.strategy_engine.get_bear_perspective, market_context_text
-                        ),
-                        fallback={
-                            "stance": "NEUTRAL",
-                            "bearish_reasons": "Perspective timeout",
-                            "bear_confidence": 50
-                        }
+                    fallback=(
+                        {"stance": "NEUTRAL", "bullish_reasons": "Perspective timeout", "bull_confidence": 50},
+                        {"stance": "NEUTRAL", "bearish_reasons": "Perspective timeout", "bear_confidence": 50}
                     )
                 )
 
@@ -1574,7 +1592,7 @@ class MultiAgentTradingBot:
                 global_state.add_agent_message("bull_agent", f"Stance: {bull_p.get('stance')} | Reason: {bull_summary}", level="success")
                 global_state.add_agent_message("bear_agent", f"Stance: {bear_p.get('stance')} | Reason: {bear_summary}", level="warning")
 
-                decision_payload = self.strategy_engine.make_decision(
+                decision_payload = await self.strategy_engine.async_make_decision(
                     market_context_text=market_context_text,
                     market_context_data=market_context_data,
                     reflection=reflection_text,
@@ -3397,6 +3415,7 @@ class MultiAgentTradingBot:
                         trade['close_cycle'] = global_state.cycle_counter
                         trade['status'] = 'CLOSED'
                         log.info(f"✅ Synced global_state.trade_history: {self.current_symbol} PnL ${pnl:.2f}")
+                        global_state.mark_changed('trade_history')
                         break
                 global_state.cumulative_realized_pnl += pnl
                 log.info(f"📊 Cumulative Realized PnL: ${global_state.cumulative_realized_pnl:.2f}")
@@ -3433,6 +3452,7 @@ class MultiAgentTradingBot:
             global_state.trade_history.insert(0, trade_record)
             if len(global_state.trade_history) > 50:
                 global_state.trade_history.pop()
+            global_state.mark_changed('trade_history')
 
         return update_success
 
@@ -3691,7 +3711,9 @@ class MultiAgentTradingBot:
             print(f"{'='*80}")
 
         global_state.is_running = True
-        global_state.current_symbol = self.current_symbol
+        if not global_state.scoped_symbol():
+            # Sequential single-symbol cycle; concurrent pipelines leave the shared value alone
+            global_state.current_symbol = self.current_symbol
         run_id = f"run_{int(time.time() * 1000)}:{self.current_symbol}"
 
         cycle_num = global_state.cycle_counter
@@ -3707,7 +3729,7 @@ class MultiAgentTradingBot:
         )
 
         global_state.add_log(f"[📊 SYSTEM] {self.current_symbol} analysis started")
-        global_state.agent_messages = [msg for msg in global_state.agent_messages if msg.get('symbol') != self.current_symbol]
+        global_state.drop_agent_messages(self.current_symbol)
         snapshot_id = f"snap_{int(time.time())}"
 
         return CycleContext(
@@ -4306,6 +4328,7 @@ class MultiAgentTradingBot:
             global_state.trade_history.insert(0, trade_record)
             if len(global_state.trade_history) > 50:
                 global_state.trade_history.pop()
+            global_state.mark_changed('trade_history')
             global_state.cycle_positions_opened += 1
             global_state.add_log(f"[🚀 EXECUTOR] Test: {action.upper()} {quantity} @ {current_price:.2f}")
             return {'status': 'success', 'action': action, 'details': order_params, 'current_price': current_price}
@@ -4344,6 +4367,7 @@ class MultiAgentTradingBot:
         global_state.trade_history.insert(0, trade_record)
         if len(global_state.trade_history) > 50:
             global_state.trade_history.pop()
+        global_state.mark_changed('trade_history')
         global_state.cycle_positions_opened += 1
         global_state.add_log(f"[🚀 EXECUTOR] Live: {action.upper()} {quantity} => ✅ SENT")
         return {'status': 'success', 'action': action, 'details': order_params, 'current_price': current_price}
@@ -4697,6 +4721,49 @@ class MultiAgentTradingBot:
 # ... locating where vote_result is processed to add semantic analysis
 
 
+    def _get_symbol_concurrency(self) -> int:
+        """Max number of symbol pipelines analyzed at once (SYMBOL_CONCURRENCY / trading.symbol_concurrency)."""
+        raw = os.environ.get('SYMBOL_CONCURRENCY') or self.config.get('trading.symbol_concurrency', 3)
+        try:
+            return max(1, int(raw))
+        except (TypeError, ValueError):
+            return 3
+
+    async def _analyze_symbol(self, symbol: str, semaphore: asyncio.Semaphore) -> Dict:
+        """Run one analyze-only pipeline with `symbol` bound to this task."""
+        async with semaphore:
+            # Only the task-local scope: run_continuous sets the dashboard-wide current_symbol after the gather
+            global_state.enter_symbol_scope(symbol)
+            return await self.run_trading_cycle(analyze_only=True)
+
+    async def _analyze_symbols_concurrently(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Analyze all symbols of a cycle concurrently on the running event loop.
+
+        Returns:
+            {symbol: run_trading_cycle result}, in the order of `symbols`
+        """
+        semaphore = asyncio.Semaphore(self._get_symbol_concurrency())
+        outcomes = await asyncio.gather(
+            *(self._analyze_symbol(symbol, semaphore) for symbol in symbols),
+            return_exceptions=True
+        )
+        results: Dict[str, Dict] = {}
+        for symbol, outcome in zip(symbols, outcomes):
+            if isinstance(outcome, BaseException):
+                log.error(f"[{symbol}] Symbol pipeline failed: {outcome}")
+                outcome = {'status': 'error', 'details': {'error': str(outcome)}}
+            results[symbol] = outcome
+        return results
+
+    def _cycle_focus_symbol(self, symbols: List[str], decisions: List[SuggestedTrade]) -> str:
+        """Symbol the dashboard follows after a cycle: best open candidate, else the previous one if still analyzed."""
+        if decisions:
+            return max(decisions, key=lambda d: d.confidence).symbol
+        if self.current_symbol in symbols or not symbols:
+            return self.current_symbol
+        return symbols[0]
+
     def run_once(self) -> Dict:
         """运行一次交易循环（同步包装）"""
         result = asyncio.run(self.run_trading_cycle())
@@ -4978,6 +5045,8 @@ class MultiAgentTradingBot:
                 pnl=current_balance - initial_balance
             )
         
+        # One persistent event loop for all cycles (keeps aiohttp sessions / pools alive)
+        cycle_loop = asyncio.new_event_loop()
         try:
             while global_state.is_running:
                 # 🔄 Check for configuration changes
@@ -5115,17 +5184,14 @@ class MultiAgentTradingBot:
                 # 🎯 重置周期开仓计数器
                 global_state.cycle_positions_opened = 0
                 
-                # 🔄 多币种顺序处理: 依次分析每个交易对
-                # Step 1: 收集所有交易对的决策
+                # 🔄 多币种并发处理: 在同一个事件循环中并发分析所有交易对
+                # Step 1: 收集所有交易对的决策 (analyze-only, 不执行开仓)
                 all_decisions: List[SuggestedTrade] = []
                 latest_prices = {}  # Store latest prices for PnL calculation
-                for symbol in symbols_for_cycle:
-                    self.current_symbol = symbol  # 设置当前处理的交易对
-                    global_state.current_symbol = symbol
-                    
-                    # Analyze each symbol first without executing OPEN actions
-                    result = asyncio.run(self.run_trading_cycle(analyze_only=True))
-                    
+                cycle_results = cycle_loop.run_until_complete(
+                    self._analyze_symbols_concurrently(symbols_for_cycle)
+                )
+                for symbol, result in cycle_results.items():
                     latest_prices[symbol] = global_state.current_price.get(symbol, 0)
                     
                     print(f"  [{symbol}] 结果: {result['status']}")
@@ -5134,6 +5200,10 @@ class MultiAgentTradingBot:
                     suggested_trade = SuggestedTrade.from_cycle_result(symbol=symbol, result=result)
                     if suggested_trade:
                         all_decisions.append(suggested_trade)
+
+                # 📺 Dashboard focus: agent status fields are kept per symbol and shown for current_symbol
+                self.current_symbol = self._cycle_focus_symbol(symbols_for_cycle, all_decisions)
+                global_state.current_symbol = self.current_symbol
                 
                 # Step 2: 从所有开仓决策中选择信心度最高的一个
                 if all_decisions:
@@ -5268,6 +5338,15 @@ class MultiAgentTradingBot:
             else:
                 print(f"\n\n⚠️  收到停止信号，退出...")
             global_state.is_running = False
+        finally:
+            try:
+                # 关闭该事件循环上的共享 LLM 连接池
+                cycle_loop.run_until_complete(close_async_http_client())
+            except Exception as e:
+                log.warning(f"⚠️ Failed to close LLM HTTP client: {e}")
+            cycle_loop.close()
+            # 写完后台 journal 中尚未落盘的记录
+            self.saver.close()
 
     def _update_virtual_account_stats(self, latest_prices: Dict[str, float]):
         """
@@ -14,6 +14,8 @@ import json
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.backtest.engine import BacktestEngine, BacktestConfig
+from src.backtest.storage import BacktestStorage
+from src.backtest.sweep import ParameterSweep
 
 
 class BacktestOptimizer:
@@ -40,7 +42,7 @@ class BacktestOptimizer:
                 },
                 'metrics': {
                     'total_return': result.metrics.total_return,
-                    'total_return_pct': result.metrics.total_return_pct,
+                    'total_return_pct': result.metrics.total_return,  # total_return 已是百分比
                     'win_rate': result.metrics.win_rate,
                     'total_trades': result.metrics.total_trades,
                     'sharpe_ratio': result.metrics.sharpe_ratio,
@@ -112,36 +114,59 @@ class BacktestOptimizer:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # 定义参数网格
-        stop_loss_values = [0.5, 1.0, 1.5, 2.0]
-        take_profit_values = [1.0, 2.0, 3.0, 4.0]
+        base_config = BacktestConfig(
+            symbol=symbol,
+            start_date=start_date.strftime("%Y-%m-%d"),
+            end_date=end_date.strftime("%Y-%m-%d"),
+            initial_capital=10000,
+            step=3,
+            strategy_mode="technical",
+        )
         
-        results = []
-        total_tests = len(stop_loss_values) * len(take_profit_values)
-        current_test = 0
+        # 定义参数网格：数据只加载一次，所有组合在进程池中并行运行，结果批量写入回测数据库
+        sweep = ParameterSweep(
+            base_config,
+            {
+                'stop_loss_pct': [0.5, 1.0, 1.5, 2.0],
+                'take_profit_pct': [1.0, 2.0, 3.0, 4.0],
+            },
+            objective="total_return",
+            storage=BacktestStorage(),
+        )
+        trials = await sweep.grid()
+        print(f"\n🗂️ 优化会话: {sweep.session_id}")
         
-        for sl in stop_loss_values:
-            for tp in take_profit_values:
-                current_test += 1
-                print(f"\n[{current_test}/{total_tests}] 测试 SL={sl}% TP={tp}%")
-                
-                config = BacktestConfig(
-                    symbol=symbol,
-                    start_date=start_date.strftime("%Y-%m-%d"),
-                    end_date=end_date.strftime("%Y-%m-%d"),
-                    initial_capital=10000,
-                    stop_loss_pct=sl,
-                    take_profit_pct=tp,
-                    step=3,
-                    strategy_mode="technical",
-                )
-                
-                result = await self.run_single_backtest(config)
-                results.append(result)
-                
-                if result['success']:
-                    m = result['metrics']
-                    print(f"  收益率: {m['total_return_pct']:+.2f}% | 胜率: {m['win_rate']:.1f}%")
+        results = []
+        for trial in sorted(trials, key=lambda t: t.trial_id):
+            config = {
+                'symbol': symbol,
+                'start_date': base_config.start_date,
+                'end_date': base_config.end_date,
+                'initial_capital': base_config.initial_capital,
+                'strategy_mode': base_config.strategy_mode,
+                **trial.params,
+            }
+            if not trial.success:
+                print(f"  ❌ SL={trial.params['stop_loss_pct']}% TP={trial.params['take_profit_pct']}% 失败: {trial.error}")
+                results.append({'config': config, 'error': trial.error, 'success': False})
+                continue
+            
+            m = trial.metrics
+            print(f"  SL={trial.params['stop_loss_pct']}% TP={trial.params['take_profit_pct']}% | "
+                  f"收益率: {m['total_return']:+.2f}% | 胜率: {m['win_rate']:.1f}%")
+            results.append({
+                'config': config,
+                'metrics': {
+                    'total_return': m['total_return'],
+                    'total_return_pct': m['total_return'],
+                    'win_rate': m['win_rate'],
+                    'total_trades': m['total_trades'],
+                    'sharpe_ratio': m['sharpe_ratio'],
+                    'max_drawdown_pct': m['max_drawdown_pct'],
+                },
+                'run_id': trial.run_id,
+                'success': True
+            })
         
         return results
     
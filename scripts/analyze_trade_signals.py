@@ -10,13 +10,19 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.trade_ledger import TradeLedger
+
 
 DECISION_RE = re.compile(
     r"decision_(?P<symbol>[^_]+)_(?P<date>\d{8})_(?P<time>\d{6})_cycle_(?P<cycle>[^_]+)_(?P<id>\d+)\.json"
@@ -113,7 +119,10 @@ def load_atr_pct(path: Path) -> Optional[float]:
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Analyze trade signals vs. decisions and indicators.")
-    parser.add_argument("--trades", default="data/execution/trades/all_trades.csv")
+    parser.add_argument("--ledger", default="data/execution/trades/trades.db",
+                        help="SQLite trade ledger (preferred source of trade records)")
+    parser.add_argument("--trades", default="data/execution/trades/all_trades.csv",
+                        help="CSV export, used only when the ledger does not exist")
     parser.add_argument("--decision-root", default="data/agents/strategy_engine")
     parser.add_argument("--indicator-root", default="data/analytics/indicators")
     parser.add_argument("--max-age-mins", type=int, default=120)
@@ -122,9 +131,20 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def load_trades(ledger_path: str, csv_path: str) -> pd.DataFrame:
+    # all_trades.csv is only an on-demand export; the ledger is always current
+    if Path(ledger_path).exists():
+        ledger = TradeLedger(ledger_path)
+        try:
+            return ledger.to_frame()
+        finally:
+            ledger.close()
+    return pd.read_csv(csv_path)
+
+
 def main() -> None:
     args = parse_args()
-    trades = pd.read_csv(args.trades)
+    trades = load_trades(args.ledger, args.trades)
     trades["record_time"] = pd.to_datetime(trades["record_time"])
     trades = trades[trades["status"] == "CLOSED"].copy()
 
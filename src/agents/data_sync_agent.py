@@ -12,9 +12,10 @@
 """
 
 import asyncio
+import time
 import pandas as pd
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 
 from src.api.binance_client import BinanceClient
@@ -56,6 +57,9 @@ class MarketSnapshot:
     binance_funding: Dict = field(default_factory=dict)
     binance_oi: Dict = field(default_factory=dict)
     
+    # 各数据源耗时（秒），如 {'5m': 0.21, 'quant': 0.35}
+    fetch_latencies: Dict[str, float] = field(default_factory=dict)
+    
     # 原始数据（可选，用于调试）
     raw_5m: List[Dict] = field(default_factory=list)
     raw_15m: List[Dict] = field(default_factory=list)
@@ -75,14 +79,29 @@ class DataSyncAgent:
     3. 时间对齐验证
     """
     
-    def __init__(self, client: BinanceClient = None):
+    KLINE_INTERVALS = ('5m', '15m', '1h')
+    
+    # 单个请求超时（秒），超时后使用部分结果继续
+    KLINE_FETCH_TIMEOUT = 10.0
+    EXTERNAL_FETCH_TIMEOUT = 8.0
+    
+    def __init__(
+        self,
+        client: BinanceClient = None,
+        kline_timeout: Optional[float] = None,
+        external_timeout: Optional[float] = None
+    ):
         """
         初始化数据同步官
         
         Args:
             client: Binance客户端实例，如果为None则自动创建
+            kline_timeout: 单个K线请求超时（秒）
+            external_timeout: 量化/资金费率请求超时（秒）
         """
         self.client = client or BinanceClient()
+        self.kline_timeout = kline_timeout or self.KLINE_FETCH_TIMEOUT
+        self.external_timeout = external_timeout or self.EXTERNAL_FETCH_TIMEOUT
         
         # WebSocket 管理器（可选，默认禁用以避免事件循环冲突）
         import os
@@ -120,6 +139,7 @@ class DataSyncAgent:
             MarketSnapshot对象，包含双视图数据
         """
         start_time = datetime.now()
+        latencies: Dict[str, float] = {}
         
         # log.oracle(f"📊 开始并发获取 {symbol} 数据...")
         
@@ -166,31 +186,17 @@ class DataSyncAgent:
                 use_rest_fallback = True
             else:
                 # 仍需异步获取外部数据
-                q_data = await quant_client.fetch_coin_data(symbol)
-                # [DISABLE OI] Commented out due to API errors
-                # b_funding, b_oi = await asyncio.gather(
-                #     loop.run_in_executor(None, self.client.get_funding_rate_with_cache, symbol),
-                #     loop.run_in_executor(None, self.client.get_open_interest, symbol)
-                # )
-                b_funding = await self.client.get_funding_rate_with_cache(symbol) # Run non-concurrently or just wait
-                b_oi = {} # Mock empty OI
+                fetched, latencies = await self._fan_out_fetch(symbol_key, symbol, limit, include_klines=False)
+                q_data = fetched['quant']
+                b_funding = fetched['funding']
+                b_oi = {}  # Mock empty OI
 
         if not ws_enabled or not self._initial_load_complete.get(symbol_key) or use_rest_fallback:
-            # Get event loop for concurrent operations
-            loop = asyncio.get_event_loop()
-            
-            # Fetch with incremental caching
-            k5m = await self._fetch_with_cache(symbol_key, '5m', limit)
-            k15m = await self._fetch_with_cache(symbol_key, '15m', limit)
-            k1h = await self._fetch_with_cache(symbol_key, '1h', limit)
-            
-            # Fetch external data concurrently
-            q_data = await quant_client.fetch_coin_data(symbol)
-            b_funding = await loop.run_in_executor(
-                None,
-                self.client.get_funding_rate_with_cache,
-                symbol
-            )
+            # Fan-out: all kline intervals + quant + funding in parallel
+            fetched, latencies = await self._fan_out_fetch(symbol_key, symbol, limit)
+            k5m, k15m, k1h = fetched['5m'], fetched['15m'], fetched['1h']
+            q_data = fetched['quant']
+            b_funding = fetched['funding']
             b_oi = {}  # Mock empty OI
             
             log.info(f"[{symbol}] Data fetched: 5m={len(k5m)}, 15m={len(k15m)}, 1h={len(k1h)}")
@@ -227,6 +233,7 @@ class DataSyncAgent:
             timestamp=datetime.now(),
             alignment_ok=self._check_alignment(k5m, k15m, k1h),
             fetch_duration=fetch_duration,
+            fetch_latencies=latencies,
             
             # 原始数据
             raw_5m=k5m,
@@ -253,6 +260,82 @@ class DataSyncAgent:
         
         return snapshot
     
+    async def _fan_out_fetch(
+        self,
+        symbol_key: str,
+        symbol: str,
+        limit: int,
+        include_klines: bool = True
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        并发获取所有数据源（K线各周期 + 量化数据 + 资金费率）
+        
+        每个请求独立超时；失败或超时的数据源使用降级结果（K线回退到本地缓存，
+        外部数据回退为空字典），不会拖垮整个快照。
+        
+        Returns:
+            (results, latencies): 按数据源名称索引的结果与耗时（秒）
+        """
+        loop = asyncio.get_running_loop()
+        requests: Dict[str, Tuple[Awaitable, float]] = {}
+        
+        if include_klines:
+            for interval in self.KLINE_INTERVALS:
+                requests[interval] = (
+                    self._fetch_with_cache(symbol_key, interval, limit),
+                    self.kline_timeout
+                )
+        requests['quant'] = (quant_client.fetch_coin_data(symbol), self.external_timeout)
+        requests['funding'] = (
+            loop.run_in_executor(None, self.client.get_funding_rate_with_cache, symbol),
+            self.external_timeout
+        )
+        
+        outcomes = await asyncio.gather(*[
+            self._timed_fetch(name, awaitable, timeout)
+            for name, (awaitable, timeout) in requests.items()
+        ])
+        
+        results: Dict[str, Any] = {}
+        latencies: Dict[str, float] = {}
+        for name, result, elapsed, error in outcomes:
+            latencies[name] = elapsed
+            if error is None:
+                results[name] = result
+                continue
+            
+            if name in self.KLINE_INTERVALS:
+                log.warning(f"[{symbol}] {name} K线获取失败，回退到本地缓存: {error}")
+                results[name] = self._cached_klines(symbol_key, name, limit)
+            else:
+                log.warning(f"[{symbol}] {name} 数据获取失败，使用空结果: {error}")
+                results[name] = {}
+        
+        return results, latencies
+    
+    @staticmethod
+    async def _timed_fetch(
+        name: str,
+        awaitable: Awaitable,
+        timeout: float
+    ) -> Tuple[str, Any, float, Optional[str]]:
+        """执行单个请求并记录耗时，超时/异常以 error 字段返回而不是抛出"""
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=timeout)
+            return name, result, time.perf_counter() - started, None
+        except asyncio.TimeoutError:
+            return name, None, time.perf_counter() - started, f"timeout after {timeout:.1f}s"
+        except Exception as e:
+            return name, None, time.perf_counter() - started, str(e)
+    
+    def _cached_klines(self, symbol: str, interval: str, limit: int) -> List[Dict]:
+        """从本地缓存读取K线作为降级结果"""
+        cached_df = self._kline_cache.get_cached_data(symbol, interval, limit=limit)
+        if cached_df is None or cached_df.empty:
+            return []
+        return cached_df.tail(limit).to_dict('records')
+    
     async def _fetch_with_cache(self, symbol: str, interval: str, limit: int) -> List[Dict]:
         """
         Fetch K-line data with incremental caching
@@ -272,8 +355,9 @@ class DataSyncAgent:
         loop = asyncio.get_event_loop()
         
         # Check cache
+        # 热层命中时不触盘
         last_ts = self._kline_cache.get_last_timestamp(symbol, interval)
-        cached_df = self._kline_cache.get_cached_data(symbol, interval)
+        cached_df = self._kline_cache.get_cached_data(symbol, interval, limit=limit)
         
         if cached_df is not None and len(cached_df) >= limit and last_ts:
             # Cache sufficient - fetch only new data
@@ -298,7 +382,7 @@ class DataSyncAgent:
                 log.debug(f"📦 Cache hit: {symbol}/{interval} | +{len(new_klines)} new")
             
             # Return from updated cache
-            final_df = self._kline_cache.get_cached_data(symbol, interval)
+            final_df = self._kline_cache.get_cached_data(symbol, interval, limit=limit)
             if final_df is not None and not final_df.empty:
                 # Convert back to list of dicts for compatibility
                 return final_df.tail(limit).to_dict('records')
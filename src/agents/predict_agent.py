@@ -13,7 +13,7 @@ Date: 2025-12-21
 """
 
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterable, List, Optional, Any, Sequence, Set, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 import numpy as np
@@ -132,9 +132,9 @@ class PredictAgent:
         import os
         if os.path.exists(self.model_path):
             try:
-                from src.models.prophet_model import ProphetMLModel, HAS_LIGHTGBM
+                from src.models.prophet_model import HAS_LIGHTGBM, get_shared_model
                 if HAS_LIGHTGBM:
-                    self.ml_model = ProphetMLModel(self.model_path)
+                    self.ml_model = get_shared_model(self.model_path)
                     log.info(f"✅ ML 模型已加载: {self.model_path}")
                 else:
                     log.warning("LightGBM not installed, using Rule-based scoring mode")
@@ -151,21 +151,53 @@ class PredictAgent:
         Returns:
             PredictResult 对象
         """
-        # 预处理特征
-        clean_features = self._preprocess_features(features)
+        return (await self.predict_batch([(self, features)]))[0]
+    
+    @staticmethod
+    async def predict_batch(requests: Sequence[Tuple['PredictAgent', Dict[str, float]]]) -> List[PredictResult]:
+        """
+        批量预测（多个 symbol / horizon）
         
-        # 选择预测Mode
-        if self.ml_model is not None:
-            result = await self._predict_with_ml(clean_features)
-        else:
-            result = await self._predict_with_rules(clean_features)
+        使用同一个模型实例的请求合并为一个 (n, n_features) 数组，只调用一次模型；
+        结果按请求顺序拆回各自的 PredictResult 并记入各 Agent 的历史。
+        
+        Args:
+            requests: [(agent, features), ...]
+        
+        Returns:
+            与 requests 顺序一致的 PredictResult 列表
+        """
+        results: List[Optional[PredictResult]] = [None] * len(requests)
+        groups: Dict[int, List[int]] = {}
+        for i, (agent, features) in enumerate(requests):
+            if agent.ml_model is not None:
+                groups.setdefault(id(agent.ml_model), []).append(i)
+            else:
+                results[i] = await agent._predict_with_rules(agent._preprocess_features(features))
         
-        # 记录历史
+        for indices in groups.values():
+            model = requests[indices[0]][0].ml_model
+            try:
+                X = np.vstack([requests[i][0]._feature_vector(requests[i][1]) for i in indices])
+                probs = model.predict_up_proba(X)
+            except Exception as e:
+                log.warning(f"ML 预测失败: {e}，falling back toRule-based scoring")
+                for i in indices:
+                    agent, features = requests[i]
+                    results[i] = await agent._predict_with_rules(agent._preprocess_features(features))
+                continue
+            for i, prob_up in zip(indices, probs):
+                results[i] = requests[i][0]._ml_result(float(prob_up))
+        
+        for (agent, _), result in zip(requests, results):
+            agent._record(result)
+        return results
+    
+    def _record(self, result: PredictResult):
+        """记录历史"""
         self.history.append(result)
         if len(self.history) > 1000:
             self.history = self.history[-1000:]
-        
-        return result
     
     def _preprocess_features(self, features: Dict[str, float]) -> Dict[str, float]:
         """
@@ -191,6 +223,33 @@ class PredictAgent:
         
         return clean
     
+    def _feature_vector(self, features: Dict[str, float]) -> np.ndarray:
+        """
+        按模型 feature_names 顺序组成 (1, n) 特征向量
+        
+        逐项与 _preprocess_features + ProphetMLModel._prepare_features 的处理一致：
+        缺失 -> 0，NaN -> 特征默认值，inf -> ±100。
+        """
+        names = self.ml_model.feature_names or self.ml_model.REQUIRED_FEATURES
+        vector = np.zeros((1, len(names)))
+        row = vector[0]
+        for i, name in enumerate(names):
+            value = features.get(name)
+            if value is None:
+                if name in features:
+                    row[i] = self._get_default_value(name)
+                continue
+            if not isinstance(value, (int, float, np.number)):
+                continue
+            value = float(value)
+            if value != value:
+                row[i] = self._get_default_value(name)
+            elif value in (np.inf, -np.inf):
+                row[i] = 100.0 if value > 0 else -100.0
+            else:
+                row[i] = value
+        return vector
+    
     def _get_default_value(self, feature_name: str) -> float:
         """获取特征的默认值"""
         defaults = {
@@ -339,48 +398,46 @@ class PredictAgent:
         使用 ML 模型预测
         
         Args:
-            features: 预处理后的特征字典
+            features: 原始特征字典（未预处理）
         
         Returns:
             PredictResult 对象
         """
         try:
-            # 使用 ML 模型预测概率
-            prob_up = self.ml_model.predict_proba(features)
-            prob_down = 1.0 - prob_up
-            
-            # 获取特征重要性作为因子
-            importance = self.ml_model.get_feature_importance()
-            # 取 Top 5 重要特征
-            top_factors = dict(sorted(
-                importance.items(), 
-                key=lambda x: abs(x[1]), 
-                reverse=True
-            )[:5])
-            
-            # 根据概率偏离程度计算基础置信度
-            base_confidence = abs(prob_up - 0.5) * 2  # 0.0 - 1.0
-            
-            # 使用验证集 AUC 分数进行缩放
-            # AUC 0.5 -> 0.0 impact (Random)
-            # AUC 1.0 -> 1.0 impact (Perfect)
-            val_auc = self.ml_model.val_auc
-            auc_factor = max(0.0, (val_auc - 0.5) * 2)
-            
-            # 最终置信度 = 基础置信度 * 模型质量因子
-            final_confidence = base_confidence * auc_factor
-            
-            return PredictResult(
-                probability_up=round(prob_up, 4),
-                probability_down=round(prob_down, 4),
-                confidence=round(min(final_confidence, 1.0), 4),
-                horizon=self.horizon,
-                factors=top_factors,
-                model_type='ml_lightgbm'
-            )
+            # 特征向量直接送入 LightGBM（不构建单行 DataFrame）
+            prob_up = float(self.ml_model.predict_up_proba(self._feature_vector(features))[0])
+            return self._ml_result(prob_up)
         except Exception as e:
             log.warning(f"ML 预测失败: {e}，falling back toRule-based scoring")
-            return await self._predict_with_rules(features)
+            return await self._predict_with_rules(self._preprocess_features(features))
+    
+    def _ml_result(self, prob_up: float) -> PredictResult:
+        """由模型输出的上涨概率构建 PredictResult"""
+        prob_down = 1.0 - prob_up
+        
+        # 取 Top 5 重要特征作为因子（按模型缓存）
+        top_factors = dict(self.ml_model.get_top_factors(5))
+        
+        # 根据概率偏离程度计算基础置信度
+        base_confidence = abs(prob_up - 0.5) * 2  # 0.0 - 1.0
+        
+        # 使用验证集 AUC 分数进行缩放
+        # AUC 0.5 -> 0.0 impact (Random)
+        # AUC 1.0 -> 1.0 impact (Perfect)
+        val_auc = self.ml_model.val_auc
+        auc_factor = max(0.0, (val_auc - 0.5) * 2)
+        
+        # 最终置信度 = 基础置信度 * 模型质量因子
+        final_confidence = base_confidence * auc_factor
+        
+        return PredictResult(
+            probability_up=round(prob_up, 4),
+            probability_down=round(prob_down, 4),
+            confidence=round(min(final_confidence, 1.0), 4),
+            horizon=self.horizon,
+            factors=top_factors,
+            model_type='ml_lightgbm'
+        )
     
     def load_ml_model(self, model_path: str):
         """
@@ -389,9 +446,9 @@ class PredictAgent:
         Args:
             model_path: 模型文件路径
         """
-        from src.models.prophet_model import ProphetMLModel, HAS_LIGHTGBM
+        from src.models.prophet_model import HAS_LIGHTGBM, get_shared_model
         if HAS_LIGHTGBM:
-            self.ml_model = ProphetMLModel(model_path)
+            self.ml_model = get_shared_model(model_path)
             self.model_path = model_path
             log.info(f"✅ ML 模型已加载: {model_path}")
         else:
@@ -420,6 +477,98 @@ class PredictAgent:
         }
 
 
+class PredictBatcher:
+    """
+    预测请求合批器
+    
+    各 symbol 的分析协程并发调用 predict()；在 max_delay 时间窗内到达的请求
+    合并为一次 PredictAgent.predict_batch（同一模型只推理一次），再把结果分发回各调用方。
+    
+    只有多个 Agent 共享同一个模型文件（同一个 ProphetMLModel 实例）时合批才有收益；
+    默认每个 symbol 各有 models/prophet_lgb_{symbol}.pkl，此时请求不等待，直接推理。
+    """
+    
+    def __init__(
+        self,
+        max_delay: float = 0.005,
+        max_batch: int = 64,
+        peers: Optional[Callable[[], Iterable[PredictAgent]]] = None
+    ):
+        """
+        Args:
+            max_delay: 等待更多请求加入批次的最长时间（秒）
+            max_batch: 批次上限，达到后立即推理
+            peers: 返回当前全部 PredictAgent；给定时只有与其他 Agent 共享模型的请求才进入合批窗口
+        """
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._peers = peers
+        self._pending: List[Tuple[PredictAgent, Dict[str, float], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 进行中的批次任务（持有强引用，避免被 GC；完成回调里检查异常）
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+    
+    def _can_merge(self, agent: PredictAgent) -> bool:
+        """请求能否与其他 symbol 合并推理（规则模式或模型未被共享时不能）"""
+        model = getattr(agent, 'ml_model', None)
+        if model is None:
+            return False
+        if self._peers is None:
+            return True
+        return any(other is not agent and other.ml_model is model for other in self._peers())
+    
+    async def predict(self, agent: PredictAgent, features: Dict[str, float]) -> PredictResult:
+        """提交一个预测请求，等待所在批次完成；无法合批的请求直接推理，不等待 max_delay"""
+        if not self._can_merge(agent):
+            return await agent.predict(features)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((agent, features, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(lambda done: self._on_done(done, batch))
+    
+    def _on_done(self, task: asyncio.Task, batch):
+        """批次任务结束：被取消或意外失败时，未完成的调用方不会一直挂起"""
+        self._tasks.discard(task)
+        if task.cancelled():
+            for _, _, future in batch:
+                future.cancel()
+            return
+        error = task.exception()
+        if error is not None:
+            log.error(f"❌ Predict batch failed: {error}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+    
+    async def _run(self, batch):
+        try:
+            results = await PredictAgent.predict_batch([(agent, features) for agent, features, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
 # ============================================
 # 测试函数
 # ============================================
@@ -139,13 +139,13 @@ class ReflectionAgentLLM:
             log.info(f"🧠 Generating reflection for {len(trades)} trades...")
             
             # Call LLM
-            response = await self.llm_client.chat(
+            response = await self.llm_client.async_chat(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt
             )
             
             # Parse response
-            result = self._parse_response(response, len(trades))
+            result = self._parse_response(response.content, len(trades))
             
             if result:
                 self.reflection_count += 1
@@ -20,15 +20,70 @@ Updated: 2026-01-10 (Two-stage selection)
 
 import asyncio
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import threading
 import time
 
 from src.utils.logger import log
 from src.config import config
 from src.backtest.engine import BacktestEngine, BacktestConfig
+from src.backtest.data_replay import DataReplayAgent, DataCache
+
+
+def _run_backtest_job(job: Dict) -> Optional[Dict]:
+    """
+    单个候选币种的技术面回测（进程池 worker 入口，也用于顺序路径）
+
+    使用父进程预加载的 DataCache，worker 内不再请求 API。
+    设置 early_stop_drawdown_pct 时，回撤超过阈值即提前终止该候选。
+    """
+    symbol = job['symbol']
+    try:
+        backtest_config = BacktestConfig(
+            symbol=symbol,
+            start_date=job['start_date'],
+            end_date=job['end_date'],
+            initial_capital=10000.0,
+            strategy_mode="technical",  # Use simple mode for speed
+            use_llm=False,
+            step=job['step']
+        )
+        engine = BacktestEngine(backtest_config, data_cache=job.get('data_cache'))
+
+        early_stop = {'stopped': False}
+        progress_callback = None
+        cutoff = job.get('early_stop_drawdown_pct')
+        if cutoff:
+            def progress_callback(data: Dict):
+                if data['latest_equity_point']['drawdown_pct'] >= cutoff and not early_stop['stopped']:
+                    early_stop['stopped'] = True
+                    engine.stop()
+
+        result = asyncio.run(engine.run(progress_callback=progress_callback))
+
+        # BacktestResult has .metrics attribute with MetricsResult
+        metrics = result.metrics
+        output = {
+            "symbol": symbol,
+            "total_return": metrics.total_return,
+            "sharpe_ratio": metrics.sharpe_ratio,
+            "win_rate": metrics.win_rate,
+            "max_drawdown": metrics.max_drawdown_pct,
+            "trades": metrics.total_trades,
+            "profit_factor": metrics.profit_factor
+        }
+        if early_stop['stopped']:
+            output["early_stopped"] = True
+        return output
+
+    except Exception as e:
+        log.error(f"Backtest error for {symbol}: {e}")
+        return None
 
 
 def calculate_adx(klines: List[Dict], period: int = 14) -> float:
@@ -144,6 +199,7 @@ class SymbolSelectorAgent:
     DEFAULT_MIN_QUOTE_VOL = 5_000_000  # 24h USDT quote volume
     DEFAULT_MIN_PRICE = 0.05  # Minimum last price to avoid ultra-low price coins
     DEFAULT_MIN_QUOTE_VOL_PER_USDT = 3000  # Dynamic volume floor per 1 USDT equity
+    DEFAULT_BACKTEST_WORKERS = min(4, os.cpu_count() or 1)  # AUTO3 回测进程数 (1 = 顺序执行)
 
     def __init__(
         self,
@@ -182,6 +238,10 @@ class SymbolSelectorAgent:
             config.get('trading.selector_min_quote_volume_per_usdt', self.DEFAULT_MIN_QUOTE_VOL_PER_USDT)
         )
         self.account_equity = None
+        self.backtest_workers = max(1, int(config.get('trading.selector_backtest_workers', self.DEFAULT_BACKTEST_WORKERS)))
+        # 回撤超过该百分比的候选提前终止（None = 关闭，排名与完整回测一致）
+        early_stop = config.get('trading.selector_early_stop_drawdown_pct', None)
+        self.early_stop_drawdown_pct = float(early_stop) if early_stop else None
 
         log.info(
             f"🔝 SymbolSelectorAgent initialized: AUTO3 backtest ({refresh_interval_hours}h refresh) + AUTO1 momentum"
@@ -430,11 +490,17 @@ class SymbolSelectorAgent:
             candidates = await self._get_expanded_candidates(account_equity=account_equity)
             log.info(f"📊 Candidates ({len(candidates)}): {candidates}")
             
+            # Both stages replay the same window, so klines are loaded once per symbol
+            window = self._backtest_window()
+            preloaded: Dict[str, DataCache] = {}
+            
             # Run 1h backtests (step=12, faster)
             stage1_results = await self._run_backtests_stage(
                 symbols=candidates,
                 step=12,  # 1-hour intervals
-                stage_name="Stage 1"
+                stage_name="Stage 1",
+                window=window,
+                preloaded=preloaded
             )
             
             # Rank and get Top 5
@@ -454,7 +520,9 @@ class SymbolSelectorAgent:
             stage2_results = await self._run_backtests_stage(
                 symbols=top5_symbols,
                 step=3,  # 15-minute intervals
-                stage_name="Stage 2"
+                stage_name="Stage 2",
+                window=window,
+                preloaded=preloaded
             )
             
             # Rank and get Top 3
@@ -533,28 +601,99 @@ class SymbolSelectorAgent:
             # Fallback: first 10 AI500
             return self.ai500_candidates[:10]
     
+    def _backtest_window(self) -> Tuple[str, str]:
+        """回测窗口 (start_date, end_date)，格式同 BacktestConfig"""
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=self.lookback_hours)
+        return start_time.strftime('%Y-%m-%d %H:%M'), end_time.strftime('%Y-%m-%d %H:%M')
+    
+    async def _preload_data(
+        self,
+        symbols: List[str],
+        window: Tuple[str, str],
+        preloaded: Dict[str, Optional[DataCache]]
+    ) -> None:
+        """
+        在父进程中为每个币种加载一次历史 K 线，结果写入 preloaded
+        
+        加载失败的币种记为 None，不会再派发回测任务。
+        """
+        for symbol in symbols:
+            if symbol in preloaded:
+                continue
+            replay = DataReplayAgent(symbol=symbol, start_date=window[0], end_date=window[1])
+            try:
+                ok = await replay.load_data()
+            except Exception as e:
+                log.warning(f"   ⚠️ {symbol} data load failed: {e}")
+                ok = False
+            preloaded[symbol] = replay.data_cache if ok else None
+    
     async def _run_backtests_stage(
         self,
         symbols: List[str],
         step: int,
-        stage_name: str
+        stage_name: str,
+        window: Optional[Tuple[str, str]] = None,
+        preloaded: Optional[Dict[str, Optional[DataCache]]] = None
     ) -> List[Dict]:
-        """Run backtests for a specific stage"""
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=self.lookback_hours)
+        """
+        Run backtests for a specific stage
         
-        valid_results = []
-        total = len(symbols)
+        backtest_workers > 1 时在进程池中并行回测（技术面回测是 CPU 密集的 pandas 计算），
+        否则在线程中顺序执行。两条路径使用相同的预加载数据，结果顺序与 symbols 一致，
+        因此排名完全相同。
+        """
+        window = window or self._backtest_window()
+        preloaded = preloaded if preloaded is not None else {}
+        await self._preload_data(symbols, window, preloaded)
+        
+        jobs = []
+        for symbol in symbols:
+            if preloaded.get(symbol) is None:
+                log.warning(f"   ⚠️ {symbol} skipped: no historical data")
+                continue
+            jobs.append({
+                "symbol": symbol,
+                "start_date": window[0],
+                "end_date": window[1],
+                "step": step,
+                "data_cache": preloaded[symbol],
+                "early_stop_drawdown_pct": self.early_stop_drawdown_pct,
+            })
+        
+        workers = min(self.backtest_workers, len(jobs))
+        log.info(f"🔄 [{stage_name}] Backtesting {len(jobs)} symbols ({workers} worker(s))")
         
-        for i, symbol in enumerate(symbols):
-            log.info(f"🔄 [{stage_name}] [{i+1}/{total}] Backtesting {symbol}...")
+        loop = asyncio.get_running_loop()
+        if workers <= 1:
+            results = []
+            for i, job in enumerate(jobs):
+                log.info(f"🔄 [{stage_name}] [{i+1}/{len(jobs)}] Backtesting {job['symbol']}...")
+                results.append(await loop.run_in_executor(None, _run_backtest_job, job))
+        else:
+            # spawn: 选币刷新运行在后台线程中，fork 带锁的进程不安全
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
             try:
-                result = await self._backtest_symbol(symbol, start_time, end_time, step)
-                if result:
-                    valid_results.append(result)
-                    log.info(f"   ✅ {symbol}: Return {result['total_return']:+.2f}%, Trades {result['trades']}")
-            except Exception as e:
-                log.warning(f"   ⚠️ {symbol} failed: {e}")
+                results = await asyncio.gather(
+                    *[loop.run_in_executor(pool, _run_backtest_job, job) for job in jobs]
+                )
+            finally:
+                # 阶段被取消时丢弃尚未开始的任务
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        valid_results = []
+        for job, result in zip(jobs, results):
+            symbol = job["symbol"]
+            if not result:
+                log.warning(f"   ⚠️ {symbol} failed")
+                continue
+            valid_results.append(result)
+            suffix = " (early stopped)" if result.get("early_stopped") else ""
+            log.info(f"   ✅ {symbol}: Return {result['total_return']:+.2f}%, Trades {result['trades']}{suffix}")
         
         return valid_results
     
@@ -566,38 +705,9 @@ class SymbolSelectorAgent:
         step: int = 12
     ) -> Optional[Dict]:
         """Run backtest for a single symbol using thread executor"""
-        try:
-            config = BacktestConfig(
-                symbol=symbol,
-                start_date=start_time.strftime('%Y-%m-%d %H:%M'),
-                end_date=end_time.strftime('%Y-%m-%d %H:%M'),
-                initial_capital=10000.0,
-                strategy_mode="technical",  # Use simple mode for speed
-                use_llm=False,
-                step=step
-            )
-            
-            # Run sync backtest in thread executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            engine = BacktestEngine(config)
-            result = await loop.run_in_executor(None, lambda: asyncio.run(engine.run(progress_callback=None)))
-            
-            # BacktestResult has .metrics attribute with MetricsResult
-            metrics = result.metrics
-            
-            return {
-                "symbol": symbol,
-                "total_return": metrics.total_return,
-                "sharpe_ratio": metrics.sharpe_ratio,
-                "win_rate": metrics.win_rate,
-                "max_drawdown": metrics.max_drawdown_pct,
-                "trades": metrics.total_trades,
-                "profit_factor": metrics.profit_factor
-            }
-            
-        except Exception as e:
-            log.error(f"Backtest error for {symbol}: {e}")
-            return None
+        window = (start_time.strftime('%Y-%m-%d %H:%M'), end_time.strftime('%Y-%m-%d %H:%M'))
+        results = await self._run_backtests_stage([symbol], step, symbol, window=window)
+        return results[0] if results else None
     
     def _rank_symbols(self, results: List[Dict]) -> List[Dict]:
         """
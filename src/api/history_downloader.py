@@ -0,0 +1,398 @@
+"""
+📥 并发历史数据下载器 (History Downloader)
+==========================================
+
+Binance 合约历史 K 线 / 资金费率的共享下载器：
+- 把时间区间切成互不重叠的窗口（每个窗口正好一页），并发请求
+- 按请求权重限速（X-MBX-USED-WEIGHT-1M 同步服务端用量，429/418 按 Retry-After 全局暂停）
+- 页面按窗口顺序一次性拼接，不做 `klines + all_klines` 式的重复拷贝
+- 传入 KlineStore 时只下载缺口，每个窗口完成即落盘；中断后再次调用从仓库断点续传
+
+DataReplayAgent（回测）和 ProphetAutoTrainer（模型训练）共用同一个进程级限速器。
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from src.config import config
+from src.utils.logger import log
+
+MAINNET_URL = "https://fapi.binance.com"
+TESTNET_URL = "https://testnet.binancefuture.com"
+
+KLINES_PATH = "/fapi/v1/klines"
+FUNDING_RATE_PATH = "/fapi/v1/fundingRate"
+
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
+    'taker_buy_quote', 'ignore'
+]
+
+# 服务端返回的限速 / 封禁状态码
+RATE_LIMIT_STATUS_CODES = (418, 429)
+RETRYABLE_STATUS_CODES = (500, 502, 503, 504)
+
+# Retry-After 超过该值（通常是 418 IP 封禁）时不再等待，直接失败
+MAX_RETRY_AFTER_SECONDS = 300.0
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000,
+}
+
+
+class KlineDownloadError(RuntimeError):
+    """部分 K 线窗口重试后仍失败：区间不完整（已成功的窗口已落盘，再次下载只补失败的窗口）"""
+
+    def __init__(self, symbol: str, interval: str, windows: List[Tuple[int, int]], total: int):
+        super().__init__(f"{len(windows)}/{total} K-line windows failed for {symbol}/{interval}: {windows}")
+        self.symbol = symbol
+        self.interval = interval
+        self.windows = windows
+
+
+def kline_request_weight(limit: int) -> int:
+    """GET /fapi/v1/klines 的请求权重（按 limit 分档）"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def klines_to_dataframe(klines: List[list]) -> pd.DataFrame:
+    """原始 K 线行 -> DataFrame（DatetimeIndex 'timestamp'，与 KlineStore.read_range 同列）"""
+    if not klines:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+
+    for col in ['open', 'high', 'low', 'close', 'volume', 'quote_volume']:
+        df[col] = df[col].astype(float)
+    df['trades'] = df['trades'].astype(int)
+
+    return df[['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']]
+
+
+class WeightRateLimiter:
+    """
+    滑动 1 分钟窗口的请求权重限速器
+
+    线程安全、与事件循环无关：回测和后台训练线程可以共享同一个实例。
+    """
+
+    def __init__(self, max_weight_per_minute: int = 1200, window_seconds: float = 60.0):
+        self.max_weight = max_weight_per_minute
+        self.window = window_seconds
+        self._spent: deque = deque()  # (时间, 权重)
+        self._used = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._spent and now - self._spent[0][0] >= self.window:
+            self._used -= self._spent.popleft()[1]
+
+    def _reserve(self, weight: int) -> float:
+        """尝试占用权重；成功返回 0，否则返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._expire(now)
+            if self._used + weight <= self.max_weight or not self._spent:
+                self._spent.append((now, weight))
+                self._used += weight
+                return 0.0
+            return max(self._spent[0][0] + self.window - now, 0.001)
+
+    async def acquire(self, weight: int = 1):
+        """等待直到本次请求的权重可用"""
+        while True:
+            wait = self._reserve(weight)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def observe_used_weight(self, used: int):
+        """用服务端返回的已用权重校准（其他进程 / 客户端也在消耗同一 IP 配额）"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if used > self._used:
+                self._spent.append((now, used - self._used))
+                self._used = used
+
+    def pause(self, seconds: float):
+        """收到 429/418 后全局暂停"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @property
+    def used_weight(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._used
+
+
+class HistoryDownloader:
+    """
+    并发、限速感知的 Binance 合约历史数据下载器
+    """
+
+    KLINE_LIMIT = 1000
+    FUNDING_LIMIT = 1000
+    FUNDING_WEIGHT = 1
+    # 资金费率最短 1 小时结算一次：按 1 小时切窗口保证每个窗口一页取完
+    FUNDING_WINDOW_MS = FUNDING_LIMIT * 3_600_000
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        testnet: Optional[bool] = None,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[WeightRateLimiter] = None,
+        max_retries: int = 5,
+        timeout: float = 10.0
+    ):
+        """
+        Args:
+            base_url: REST 地址；未指定时按 testnet 选择主网 / 测试网
+            testnet: 是否测试网（None 时读取 config.binance.testnet）
+            max_concurrency: 同时进行的请求数
+            rate_limiter: 权重限速器（默认进程级共享实例）
+            max_retries: 网络错误 / 5xx / 限速的最大重试次数
+            timeout: 单个请求超时（秒）
+        """
+        if base_url is None:
+            if testnet is None:
+                testnet = config.binance.get('testnet', True)
+            base_url = TESTNET_URL if testnet else MAINNET_URL
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+    # ========== 请求 ==========
+
+    def _client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        return httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits)
+
+    async def _get(self, client: httpx.AsyncClient, path: str, params: Dict[str, Any], weight: int) -> Any:
+        """限速 GET；429/418 按 Retry-After 全局暂停后重试，网络错误 / 5xx 指数退避"""
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(weight)
+            try:
+                response = await client.get(path, params=params)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(0.5 * 2 ** attempt, 10.0)
+                log.warning(f"⚠️ History request error ({e.__class__.__name__}), retry in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+            if used is not None and used.isdigit():
+                self.rate_limiter.observe_used_weight(int(used))
+
+            if response.status_code in RATE_LIMIT_STATUS_CODES:
+                retry_after = float(response.headers.get('Retry-After') or 1.0)
+                if attempt >= self.max_retries or retry_after > MAX_RETRY_AFTER_SECONDS:
+                    response.raise_for_status()
+                log.warning(f"⏳ Rate limited ({response.status_code}), pausing downloads for {retry_after:.1f}s")
+                self.rate_limiter.pause(retry_after)
+                continue
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                await asyncio.sleep(min(0.5 * 2 ** attempt, 10.0))
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+        raise RuntimeError(f"History request failed after {self.max_retries} retries: {path}")
+
+    async def _fetch_window(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        params: Dict[str, Any],
+        start_ms: int,
+        end_ms: int,
+        limit: int,
+        weight: int,
+        time_of,
+        step: int = 1
+    ) -> List:
+        """窗口内正向分页（正常情况下一页即取完；下一页从最后一条时间 + step 开始）"""
+        rows: List = []
+        current = start_ms
+        while current <= end_ms:
+            page = await self._get(client, path, {**params, 'startTime': current, 'endTime': end_ms, 'limit': limit}, weight)
+            if not page:
+                break
+            rows.extend(page)
+            if len(page) < limit:
+                break
+            current = time_of(page[-1]) + step
+        return rows
+
+    @staticmethod
+    def split_windows(start_ms: int, end_ms: int, span_ms: int) -> List[Tuple[int, int]]:
+        """把 [start_ms, end_ms] 切成互不重叠的闭区间窗口"""
+        starts = np.arange(start_ms, end_ms + 1, span_ms, dtype=np.int64)
+        return [(int(s), int(min(s + span_ms - 1, end_ms))) for s in starts]
+
+    # ========== K 线 ==========
+
+    def _kline_windows(self, interval: str, ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        step = INTERVAL_MS[interval]
+        windows = []
+        for start_ms, end_ms in ranges:
+            first = -(-start_ms // step) * step
+            windows.extend(self.split_windows(first, end_ms, self.KLINE_LIMIT * step))
+        return windows
+
+    async def _fetch_kline_windows(
+        self,
+        symbol: str,
+        interval: str,
+        windows: List[Tuple[int, int]],
+        on_window=None
+    ) -> List[Optional[List[list]]]:
+        """并发获取各窗口；返回按窗口顺序排列的结果（失败的窗口为 None）"""
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        weight = kline_request_weight(self.KLINE_LIMIT)
+        params = {'symbol': symbol.upper(), 'interval': interval}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._client() as client:
+            async def run(window: Tuple[int, int]) -> List[list]:
+                async with semaphore:
+                    rows = await self._fetch_window(
+                        client, KLINES_PATH, params, window[0], window[1],
+                        self.KLINE_LIMIT, weight, lambda k: int(k[0]), INTERVAL_MS[interval]
+                    )
+                if on_window is not None:
+                    on_window(window, rows)
+                return rows
+
+            results = await asyncio.gather(*(run(w) for w in windows), return_exceptions=True)
+
+        pages: List[Optional[List[list]]] = []
+        for window, result in zip(windows, results):
+            if isinstance(result, BaseException):
+                log.warning(f"⚠️ K-line window failed {symbol}/{interval} {window}: {result}")
+                pages.append(None)
+            else:
+                pages.append(result)
+        return pages
+
+    async def fetch_klines(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[list]:
+        """
+        获取 [start_ms, end_ms] 内的原始 K 线行（按开盘时间升序）
+
+        任一窗口失败时抛出异常，避免返回中间缺一段的数据。
+        """
+        windows = self._kline_windows(interval, [(start_ms, end_ms)])
+        pages = await self._fetch_kline_windows(symbol, interval, windows)
+        failed = [window for window, page in zip(windows, pages) if page is None]
+        if failed:
+            raise KlineDownloadError(symbol, interval, failed, len(windows))
+        return [row for page in pages for row in page]
+
+    async def download_klines(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: int,
+        end_ms: int,
+        store=None
+    ) -> pd.DataFrame:
+        """
+        下载 [start_ms, end_ms] 的 K 线并返回 DataFrame
+
+        传入 store (KlineStore) 时只请求仓库缺口，每个窗口完成即写入仓库：
+        中断或部分窗口失败后再次调用，只会补下载尚未落盘的窗口。
+
+        Raises:
+            KlineDownloadError: 有窗口重试后仍失败（成功的窗口已写入仓库，失败的仍是缺口）
+        """
+        if store is None:
+            return klines_to_dataframe(await self.fetch_klines(symbol, interval, start_ms, end_ms))
+
+        gaps = store.find_gaps(symbol, interval, start_ms, end_ms)
+        if not gaps:
+            log.info(f"🗄️ Store hit: {symbol}/{interval} | range fully covered")
+            return store.read_range(symbol, interval, start_ms, end_ms)
+
+        windows = self._kline_windows(interval, gaps)
+        log.info(f"📥 Downloading {symbol}/{interval} | {len(gaps)} gap(s), {len(windows)} window(s)")
+
+        def persist(window: Tuple[int, int], rows: List[list]):
+            if rows:
+                store.write(symbol, interval, klines_to_dataframe(rows))
+            store.mark_fetched(symbol, interval, window[0], window[1])
+
+        t0 = time.perf_counter()
+        pages = await self._fetch_kline_windows(symbol, interval, windows, on_window=persist)
+        failed = [window for window, page in zip(windows, pages) if page is None]
+        log.info(f"📥 {symbol}/{interval}: {len(windows) - len(failed)}/{len(windows)} windows in "
+                 f"{time.perf_counter() - t0:.1f}s")
+        if failed:
+            raise KlineDownloadError(symbol, interval, failed, len(windows))
+        return store.read_range(symbol, interval, start_ms, end_ms)
+
+    def download_klines_sync(self, *args, **kwargs) -> pd.DataFrame:
+        """同步版本，供后台线程（无事件循环）调用"""
+        return asyncio.run(self.download_klines(*args, **kwargs))
+
+    # ========== 资金费率 ==========
+
+    async def fetch_funding_rates(self, symbol: str, start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        """获取 [start_ms, end_ms] 内的资金费率记录（按 fundingTime 升序）"""
+        windows = self.split_windows(start_ms, end_ms, self.FUNDING_WINDOW_MS)
+        params = {'symbol': symbol.upper()}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._client() as client:
+            async def run(window: Tuple[int, int]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await self._fetch_window(
+                        client, FUNDING_RATE_PATH, params, window[0], window[1],
+                        self.FUNDING_LIMIT, self.FUNDING_WEIGHT, lambda r: int(r['fundingTime'])
+                    )
+
+            pages = await asyncio.gather(*(run(w) for w in windows))
+        return [record for page in pages for record in page]
+
+
+# 进程级共享限速器（所有下载器共用同一 IP 配额）
+_rate_limiter: Optional[WeightRateLimiter] = None
+
+
+def get_rate_limiter() -> WeightRateLimiter:
+    """Get global WeightRateLimiter instance (singleton)"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = WeightRateLimiter(config.get('binance.history_weight_per_minute', 1200))
+    return _rate_limiter
@@ -20,6 +20,8 @@ from dataclasses import dataclass
 
 from src.agents.decision_core_agent import DecisionCoreAgent
 from src.strategy.composer import StrategyComposer # ✅ Shared Strategy Logic
+from src.llm.cache import LLMCacheMiss, LLMResponseCache
+from src.backtest.signal_precompute import PrecomputedQuantSignals
 from src.utils.logger import log
 
 @dataclass
@@ -202,15 +204,53 @@ class BacktestAgentRunner:
         # LLM log collection for backtest
         self.llm_logs = []  # Store LLM interaction logs
         
+        # Whole-run quant signals (set by precompute_signals)
+        self.precomputed_signals: Optional[PrecomputedQuantSignals] = None
+        
         # Initialize LLM engine if enabled
         if self.config.get('use_llm', False):
             from src.strategy.llm_engine import StrategyEngine
             self.llm_engine = StrategyEngine()
+            self._attach_llm_cache()
             log.info("🤖 BacktestAgentRunner initialized with LLM Engine enabled")
         else:
             self.llm_engine = None
             log.info("🤖 BacktestAgentRunner initialized (LLM disabled)")
 
+    def _attach_llm_cache(self):
+        """Serve repeated LLM prompts from the on-disk response cache (llm_cache / llm_cache_mode)."""
+        mode = self.config.get('llm_cache_mode', 'read_write')
+        if not self.config.get('llm_cache', True) and mode != 'replay_only':
+            return
+        
+        cache = LLMResponseCache(
+            cache_dir=self.config.get('llm_cache_dir', LLMResponseCache.DEFAULT_CACHE_DIR),
+            max_size_mb=self.config.get('llm_cache_max_mb', LLMResponseCache.DEFAULT_MAX_SIZE_MB),
+            mode=mode
+        )
+        self.llm_engine.enable_response_cache(cache)
+        if cache.replay_only and not self.llm_engine.is_ready:
+            # Provider/model are part of the cache key, so replay still needs the LLM config
+            raise RuntimeError("LLM replay_only mode requires a configured LLM provider and model")
+        log.info(f"💾 LLM response cache enabled | mode={mode} | dir={cache.cache_dir}")
+
+    def precompute_signals(self, data_cache, timestamps, lookback: int = 1000):
+        """Compute every quant signal for the replay once; step() then only looks values up."""
+        self.precomputed_signals = PrecomputedQuantSignals.build(
+            data_cache, self.quant_analyst, timestamps=timestamps, lookback=lookback
+        )
+
+    def _atr_15m(self, snapshot):
+        """15m ATR from the precomputed signals, or from the snapshot window as fallback"""
+        if self.precomputed_signals is not None:
+            ends = self.precomputed_signals.ends_for(snapshot)
+            if ends is not None:
+                return self.precomputed_signals.atr_at('15m', ends['15m'])
+        df_15m = snapshot.stable_15m
+        return self.quant_analyst.calculate_atr(
+            df_15m['high'], df_15m['low'], df_15m['close']
+        ).iloc[-1]
+
     async def step(self, snapshot, portfolio=None) -> Dict:
         """
         Process one backtest step
@@ -233,8 +273,12 @@ class BacktestAgentRunner:
                 }
             
             # 1. Calculate Signals using REAL QuantAnalystAgent
-            # Use await since analyze_all_timeframes is async
-            quant_analysis = await self.quant_analyst.analyze_all_timeframes(snapshot)
+            # (looked up from the whole-run precompute when available)
+            quant_analysis = None
+            if self.precomputed_signals is not None:
+                quant_analysis = self.precomputed_signals.analysis_at(snapshot)
+            if quant_analysis is None:
+                quant_analysis = await self.quant_analyst.analyze_all_timeframes(snapshot)
             
             # 2. Make Decision via Critic
             # We mock the PredictResult (ML disabled for speed/simplicity in backtest for now)
@@ -313,9 +357,7 @@ class BacktestAgentRunner:
             df_15m = snapshot.stable_15m
             if df_15m is not None and len(df_15m) > 20:
                 try:
-                    atr = self.quant_analyst.calculate_atr(
-                        df_15m['high'], df_15m['low'], df_15m['close']
-                    ).iloc[-1]
+                    atr = self._atr_15m(snapshot)
                     close = df_15m['close'].iloc[-1]
                     if close:
                         atr_pct = float(atr / close * 100)
@@ -354,6 +396,8 @@ class BacktestAgentRunner:
                 'position_1h': position_1h
             }
             
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             log.error(f"Backtest agent step error: {e}", exc_info=True) # Added exc_info
             return {
@@ -400,7 +444,7 @@ class BacktestAgentRunner:
         # Build context data dict
         context_data = {
             'symbol': symbol,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': snapshot.timestamp.isoformat() if getattr(snapshot, 'timestamp', None) else datetime.now().isoformat(),
             'current_price': current_price,
             'quant_analysis': quant_analysis,
             'vote_result': {
@@ -412,7 +456,7 @@ class BacktestAgentRunner:
         
         # Call LLM engine
         try:
-            llm_result_dict = self.llm_engine.make_decision(
+            llm_result_dict = await self.llm_engine.async_make_decision(
                 market_context_text=context_text,
                 market_context_data=context_data,
                 reflection=None # TODO: Add Backtest Reflection Support
@@ -451,6 +495,8 @@ class BacktestAgentRunner:
             
             log.info(f"🤖 LLM Decision: {llm_result.action} (confidence: {llm_result.confidence}%)")
             return llm_result
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             log.warning(f"LLM call failed: {e}, falling back to quant decision")
             return vote_result
@@ -15,12 +15,12 @@ from typing import Dict, List, Iterator, Optional, Tuple
 from dataclasses import dataclass, field
 import pandas as pd
 import numpy as np
-import os
 
 from src.api.binance_client import BinanceClient
+from src.api.history_downloader import HistoryDownloader
 from src.agents.data_sync_agent import MarketSnapshot
 from src.utils.logger import log
-from src.utils.kline_cache import get_kline_cache
+from src.utils.kline_store import get_kline_store
 
 
 @dataclass
@@ -43,6 +43,45 @@ class DataCache:
     funding_rates: List['FundingRateRecord'] = field(default_factory=list)  # 资金费率历史
 
 
+@dataclass
+class ReplayIndex:
+    """
+    回放位置索引
+
+    对每个回测时间点，预先用 searchsorted 计算各周期 DataFrame 中
+    "index <= timestamp" 的截止位置（exclusive），回放时直接 iloc 切片，
+    不再对全量历史做布尔掩码。
+    """
+    cache: DataCache          # 构建时对应的 DataCache，缓存替换后自动重建
+    replay_ns: np.ndarray     # 回测时间点 (int64 ns, 升序)
+    end_5m: np.ndarray
+    end_15m: np.ndarray
+    end_1h: np.ndarray
+
+
+@dataclass
+class FundingIndex:
+    """
+    资金费率索引
+
+    按时间排序后的资金费率记录及其 NumPy 数组，查询时 searchsorted 二分定位，
+    不再逐条扫描全部历史。
+    """
+    source: List['FundingRateRecord']   # 构建时对应的 data_cache.funding_rates，替换后自动重建
+    records: List['FundingRateRecord']  # 按时间排序（稳定排序，同一时刻保留原顺序）
+    ts_ns: np.ndarray                   # 记录时间 (int64 ns, 升序)
+    rates: np.ndarray
+    marks: np.ndarray
+
+
+@dataclass
+class FundingSettlement:
+    """一次资金费率结算（回测时间点与适用的费率记录）"""
+    step: int                 # 在回测时间点列表中的位置
+    timestamp: datetime
+    funding_rate: float
+    mark_price: float
+
 
 class DataReplayAgent:
     """
@@ -50,13 +89,12 @@ class DataReplayAgent:
     
     功能：
     1. 从 Binance 获取历史 K 线数据
-    2. 本地缓存（Parquet 格式）
+    2. 本地列式 K 线仓库（按月分区、内存映射读取、只回补缺口）
     3. 在指定时间点生成 MarketSnapshot
     4. 模拟实时数据流用于回测
     """
     
-    CACHE_DIR = "data/backtest/cache"  # Backtest-specific cache
-    KLINE_DIR = "data/kline"  # Shared K-line cache (prioritized)
+    LOOKBACK_DAYS = 30  # 回测开始前额外加载的历史（用于技术指标预热）
     
     def __init__(
         self,
@@ -85,7 +123,8 @@ class DataReplayAgent:
         self.start_date = self._to_utc_naive(start_dt)
         self.end_date = self._to_utc_naive(end_dt)
             
-        self.client = client or BinanceClient()
+        # 惰性创建：使用预加载数据（attach_data_cache）时不连接交易所
+        self._client = client
         
         # 数据缓存
         self.data_cache: Optional[DataCache] = None
@@ -94,23 +133,69 @@ class DataReplayAgent:
         self.current_idx = 0
         self.timestamps: List[datetime] = []
         
+        # 回放游标：随 iterate_timestamps 前进，顺序回放时 O(1) 定位
+        self._replay_index: Optional[ReplayIndex] = None
+        self._cursor = 0
+        self._cursor_step = 1
+        
+        # 资金费率索引（惰性构建）
+        self._funding_index: Optional[FundingIndex] = None
+        
         # 最新快照（模拟 DataSyncAgent.latest_snapshot）
         self.latest_snapshot: Optional[MarketSnapshot] = None
         
-        # 确保缓存目录存在
-        os.makedirs(self.CACHE_DIR, exist_ok=True)
-        
-        # Initialize shared K-line cache for incremental fetching
-        self._kline_cache = get_kline_cache()
+        # 长周期历史 K 线仓库（跨回测共享，只回补缺口）
+        self._kline_store = get_kline_store()
+        self._downloader: Optional[HistoryDownloader] = None
         
         log.info(f"📼 DataReplayAgent initialized | {symbol} | {self.start_date} to {self.end_date}")
     
+    @property
+    def client(self) -> BinanceClient:
+        """Binance 客户端（首次访问时创建）"""
+        if self._client is None:
+            self._client = BinanceClient()
+        return self._client
+    
+    @client.setter
+    def client(self, value: BinanceClient):
+        self._client = value
+    
+    @property
+    def downloader(self) -> HistoryDownloader:
+        """历史数据下载器（首次访问时创建，网络环境跟随 Binance 客户端）"""
+        if self._downloader is None:
+            self._downloader = HistoryDownloader(testnet=getattr(self._client, 'testnet', None))
+        return self._downloader
+    
+    def attach_data_cache(self, cache: DataCache) -> bool:
+        """
+        使用已加载好的历史数据（例如父进程预加载后传给回测 worker），不再请求 API
+        
+        Args:
+            cache: 覆盖本回测窗口（含指标回看期）的 DataCache
+            
+        Returns:
+            数据是否覆盖回测窗口
+        """
+        self.data_cache = DataCache(
+            symbol=self.symbol,
+            df_5m=cache.df_5m,
+            df_15m=cache.df_15m,
+            df_1h=cache.df_1h,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            funding_rates=cache.funding_rates
+        )
+        self.timestamps = [ts for ts in cache.df_5m.index.tolist() if self.start_date <= ts < self.end_date]
+        return self._cache_covers_range()
+    
     async def load_data(self) -> bool:
         """
-        加载历史数据 (使用统一的 KlineCache)
+        加载历史数据 (使用本地 KlineStore)
         
-        优先从 data/kline/{symbol}/*.parquet 读取 (共享目录)
-        只获取增量数据从 API
+        优先从 data/kline_store/{symbol}/{interval}/ 读取
+        只从 API 回补缺失的区间
         
         Returns:
             是否成功加载
@@ -223,57 +308,22 @@ class DataReplayAgent:
 
         return True
     
-    def _get_cache_path(self) -> str:
-        """生成缓存文件路径"""
-        # Use simple date string for cache key to maximize hits
-        # (Even if precise time is used, we cache the whole day range usually)
-        # But here start/end might be mid-day. 
-        # Strategy: Cache based on DATE part only to allow reuse for different times on same days.
-        start_str = self.start_date.strftime("%Y%m%d")
-        
-        # Use the DATE part of end_date (minus a microsecond to handle clean midnight?)
-        # Actually safest is to use the requested window.
-        # But if I request 16:00, and later request 00:00, different cache?
-        # Ideally cache should cover the widest range.
-        # For simplicity, just use the exact request strings converted to safe chars.
-        end_str = self.end_date.strftime("%Y%m%d")
-        
-        # Include lookback in cache path to ensure invalidation when lookback changes
-        lookback_days = 30  # Must match the value in _fetch_from_api
-        return os.path.join(
-            self.CACHE_DIR,
-            f"{self.symbol}_{start_str}_{end_str}_lb{lookback_days}.parquet"
-        )
-    
     async def _fetch_from_api(self):
-        """从 Binance API 获取历史数据"""
+        """从本地 K 线仓库加载历史数据，缺口从 Binance API 回补"""
         # CRITICAL FIX: Need historical data BEFORE backtest period for technical indicators
         # Add lookback period (default 30 days) before start_date
-        lookback_days = 30
-        extended_start = self.start_date - timedelta(days=lookback_days)
-        
-        # Calculate total days including lookback
-        total_days = (self.end_date - extended_start).days + 1
-        
-        # Calculate required candles
-        # 5m K线：每天 288 根
-        limit_5m = total_days * 288 * 2 # Safety factor
-        # 15m K线：每天 96 根
-        limit_15m = total_days * 96 * 2
-        # 1h K线：每天 24 根
-        limit_1h = total_days * 24 * 2
+        extended_start = self.start_date - timedelta(days=self.LOOKBACK_DAYS)
         
         log.info(f"📊 Fetching data from {extended_start.date()} to {self.end_date.date()}")
-        log.info(f"   Lookback: {lookback_days} days before backtest start")
-        
-        # Binance API 限制单次最多 1500 根，需要分批获取
-        # Use KlineCache for local-first fetching
-        df_5m = await self._fetch_klines_with_cache("5m", limit_5m)
-        df_15m = await self._fetch_klines_with_cache("15m", limit_15m)
-        df_1h = await self._fetch_klines_with_cache("1h", limit_1h)
-        
-        # 获取资金费率历史
-        funding_rates = await self._fetch_funding_rates()
+        log.info(f"   Lookback: {self.LOOKBACK_DAYS} days before backtest start")
+        
+        # 三个周期的 K 线与资金费率并发下载（共享同一个权重限速器）
+        df_5m, df_15m, df_1h, funding_rates = await asyncio.gather(
+            self._fetch_klines_with_cache("5m"),
+            self._fetch_klines_with_cache("15m"),
+            self._fetch_klines_with_cache("1h"),
+            self._fetch_funding_rates()
+        )
         
         # IMPORTANT: Do NOT filter out historical data before start_date here
         # We need it for technical indicator calculation
@@ -305,45 +355,19 @@ class DataReplayAgent:
             log.info(f"   First: {self.timestamps[0]}, Last: {self.timestamps[-1]}")
     
     async def _fetch_funding_rates(self) -> List[FundingRateRecord]:
-        """获取资金费率历史数据"""
+        """获取资金费率历史数据（按时间窗口并发下载）"""
         funding_records = []
         
         try:
-            # 计算时间范围
             start_ts = self._utc_timestamp_ms(self.start_date)
             end_ts = self._utc_timestamp_ms(self.end_date)
             
-            # Binance API 每次最多返回 1000 条
-            current_start = start_ts
-            
-            # Safety break
-            loop_count = 0
-            while current_start < end_ts and loop_count < 100:
-                loop_count += 1
-                funding_data = self.client.client.futures_funding_rate(
-                    symbol=self.symbol,
-                    startTime=current_start,
-                    endTime=end_ts,
-                    limit=1000
-                )
-                
-                if not funding_data:
-                    break
-                
-                for record in funding_data:
-                    fr = FundingRateRecord(
-                        timestamp=datetime.fromtimestamp(record['fundingTime'] / 1000),
-                        funding_rate=float(record['fundingRate']),
-                        mark_price=float(record.get('markPrice', 0))
-                    )
-                    funding_records.append(fr)
-                
-                if len(funding_data) < 1000:
-                    break
-                
-                # 下一批从最后一条时间 +1 开始
-                current_start = funding_data[-1]['fundingTime'] + 1
-                await asyncio.sleep(0.1)  # 避免请求过快
+            for record in await self.downloader.fetch_funding_rates(self.symbol, start_ts, end_ts):
+                funding_records.append(FundingRateRecord(
+                    timestamp=datetime.fromtimestamp(record['fundingTime'] / 1000),
+                    funding_rate=float(record['fundingRate']),
+                    mark_price=float(record.get('markPrice') or 0)
+                ))
             
             log.info(f"📊 Fetched {len(funding_records)} funding rate records")
             
@@ -352,187 +376,24 @@ class DataReplayAgent:
         
         return funding_records
     
-    async def _fetch_klines_with_cache(self, interval: str, total_limit: int) -> pd.DataFrame:
+    async def _fetch_klines_with_cache(self, interval: str) -> pd.DataFrame:
         """
-        Fetch K-lines using local cache first, then API for missing data
+        Load K-lines for [start - lookback, end] from the local KlineStore
         
-        Optimization: Prioritize local parquet cache, only fetch incremental data from API
+        只下载仓库中缺失的区间（并发、限速、逐窗口落盘），重叠的回测不会重复下载和存储同一批 K 线，
+        中断的下载下次从仓库断点续传。
         
         Args:
             interval: K-line interval ('5m', '15m', '1h')
-            total_limit: Total number of K-lines needed
             
         Returns:
-            DataFrame with K-line data
+            DataFrame with K-line data (DatetimeIndex)
         """
-        # Check cache for existing data
-        cached_df = self._kline_cache.get_cached_data(self.symbol, interval)
-        
-        if cached_df is not None and not cached_df.empty:
-            # Cache exists - check coverage
-            cache_start = cached_df['timestamp'].min() if 'timestamp' in cached_df.columns else None
-            cache_end = cached_df['timestamp'].max() if 'timestamp' in cached_df.columns else None
-            
-            # Calculate lookback period
-            lookback_days = 30
-            extended_start = self.start_date - timedelta(days=lookback_days)
-            extended_start_ms = self._utc_timestamp_ms(extended_start)
-            end_ms = self._utc_timestamp_ms(self.end_date)
-            
-            # Check if cache covers our range
-            if cache_start is not None and cache_end is not None:
-                cache_start_ms = int(cache_start)
-                cache_end_ms = int(cache_end)
-                
-                if cache_start_ms <= extended_start_ms and cache_end_ms >= end_ms:
-                    # Cache fully covers range
-                    log.info(f"📦 Cache hit: {self.symbol}/{interval} | Using cached data")
-                    
-                    # Filter to needed range and convert to proper format
-                    df = cached_df.copy()
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                    df.set_index('timestamp', inplace=True)
-                    
-                    for col in ['open', 'high', 'low', 'close', 'volume']:
-                        if col in df.columns:
-                            df[col] = pd.to_numeric(df[col], errors='coerce')
-                    
-                    return df
-                else:
-                    # Cache partial - fetch missing data
-                    log.info(f"📦 Cache partial: {self.symbol}/{interval} | Fetching additional data")
-                    
-                    # Determine what to fetch
-                    if cache_end_ms < end_ms:
-                        # Need newer data
-                        await self._fetch_and_append_to_cache(interval, cache_end_ms + 1, end_ms)
-                    
-                    if cache_start_ms > extended_start_ms:
-                        # Need older data - use batched fetch
-                        old_df = await self._fetch_klines_batched(interval, total_limit)
-                        if not old_df.empty:
-                            # Convert and append
-                            old_df_reset = old_df.reset_index()
-                            old_df_reset['timestamp'] = old_df_reset['timestamp'].astype('int64') // 10**6
-                            self._kline_cache.append_data(self.symbol, interval, old_df_reset.to_dict('records'))
-                    
-                    # Get updated cache
-                    updated_df = self._kline_cache.get_cached_data(self.symbol, interval)
-                    if updated_df is not None:
-                        df = updated_df.copy()
-                        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                        df.set_index('timestamp', inplace=True)
-                        for col in ['open', 'high', 'low', 'close', 'volume']:
-                            if col in df.columns:
-                                df[col] = pd.to_numeric(df[col], errors='coerce')
-                        return df
-        
-        # No cache or insufficient - full fetch via API
-        log.info(f"📦 Cache miss: {self.symbol}/{interval} | Fetching from API")
-        df = await self._fetch_klines_batched(interval, total_limit)
-        
-        # Save to cache
-        if not df.empty:
-            df_for_cache = df.reset_index()
-            df_for_cache['timestamp'] = df_for_cache['timestamp'].astype('int64') // 10**6
-            self._kline_cache.append_data(self.symbol, interval, df_for_cache.to_dict('records'))
-        
-        return df
-    
-    async def _fetch_and_append_to_cache(self, interval: str, start_ms: int, end_ms: int):
-        """Fetch K-lines from API and append to cache"""
-        try:
-            klines = self.client.client.futures_klines(
-                symbol=self.symbol,
-                interval=interval,
-                startTime=start_ms,
-                endTime=end_ms,
-                limit=1000
-            )
-            
-            if klines:
-                # Convert to cache format
-                klines_dict = []
-                for k in klines:
-                    klines_dict.append({
-                        'timestamp': k[0],
-                        'open': float(k[1]),
-                        'high': float(k[2]),
-                        'low': float(k[3]),
-                        'close': float(k[4]),
-                        'volume': float(k[5]),
-                    })
-                
-                self._kline_cache.append_data(self.symbol, interval, klines_dict)
-                log.debug(f"📦 Appended {len(klines_dict)} rows to {self.symbol}/{interval} cache")
-                
-        except Exception as e:
-            log.warning(f"Failed to fetch incremental data: {e}")
-    
-    async def _fetch_klines_batched(self, interval: str, total_limit: int) -> pd.DataFrame:
-        """分批获取 K 线数据"""
-        all_klines = []
-        batch_size = 1000  # Binance 推荐的批次大小
-        
-        # 计算结束时间戳
-        end_ts = self._utc_timestamp_ms(self.end_date)
-        
-        remaining = total_limit
-        current_end = end_ts
-        loop_count = 0
-        
-        while remaining > 0 and loop_count < 200: # Safety break
-            loop_count += 1
-            limit = min(batch_size, remaining)
-            
-            try:
-                klines = self.client.client.futures_klines(
-                    symbol=self.symbol,
-                    interval=interval,
-                    endTime=current_end,
-                    limit=limit
-                )
-                
-                if not klines:
-                    break
-                
-                all_klines = klines + all_klines  # 倒序插入
-                
-                # 更新下一批的结束时间（取最早一根的开始时间 - 1）
-                current_end = klines[0][0] - 1
-                remaining -= len(klines)
-                
-                # 避免请求过快
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                log.warning(f"Batch fetch error: {e}")
-                break
-        
-        # 转换为 DataFrame
-        return self._klines_to_dataframe(all_klines)
-    
-    def _klines_to_dataframe(self, klines: List) -> pd.DataFrame:
-        """将 K 线列表转换为 DataFrame"""
-        if not klines:
-            return pd.DataFrame()
-        
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-            'taker_buy_quote', 'ignore'
-        ])
-        
-        # 转换数据类型
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-        
-        for col in ['open', 'high', 'low', 'close', 'volume', 'quote_volume']:
-            df[col] = df[col].astype(float)
-        
-        df['trades'] = df['trades'].astype(int)
-        
-        return df[['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']]
+        start_ms = self._utc_timestamp_ms(self.start_date - timedelta(days=self.LOOKBACK_DAYS))
+        end_ms = self._utc_timestamp_ms(self.end_date)
+        return await self.downloader.download_klines(
+            self.symbol, interval, start_ms, end_ms, store=self._kline_store
+        )
     
     def _filter_date_range(self, df: pd.DataFrame) -> pd.DataFrame:
         """过滤日期范围"""
@@ -541,66 +402,6 @@ class DataReplayAgent:
         # Use < instead of <= since end_date is now strictly parsed
         return df[(df.index >= self.start_date) & (df.index < self.end_date)]
     
-    def _save_to_cache(self, cache_path: str):
-        """保存数据到缓存"""
-        if self.data_cache is None:
-            return
-        
-        # 合并所有数据
-        cache_data = {
-            'df_5m': self.data_cache.df_5m,
-            'df_15m': self.data_cache.df_15m,
-            'df_1h': self.data_cache.df_1h,
-            'funding_rates': [
-                {'timestamp': fr.timestamp, 'funding_rate': fr.funding_rate, 'mark_price': fr.mark_price}
-                for fr in self.data_cache.funding_rates
-            ],
-            # Save date boundaries to verify cache validity
-            'start_date': self.start_date,
-            'end_date': self.end_date
-        }
-        
-        # 使用 pickle 保存（支持多个 DataFrame）
-        import pickle
-        with open(cache_path, 'wb') as f:
-            pickle.dump(cache_data, f)
-    
-    def _load_from_cache(self, cache_path: str):
-        """从缓存加载数据"""
-        import pickle
-        with open(cache_path, 'rb') as f:
-            cache_data = pickle.load(f)
-        
-        # 加载资金费率（兼容旧缓存）
-        funding_rates = []
-        if 'funding_rates' in cache_data:
-            for fr_dict in cache_data['funding_rates']:
-                funding_rates.append(FundingRateRecord(
-                    timestamp=fr_dict['timestamp'],
-                    funding_rate=fr_dict['funding_rate'],
-                    mark_price=fr_dict.get('mark_price', 0)
-                ))
-        
-        # Reconstruct DataCache
-        self.data_cache = DataCache(
-            symbol=self.symbol,
-            df_5m=cache_data['df_5m'],
-            df_15m=cache_data['df_15m'],
-            df_1h=cache_data['df_1h'],
-            start_date=self.start_date,
-            end_date=self.end_date,
-            funding_rates=funding_rates
-        )
-        
-        self.timestamps = [ts for ts in self.data_cache.df_5m.index.tolist() if self.start_date <= ts < self.end_date]
-        
-        log.info(f"   Date comparison: start_date={self.start_date}, end_date={self.end_date}")
-        if not self.timestamps:
-            log.warning(f"   ⚠️ Cache loaded but zero timestamps in requested range!")
-        else:
-            log.info(f"   Cached range: {self.timestamps[0]} to {self.timestamps[-1]}")
-            log.info(f"   Backtest timestamps: {len(self.timestamps)}")
-    
     def get_snapshot_at(self, timestamp: datetime, lookback: int = 1000) -> MarketSnapshot:
         """
         获取指定时间点的市场快照
@@ -615,18 +416,18 @@ class DataReplayAgent:
         if self.data_cache is None:
             raise ValueError("Data not loaded. Call load_data() first.")
         
-        # 获取截止到 timestamp 的数据
+        # 获取截止到 timestamp 的数据（位置索引 + iloc 视图，不复制全量历史）
         # Ensure we have enough data for 1h analysis (need > 60 candles)
         # 1000 5m candles = 83 1h candles.
-        
-        df_5m = self.data_cache.df_5m[self.data_cache.df_5m.index <= timestamp].tail(lookback)
+        end_5m, end_15m, end_1h = self._positions_at(timestamp)
         
         # For 15m and 1h, we need at least 100 candles to be safe for indicators
         lb_15m = max(lookback // 3, 100)
         lb_1h = max(lookback // 12, 100)
         
-        df_15m = self.data_cache.df_15m[self.data_cache.df_15m.index <= timestamp].tail(lb_15m)
-        df_1h = self.data_cache.df_1h[self.data_cache.df_1h.index <= timestamp].tail(lb_1h)
+        df_5m = self.data_cache.df_5m.iloc[max(end_5m - lookback, 0):end_5m]
+        df_15m = self.data_cache.df_15m.iloc[max(end_15m - lb_15m, 0):end_15m]
+        df_1h = self.data_cache.df_1h.iloc[max(end_1h - lb_1h, 0):end_1h]
         
         # Stable view: 排除最后一根（未完成）
         # Live view: 最后一根（作为 Dict）
@@ -661,6 +462,54 @@ class DataReplayAgent:
         self.latest_snapshot = snapshot
         return snapshot
     
+    def _ensure_replay_index(self) -> ReplayIndex:
+        """构建（或复用）回放位置索引，每份 DataCache 只计算一次"""
+        cache = self.data_cache
+        if self._replay_index is not None and self._replay_index.cache is cache:
+            return self._replay_index
+        
+        # searchsorted 要求索引有序；K 线缓存通常已排序，这里只做一次兜底
+        for attr in ('df_5m', 'df_15m', 'df_1h'):
+            df = getattr(cache, attr)
+            if not df.index.is_monotonic_increasing:
+                setattr(cache, attr, df.sort_index(kind='stable'))
+        
+        replay = pd.DatetimeIndex(self.timestamps).as_unit('ns')
+        self._replay_index = ReplayIndex(
+            cache=cache,
+            replay_ns=replay.asi8,
+            end_5m=cache.df_5m.index.searchsorted(replay, side='right'),
+            end_15m=cache.df_15m.index.searchsorted(replay, side='right'),
+            end_1h=cache.df_1h.index.searchsorted(replay, side='right'),
+        )
+        self._cursor = 0
+        return self._replay_index
+    
+    def _positions_at(self, timestamp: datetime) -> Tuple[int, int, int]:
+        """
+        返回 timestamp 在 5m/15m/1h 数据中的截止位置 (exclusive)
+        
+        顺序回放命中游标时 O(1)；回测时间点之外的任意时刻退化为 O(log n) 二分。
+        """
+        index = self._ensure_replay_index()
+        ts_ns = pd.Timestamp(timestamp).value
+        n = len(index.replay_ns)
+        
+        i = self._cursor
+        if not (i < n and index.replay_ns[i] == ts_ns):
+            i = int(np.searchsorted(index.replay_ns, ts_ns, side='left'))
+        
+        if i < n and index.replay_ns[i] == ts_ns:
+            self._cursor = i + self._cursor_step
+            return int(index.end_5m[i]), int(index.end_15m[i]), int(index.end_1h[i])
+        
+        cache = self.data_cache
+        return (
+            int(cache.df_5m.index.searchsorted(timestamp, side='right')),
+            int(cache.df_15m.index.searchsorted(timestamp, side='right')),
+            int(cache.df_1h.index.searchsorted(timestamp, side='right')),
+        )
+    
     def iterate_timestamps(self, step: int = 1) -> Iterator[datetime]:
         """
         迭代所有回测时间点
@@ -671,8 +520,10 @@ class DataReplayAgent:
         Yields:
             datetime 时间点
         """
+        self._cursor_step = max(step, 1)
         for i in range(0, len(self.timestamps), step):
             self.current_idx = i
+            self._cursor = i
             yield self.timestamps[i]
     
     def get_current_price(self) -> float:
@@ -744,15 +595,59 @@ class DataReplayAgent:
         if self.data_cache is None or not self.data_cache.funding_rates:
             return None
         
-        # 找到时间戳之前最近的资金费率
-        latest_fr = None
-        for fr in self.data_cache.funding_rates:
-            if fr.timestamp <= timestamp:
-                latest_fr = fr
-            else:
-                break
+        index = self._ensure_funding_index()
+        i = int(np.searchsorted(index.ts_ns, pd.Timestamp(timestamp).value, side='right')) - 1
+        return index.records[i] if i >= 0 else None
+    
+    def _ensure_funding_index(self) -> FundingIndex:
+        """构建（或复用）资金费率索引，每份资金费率历史只排序一次"""
+        source = self.data_cache.funding_rates
+        index = self._funding_index
+        if index is not None and index.source is source and len(index.records) == len(source):
+            return index
+        
+        ts_ns = np.array([pd.Timestamp(fr.timestamp).value for fr in source], dtype=np.int64)
+        order = np.argsort(ts_ns, kind='stable')
+        records = [source[i] for i in order]
+        self._funding_index = FundingIndex(
+            source=source,
+            records=records,
+            ts_ns=ts_ns[order],
+            rates=np.array([fr.funding_rate for fr in records], dtype=float),
+            marks=np.array([fr.mark_price for fr in records], dtype=float),
+        )
+        return self._funding_index
+    
+    def funding_schedule(self, timestamps: List[datetime]) -> List[FundingSettlement]:
+        """
+        预先计算回测时间点上的全部资金费率结算（按时间顺序）
         
-        return latest_fr
+        判定与 get_funding_rate_for_settlement 相同：结算时刻（UTC 00/08/16 点前 10 分钟内）
+        且最近一条费率记录距该时刻不足 10 分钟。回测循环按顺序消费即可，无需逐步查询。
+        """
+        if self.data_cache is None or not self.data_cache.funding_rates or not timestamps:
+            return []
+        
+        index = self._ensure_funding_index()
+        times = pd.DatetimeIndex(timestamps)
+        utc = times.tz_convert('UTC') if times.tz is not None else times
+        is_settlement = np.isin(utc.hour, (0, 8, 16)) & (utc.minute < 10)
+        
+        ts_ns = times.as_unit('ns').asi8
+        pos = np.searchsorted(index.ts_ns, ts_ns, side='right') - 1
+        valid = is_settlement & (pos >= 0)
+        gap = np.abs(index.ts_ns[np.maximum(pos, 0)] - ts_ns)
+        valid &= gap < 600 * 1_000_000_000
+        
+        return [
+            FundingSettlement(
+                step=int(i),
+                timestamp=timestamps[i],
+                funding_rate=float(index.rates[pos[i]]),
+                mark_price=float(index.marks[pos[i]]),
+            )
+            for i in np.flatnonzero(valid)
+        ]
     
     def is_funding_settlement_time(self, timestamp: datetime) -> bool:
         """
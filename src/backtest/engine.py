@@ -9,16 +9,18 @@ Date: 2025-12-31
 """
 
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable
 from dataclasses import dataclass, field
 import pandas as pd
 
-from src.backtest.data_replay import DataReplayAgent
+from src.backtest.data_replay import DataReplayAgent, DataCache
 from src.backtest.portfolio import BacktestPortfolio, Side, Trade
 from src.backtest.metrics import PerformanceMetrics, MetricsResult
 from src.backtest.report import BacktestReport
 from src.agents.risk_audit_agent import RiskAuditAgent, PositionInfo
+from src.llm.cache import LLMCacheMiss
 from src.utils.logger import log
 from src.utils.action_protocol import (
     normalize_action,
@@ -48,7 +50,12 @@ class BacktestConfig:
     strategy_mode: str = "agent"  # "technical" (EMA) or "agent" (Multi-Agent) - Default: agent for prompt optimization
     use_llm: bool = False  # 是否在回测中调用 LLM（费用高、速度慢）
     llm_cache: bool = True  # 缓存 LLM 响应
+    llm_cache_mode: str = "read_write"  # "read_write" 或 "replay_only"（未命中即失败，不调用 API）
+    llm_cache_dir: str = "data/llm_cache"  # LLM 响应缓存目录
+    llm_cache_max_mb: float = 256.0  # 缓存大小上限（MB），超出按最近使用淘汰
     llm_throttle_ms: int = 100  # LLM 调用间隔（毫秒），避免速率限制
+    precompute_signals: bool = True  # 回放前一次性预计算量化信号，逐步只查表（agent 模式）
+    progress_interval_sec: float = 0.25  # 进度回调最小间隔（秒），0=每步回调；最后一步总会回调
     
     # 🔧 P0 Realism Improvements
     execution_latency_ms: int = 0  # 执行延迟（毫秒），模拟决策到执行的延迟，0=关闭
@@ -120,6 +127,13 @@ class BacktestConfig:
         # 验证合约类型
         if self.contract_type not in ['linear', 'inverse']:
             raise ValueError(f"contract_type must be 'linear' or 'inverse', got {self.contract_type}")
+        
+        # 验证 LLM 缓存模式
+        if self.llm_cache_mode not in ['read_write', 'replay_only']:
+            raise ValueError(f"llm_cache_mode must be 'read_write' or 'replay_only', got {self.llm_cache_mode}")
+        
+        if self.llm_cache_max_mb <= 0:
+            raise ValueError(f"llm_cache_max_mb must be positive, got {self.llm_cache_max_mb}")
 
 
 
@@ -187,7 +201,8 @@ class BacktestEngine:
     def __init__(
         self,
         config: BacktestConfig,
-        strategy_fn: Optional[Callable] = None
+        strategy_fn: Optional[Callable] = None,
+        data_cache: Optional[DataCache] = None
     ):
         """
         初始化回测引擎
@@ -195,9 +210,11 @@ class BacktestEngine:
         Args:
             config: 回测配置
             strategy_fn: 策略函数，接收 (snapshot, portfolio) 返回 {'action': 'long/short/hold', 'confidence': 0-100}
+            data_cache: 预加载的历史数据（可选），提供时不再从 API/缓存加载
         """
         self.config = config
         self.strategy_fn = strategy_fn or self._default_strategy
+        self.preloaded_data = data_cache
         
         # 组件
         self.data_replay: Optional[DataReplayAgent] = None
@@ -242,7 +259,10 @@ class BacktestEngine:
             end_date=self.config.end_date
         )
         
-        success = await self.data_replay.load_data()
+        if self.preloaded_data is not None:
+            success = self.data_replay.attach_data_cache(self.preloaded_data)
+        else:
+            success = await self.data_replay.load_data()
         if not success:
             raise RuntimeError("Failed to load historical data")
         
@@ -257,6 +277,15 @@ class BacktestEngine:
         timestamps = list(self.data_replay.iterate_timestamps(step=self.config.step))
         total = len(timestamps)
         
+        if self.agent_runner is not None and self.config.precompute_signals:
+            self.agent_runner.precompute_signals(self.data_replay.data_cache, timestamps)
+        
+        # 资金费率结算计划：一次二分定位全部结算时刻
+        funding_schedule = self.data_replay.funding_schedule(timestamps)
+        next_funding = 0
+        
+        last_progress_emit = None
+        
         log.info(f"📊 Processing {total} timestamps (step={self.config.step})")
         log.info(f"⏱️  Estimated time: {total * 72 / 60:.1f} minutes (3 LLM calls per timepoint)")
         
@@ -272,16 +301,18 @@ class BacktestEngine:
                 snapshot = self.data_replay.get_snapshot_at(timestamp)
                 current_price = self.data_replay.get_current_price()
                 
-                # 🆕 检查并应用资金费率结算
-                funding_rate = self.data_replay.get_funding_rate_for_settlement(timestamp)
-                if funding_rate is not None:
+                # 🆕 检查并应用资金费率结算（按预计算的结算计划顺序消费）
+                while next_funding < len(funding_schedule) and funding_schedule[next_funding].step < i:
+                    next_funding += 1
+                if next_funding < len(funding_schedule) and funding_schedule[next_funding].step == i:
+                    settlement = funding_schedule[next_funding]
+                    next_funding += 1
                     # 获取标记价格（若有）
-                    fr_record = self.data_replay.get_funding_rate_at(timestamp)
-                    mark_price = fr_record.mark_price if fr_record and fr_record.mark_price > 0 else current_price
+                    mark_price = settlement.mark_price if settlement.mark_price > 0 else current_price
                     
                     # 对所有持仓应用资金费率
                     for symbol in list(self.portfolio.positions.keys()):
-                        self.portfolio.apply_funding_fee(symbol, funding_rate, mark_price, timestamp)
+                        self.portfolio.apply_funding_fee(symbol, settlement.funding_rate, mark_price, timestamp)
                 
                 # 🆕 检查强平
                 prices = {self.config.symbol: current_price}
@@ -310,8 +341,14 @@ class BacktestEngine:
                     self.portfolio.record_equity(timestamp, prices)
                 
                 
-                # 进度回调（包含实时收益数据和增量可视化数据）
-                if progress_callback:
+                # 进度回调（包含实时收益数据和增量可视化数据），按墙钟时间节流
+                now = time.monotonic()
+                if progress_callback and (
+                    last_progress_emit is None
+                    or now - last_progress_emit >= self.config.progress_interval_sec
+                    or i == total - 1
+                ):
+                    last_progress_emit = now
                     progress_pct = (i + 1) / total * 100  # +1 because we just completed this timepoint
                     
                     # Send progress update
@@ -342,16 +379,16 @@ class BacktestEngine:
                         latest_trade = {
                             'timestamp': trade.timestamp.isoformat(),
                             'side': trade.side.value,
-                                            'action': trade.action,
+                            'action': trade.action,
                             'price': float(trade.price),
                             'pnl': float(trade.pnl),
                             'pnl_pct': float(trade.pnl_pct)
                         }
                     
-                    # 计算实时指标
-                    trades_count = len(self.portfolio.trades)
-                    winning_trades = sum(1 for t in self.portfolio.trades if t.pnl > 0 and t.action == 'close')
-                    win_rate = (winning_trades / trades_count * 100) if trades_count > 0 else 0
+                    # 实时指标（来自投资组合的增量统计，O(1)）
+                    stats = self.portfolio.stats
+                    trades_count = stats.trade_count
+                    win_rate = (stats.winning_trades / trades_count * 100) if trades_count > 0 else 0
                     
                     callback_data = {
                         'progress': progress_pct,
@@ -368,7 +405,9 @@ class BacktestEngine:
                         'metrics': {
                             'total_trades': trades_count,
                             'win_rate': win_rate,
-                            'max_drawdown_pct': self.portfolio.equity_curve[-1].drawdown_pct if self.portfolio.equity_curve else 0
+                            'max_drawdown_pct': self.portfolio.equity_curve[-1].drawdown_pct if self.portfolio.equity_curve else 0,
+                            'sharpe_ratio': stats.sharpe_ratio(self.config.initial_capital),
+                            'sortino_ratio': stats.sortino_ratio(self.config.initial_capital)
                         }
                     }
 
@@ -397,7 +436,8 @@ class BacktestEngine:
         metrics = PerformanceMetrics.calculate(
             equity_curve=equity_curve,
             trades=trades,
-            initial_capital=self.config.initial_capital
+            initial_capital=self.config.initial_capital,
+            running_stats=self.portfolio.stats
         )
         
         # 6. 生成结果
@@ -457,6 +497,8 @@ class BacktestEngine:
             
             return decision
             
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             log.warning(f"Strategy error: {e}")
             return {
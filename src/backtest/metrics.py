@@ -8,13 +8,14 @@ Author: AI Trader Team
 Date: 2025-12-31
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 from datetime import timedelta
 
 from src.backtest.portfolio import Trade, Side
+from src.backtest.running_stats import RunningStats
 
 
 @dataclass
@@ -124,7 +125,8 @@ class PerformanceMetrics:
         cls,
         equity_curve: pd.DataFrame,
         trades: List[Trade],
-        initial_capital: float
+        initial_capital: float,
+        running_stats: Optional[RunningStats] = None
     ) -> MetricsResult:
         """
         计算所有性能指标
@@ -133,10 +135,18 @@ class PerformanceMetrics:
             equity_curve: 净值曲线 DataFrame (columns: total_equity, drawdown, drawdown_pct)
             trades: 交易记录列表
             initial_capital: 初始资金
+            running_stats: 投资组合的增量统计；与净值曲线/交易一致时直接由它完成计算
             
         Returns:
             MetricsResult 对象
         """
+        if (
+            running_stats is not None
+            and running_stats.equity_points == len(equity_curve)
+            and running_stats.trade_count == len(trades)
+        ):
+            return cls.finalize(running_stats, initial_capital)
+        
         # 过滤平仓交易（有 PnL 的交易）
         closed_trades = [t for t in trades if t.action == "close"]
         
@@ -218,6 +228,82 @@ class PerformanceMetrics:
             trading_days=trading_days,
         )
     
+    @classmethod
+    def finalize(cls, stats: RunningStats, initial_capital: float) -> MetricsResult:
+        """
+        由增量统计完成指标计算（O(1)，不扫描净值曲线和交易列表）
+        
+        口径与 calculate 相同：回撤基于净值曲线自身的滚动峰值，交易统计只计平仓交易。
+        """
+        total_return = stats.total_return(initial_capital)
+        final_equity = stats.last_equity if stats.last_equity is not None else initial_capital
+        
+        if stats.equity_points:
+            start_date = stats.first_timestamp.strftime("%Y-%m-%d")
+            end_date = stats.last_timestamp.strftime("%Y-%m-%d")
+            total_days = (stats.last_timestamp - stats.first_timestamp).days
+        else:
+            start_date = end_date = "N/A"
+            total_days = 0
+        
+        if total_days > 0:
+            annualized_return = ((1 + total_return / 100) ** (365 / total_days) - 1) * 100
+        else:
+            annualized_return = 0.0
+        
+        if stats.return_count:
+            sharpe = stats.sharpe_ratio(initial_capital, cls.RISK_FREE_RATE, cls.TRADING_DAYS_PER_YEAR)
+            sortino = stats.sortino_ratio(initial_capital, cls.RISK_FREE_RATE, cls.TRADING_DAYS_PER_YEAR)
+            calmar = total_return / stats.max_drawdown_pct if stats.max_drawdown_pct > 0 else 0.0
+            volatility = stats.volatility() * np.sqrt(cls.TRADING_DAYS_PER_YEAR)
+        else:
+            sharpe = sortino = calmar = volatility = 0.0
+        
+        closed = stats.closed_trades
+        total_loss = abs(stats.gross_loss)
+        
+        def side_win_rate(wins: int, count: int) -> float:
+            return wins / count * 100 if count else 0.0
+        
+        return MetricsResult(
+            total_return=total_return,
+            annualized_return=annualized_return,
+            final_equity=final_equity,
+            profit_amount=final_equity - initial_capital,
+            max_drawdown=stats.max_drawdown,
+            max_drawdown_pct=stats.max_drawdown_pct,
+            max_drawdown_duration=stats.max_drawdown_duration,
+            
+            sharpe_ratio=sharpe,
+            sortino_ratio=sortino,
+            calmar_ratio=calmar,
+            volatility=volatility,
+            
+            total_trades=closed,
+            winning_trades=stats.winning_trades,
+            losing_trades=stats.losing_trades,
+            win_rate=stats.winning_trades / closed * 100 if closed else 0.0,
+            profit_factor=(stats.gross_profit / total_loss if total_loss > 0 else float('inf')) if closed else 0.0,
+            avg_trade_pnl=stats.total_pnl / closed if closed else 0.0,
+            avg_win=stats.gross_profit / stats.winning_trades if stats.winning_trades else 0.0,
+            avg_loss=stats.gross_loss / stats.losing_trades if stats.losing_trades else 0.0,
+            largest_win=stats.largest_win if closed else 0.0,
+            largest_loss=stats.largest_loss if closed else 0.0,
+            avg_holding_time=stats.holding_time_sum / stats.holding_time_count if stats.holding_time_count else 0.0,
+            
+            long_trades=stats.long_trades,
+            short_trades=stats.short_trades,
+            long_win_rate=side_win_rate(stats.long_wins, stats.long_trades),
+            short_win_rate=side_win_rate(stats.short_wins, stats.short_trades),
+            long_pnl=stats.long_pnl,
+            short_pnl=stats.short_pnl,
+            
+            start_date=start_date,
+            end_date=end_date,
+            total_days=total_days,
+            trading_days=len(stats.trading_days),
+        )
+    
     @classmethod
     def _calculate_returns(
         cls,
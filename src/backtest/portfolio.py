@@ -14,6 +14,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 import pandas as pd
 
+from src.backtest.running_stats import RunningStats
 from src.utils.logger import log
 
 
@@ -299,6 +300,9 @@ class BacktestPortfolio:
         self.equity_curve: List[EquityPoint] = []
         self.peak_equity = initial_capital
         
+        # 增量统计（进度回调与最终指标共用）
+        self.stats = RunningStats()
+        
         # 资金费率追踪
         self.total_funding_paid: float = 0.0
         self.funding_history: List[Dict] = []
@@ -502,6 +506,7 @@ class BacktestPortfolio:
             close_reason="liquidation"
         )
         self.trades.append(trade)
+        self.stats.record_trade(trade)
         
         # 记录强平历史
         self.liquidation_count += 1
@@ -618,6 +623,7 @@ class BacktestPortfolio:
             slippage=slippage_impact * quantity
         )
         self.trades.append(trade)
+        self.stats.record_trade(trade)
         
         sl_str = f"${stop_loss:.2f}" if stop_loss else "N/A"
         tp_str = f"${take_profit:.2f}" if take_profit else "N/A"
@@ -695,6 +701,7 @@ class BacktestPortfolio:
             close_reason=reason
         )
         self.trades.append(trade)
+        self.stats.record_trade(trade)
         
         # 删除持仓
         del self.positions[symbol]
@@ -862,6 +869,7 @@ class BacktestPortfolio:
             drawdown_pct=drawdown_pct
         )
         self.equity_curve.append(point)
+        self.stats.record_equity(timestamp, total_equity)
     
     def get_equity_dataframe(self) -> pd.DataFrame:
         """获取净值曲线 DataFrame"""
@@ -0,0 +1,202 @@
+"""
+增量回测统计 (Running Statistics)
+=================================
+
+随交易和净值点逐条更新的统计量，每次更新 O(1)：
+- 交易计数、胜负、盈亏汇总、多空拆分
+- 净值峰值、最大回撤（金额 / 百分比 / 持续时间）
+- 收益率均值与方差（Welford），用于夏普 / 索提诺比率
+
+BacktestPortfolio 在成交和记录净值时更新它；进度回调直接读取，
+PerformanceMetrics.calculate 在净值曲线与统计一致时用它完成最终指标，
+不再对整条曲线和全部交易做多次扫描。
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Set
+
+
+@dataclass
+class _Moments:
+    """Welford 在线均值 / 方差"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def std(self) -> float:
+        """样本标准差 (ddof=1)，与 pandas Series.std 一致；不足 2 个样本返回 NaN"""
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+@dataclass
+class RunningStats:
+    """回测增量统计"""
+    # 交易（所有成交，包括开仓）
+    trade_count: int = 0
+
+    # 平仓交易 (action == "close")
+    closed_trades: int = 0
+    winning_trades: int = 0
+    losing_trades: int = 0
+    total_pnl: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0
+    largest_win: Optional[float] = None
+    largest_loss: Optional[float] = None
+    holding_time_sum: float = 0.0
+    holding_time_count: int = 0
+    long_trades: int = 0
+    long_wins: int = 0
+    long_pnl: float = 0.0
+    short_trades: int = 0
+    short_wins: int = 0
+    short_pnl: float = 0.0
+    trading_days: Set = field(default_factory=set)
+
+    # 净值曲线
+    equity_points: int = 0
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+    last_equity: Optional[float] = None
+    peak_equity: float = 0.0
+    peak_time: Optional[datetime] = None
+    max_drawdown: float = 0.0
+    max_drawdown_pct: float = 0.0
+
+    # 最大回撤区间：起点峰值及其恢复时间
+    _dd_peak_equity: float = 0.0
+    _dd_peak_time: Optional[datetime] = None
+    _dd_recovery_time: Optional[datetime] = None
+
+    # 逐点收益率
+    _returns: _Moments = field(default_factory=_Moments)
+    _downside: _Moments = field(default_factory=_Moments)
+
+    def record_trade(self, trade):
+        """记录一笔成交"""
+        self.trade_count += 1
+        if trade.action != "close":
+            return
+
+        pnl = trade.pnl
+        self.closed_trades += 1
+        self.total_pnl += pnl
+        if pnl > 0:
+            self.winning_trades += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.losing_trades += 1
+            self.gross_loss += pnl
+        if self.largest_win is None or pnl > self.largest_win:
+            self.largest_win = pnl
+        if self.largest_loss is None or pnl < self.largest_loss:
+            self.largest_loss = pnl
+        if trade.holding_time is not None:
+            self.holding_time_sum += trade.holding_time
+            self.holding_time_count += 1
+
+        if trade.side.value == "long":
+            self.long_trades += 1
+            self.long_wins += pnl > 0
+            self.long_pnl += pnl
+        else:
+            self.short_trades += 1
+            self.short_wins += pnl > 0
+            self.short_pnl += pnl
+        self.trading_days.add(trade.timestamp.date())
+
+    def record_equity(self, timestamp: datetime, equity: float):
+        """记录一个净值点"""
+        if self.equity_points == 0:
+            self.first_timestamp = timestamp
+            self.peak_equity = equity
+            self.peak_time = timestamp
+        else:
+            previous = self.last_equity
+            if previous != 0:
+                self._add_return(equity / previous - 1)
+            elif equity != 0:
+                self._add_return(math.copysign(math.inf, equity))
+
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+            self.peak_time = timestamp
+
+        drawdown = self.peak_equity - equity
+        drawdown_pct = drawdown / self.peak_equity * 100 if self.peak_equity > 0 else 0.0
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+            self._dd_peak_equity = self.peak_equity
+            self._dd_peak_time = self.peak_time
+            self._dd_recovery_time = None
+        elif self._dd_peak_time is not None and self._dd_recovery_time is None and equity >= self._dd_peak_equity:
+            self._dd_recovery_time = timestamp
+        if drawdown_pct > self.max_drawdown_pct:
+            self.max_drawdown_pct = drawdown_pct
+
+        self.equity_points += 1
+        self.last_equity = equity
+        self.last_timestamp = timestamp
+
+    def _add_return(self, value: float):
+        self._returns.add(value)
+        if value < 0:
+            self._downside.add(value)
+
+    # ========== 派生指标 ==========
+
+    @property
+    def return_count(self) -> int:
+        return self._returns.count
+
+    @property
+    def max_drawdown_duration(self) -> int:
+        """最大回撤持续天数（未恢复时计到最后一个净值点）"""
+        if self.max_drawdown <= 0 or self._dd_peak_time is None:
+            return 0
+        end = self._dd_recovery_time or self.last_timestamp
+        return (end - self._dd_peak_time).days
+
+    def total_return(self, initial_capital: float) -> float:
+        """总收益率 (%)"""
+        if self.last_equity is None:
+            return 0.0
+        return (self.last_equity - initial_capital) / initial_capital * 100
+
+    def volatility(self) -> float:
+        """逐点收益率标准差 (%)"""
+        return self._returns.std() * 100
+
+    def excess_return(self, initial_capital: float, risk_free_rate: float, periods_per_year: int) -> float:
+        """超额收益 (%)，无风险收益按收益率样本数折算"""
+        risk_free_return = risk_free_rate * self._returns.count / periods_per_year * 100
+        return self.total_return(initial_capital) - risk_free_return
+
+    def sharpe_ratio(self, initial_capital: float, risk_free_rate: float = 0.02, periods_per_year: int = 365) -> float:
+        """夏普比率（总收益口径，与 PerformanceMetrics 一致）"""
+        volatility = self.volatility()
+        if not volatility > 0:
+            return 0.0
+        excess = self.excess_return(initial_capital, risk_free_rate, periods_per_year)
+        return excess / (volatility * math.sqrt(self._returns.count))
+
+    def sortino_ratio(self, initial_capital: float, risk_free_rate: float = 0.02, periods_per_year: int = 365) -> float:
+        """索提诺比率（只考虑下行收益率的波动）"""
+        downside_std = self._downside.std() * 100
+        if not downside_std > 0:
+            return 0.0
+        excess = self.excess_return(initial_capital, risk_free_rate, periods_per_year)
+        return excess / (downside_std * math.sqrt(self._returns.count))
@@ -0,0 +1,335 @@
+"""
+回测信号预计算 (Whole-run Signal Precomputation)
+================================================
+
+BacktestAgentRunner 每个时间点都会在 1000 根 K 线窗口上重新计算
+QuantAnalystAgent 的 EMA20/60、RSI、KDJ、ATR、市场体制与陷阱检测，
+而这些值在整个回放区间内每个序列只需计算一次。
+
+PrecomputedQuantSignals 对每个周期做一次向量化计算，按“截止位置”
+(end, 与 DataReplayAgent._positions_at 一致，exclusive) 建立查表数组：
+- 趋势 / 震荡 / ATR：全序列一次计算，再按快照窗口起点做 EWM 种子修正，
+  结果与在窗口上逐步计算一致（无未来数据：end 之后的 K 线从不参与）
+- 市场体制 / 陷阱（1h，非线性，依赖窗口）：每根 1h K 线只计算一次，
+  而不是每个 5m 步计算一次
+
+每步只需 analysis_at(snapshot) 查表；快照与预计算不匹配时返回 None，
+调用方回退到逐步计算。
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import copy
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.data_replay import DataCache
+from src.utils.logger import log
+
+TIMEFRAMES = ('5m', '15m', '1h')
+
+# 趋势状态编码（与 QuantAnalystAgent.analyze_trend 一致）
+_TREND_STATES = {
+    60: 'bullish_alignment',
+    -60: 'bearish_alignment',
+    20: 'potential_reversal_up',
+    -20: 'potential_reversal_down',
+    0: 'neutral',
+}
+
+
+def window_lookbacks(lookback: int) -> Dict[str, int]:
+    """各周期窗口长度（与 DataReplayAgent.get_snapshot_at 一致）"""
+    return {
+        '5m': lookback,
+        '15m': max(lookback // 3, 100),
+        '1h': max(lookback // 12, 100),
+    }
+
+
+def _windowed_ewm(full: np.ndarray, seed: np.ndarray, alpha: float,
+                  start: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """
+    把全序列 EWM (adjust=False) 换算为从 start 处重新起算的窗口 EWM
+
+    y_last = E[last] + (1-alpha)^(last-start) * (seed[start] - E[start])
+    """
+    decay = np.power(1.0 - alpha, (last - start).astype(float))
+    return full[last] + decay * (seed[start] - full[start])
+
+
+@dataclass
+class _TimeframeSignals:
+    """单个周期按截止位置 end 索引的信号数组"""
+    index_ns: np.ndarray
+    close: np.ndarray
+    start: np.ndarray        # 稳定窗口起点
+    last: np.ndarray         # 稳定窗口最后一根的位置
+    length: np.ndarray       # 稳定窗口长度
+    trend_score: np.ndarray
+    osc_score: np.ndarray
+    rsi: np.ndarray
+    kdj_j: np.ndarray
+    atr: np.ndarray
+
+
+@dataclass
+class PrecomputedQuantSignals:
+    """
+    按回放位置查表的 QuantAnalystAgent 信号
+
+    Args:
+        data_cache: 回放数据
+        quant_analyst: 用于体制/陷阱检测与情绪分析的 QuantAnalystAgent
+        lookback: get_snapshot_at 的 5m 回看长度
+    """
+    data_cache: DataCache
+    quant_analyst: object
+    lookback: int = 1000
+    _frames: Dict[str, _TimeframeSignals] = field(default_factory=dict, init=False, repr=False)
+    _context_1h: Dict[int, Optional[Dict]] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        lookbacks = window_lookbacks(self.lookback)
+        for tf in TIMEFRAMES:
+            df = getattr(self.data_cache, f'df_{tf}')
+            self._frames[tf] = self._compute_timeframe(df, lookbacks[tf])
+
+    # ---------- 预计算 ----------
+
+    def _compute_timeframe(self, df: pd.DataFrame, lookback: int) -> _TimeframeSignals:
+        """一次向量化计算该周期所有截止位置的信号"""
+        qa = self.quant_analyst
+        n = len(df)
+        close_s = df['close']
+        high_s = df['high']
+        low_s = df['low']
+
+        # 截止位置 end ∈ [0, n]：原始窗口 [start, end)，稳定窗口去掉最后一根
+        end = np.arange(n + 1)
+        start = np.maximum(end - lookback, 0)
+        raw_len = end - start
+        length = np.where(raw_len > 1, raw_len - 1, raw_len)
+        last = np.clip(start + length - 1, 0, max(n - 1, 0))
+
+        close = close_s.to_numpy(dtype=float)
+        if n == 0:
+            empty = np.zeros(n + 1)
+            return _TimeframeSignals(
+                index_ns=np.array([], dtype=np.int64), close=close, start=start, last=last,
+                length=length, trend_score=empty.astype(int), osc_score=empty.astype(int),
+                rsi=empty, kdj_j=empty, atr=empty,
+            )
+
+        # 趋势：EMA20 / EMA60，窗口从 start 处以 close[start] 重新起算
+        ema20 = _windowed_ewm(qa.calculate_ema(close_s, 20).to_numpy(), close, 2 / 21, start, last)
+        ema60 = _windowed_ewm(qa.calculate_ema(close_s, 60).to_numpy(), close, 2 / 61, start, last)
+        c = close[last]
+        trend = np.select(
+            [
+                (c > ema20) & (ema20 > ema60),
+                (c < ema20) & (ema20 < ema60),
+                (c > ema20) & (ema20 < ema60),
+                (c < ema20) & (ema20 > ema60),
+            ],
+            [60, -60, 20, -20],
+            default=0,
+        )
+        trend = np.where(length >= 60, trend, 0)
+
+        # 震荡：RSI 为 14 根滚动均值，窗口 >= 30 时与窗口起点无关；
+        # KDJ 的 EWM 种子影响在最短窗口 (1h, 99 根) 内已衰减到 (2/3)^90 < 1e-15
+        rsi = qa.calculate_rsi(close_s, 14).to_numpy()[last]
+        _, _, j = qa.calculate_kdj(high_s, low_s, close_s)
+        kdj_j = j.to_numpy()[last]
+        osc = (
+            np.where(rsi < 30, 40, 0) + np.where(rsi > 70, -40, 0)
+            + np.where(kdj_j < 20, 30, 0) + np.where(kdj_j > 80, -30, 0)
+        )
+        osc = np.where(length >= 30, osc, 0)
+
+        # ATR：窗口首根没有前收盘价，TR 退化为 high - low
+        high = high_s.to_numpy(dtype=float)
+        low = low_s.to_numpy(dtype=float)
+        full_atr = qa.calculate_atr(high_s, low_s, close_s).to_numpy()
+        atr = _windowed_ewm(full_atr, high - low, 1 / 14, start, last)
+
+        return _TimeframeSignals(
+            index_ns=pd.DatetimeIndex(df.index).as_unit('ns').asi8,
+            close=close,
+            start=start,
+            last=last,
+            length=length,
+            trend_score=trend.astype(int),
+            osc_score=osc.astype(int),
+            rsi=rsi,
+            kdj_j=kdj_j,
+            atr=atr,
+        )
+
+    def prepare(self, timestamps: Iterable) -> int:
+        """
+        为回放时间点预先计算 1h 体制/陷阱（每根 1h K 线一次）
+
+        Returns:
+            计算的 1h 窗口数
+        """
+        frame = self._frames['1h']
+        replay = pd.DatetimeIndex(list(timestamps)).as_unit('ns')
+        ends = np.unique(np.searchsorted(frame.index_ns, replay.asi8, side='right'))
+        for end in ends:
+            self._context_at(int(end))
+        return len(ends)
+
+    def _context_at(self, end: int) -> Optional[Dict]:
+        """1h 窗口上的体制与陷阱检测（按 end 缓存）"""
+        if end not in self._context_1h:
+            frame = self._frames['1h']
+            window = self.data_cache.df_1h.iloc[frame.start[end]:frame.start[end] + frame.length[end]]
+            try:
+                self._context_1h[end] = {
+                    'regime': self.quant_analyst.regime_detector.detect_regime(window),
+                    'traps': self.quant_analyst.analyze_market_traps(window),
+                }
+            except Exception:
+                # 与逐步路径保持一致：交给回退路径抛出同样的错误
+                self._context_1h[end] = None
+        return self._context_1h[end]
+
+    # ---------- 查表 ----------
+
+    def _end_for(self, tf: str, stable: pd.DataFrame) -> Optional[int]:
+        """由快照稳定窗口反推截止位置；窗口与预计算不一致时返回 None"""
+        frame = self._frames[tf]
+        if stable is None or len(stable) < 2:
+            return None
+        ts_ns = pd.Timestamp(stable.index[-1]).value
+        pos = int(np.searchsorted(frame.index_ns, ts_ns, side='left'))
+        if pos >= len(frame.index_ns) or frame.index_ns[pos] != ts_ns:
+            return None
+        end = pos + 2
+        if end >= len(frame.length):
+            return None
+        if frame.length[end] != len(stable) or frame.close[pos] != stable['close'].iat[-1]:
+            return None
+        return end
+
+    def ends_for(self, snapshot) -> Optional[Dict[str, int]]:
+        """快照各周期的截止位置"""
+        if getattr(snapshot, 'symbol', self.data_cache.symbol) != self.data_cache.symbol:
+            return None
+        ends = {}
+        for tf in TIMEFRAMES:
+            end = self._end_for(tf, getattr(snapshot, f'stable_{tf}', None))
+            if end is None:
+                return None
+            ends[tf] = end
+        return ends
+
+    def atr_at(self, tf: str, end: int) -> Optional[float]:
+        """窗口 ATR（窗口长度 <= 20 时为 None，与逐步路径的门槛一致）"""
+        frame = self._frames[tf]
+        if frame.length[end] <= 20:
+            return None
+        return frame.atr[end]
+
+    def _trend(self, tf: str, end: int) -> Dict:
+        frame = self._frames[tf]
+        if frame.length[end] < 60:
+            return {'score': 0, 'signal': 'neutral', 'details': {}}
+        score = int(frame.trend_score[end])
+        return {
+            'score': score,
+            'signal': 'long' if score > 0 else 'short',
+            'details': {'ema_status': _TREND_STATES[score]},
+        }
+
+    def _oscillator(self, tf: str, end: int) -> Dict:
+        frame = self._frames[tf]
+        if frame.length[end] < 30:
+            return {'score': 0, 'signal': 'neutral', 'details': {}}
+        score = int(frame.osc_score[end])
+        return {
+            'score': score,
+            'signal': 'long' if score > 0 else 'short',
+            'details': {
+                'rsi_value': round(frame.rsi[end], 1),
+                'kdj_j': round(frame.kdj_j[end], 1),
+            },
+        }
+
+    def analysis_at(self, snapshot) -> Optional[Dict]:
+        """
+        查表生成与 QuantAnalystAgent.analyze_all_timeframes 相同结构的结果
+
+        Returns:
+            分析结果；快照不在预计算范围内时返回 None
+        """
+        ends = self.ends_for(snapshot)
+        if ends is None:
+            return None
+        context = self._context_at(ends['1h'])
+        if context is None:
+            return None
+
+        t = {tf: self._trend(tf, ends[tf]) for tf in TIMEFRAMES}
+        o = {tf: self._oscillator(tf, ends[tf]) for tf in TIMEFRAMES}
+
+        volatility = {'atr_1h': 0.0, 'atr_15m': 0.0, 'atr_5m': 0.0}
+        for tf in ('1h', '15m', '5m'):
+            atr = self.atr_at(tf, ends[tf])
+            if atr is not None:
+                volatility[f'atr_{tf}'] = round(atr, 4)
+
+        total_trend_score = (t['5m']['score'] + t['15m']['score'] + t['1h']['score']) / 3
+        total_osc_score = (o['5m']['score'] + o['15m']['score'] + o['1h']['score']) / 3
+
+        return {
+            'symbol': snapshot.symbol,
+            'sentiment': self.quant_analyst._analyze_sentiment(snapshot),
+            'volatility': volatility,
+            # 缓存结果在多个步骤间共享，返回副本防止下游修改
+            'regime': copy.deepcopy(context['regime']),
+            'traps': copy.deepcopy(context['traps']),
+            'timeframe_6h': {},
+            'timeframe_2h': {},
+            'timeframe_30m': {},
+            'trend': {
+                'trend_5m_score': t['5m']['score'],
+                'trend_15m_score': t['15m']['score'],
+                'trend_1h_score': t['1h']['score'],
+                'total_trend_score': total_trend_score,
+                'trend_5m': t['5m'],
+                'trend_15m': t['15m'],
+                'trend_1h': t['1h'],
+            },
+            'oscillator': {
+                'osc_5m_score': o['5m']['score'],
+                'osc_15m_score': o['15m']['score'],
+                'osc_1h_score': o['1h']['score'],
+                'total_osc_score': total_osc_score,
+                'oscillator_5m': o['5m'],
+                'oscillator_15m': o['15m'],
+                'oscillator_1h': o['1h'],
+            },
+            'overall_score': (total_trend_score + total_osc_score) / 2,
+        }
+
+    @classmethod
+    def build(cls, data_cache: DataCache, quant_analyst, timestamps: Iterable = (),
+              lookback: int = 1000) -> 'PrecomputedQuantSignals':
+        """预计算全部信号并记录耗时"""
+        t0 = time.perf_counter()
+        signals = cls(data_cache=data_cache, quant_analyst=quant_analyst, lookback=lookback)
+        windows = signals.prepare(timestamps)
+        log.info(
+            f"⚡ Precomputed quant signals | {data_cache.symbol} | "
+            f"{len(data_cache.df_5m)} 5m bars, {windows} 1h regime windows | "
+            f"{time.perf_counter() - t0:.2f}s"
+        )
+        return signals
@@ -58,9 +58,14 @@ class BacktestStorage:
                 fee_tier TEXT,
                 include_funding BOOLEAN,
                 duration_seconds REAL,
-                status TEXT DEFAULT 'completed'
+                status TEXT DEFAULT 'completed',
+                error TEXT
             )
         ''')
+        # Databases created before the error column existed
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(backtest_runs)')}
+        if 'error' not in columns:
+            cursor.execute('ALTER TABLE backtest_runs ADD COLUMN error TEXT')
         
         # Metrics table
         cursor.execute('''
@@ -163,103 +168,10 @@ class BacktestStorage:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            # Save run configuration
-            cursor.execute('''
-                INSERT INTO backtest_runs (
-                    run_id, symbol, symbols, start_date, end_date,
-                    initial_capital, step, stop_loss_pct, take_profit_pct,
-                    leverage, margin_mode, contract_type, fee_tier,
-                    include_funding, duration_seconds
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                run_id,
-                config.get('symbol'),
-                json.dumps(config.get('symbols', [])),
-                config.get('start_date'),
-                config.get('end_date'),
-                config.get('initial_capital'),
-                config.get('step'),
-                config.get('stop_loss_pct'),
-                config.get('take_profit_pct'),
-                config.get('leverage'),
-                config.get('margin_mode'),
-                config.get('contract_type'),
-                config.get('fee_tier'),
-                config.get('include_funding'),
-                config.get('duration_seconds')
-            ))
-            
-            # Save metrics
-            cursor.execute('''
-                INSERT INTO backtest_metrics (
-                    run_id, total_return, annualized_return, max_drawdown_pct,
-                    sharpe_ratio, sortino_ratio, win_rate, total_trades,
-                    profit_factor, long_trades, short_trades, long_win_rate,
-                    short_win_rate, avg_holding_time, volatility
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                run_id,
-                metrics.get('total_return'),
-                metrics.get('annualized_return'),
-                metrics.get('max_drawdown_pct'),
-                metrics.get('sharpe_ratio'),
-                metrics.get('sortino_ratio'),
-                metrics.get('win_rate'),
-                metrics.get('total_trades'),
-                metrics.get('profit_factor'),
-                metrics.get('long_trades'),
-                metrics.get('short_trades'),
-                metrics.get('long_win_rate'),
-                metrics.get('short_win_rate'),
-                metrics.get('avg_holding_time'),
-                metrics.get('volatility')
-            ))
-            
-            # Save trades
-            for trade in trades:
-                cursor.execute('''
-                    INSERT INTO backtest_trades (
-                        run_id, trade_id, symbol, side, action, quantity,
-                        price, timestamp, pnl, pnl_pct, entry_price,
-                        holding_time, close_reason
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    run_id,
-                    trade.get('trade_id'),
-                    trade.get('symbol'),
-                    trade.get('side'),
-                    trade.get('action'),
-                    trade.get('quantity'),
-                    trade.get('price'),
-                    trade.get('timestamp'),
-                    trade.get('pnl'),
-                    trade.get('pnl_pct'),
-                    trade.get('entry_price'),
-                    trade.get('holding_time'),
-                    trade.get('close_reason')
-                ))
-            
-            # Save equity curve
-            for point in equity_curve:
-                cursor.execute('''
-                    INSERT INTO backtest_equity (
-                        run_id, timestamp, total_equity, cash,
-                        position_value, drawdown_pct
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    run_id,
-                    point.get('timestamp'),
-                    point.get('total_equity'),
-                    point.get('cash'),
-                    point.get('position_value'),
-                    point.get('drawdown_pct')
-                ))
-            
-            conn.commit()
-            
             # Get the auto-increment ID
-            backtest_id = cursor.lastrowid
+            backtest_id = self._write_backtest(cursor, run_id, config, metrics, trades, equity_curve)
             
+            conn.commit()
             conn.close()
             return backtest_id
             
@@ -267,6 +179,211 @@ class BacktestStorage:
             print(f"Error saving backtest: {e}")
             return None
     
+    def save_backtests_batch(self, records: List[Dict]) -> int:
+        """
+        Save many backtest results in a single transaction
+        
+        Args:
+            records: List of dicts with run_id, config, metrics, trades, equity_curve
+            
+        Returns:
+            Number of backtests saved (0 on failure, the batch is rolled back)
+        """
+        if not records:
+            return 0
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with conn:
+                    cursor = conn.cursor()
+                    for record in records:
+                        self._write_backtest(
+                            cursor,
+                            record['run_id'],
+                            record.get('config', {}),
+                            record.get('metrics', {}),
+                            record.get('trades', []),
+                            record.get('equity_curve', [])
+                        )
+            finally:
+                conn.close()
+            return len(records)
+            
+        except Exception as e:
+            print(f"Error saving backtest batch: {e}")
+            return 0
+    
+    def _write_backtest(self, cursor: sqlite3.Cursor, run_id: str, config: Dict, metrics: Dict,
+                        trades: List[Dict], equity_curve: List[Dict]) -> int:
+        """Insert one backtest (run, metrics, trades, equity) using an open cursor"""
+        # Save run configuration
+        cursor.execute('''
+            INSERT INTO backtest_runs (
+                run_id, symbol, symbols, start_date, end_date,
+                initial_capital, step, stop_loss_pct, take_profit_pct,
+                leverage, margin_mode, contract_type, fee_tier,
+                include_funding, duration_seconds, status, error
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            run_id,
+            config.get('symbol'),
+            json.dumps(config.get('symbols', [])),
+            config.get('start_date'),
+            config.get('end_date'),
+            config.get('initial_capital'),
+            config.get('step'),
+            config.get('stop_loss_pct'),
+            config.get('take_profit_pct'),
+            config.get('leverage'),
+            config.get('margin_mode'),
+            config.get('contract_type'),
+            config.get('fee_tier'),
+            config.get('include_funding'),
+            config.get('duration_seconds'),
+            config.get('status', 'completed'),
+            config.get('error')
+        ))
+        backtest_id = cursor.lastrowid
+        
+        # Save metrics
+        cursor.execute('''
+            INSERT INTO backtest_metrics (
+                run_id, total_return, annualized_return, max_drawdown_pct,
+                sharpe_ratio, sortino_ratio, win_rate, total_trades,
+                profit_factor, long_trades, short_trades, long_win_rate,
+                short_win_rate, avg_holding_time, volatility
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            run_id,
+            metrics.get('total_return'),
+            metrics.get('annualized_return'),
+            metrics.get('max_drawdown_pct'),
+            metrics.get('sharpe_ratio'),
+            metrics.get('sortino_ratio'),
+            metrics.get('win_rate'),
+            metrics.get('total_trades'),
+            metrics.get('profit_factor'),
+            metrics.get('long_trades'),
+            metrics.get('short_trades'),
+            metrics.get('long_win_rate'),
+            metrics.get('short_win_rate'),
+            metrics.get('avg_holding_time'),
+            metrics.get('volatility')
+        ))
+        
+        # Save trades
+        cursor.executemany('''
+            INSERT INTO backtest_trades (
+                run_id, trade_id, symbol, side, action, quantity,
+                price, timestamp, pnl, pnl_pct, entry_price,
+                holding_time, close_reason
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (
+                run_id,
+                trade.get('trade_id'),
+                trade.get('symbol'),
+                trade.get('side'),
+                trade.get('action'),
+                trade.get('quantity'),
+                trade.get('price'),
+                trade.get('timestamp'),
+                trade.get('pnl'),
+                trade.get('pnl_pct'),
+                trade.get('entry_price'),
+                trade.get('holding_time'),
+                trade.get('close_reason')
+            )
+            for trade in trades
+        ])
+        
+        # Save equity curve
+        cursor.executemany('''
+            INSERT INTO backtest_equity (
+                run_id, timestamp, total_equity, cash,
+                position_value, drawdown_pct
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (
+                run_id,
+                point.get('timestamp'),
+                point.get('total_equity'),
+                point.get('cash'),
+                point.get('position_value'),
+                point.get('drawdown_pct')
+            )
+            for point in equity_curve
+        ])
+        
+        return backtest_id
+    
+    def create_optimization_session(self, session_id: str, symbol: str,
+                                    optimization_target: str, parameter_space: Dict) -> bool:
+        """
+        Register a parameter optimization session (status 'running')
+        
+        Args:
+            session_id: Unique session identifier
+            symbol: Trading symbol being optimized
+            optimization_target: Metric being optimized (e.g. sharpe_ratio)
+            parameter_space: Searched parameter space
+            
+        Returns:
+            True if successful
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO optimization_sessions (
+                    session_id, symbol, optimization_target, parameter_space
+                ) VALUES (?, ?, ?, ?)
+            ''', (session_id, symbol, optimization_target, json.dumps(parameter_space)))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"Error creating optimization session: {e}")
+            return False
+    
+    def finish_optimization_session(self, session_id: str, best_run_id: Optional[str],
+                                    status: str = 'completed') -> bool:
+        """Record the best run of an optimization session and close it"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE optimization_sessions SET best_run_id = ?, status = ?
+                WHERE session_id = ?
+            ''', (best_run_id, status, session_id))
+            conn.commit()
+            updated = cursor.rowcount > 0
+            conn.close()
+            return updated
+        except Exception as e:
+            print(f"Error finishing optimization session: {e}")
+            return False
+    
+    def get_optimization_session(self, session_id: str) -> Optional[Dict]:
+        """Retrieve an optimization session with its parameter space decoded"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM optimization_sessions WHERE session_id = ?', (session_id,))
+            row = cursor.fetchone()
+            conn.close()
+            if not row:
+                return None
+            session = dict(row)
+            if session.get('parameter_space'):
+                session['parameter_space'] = json.loads(session['parameter_space'])
+            return session
+        except Exception as e:
+            print(f"Error getting optimization session: {e}")
+            return None
+    
     def get_backtest(self, run_id: str) -> Optional[Dict]:
         """
         Retrieve complete backtest results
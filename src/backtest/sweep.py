@@ -0,0 +1,426 @@
+"""
+并行参数扫描 (Parameter Sweep)
+==============================
+
+在进程池中对 BacktestConfig 字段做 grid / random / successive-halving 搜索：
+- 每个 symbol/日期区间的数据只加载一次，通过进程池 initializer 下发给每个 worker，
+  之后所有 trial 复用同一份 DataCache（不再逐次请求 API / 读缓存）
+- 每个 trial 的结果按批写入 BacktestStorage（单事务 executemany）
+- 扫描会话记录到 optimization_sessions 表（参数空间、目标、最佳 run_id）
+
+用法:
+    sweep = ParameterSweep(base_config, {'stop_loss_pct': [0.5, 1.0], 'take_profit_pct': [1.0, 2.0]})
+    trials = await sweep.grid()
+    trials = await sweep.random(n_trials=100, seed=42)
+    trials = await sweep.successive_halving(n_trials=81, eta=3)
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import asyncio
+import dataclasses
+import itertools
+import math
+import multiprocessing
+import os
+import random as random_module
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.backtest.data_replay import DataCache, DataReplayAgent
+from src.backtest.engine import BacktestConfig, BacktestEngine
+from src.backtest.storage import BacktestStorage
+from src.utils.logger import log
+
+SEARCH_MODES = ("grid", "random", "successive_halving")
+
+# 越小越好的目标（排序时取反）
+MINIMIZE_OBJECTIVES = {"max_drawdown_pct"}
+
+# 参数取值：离散列表，或 (low, high) 连续区间（仅 random / successive_halving）
+ParamValues = Union[Sequence[Any], Tuple[float, float]]
+
+
+@dataclass
+class SweepTrial:
+    """单个参数组合的回测结果"""
+    trial_id: int
+    run_id: str
+    params: Dict[str, Any]
+    budget: float = 1.0  # 使用的回测窗口比例（successive halving）
+    metrics: Dict[str, float] = field(default_factory=dict)
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    def score(self, objective: str) -> float:
+        """按目标计算排序分数（越大越好，失败为 -inf）"""
+        if not self.success or objective not in self.metrics:
+            return float('-inf')
+        value = float(self.metrics[objective])
+        if math.isnan(value):
+            return float('-inf')
+        return -value if objective in MINIMIZE_OBJECTIVES else value
+
+
+# ========== Worker 进程 ==========
+
+_WORKER_DATA: Optional[DataCache] = None
+
+
+def _init_worker(data_cache: DataCache):
+    """进程池 initializer：每个 worker 只接收一次数据集"""
+    global _WORKER_DATA
+    _WORKER_DATA = data_cache
+
+
+def _equity_points(equity_curve) -> List[Dict]:
+    """净值曲线 DataFrame -> BacktestStorage 的 equity 记录"""
+    if equity_curve is None or equity_curve.empty:
+        return []
+    return [
+        {
+            'timestamp': ts.isoformat() if hasattr(ts, 'isoformat') else str(ts),
+            'total_equity': float(row.total_equity),
+            'cash': float(row.cash),
+            'position_value': float(row.position_value),
+            'drawdown_pct': float(row.drawdown_pct),
+        }
+        for ts, row in zip(equity_curve.index, equity_curve.itertuples(index=False))
+    ]
+
+
+def _run_trial(task: Dict) -> Dict:
+    """在 worker 中运行单个 trial，返回可序列化的结果"""
+    config = BacktestConfig(**task['config'])
+    result = {
+        'trial_id': task['trial_id'],
+        'run_id': task['run_id'],
+        'config': task['config'],
+        'error': None,
+    }
+    try:
+        engine = BacktestEngine(config, data_cache=_WORKER_DATA)
+        backtest = asyncio.run(engine.run())
+        metrics = dataclasses.asdict(backtest.metrics)
+        result.update({
+            'metrics': metrics,
+            'trades': [t.to_dict() for t in backtest.trades],
+            'equity_curve': _equity_points(backtest.equity_curve),
+            'duration_seconds': backtest.duration_seconds,
+        })
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# ========== Sweep 引擎 ==========
+
+class ParameterSweep:
+    """
+    进程并行参数扫描
+
+    所有 trial 共享 base_config 的 symbol 与日期区间，只覆盖 space 中的字段。
+    """
+
+    DEFAULT_BATCH_SIZE = 20
+    TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+    def __init__(
+        self,
+        base_config: BacktestConfig,
+        space: Dict[str, ParamValues],
+        objective: str = "sharpe_ratio",
+        workers: Optional[int] = None,
+        storage: Optional[BacktestStorage] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        data_cache: Optional[DataCache] = None
+    ):
+        """
+        Args:
+            base_config: 基础回测配置（symbol / 日期区间 / 默认参数）
+            space: 参数空间 {BacktestConfig 字段: 取值列表 或 (low, high)}
+            objective: 排序目标（total_return / sharpe_ratio / sortino_ratio / win_rate /
+                       profit_factor / max_drawdown_pct）
+            workers: 进程数，默认 CPU 核数；1 表示在当前进程顺序执行
+            storage: BacktestStorage（None 则不持久化）
+            batch_size: 每批写入数据库的 trial 数
+            data_cache: 预加载的数据（None 则在首次运行时加载）
+        """
+        valid_fields = {f.name for f in dataclasses.fields(BacktestConfig)}
+        unknown = set(space) - valid_fields
+        if unknown:
+            raise ValueError(f"Unknown BacktestConfig fields in parameter space: {sorted(unknown)}")
+        if not space:
+            raise ValueError("Parameter space must not be empty")
+
+        self.base_config = base_config
+        self.space = dict(space)
+        self.objective = objective
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.storage = storage
+        self.batch_size = max(1, batch_size)
+        self.data_cache = data_cache
+
+        self.session_id = f"opt_{uuid.uuid4().hex[:10]}"
+        self._next_trial_id = 0
+        self._pending_writes: List[Dict] = []
+
+    # ---------- 搜索策略 ----------
+
+    async def grid(self) -> List[SweepTrial]:
+        """网格搜索（所有取值必须是离散列表）"""
+        for name, values in self.space.items():
+            if self._is_range(values):
+                raise ValueError(f"Grid search needs discrete values for '{name}'")
+        names = list(self.space)
+        combos = [dict(zip(names, combo)) for combo in itertools.product(*(self.space[n] for n in names))]
+        return await self._run_session("grid", combos)
+
+    async def random(self, n_trials: int, seed: Optional[int] = None) -> List[SweepTrial]:
+        """随机搜索"""
+        rng = random_module.Random(seed)
+        combos = [self._sample(rng) for _ in range(n_trials)]
+        return await self._run_session("random", combos)
+
+    async def successive_halving(
+        self,
+        n_trials: int,
+        eta: int = 3,
+        min_budget: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> List[SweepTrial]:
+        """
+        Successive halving: 先用较短窗口评估全部候选，每轮保留前 1/eta，
+        窗口扩大 eta 倍，直到完整窗口
+
+        Args:
+            n_trials: 初始候选数
+            eta: 每轮淘汰比例
+            min_budget: 首轮窗口比例（默认 eta^-(轮数-1)）
+        """
+        if eta < 2:
+            raise ValueError("eta must be >= 2")
+        rng = random_module.Random(seed)
+        candidates = [self._sample(rng) for _ in range(n_trials)]
+
+        rungs = max(1, int(math.log(max(n_trials, 1), eta)) + 1)
+        budget = min_budget if min_budget is not None else float(eta) ** -(rungs - 1)
+
+        await self._begin_session("successive_halving")
+        all_trials: List[SweepTrial] = []
+        try:
+            while True:
+                budget = min(budget, 1.0)
+                trials = await self._evaluate(candidates, budget)
+                all_trials.extend(trials)
+                ranked = self._rank(trials)
+                best_value = ranked[0].metrics.get(self.objective) if ranked and ranked[0].success else None
+                log.info(
+                    f"🔬 Sweep rung: budget={budget:.2f} | {len(trials)} trials | "
+                    f"best {self.objective}={best_value}"
+                )
+                if budget >= 1.0 or len(ranked) <= 1:
+                    break
+                keep = max(1, len(ranked) // eta)
+                candidates = [t.params for t in ranked[:keep] if t.success] or [ranked[0].params]
+                budget *= eta
+        finally:
+            self._flush()
+
+        final = self._rank([t for t in all_trials if t.budget >= budget])
+        self._finish_session(final)
+        return final
+
+    # ---------- 内部 ----------
+
+    @staticmethod
+    def _is_range(values: ParamValues) -> bool:
+        return (
+            isinstance(values, tuple) and len(values) == 2
+            and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+        )
+
+    def _sample(self, rng: random_module.Random) -> Dict[str, Any]:
+        params = {}
+        for name, values in self.space.items():
+            if self._is_range(values):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(values))
+        return params
+
+    def _rank(self, trials: List[SweepTrial]) -> List[SweepTrial]:
+        # 稳定排序：分数相同按 trial_id 先后
+        return sorted(trials, key=lambda t: t.score(self.objective), reverse=True)
+
+    async def _ensure_data(self):
+        """每个 symbol/日期区间只加载一次数据"""
+        if self.data_cache is not None:
+            return
+        replay = DataReplayAgent(
+            symbol=self.base_config.symbol,
+            start_date=self.base_config.start_date,
+            end_date=self.base_config.end_date
+        )
+        if not await replay.load_data():
+            raise RuntimeError(f"Failed to load historical data for {self.base_config.symbol}")
+        self.data_cache = replay.data_cache
+
+    def _window_end(self, budget: float) -> str:
+        """按预算比例截取回测窗口"""
+        if budget >= 1.0:
+            return self.base_config.end_date
+        start = self._parse(self.base_config.start_date)
+        end = self._parse(self.base_config.end_date, is_end=True)
+        return (start + (end - start) * budget).strftime(self.TIME_FORMAT)
+
+    @classmethod
+    def _parse(cls, value: str, is_end: bool = False) -> datetime:
+        try:
+            return datetime.strptime(value, cls.TIME_FORMAT)
+        except ValueError:
+            dt = datetime.strptime(value, "%Y-%m-%d")
+            # 与 DataReplayAgent 一致：仅日期的结束时间包含当天
+            return dt.replace(hour=23, minute=59) if is_end else dt
+
+    def _build_tasks(self, combos: List[Dict[str, Any]], budget: float) -> List[Dict]:
+        base = dataclasses.asdict(self.base_config)
+        end_date = self._window_end(budget)
+        tasks = []
+        for params in combos:
+            trial_id = self._next_trial_id
+            self._next_trial_id += 1
+            tasks.append({
+                'trial_id': trial_id,
+                'run_id': f"{self.session_id}_{trial_id:04d}",
+                'params': params,
+                'budget': budget,
+                'config': {**base, **params, 'end_date': end_date},
+            })
+        return tasks
+
+    async def _evaluate(self, combos: List[Dict[str, Any]], budget: float = 1.0) -> List[SweepTrial]:
+        """在进程池中运行一组 trial，按完成顺序分批写库，按提交顺序返回"""
+        await self._ensure_data()
+        tasks = self._build_tasks(combos, budget)
+        if not tasks:
+            return []
+
+        workers = min(self.workers, len(tasks))
+        results: Dict[int, Dict] = {}
+        if workers <= 1:
+            _init_worker(self.data_cache)
+            loop = asyncio.get_running_loop()
+            for task in tasks:
+                result = await loop.run_in_executor(None, _run_trial, task)
+                results[task['trial_id']] = result
+                self._queue_write(result)
+        else:
+            loop = asyncio.get_running_loop()
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.data_cache,)
+            )
+            try:
+                futures = [loop.run_in_executor(pool, _run_trial, task) for task in tasks]
+                for next_done in asyncio.as_completed(futures):
+                    result = await next_done
+                    results[result['trial_id']] = result
+                    self._queue_write(result)
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        trials = []
+        for task in tasks:
+            result = results[task['trial_id']]
+            trials.append(SweepTrial(
+                trial_id=task['trial_id'],
+                run_id=task['run_id'],
+                params=task['params'],
+                budget=budget,
+                metrics=result.get('metrics', {}),
+                duration_seconds=result.get('duration_seconds', 0.0),
+                error=result.get('error'),
+            ))
+        return trials
+
+    async def _run_session(self, mode: str, combos: List[Dict[str, Any]]) -> List[SweepTrial]:
+        await self._begin_session(mode)
+        try:
+            trials = await self._evaluate(combos)
+        finally:
+            self._flush()
+        ranked = self._rank(trials)
+        self._finish_session(ranked)
+        return ranked
+
+    async def _begin_session(self, mode: str):
+        log.info(
+            f"🔬 Parameter sweep {self.session_id} | {mode} | {self.base_config.symbol} | "
+            f"{self.base_config.start_date} → {self.base_config.end_date} | workers={self.workers}"
+        )
+        if self.storage is not None:
+            self.storage.create_optimization_session(
+                session_id=self.session_id,
+                symbol=self.base_config.symbol,
+                optimization_target=self.objective,
+                parameter_space={
+                    'mode': mode,
+                    'space': {k: list(v) for k, v in self.space.items()},
+                },
+            )
+
+    def _finish_session(self, ranked: List[SweepTrial]):
+        best = next((t for t in ranked if t.success), None)
+        if best is not None:
+            log.info(f"🏆 Sweep best: {best.params} | {self.objective}={best.metrics.get(self.objective)}")
+        if self.storage is not None:
+            self.storage.finish_optimization_session(
+                self.session_id,
+                best_run_id=best.run_id if best else None,
+                status='completed' if best else 'failed'
+            )
+
+    def _queue_write(self, result: Dict):
+        """失败的 trial 也写库（status='failed' + 错误信息），便于事后排查"""
+        if self.storage is None:
+            return
+        self._pending_writes.append(result)
+        if len(self._pending_writes) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        """把累积的 trial 结果一次性写入数据库"""
+        if self.storage is None or not self._pending_writes:
+            return
+        records = []
+        for result in self._pending_writes:
+            config = dict(result['config'])
+            config['duration_seconds'] = result.get('duration_seconds')
+            if result.get('error'):
+                config['status'] = 'failed'
+                config['error'] = result['error']
+            records.append({
+                'run_id': result['run_id'],
+                'config': config,
+                'metrics': result.get('metrics', {}),
+                'trades': result.get('trades', []),
+                'equity_curve': result.get('equity_curve', []),
+            })
+        saved = self.storage.save_backtests_batch(records)
+        log.debug(f"💾 Sweep batch saved: {saved}/{len(records)} trials")
+        self._pending_writes = []
@@ -0,0 +1,474 @@
+"""
+向量化投资组合模拟器 (Vectorized Portfolio Simulator)
+=====================================================
+
+BacktestPortfolio 的快速路径：输入预先计算好的开/平仓信号数组与 K 线 OHLC，
+在一个只操作 NumPy 数组和标量的紧凑循环中回放成交、手续费、滑点、
+资金费率和强平，输出与 PerformanceMetrics.calculate 相同的净值曲线与交易列表。
+
+每根 K 线的事件顺序与 BacktestEngine.run 一致：
+1. 资金费率结算（标记价格缺失时使用开盘价）
+2. 强平检查（开盘价）；被强平则跳过本根 K 线的后续步骤
+3. 信号执行（开盘价）：先平仓，再开仓
+4. 盘中止损 / 止盈 / 移动止损（K 线 high/low）
+5. 记录净值（开盘价）
+
+适用于止损、止盈、移动止损等参数扫描：信号只需生成一次，每组参数只跑一次循环。
+安装 numba 时循环会被 JIT 编译，否则以纯 Python 运行（结果相同）。
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.portfolio import FeeStructure, MarginConfig, MarginMode, Side, Trade
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# 交易类型 / 平仓原因编码
+KIND_OPEN, KIND_CLOSE, KIND_LIQUIDATION = 0, 1, 2
+REASONS = (None, "signal", "stop_loss", "take_profit", "trailing_stop", "liquidation", "backtest_end")
+_ACTIONS = ("open", "close", "liquidation")
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+def _mm_rate(value, limits, rates):
+    """阶梯维持保证金率（与 MarginConfig.get_maintenance_margin_rate 一致）"""
+    for k in range(len(limits)):
+        if value <= limits[k]:
+            return rates[k]
+    return rates[len(rates) - 1]
+
+
+def _simulate(
+    open_, high, low, entries, exits, quantity, funding_rate, mark_price, record,
+    initial_capital, slippage, commission, leverage, sl_pct, tp_pct, trail_pct,
+    cross_margin, mm_limits, mm_rates, liq_fee_rate, close_at_end,
+    eq_cash, eq_position_value, eq_total, eq_drawdown, eq_drawdown_pct, eq_recorded,
+    tr_bar, tr_side, tr_kind, tr_qty, tr_price, tr_pnl, tr_pnl_pct, tr_commission,
+    tr_slippage, tr_entry_price, tr_entry_bar, tr_reason,
+):
+    """
+    核心回放循环（只使用数组与标量，可被 numba 编译）
+
+    side: +1 多 / -1 空 / 0 空仓
+    Returns:
+        (交易数, 现金, 资金费累计, 强平次数, 峰值净值, 最后处理的 K 线)
+    """
+    n = len(open_)
+    cash = initial_capital
+    peak = initial_capital
+    funding_total = 0.0
+    liquidations = 0
+    n_trades = 0
+    last_bar = -1
+
+    side = 0
+    qty = 0.0
+    entry = 0.0
+    entry_bar = -1
+    stop_loss = np.nan
+    take_profit = np.nan
+    highest = 0.0
+    lowest = np.inf
+
+    for i in range(n):
+        price = open_[i]
+        last_bar = i
+
+        # 1. 资金费率
+        rate = funding_rate[i]
+        if side != 0 and rate == rate:
+            mark = mark_price[i]
+            if not (mark > 0):
+                mark = price
+            fee = qty * mark * abs(rate)
+            if (side > 0) == (rate > 0):
+                impact = -fee
+            else:
+                impact = fee
+            cash += impact
+            funding_total += impact
+
+        # 2. 强平
+        if side != 0:
+            position_value = qty * price
+            pnl = (price - entry) * qty * side
+            if cross_margin:
+                equity = cash + pnl
+            else:
+                equity = position_value / leverage + pnl
+            maintenance = position_value * _mm_rate(position_value, mm_limits, mm_rates)
+            if equity < maintenance:
+                liq_fee = qty * price * liq_fee_rate
+                loss = -(qty * entry / leverage) + min(pnl, 0.0) - liq_fee
+                cash = max(0.0, cash + loss)
+                tr_bar[n_trades] = i
+                tr_side[n_trades] = side
+                tr_kind[n_trades] = KIND_LIQUIDATION
+                tr_qty[n_trades] = qty
+                tr_price[n_trades] = price
+                tr_pnl[n_trades] = pnl - liq_fee
+                tr_pnl_pct[n_trades] = pnl / (qty * entry) * 100
+                tr_commission[n_trades] = 0.0
+                tr_slippage[n_trades] = 0.0
+                tr_entry_price[n_trades] = entry
+                tr_entry_bar[n_trades] = entry_bar
+                tr_reason[n_trades] = 5
+                n_trades += 1
+                liquidations += 1
+                side = 0
+                continue
+
+        # 3. 信号：先平仓
+        if side != 0 and exits[i]:
+            slip = price * slippage
+            exec_price = price - slip * side
+            pnl = (exec_price - entry) * qty * side
+            fee = qty * exec_price * commission
+            cash += qty * entry / leverage + pnl - fee
+            tr_bar[n_trades] = i
+            tr_side[n_trades] = side
+            tr_kind[n_trades] = KIND_CLOSE
+            tr_qty[n_trades] = qty
+            tr_price[n_trades] = exec_price
+            tr_pnl[n_trades] = pnl
+            tr_pnl_pct[n_trades] = pnl / (qty * entry) * 100
+            tr_commission[n_trades] = fee
+            tr_slippage[n_trades] = slip * qty
+            tr_entry_price[n_trades] = entry
+            tr_entry_bar[n_trades] = entry_bar
+            tr_reason[n_trades] = 1
+            n_trades += 1
+            side = 0
+
+        # 再开仓
+        if side == 0 and entries[i] != 0 and quantity[i] > 0:
+            new_side = 1 if entries[i] > 0 else -1
+            slip = price * slippage
+            exec_price = price + slip * new_side
+            notional = quantity[i] * exec_price
+            fee = notional * commission
+            total_cost = notional / leverage + fee
+            if total_cost <= cash:
+                side = new_side
+                qty = quantity[i]
+                entry = exec_price
+                entry_bar = i
+                cash -= total_cost
+                stop_loss = np.nan
+                take_profit = np.nan
+                if sl_pct > 0:
+                    stop_loss = exec_price * (1 - side * sl_pct / 100)
+                if tp_pct > 0:
+                    take_profit = exec_price * (1 + side * tp_pct / 100)
+                highest = exec_price
+                lowest = exec_price
+                tr_bar[n_trades] = i
+                tr_side[n_trades] = side
+                tr_kind[n_trades] = KIND_OPEN
+                tr_qty[n_trades] = qty
+                tr_price[n_trades] = exec_price
+                tr_pnl[n_trades] = 0.0
+                tr_pnl_pct[n_trades] = 0.0
+                tr_commission[n_trades] = fee
+                tr_slippage[n_trades] = slip * qty
+                tr_entry_price[n_trades] = np.nan
+                tr_entry_bar[n_trades] = -1
+                tr_reason[n_trades] = 0
+                n_trades += 1
+
+        # 4. 盘中止损 / 止盈 / 移动止损（保守顺序）
+        if side != 0:
+            exit_price = np.nan
+            reason = 0
+            if side > 0:
+                if high[i] > highest:
+                    highest = high[i]
+                if stop_loss == stop_loss and low[i] <= stop_loss:
+                    exit_price = stop_loss
+                    reason = 2
+                elif take_profit == take_profit and high[i] >= take_profit:
+                    exit_price = take_profit
+                    reason = 3
+                elif trail_pct == trail_pct:
+                    trail_stop = highest * (1 - trail_pct / 100)
+                    if low[i] <= trail_stop:
+                        exit_price = trail_stop
+                        reason = 4
+            else:
+                if low[i] < lowest:
+                    lowest = low[i]
+                if stop_loss == stop_loss and high[i] >= stop_loss:
+                    exit_price = stop_loss
+                    reason = 2
+                elif take_profit == take_profit and low[i] <= take_profit:
+                    exit_price = take_profit
+                    reason = 3
+                elif trail_pct == trail_pct:
+                    trail_stop = lowest * (1 + trail_pct / 100)
+                    if high[i] >= trail_stop:
+                        exit_price = trail_stop
+                        reason = 4
+            if reason != 0:
+                slip = exit_price * slippage
+                exec_price = exit_price - slip * side
+                pnl = (exec_price - entry) * qty * side
+                fee = qty * exec_price * commission
+                cash += qty * entry / leverage + pnl - fee
+                tr_bar[n_trades] = i
+                tr_side[n_trades] = side
+                tr_kind[n_trades] = KIND_CLOSE
+                tr_qty[n_trades] = qty
+                tr_price[n_trades] = exec_price
+                tr_pnl[n_trades] = pnl
+                tr_pnl_pct[n_trades] = pnl / (qty * entry) * 100
+                tr_commission[n_trades] = fee
+                tr_slippage[n_trades] = slip * qty
+                tr_entry_price[n_trades] = entry
+                tr_entry_bar[n_trades] = entry_bar
+                tr_reason[n_trades] = reason
+                n_trades += 1
+                side = 0
+
+        # 5. 净值
+        if record[i]:
+            total = cash
+            position_value = 0.0
+            if side != 0:
+                pnl = (price - entry) * qty * side
+                total = cash + qty * entry / leverage + pnl
+                position_value = qty * entry + pnl
+            if total > peak:
+                peak = total
+            eq_cash[i] = cash
+            eq_position_value[i] = position_value
+            eq_total[i] = total
+            eq_drawdown[i] = peak - total
+            eq_drawdown_pct[i] = (peak - total) / peak * 100 if peak > 0 else 0.0
+            eq_recorded[i] = True
+
+    # 回测结束强制平仓（开盘价，与 BacktestEngine._close_all_positions 一致）
+    if close_at_end and side != 0 and last_bar >= 0:
+        price = open_[last_bar]
+        slip = price * slippage
+        exec_price = price - slip * side
+        pnl = (exec_price - entry) * qty * side
+        fee = qty * exec_price * commission
+        cash += qty * entry / leverage + pnl - fee
+        tr_bar[n_trades] = last_bar
+        tr_side[n_trades] = side
+        tr_kind[n_trades] = KIND_CLOSE
+        tr_qty[n_trades] = qty
+        tr_price[n_trades] = exec_price
+        tr_pnl[n_trades] = pnl
+        tr_pnl_pct[n_trades] = pnl / (qty * entry) * 100
+        tr_commission[n_trades] = fee
+        tr_slippage[n_trades] = slip * qty
+        tr_entry_price[n_trades] = entry
+        tr_entry_bar[n_trades] = entry_bar
+        tr_reason[n_trades] = 6
+        n_trades += 1
+
+    return n_trades, cash, funding_total, liquidations, peak, last_bar
+
+
+if HAS_NUMBA:
+    _mm_rate = njit(cache=True)(_mm_rate)
+    _simulate = njit(cache=True)(_simulate)
+
+
+@dataclass
+class SimulationResult:
+    """模拟结果（equity_curve / trades 可直接传给 PerformanceMetrics.calculate）"""
+    equity_curve: pd.DataFrame
+    trades: List[Trade]
+    final_cash: float
+    peak_equity: float
+    total_funding_paid: float = 0.0
+    total_fees_paid: float = 0.0
+    total_slippage_cost: float = 0.0
+    liquidation_count: int = 0
+    trade_arrays: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+
+class VectorizedPortfolioSimulator:
+    """
+    基于 NumPy 数组的单品种投资组合模拟器（BacktestPortfolio 快速路径）
+
+    构造参数与 BacktestPortfolio 相同；未显式给出 commission 时使用
+    FeeStructure 的 taker 费率（信号在开盘价市价成交）。
+    """
+
+    def __init__(
+        self,
+        initial_capital: float,
+        slippage: float = 0.001,
+        commission: Optional[float] = None,
+        margin_config: MarginConfig = None,
+        fee_structure: FeeStructure = None
+    ):
+        self.initial_capital = initial_capital
+        self.slippage = slippage
+        self.margin_config = margin_config or MarginConfig()
+        self.fee_structure = fee_structure or FeeStructure()
+        self.commission = commission if commission is not None else self.fee_structure.get_fee(is_maker=False)
+
+        tiers = self.margin_config.tiered_margins
+        self._mm_limits = np.array([t[0] for t in tiers], dtype=float)
+        self._mm_rates = np.array([t[1] for t in tiers], dtype=float)
+
+    @staticmethod
+    def funding_arrays(replay, timestamps: Sequence[datetime]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        按 K 线对齐回放数据中的资金费率结算（与 BacktestEngine.run 的判定一致）
+
+        Returns:
+            (funding_rate, mark_price)，无结算的 K 线为 NaN
+        """
+        n = len(timestamps)
+        rates = np.full(n, np.nan)
+        marks = np.full(n, np.nan)
+        for settlement in replay.funding_schedule(list(timestamps)):
+            rates[settlement.step] = settlement.funding_rate
+            if settlement.mark_price > 0:
+                marks[settlement.step] = settlement.mark_price
+        return rates, marks
+
+    def run(
+        self,
+        timestamps: Sequence[datetime],
+        open_: ArrayLike,
+        high: ArrayLike,
+        low: ArrayLike,
+        entries: ArrayLike,
+        exits: Optional[ArrayLike] = None,
+        quantity: Union[float, ArrayLike] = 0.0,
+        stop_loss_pct: Optional[float] = None,
+        take_profit_pct: Optional[float] = None,
+        trailing_stop_pct: Optional[float] = None,
+        funding_rates: Optional[ArrayLike] = None,
+        mark_prices: Optional[ArrayLike] = None,
+        record_mask: Optional[ArrayLike] = None,
+        symbol: str = "BTCUSDT",
+        close_at_end: bool = True
+    ) -> SimulationResult:
+        """
+        回放一组信号
+
+        Args:
+            timestamps: K 线时间
+            open_/high/low: K 线价格（开盘价为成交价，high/low 用于盘中止损止盈）
+            entries: 开仓信号 (+1 多 / -1 空 / 0 无)，仅空仓时生效
+            exits: 平仓信号 (bool)，在开仓信号之前处理
+            quantity: 开仓数量（标量或逐 K 线数组）
+            stop_loss_pct / take_profit_pct / trailing_stop_pct: 百分比，None 表示关闭
+            funding_rates / mark_prices: 逐 K 线资金费率结算（NaN 表示无结算），见 funding_arrays
+            record_mask: 需要记录净值的 K 线（默认全部）
+        """
+        open_ = np.ascontiguousarray(open_, dtype=float)
+        n = len(open_)
+        high = np.ascontiguousarray(high, dtype=float)
+        low = np.ascontiguousarray(low, dtype=float)
+        entries = np.ascontiguousarray(entries, dtype=np.int64)
+        exits = np.zeros(n, dtype=np.bool_) if exits is None else np.ascontiguousarray(exits, dtype=np.bool_)
+        quantity = np.broadcast_to(np.asarray(quantity, dtype=float), (n,)).copy()
+        funding_rates = np.full(n, np.nan) if funding_rates is None else np.ascontiguousarray(funding_rates, dtype=float)
+        mark_prices = np.full(n, np.nan) if mark_prices is None else np.ascontiguousarray(mark_prices, dtype=float)
+        record = np.ones(n, dtype=np.bool_) if record_mask is None else np.ascontiguousarray(record_mask, dtype=np.bool_)
+        for name, arr in (('high', high), ('low', low), ('entries', entries), ('exits', exits),
+                          ('funding_rates', funding_rates), ('mark_prices', mark_prices), ('record_mask', record)):
+            if len(arr) != n:
+                raise ValueError(f"{name} has {len(arr)} rows, expected {n}")
+
+        eq = {key: np.zeros(n) for key in ('cash', 'position_value', 'total_equity', 'drawdown', 'drawdown_pct')}
+        eq_recorded = np.zeros(n, dtype=np.bool_)
+
+        # 每根 K 线最多 3 笔成交（平仓、开仓、盘中平仓），外加结束平仓
+        cap = 3 * n + 1
+        tr = {
+            'bar': np.zeros(cap, dtype=np.int64),
+            'side': np.zeros(cap, dtype=np.int64),
+            'kind': np.zeros(cap, dtype=np.int64),
+            'quantity': np.zeros(cap),
+            'price': np.zeros(cap),
+            'pnl': np.zeros(cap),
+            'pnl_pct': np.zeros(cap),
+            'commission': np.zeros(cap),
+            'slippage': np.zeros(cap),
+            'entry_price': np.zeros(cap),
+            'entry_bar': np.zeros(cap, dtype=np.int64),
+            'reason': np.zeros(cap, dtype=np.int64),
+        }
+
+        n_trades, cash, funding_total, liquidations, peak, _ = _simulate(
+            open_, high, low, entries, exits, quantity, funding_rates, mark_prices, record,
+            float(self.initial_capital), float(self.slippage), float(self.commission),
+            float(self.margin_config.leverage),
+            float(stop_loss_pct or 0.0), float(take_profit_pct or 0.0),
+            np.nan if trailing_stop_pct is None else float(trailing_stop_pct),
+            self.margin_config.mode == MarginMode.CROSS,
+            self._mm_limits, self._mm_rates, float(self.margin_config.liquidation_fee), close_at_end,
+            eq['cash'], eq['position_value'], eq['total_equity'], eq['drawdown'], eq['drawdown_pct'], eq_recorded,
+            tr['bar'], tr['side'], tr['kind'], tr['quantity'], tr['price'], tr['pnl'], tr['pnl_pct'],
+            tr['commission'], tr['slippage'], tr['entry_price'], tr['entry_bar'], tr['reason'],
+        )
+        tr = {key: arr[:n_trades] for key, arr in tr.items()}
+
+        index = pd.DatetimeIndex(timestamps)
+        equity_curve = pd.DataFrame(
+            {key: arr[eq_recorded] for key, arr in eq.items()},
+            index=pd.Index(index[eq_recorded], name='timestamp'),
+        )
+
+        return SimulationResult(
+            equity_curve=equity_curve,
+            trades=self._build_trades(tr, list(timestamps), symbol),
+            final_cash=cash,
+            peak_equity=peak,
+            total_funding_paid=funding_total,
+            total_fees_paid=float(tr['commission'].sum()),
+            total_slippage_cost=float(tr['slippage'].sum()),
+            liquidation_count=int(liquidations),
+            trade_arrays=tr,
+        )
+
+    @staticmethod
+    def _build_trades(tr: Dict[str, np.ndarray], timestamps: List[datetime], symbol: str) -> List[Trade]:
+        """把成交数组转换为 Trade 列表（每笔成交一次，不是每根 K 线一次）"""
+        trades = []
+        for k in range(len(tr['bar'])):
+            bar = int(tr['bar'][k])
+            kind = int(tr['kind'][k])
+            timestamp = timestamps[bar]
+            trade = Trade(
+                trade_id=k + 1,
+                symbol=symbol,
+                side=Side.LONG if tr['side'][k] > 0 else Side.SHORT,
+                action=_ACTIONS[kind],
+                quantity=float(tr['quantity'][k]),
+                price=float(tr['price'][k]),
+                timestamp=timestamp,
+                pnl=float(tr['pnl'][k]),
+                pnl_pct=float(tr['pnl_pct'][k]),
+                commission=float(tr['commission'][k]),
+                slippage=float(tr['slippage'][k]),
+            )
+            if kind != KIND_OPEN:
+                entry_time = timestamps[int(tr['entry_bar'][k])]
+                trade.entry_price = float(tr['entry_price'][k])
+                trade.holding_time = (timestamp - entry_time).total_seconds() / 3600
+                trade.close_reason = REASONS[int(tr['reason'][k])]
+            trades.append(trade)
+        return trades
@@ -0,0 +1,416 @@
+"""
+增量技术指标引擎 (Incremental Indicator Engine)
+================================================
+
+按 (symbol, interval) 维护指标状态，每收到一根已收盘 K 线只做 O(1) 更新：
+- 递归型: EMA / MACD / Wilder RSI / ATR / ADX / OBV
+- 窗口型: SMA / 布林带 / KDJ / 成交量均线 / VWAP（固定长度窗口）
+
+输出列名与 MarketDataProcessor._calculate_indicators 完全一致，
+数值与批量实现（ta 库）逐根等价，下游 Agent 可直接消费。
+
+用法:
+    engine = IncrementalIndicatorEngine()
+    engine.seed("BTCUSDT", "5m", history_klines)     # 冷启动一次
+    row = engine.update("BTCUSDT", "5m", new_kline)  # 每根新 K 线
+    df = engine.get_frame("BTCUSDT", "5m")           # 与 process_klines 同列名
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+NAN = float('nan')
+
+# 与 MarketDataProcessor._calculate_indicators 的输出顺序一致
+INDICATOR_COLUMNS = [
+    'sma_20', 'sma_50',
+    'ema_5', 'ema_13', 'ema_12', 'ema_26', 'ema_20', 'ema_60',
+    'macd', 'macd_signal', 'macd_diff',
+    'rsi', 'adx',
+    'bb_upper', 'bb_middle', 'bb_lower', 'bb_width',
+    'kdj_k', 'kdj_d', 'kdj_j',
+    'atr',
+    'volume_sma', 'volume_ratio', 'obv', 'vwap',
+    'price_change_pct', 'high_low_range',
+]
+
+
+def _is_nan(x: float) -> bool:
+    return x != x
+
+
+def _div(numer: float, denom: float) -> float:
+    """numpy 语义的除法（0 除返回 inf/nan 而不是抛异常），与批量实现保持一致"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numer) / np.float64(denom))
+
+
+class _EWM:
+    """
+    pandas ewm(adjust=False).mean() 的逐点等价实现
+
+    前导 NaN 跳过，min_periods 按有效观测数计数。
+    """
+
+    def __init__(self, span: Optional[int] = None, alpha: Optional[float] = None, min_periods: int = 0):
+        # 与 pandas 相同：先换算为 com，再由 com 得到 alpha
+        com = (span - 1) / 2.0 if span is not None else 1.0 / alpha - 1.0
+        self.alpha = 1.0 / (1.0 + com)
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.nobs = 0
+
+    def update(self, x: float) -> float:
+        if _is_nan(x):
+            return self.value
+        if self.nobs == 0:
+            self.weighted = x
+        else:
+            old_wt = 1.0 - self.alpha
+            if self.weighted != x:
+                self.weighted = (old_wt * self.weighted + self.alpha * x) / (old_wt + self.alpha)
+        self.nobs += 1
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.weighted if self.nobs >= max(self.min_periods, 1) else NAN
+
+
+class _Window:
+    """固定长度滑动窗口（rolling(window, min_periods=window)）"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: Deque[float] = deque(maxlen=size)
+
+    def push(self, x: float) -> None:
+        self.values.append(x)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def sum(self) -> float:
+        return math.fsum(self.values) if self.full else NAN
+
+    def mean(self) -> float:
+        if not self.full or any(_is_nan(v) for v in self.values):
+            return NAN
+        return math.fsum(self.values) / self.size
+
+    def std(self) -> float:
+        """总体标准差 (ddof=0)"""
+        mean = self.mean()
+        if _is_nan(mean):
+            return NAN
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in self.values) / self.size)
+
+    def min(self) -> float:
+        return min(self.values) if self.full else NAN
+
+    def max(self) -> float:
+        return max(self.values) if self.full else NAN
+
+
+class _WilderATR:
+    """ta.AverageTrueRange：前 window 根取 TR 均值作种子，其后 Wilder 平滑；种子前为 0"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.seed: List[float] = []
+        self.value = 0.0
+
+    def update(self, tr: float) -> float:
+        if len(self.seed) < self.window:
+            self.seed.append(tr)
+            if len(self.seed) == self.window:
+                self.value = float(np.mean(self.seed))
+            return self.value
+        self.value = (self.value * (self.window - 1) + tr) / float(self.window)
+        return self.value
+
+
+class _WilderADX:
+    """
+    ta.ADXIndicator 的逐根等价实现
+
+    第 1..window 根累加 TR / +DM / -DM 作种子，其后 x - x/window + new 平滑；
+    DX 累积 window 个后取均值作 ADX 种子，再 Wilder 平滑。种子前 ADX 为 0。
+    """
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.bars = 0
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.dx_seed: List[float] = []
+        self.adx = 0.0
+        self.adx_ready = False
+
+    def update(self, tr: float, pos: float, neg: float) -> float:
+        self.bars += 1
+        w = self.window
+        if self.bars == 1:
+            # 第 0 根没有前值，不计入
+            return 0.0
+        if self.bars <= w + 1:
+            self.trs += tr
+            self.dip += pos
+            self.din += neg
+            if self.bars < w + 1:
+                return 0.0
+        else:
+            self.trs = self.trs - (self.trs / float(w)) + tr
+            self.dip = self.dip - (self.dip / float(w)) + pos
+            self.din = self.din - (self.din / float(w)) + neg
+
+        di_pos = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        di_neg = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+        dx = 100 * abs((di_pos - di_neg) / (di_pos + di_neg)) if di_pos + di_neg != 0 else 0.0
+
+        if not self.adx_ready:
+            self.dx_seed.append(dx)
+            if len(self.dx_seed) == w:
+                self.adx = float(np.mean(self.dx_seed))
+                self.adx_ready = True
+            return self.adx
+        self.adx = ((self.adx * (w - 1)) + dx) / float(w)
+        return self.adx
+
+
+class IndicatorState:
+    """单个 (symbol, interval) 的指标状态"""
+
+    def __init__(self, max_rows: int = 500):
+        self.last_timestamp: Optional[int] = None
+        self.prev: Optional[Dict[str, float]] = None
+        self.rows: Deque[Tuple[int, Dict]] = deque(maxlen=max_rows)
+
+        self.ema = {n: _EWM(span=n, min_periods=n) for n in (5, 13, 12, 26, 20, 60)}
+        self.macd_signal = _EWM(span=9, min_periods=9)
+        self.rsi_up = _EWM(alpha=1 / 14, min_periods=14)
+        self.rsi_down = _EWM(alpha=1 / 14, min_periods=14)
+        self.tr_ema = _EWM(span=14)
+        self.atr = _WilderATR(14)
+        self.adx = _WilderADX(14)
+
+        self.close_20 = _Window(20)
+        self.close_50 = _Window(50)
+        self.high_9 = _Window(9)
+        self.low_9 = _Window(9)
+        self.kdj_k_3 = _Window(3)
+        self.volume_20 = _Window(20)
+        self.pv_20 = _Window(20)
+
+        self.obv = 0.0
+
+    def update(self, candle: Dict) -> Dict:
+        """推进一根 K 线，返回该根 K 线的完整指标行"""
+        o = float(candle['open'])
+        h = float(candle['high'])
+        l = float(candle['low'])
+        c = float(candle['close'])
+        v = float(candle['volume'])
+        prev = self.prev
+        row: Dict = dict(candle)
+
+        # 均线
+        self.close_20.push(c)
+        self.close_50.push(c)
+        row['sma_20'] = self.close_20.mean()
+        row['sma_50'] = self.close_50.mean()
+        for n, ewm in self.ema.items():
+            row[f'ema_{n}'] = ewm.update(c)
+
+        # MACD (12, 26, 9)
+        macd = row['ema_12'] - row['ema_26']
+        signal = self.macd_signal.update(macd)
+        row['macd'] = macd
+        row['macd_signal'] = signal
+        row['macd_diff'] = macd - signal
+
+        # RSI (Wilder)
+        diff = c - prev['close'] if prev else NAN
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        ema_up = self.rsi_up.update(up)
+        ema_down = self.rsi_down.update(down)
+        if ema_down == 0:
+            row['rsi'] = 100.0
+        else:
+            row['rsi'] = 100 - (100 / (1 + ema_up / ema_down)) if not _is_nan(ema_down) else NAN
+
+        # True Range（第一根只有 high - low）
+        if prev:
+            pc = prev['close']
+            tr = max(h - l, abs(h - pc), abs(l - pc))
+            diff_up = h - prev['high']
+            diff_down = prev['low'] - l
+            pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+            neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+        else:
+            tr = h - l
+            pos = neg = NAN
+
+        # ADX
+        row['adx'] = self.adx.update(tr, pos, neg)
+
+        # 布林带 (20, 2)
+        mid = row['sma_20']
+        std = self.close_20.std()
+        row['bb_upper'] = mid + 2 * std
+        row['bb_middle'] = mid
+        row['bb_lower'] = mid - 2 * std
+        row['bb_width'] = (row['bb_upper'] - row['bb_lower']) / mid if mid > 0 else NAN
+
+        # KDJ (9, 3, 3)
+        self.high_9.push(h)
+        self.low_9.push(l)
+        low_9 = self.low_9.min()
+        k = _div(100 * (c - low_9), self.high_9.max() - low_9)
+        self.kdj_k_3.push(k)
+        d = self.kdj_k_3.mean()
+        row['kdj_k'] = k
+        row['kdj_d'] = d
+        row['kdj_j'] = 3 * k - 2 * d
+
+        # ATR（前期 0 值用 TR 的 EMA 填充，与批量实现一致）
+        atr = self.atr.update(tr)
+        tr_ema = self.tr_ema.update(tr)
+        row['atr'] = tr_ema if atr == 0 else atr
+
+        # 成交量
+        self.volume_20.push(v)
+        volume_sma = self.volume_20.mean()
+        row['volume_sma'] = volume_sma
+        row['volume_ratio'] = v / volume_sma if (not _is_nan(volume_sma) and volume_sma > 0) else 1.0
+
+        if prev:
+            self.obv += v * float(np.sign(c - prev['close']))
+        row['obv'] = self.obv
+
+        # VWAP (20 期滚动)
+        self.pv_20.push(c * v)
+        rolling_vol = self.volume_20.sum()
+        row['vwap'] = self.pv_20.sum() / rolling_vol if rolling_vol > 0 else c
+
+        # 价格变化
+        row['price_change_pct'] = (c / prev['close'] - 1) * 100 if prev else NAN
+        row['high_low_range'] = (h - l) / c * 100 if c > 0 else 0.0
+
+        self.prev = {'open': o, 'high': h, 'low': l, 'close': c}
+        return row
+
+
+class IncrementalIndicatorEngine:
+    """
+    增量指标引擎（按 symbol + interval 隔离状态）
+
+    只应喂入已收盘的 K 线：同一时间戳或更早的 K 线会被忽略，
+    因此每个周期把完整 K 线列表交给 ingest() 也只会处理新增部分。
+    """
+
+    def __init__(self, max_rows: int = 500):
+        """
+        Args:
+            max_rows: 每个 (symbol, interval) 保留的最近指标行数（用于 get_frame）
+        """
+        self.max_rows = max_rows
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+
+    def _state(self, symbol: str, interval: str) -> IndicatorState:
+        key = (symbol, interval)
+        state = self._states.get(key)
+        if state is None:
+            state = IndicatorState(self.max_rows)
+            self._states[key] = state
+        return state
+
+    def reset(self, symbol: str, interval: str) -> None:
+        """丢弃该 (symbol, interval) 的全部状态"""
+        self._states.pop((symbol, interval), None)
+
+    def rebase_obv(self, symbol: str, interval: str, offset: float) -> None:
+        """OBV 累计量整体减去 offset（滚动窗口把 OBV 起点挪到窗口第一根时使用）"""
+        state = self._states.get((symbol, interval))
+        if state is None:
+            return
+        state.obv -= offset
+        for _, row in state.rows:
+            row['obv'] -= offset
+
+    def update(self, symbol: str, interval: str, candle: Dict) -> Optional[Dict]:
+        """
+        推进一根已收盘 K 线
+
+        Args:
+            candle: 与 BinanceClient.get_klines 相同格式的 dict（timestamp 为毫秒）
+
+        Returns:
+            该 K 线的指标行；若不是新 K 线则返回 None
+        """
+        state = self._state(symbol, interval)
+        ts = int(candle['timestamp'])
+        if state.last_timestamp is not None and ts <= state.last_timestamp:
+            return None
+        row = state.update(candle)
+        state.last_timestamp = ts
+        state.rows.append((ts, row))
+        return row
+
+    def ingest(self, symbol: str, interval: str, klines: Iterable[Dict]) -> int:
+        """批量喂入 K 线，只处理比已有状态更新的部分，返回新处理的根数"""
+        applied = 0
+        for candle in klines:
+            if self.update(symbol, interval, candle) is not None:
+                applied += 1
+        return applied
+
+    def seed(self, symbol: str, interval: str, klines: Iterable[Dict]) -> int:
+        """从历史 K 线冷启动（先重置状态）"""
+        self.reset(symbol, interval)
+        return self.ingest(symbol, interval, klines)
+
+    def latest(self, symbol: str, interval: str) -> Optional[Dict]:
+        """最新一根 K 线的指标行"""
+        state = self._states.get((symbol, interval))
+        if state is None or not state.rows:
+            return None
+        return state.rows[-1][1]
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        state = self._states.get((symbol, interval))
+        return state.last_timestamp if state else None
+
+    def rows_since(self, symbol: str, interval: str, start_ts: int) -> List[Dict]:
+        """保留行中开盘时间 >= start_ts 的指标行（升序）"""
+        state = self._states.get((symbol, interval))
+        if state is None:
+            return []
+        rows: List[Dict] = []
+        for ts, row in reversed(state.rows):
+            if ts < start_ts:
+                break
+            rows.append(row)
+        rows.reverse()
+        return rows
+
+    def get_frame(self, symbol: str, interval: str) -> pd.DataFrame:
+        """
+        以 DataFrame 返回最近 max_rows 根 K 线及指标
+
+        索引与列名同 MarketDataProcessor.process_klines（timestamp 为 DatetimeIndex）。
+        """
+        state = self._states.get((symbol, interval))
+        if state is None or not state.rows:
+            return pd.DataFrame()
+        df = pd.DataFrame([row for _, row in state.rows])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df.set_index('timestamp', inplace=True)
+        return df
@@ -14,12 +14,23 @@ K线数据验证器 - 正确实现
 - 长影线（Pin Bar）
 - MAD 偏离大
 - 连续单边行情
+
+性能：
+- 数值字段齐全的K线用数组掩码一次性检查（非常规类型回退逐行检查，报告一致）
+- 按 symbol/interval 记录已验证区间，每个周期只检查区间之外的K线（通常只有新K线；
+  窗口向前扩展或与上次不相交时相应部分重新检查）；
+  区间内K线的问题从缓存按当前位置重新输出，报告与全量验证相同
 """
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from src.utils.logger import log
 
+_MISSING = object()
+
+# 可走数组检查的值类型（与逐行检查的 isinstance 判断结果一致）
+_FAST_TYPES = {float, int, np.float64}
+
 
 class KlineValidator:
     """K线数据验证器 - 仅检测真正的数据错误，不修改价格"""
@@ -28,15 +39,23 @@ class KlineValidator:
     MIN_REASONABLE_PRICE = 0.001  # 0.1 美分
     MAX_REASONABLE_PRICE = 10_000_000  # 1000万 USDT
     
+    PRICE_FIELDS = ['open', 'high', 'low', 'close']
+    VALUE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+    REQUIRED_FIELDS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    
     def __init__(self):
         self.issues_found: List[Dict] = []
         self.removed_count = 0
+        # (symbol, interval) -> 已验证区间状态
+        self._watermarks: Dict[Tuple[str, str], Dict] = {}
+        self.rows_checked = 0  # 最近一次调用实际逐行检查的K线数
     
     def validate_and_clean_klines(
         self, 
         klines: List[Dict],
         symbol: str,
-        action: str = 'remove'  # 只支持 'remove' 或 'none'
+        action: str = 'remove',  # 只支持 'remove' 或 'none'
+        interval: Optional[str] = None
     ) -> Tuple[List[Dict], Dict]:
         """
         验证K线数据质量
@@ -47,6 +66,7 @@ class KlineValidator:
             action: 处理方式
                 - 'remove': 删除无效K线（默认）
                 - 'none': 仅检测不处理
+            interval: K线周期；提供时只检查上次已验证区间之外的K线
         
         Returns:
             (清洗后的K线, 验证报告)
@@ -66,10 +86,7 @@ class KlineValidator:
         # 1. 检测所有问题
         log.debug(f"[{symbol}] 开始验证 {n_original} 根K线...")
         
-        issues = []
-        issues.extend(self._check_basic_validity(klines, symbol))
-        issues.extend(self._check_ohlc_logic(klines, symbol))
-        issues.extend(self._check_time_series(klines, symbol))
+        issues = self._collect_issues(klines, symbol, interval)
         
         self.issues_found = issues
         
@@ -116,6 +133,159 @@ class KlineValidator:
         
         return cleaned_klines, report
     
+    # ========== 增量 / 向量化检查 ==========
+    
+    def reset_watermark(self, symbol: Optional[str] = None, interval: Optional[str] = None):
+        """清除验证水位（不指定则全部清除）"""
+        if symbol is None:
+            self._watermarks.clear()
+        else:
+            self._watermarks.pop((symbol, interval), None)
+    
+    def _collect_issues(self, klines: List[Dict], symbol: str, interval: Optional[str]) -> List[Dict]:
+        """
+        按 基础完整性 -> OHLC -> 时间序列 的顺序收集问题
+        
+        时间戳为严格递增的整数时，上次已验证区间内的K线直接复用缓存结果，只检查区间外的K线。
+        """
+        timestamps = [k.get('timestamp') for k in klines]
+        ts = None
+        if set(map(type, timestamps)) == {int}:
+            ts = np.array(timestamps, dtype=np.int64)
+            if len(ts) > 1 and not (np.diff(ts) > 0).all():
+                ts = None
+        
+        key = (symbol, interval)
+        state = self._watermarks.get(key) if interval is not None and ts is not None else None
+        
+        # 1. 上次验证过的连续区间 [lo, hi) 复用缓存，区间之前（向前扩展）和之后（新K线）的都检查；
+        #    区间内的时间戳必须与上次窗口的一段完全一致，否则整体重新检查
+        lo = hi = 0
+        if state is not None:
+            validated = state['timestamps']
+            lo = int(np.searchsorted(ts, validated[0], side='left'))
+            hi = int(np.searchsorted(ts, validated[-1], side='right'))
+            offset = int(np.searchsorted(validated, ts[lo])) if hi > lo else 0
+            if hi <= lo or not np.array_equal(validated[offset:offset + hi - lo], ts[lo:hi]):
+                lo = hi = 0
+            elif ts[hi - 1] == validated[-1] and klines[hi - 1] != state['tail']:
+                # 最后一根已验证K线内容变化（仍在形成）时重新检查
+                hi -= 1
+        
+        head_basic, head_ohlc = self._check_rows(klines, 0, symbol, stop=lo)
+        basic, ohlc = self._check_rows(klines, hi, symbol)
+        self.rows_checked = lo + len(klines) - hi
+        
+        if hi > lo:
+            position = {timestamps[i]: i for i in range(lo, hi)}
+            cached_basic = [dict(issue, index=position[t]) for t, cached in state['basic'].items()
+                            if t in position for issue in cached]
+            cached_ohlc = [dict(issue, index=position[t]) for t, cached in state['ohlc'].items()
+                           if t in position for issue in cached]
+            basic = head_basic + sorted(cached_basic, key=lambda issue: issue['index']) + basic
+            ohlc = head_ohlc + sorted(cached_ohlc, key=lambda issue: issue['index']) + ohlc
+        
+        # 2. 时间序列：严格递增的整数时间戳不会有重复 / 逆序
+        series = [] if ts is not None else self._check_time_series(klines, symbol)
+        
+        # 3. 记录本次验证的区间（时间戳序列）与问题缓存
+        if interval is not None:
+            if ts is not None and len(ts):
+                self._watermarks[key] = {
+                    'timestamps': ts,
+                    'tail': dict(klines[-1]),
+                    'basic': self._issues_by_timestamp(basic, timestamps),
+                    'ohlc': self._issues_by_timestamp(ohlc, timestamps),
+                }
+            else:
+                self._watermarks.pop(key, None)
+        
+        return basic + ohlc + series
+    
+    @staticmethod
+    def _issues_by_timestamp(issues: List[Dict], timestamps: List) -> Dict:
+        cached: Dict = {}
+        for issue in issues:
+            cached.setdefault(timestamps[issue['index']], []).append(issue)
+        return cached
+    
+    def _check_rows(self, klines: List[Dict], start: int, symbol: str,
+                    stop: Optional[int] = None) -> Tuple[List[Dict], List[Dict]]:
+        """检查 klines[start:stop] 的基础完整性与 OHLC 逻辑（index 为在 klines 中的位置）"""
+        rows = klines[start:stop] if start or stop is not None else klines
+        if not rows:
+            return [], []
+        
+        columns = {f: [k.get(f, _MISSING) for k in rows] for f in self.VALUE_FIELDS}
+        fast = all(set(map(type, values)) <= _FAST_TYPES for values in columns.values())
+        if not fast or any('timestamp' not in k for k in rows):
+            basic = self._check_basic_validity(rows, symbol)
+            ohlc = self._check_ohlc_logic(rows, symbol)
+            if start:
+                basic = [dict(issue, index=issue['index'] + start) for issue in basic]
+                ohlc = [dict(issue, index=issue['index'] + start) for issue in ohlc]
+            return basic, ohlc
+        
+        arrays = {f: np.array(values, dtype=np.float64) for f, values in columns.items()}
+        return self._check_arrays(rows, arrays, start)
+    
+    def _check_arrays(self, rows: List[Dict], arrays: Dict[str, np.ndarray], start: int) -> Tuple[List[Dict], List[Dict]]:
+        """数组掩码版 _check_basic_validity + _check_ohlc_logic（字段齐全、数值类型）"""
+        values = np.vstack([arrays[f] for f in self.VALUE_FIELDS])
+        invalid = ~np.isfinite(values)
+        prices = values[:4]
+        with np.errstate(invalid='ignore'):
+            out_of_range = (prices < self.MIN_REASONABLE_PRICE) | (prices > self.MAX_REASONABLE_PRICE)
+            negative_volume = arrays['volume'] < 0
+            o, h, l, c = prices
+            ohlc_bad = (h < l) | (h < o) | (h < c) | (l > o) | (l > c)
+        
+        basic = []
+        flagged = np.flatnonzero(invalid.any(axis=0) | out_of_range.any(axis=0) | negative_volume)
+        for i in flagged:
+            kline = rows[i]
+            timestamp = kline.get('timestamp')
+            if invalid[:, i].any():
+                field = self.VALUE_FIELDS[int(np.argmax(invalid[:, i]))]
+                basic.append({
+                    'index': int(i) + start,
+                    'type': 'invalid_value',
+                    'field': field,
+                    'value': str(kline.get(field)),
+                    'timestamp': timestamp,
+                    'severity': 'critical',
+                    'action': 'remove'
+                })
+            if out_of_range[:, i].any():
+                field = self.PRICE_FIELDS[int(np.argmax(out_of_range[:, i]))]
+                basic.append({
+                    'index': int(i) + start,
+                    'type': 'price_out_of_range',
+                    'field': field,
+                    'value': kline.get(field, 0),
+                    'range': f'{self.MIN_REASONABLE_PRICE} - {self.MAX_REASONABLE_PRICE}',
+                    'timestamp': timestamp,
+                    'severity': 'critical',
+                    'action': 'remove'
+                })
+            if negative_volume[i]:
+                basic.append({
+                    'index': int(i) + start,
+                    'type': 'negative_volume',
+                    'value': kline.get('volume', 0),
+                    'timestamp': timestamp,
+                    'severity': 'warning',
+                    'action': 'remove'
+                })
+        
+        # OHLC 违规的明细沿用逐行检查（只针对被标记的K线）
+        ohlc = [dict(issue, index=int(i) + start)
+                for i in np.flatnonzero(ohlc_bad)
+                for issue in self._check_ohlc_logic([rows[i]], '')]
+        return basic, ohlc
+    
+    # ========== 逐行检查（非常规数据的回退路径） ==========
+    
     def _check_basic_validity(self, klines: List[Dict], symbol: str) -> List[Dict]:
         """检查基础数据完整性"""
         issues = []
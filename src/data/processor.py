@@ -13,6 +13,7 @@ from ta.volume import VolumeWeightedAveragePrice
 from src.utils.logger import log
 from src.utils.data_saver import DataSaver
 from src.data.kline_validator import KlineValidator
+from src.data.incremental_indicators import IncrementalIndicatorEngine
 
 class MarketDataProcessor:
     """市场数据处理器"""
@@ -31,8 +32,13 @@ class MarketDataProcessor:
     # 处理器版本（用于快照追踪）
     PROCESSOR_VERSION = 'processor_v2'
 
+    # 增量指标引擎为每个 (symbol, timeframe) 保留的行数；更长的窗口走批量计算
+    INCREMENTAL_MAX_ROWS = 1000
+
     def __init__(self):
         self.df_cache: Dict[str, pd.DataFrame] = {}
+        # 已收盘 K 线的指标状态：每个周期只推进新收盘的 K 线，不再整窗重算
+        self.indicator_engine = IncrementalIndicatorEngine(max_rows=self.INCREMENTAL_MAX_ROWS)
         self.validator = KlineValidator()
         self.saver = DataSaver()  # ✅ 初始化数据保存器
         self.last_snapshot_id: Optional[str] = None
@@ -74,7 +80,8 @@ class MarketDataProcessor:
             klines, validation_report = self.validator.validate_and_clean_klines(
                 klines, 
                 symbol,
-                action='remove'
+                action='remove',
+                interval=timeframe
             )
             
             anomaly_details = {
@@ -108,13 +115,13 @@ class MarketDataProcessor:
             f"bars={len(klines)}, params={self.INDICATOR_PARAMS}"
         )
         
-        # 3. 转换为DataFrame
-        df = pd.DataFrame(klines)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-        
-        # 4. 计算技术指标
-        df = self._calculate_indicators(df)
+        # 3-4. 计算技术指标（全部已收盘时由增量引擎给出，否则整窗批量计算）
+        df = self._incremental_indicators(klines, symbol, timeframe)
+        if df is None:
+            df = pd.DataFrame(klines)
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            df.set_index('timestamp', inplace=True)
+            df = self._calculate_indicators(df)
         
         # 5. 添加指标 warm-up 标记
         df = self._mark_warmup_period(df)
@@ -187,6 +194,38 @@ class MarketDataProcessor:
         
         return state
     
+    def _incremental_indicators(self, klines: List[Dict], symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        """
+        由增量引擎生成与 _calculate_indicators 同列的指标表
+
+        引擎状态与本窗口衔接时只推进新收盘的 K 线；冷启动、跳跃、回看或清洗删行导致
+        不衔接时用本窗口重新 seed（此时与批量计算逐根一致）。递归指标（EMA/MACD/RSI/ATR/ADX）
+        从 seed 起连续累积，而不是每周期从窗口第一根重新起算；OBV 平移为窗口第一根 = 0，同批量实现。
+
+        Returns:
+            指标 DataFrame；含未收盘 K 线或窗口超过引擎保留行数时返回 None（由调用方批量计算）
+        """
+        if len(klines) > self.indicator_engine.max_rows or klines[-1].get('is_closed') is False:
+            return None
+
+        engine = self.indicator_engine
+        window_ts = [int(k['timestamp']) for k in klines]
+        # 衔接 = 上次推进到的 K 线仍在本窗口内，且之前的行与窗口逐根对应
+        last = engine.last_timestamp(symbol, timeframe)
+        rows = []
+        if last is not None and last in set(window_ts):
+            engine.ingest(symbol, timeframe, klines)
+            rows = engine.rows_since(symbol, timeframe, window_ts[0])
+        if [r['timestamp'] for r in rows] != window_ts:
+            engine.seed(symbol, timeframe, klines)
+            rows = engine.rows_since(symbol, timeframe, window_ts[0])
+
+        df = pd.DataFrame(rows)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df.set_index('timestamp', inplace=True)
+        df['obv'] -= df['obv'].iloc[0]
+        return df
+
     def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """计算技术指标"""
         
@@ -2,8 +2,10 @@
 数据质量验证模块
 检测和处理异常K线数据
 """
+import warnings
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import List, Dict, Tuple, Optional
 from src.utils.logger import log
 
@@ -161,6 +163,8 @@ class DataValidator:
         1. MAD (Median Absolute Deviation) - 比 Z-score 更稳健
         2. Returns-based filter - 检测异常涨跌幅
         3. High-Low 相对 Close 的比例 - 检测异常波动
+        
+        邻近窗口的中位数 / MAD 与各项阈值都按整列数组计算，只为命中的行构建详情。
         """
         anomalies = []
         
@@ -168,133 +172,126 @@ class DataValidator:
         if 'close' in df.columns:
             df['returns'] = df['close'].pct_change()
         
-        for i in range(len(df)):
-            # 获取邻近窗口（更大的窗口提高稳健性）
-            start_idx = max(0, i - self.NEIGHBOR_WINDOW)
-            end_idx = min(len(df), i + self.NEIGHBOR_WINDOW + 1)
-            
-            # 排除当前行
-            neighbor_indices = [j for j in range(start_idx, end_idx) if j != i]
-            
-            if len(neighbor_indices) < 3:
-                continue  # 窗口太小，跳过
-            
+        n = len(df)
+        if n == 0:
+            return anomalies
+        rows = np.arange(n)
+        
+        # 邻近窗口（排除当前行）不足 3 根的行跳过
+        n_neighbors = np.minimum(n, rows + self.NEIGHBOR_WINDOW + 1) - np.maximum(0, rows - self.NEIGHBOR_WINDOW) - 1
+        checked = n_neighbors >= 3
+        
+        # 按优先级逐项标记：high MAD -> low MAD -> Returns -> HL-Range（每行最多记录一项）
+        remaining = checked.copy()
+        stats = {}
+        flags = {}
+        for field in ('high', 'low'):
+            if field not in df.columns:
+                continue
+            values = df[field].to_numpy(dtype=np.float64)
+            median, mad = self._neighbor_median_mad(values)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mad_score = np.where(mad > 0, np.abs(values - median) / mad, 0.0)
+                relative_change = np.where(median > 0, np.abs(values - median) / median, 0.0)
+            flags[field] = remaining & (mad_score > self.MAD_THRESHOLD) & (relative_change > 0.01)
+            remaining &= ~flags[field]
+            stats[field] = (median, mad)
+        
+        if 'returns' in df.columns:
+            returns = df['returns'].to_numpy(dtype=np.float64)
+            with np.errstate(invalid='ignore'):
+                flags['close'] = remaining & (rows > 0) & ~np.isnan(returns) & (np.abs(returns) > self.RETURNS_THRESHOLD)
+            remaining &= ~flags['close']
+        
+        if all(f in df.columns for f in ['high', 'low', 'close']):
+            high = df['high'].to_numpy(dtype=np.float64)
+            low = df['low'].to_numpy(dtype=np.float64)
+            close = df['close'].to_numpy(dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                flags['high_low_range'] = remaining & (close > 0) & ((high - low) / close > self.HL_RANGE_THRESHOLD)
+        
+        # 只为被标记的行构建详情
+        flagged = np.zeros(n, dtype=bool)
+        for mask in flags.values():
+            flagged |= mask
+        for i in np.flatnonzero(flagged).tolist():
             current = df.iloc[i]
-            neighbors = df.iloc[neighbor_indices]
             
-            # === 方法 1: MAD 检测 high 异常 ===
-            if 'high' in df.columns:
-                high_median = neighbors['high'].median()
-                high_mad = np.median(np.abs(neighbors['high'] - high_median))
-                
-                if high_mad > 0:
-                    mad_score = abs(current['high'] - high_median) / high_mad
-                else:
-                    mad_score = 0
+            # === 方法 1/2: MAD 检测 high / low 异常 ===
+            field = next((f for f in ('high', 'low') if f in flags and flags[f][i]), None)
+            if field is not None:
+                median = stats[field][0][i]
+                mad = stats[field][1][i]
+                mad_score = abs(current[field] - median) / mad
+                relative_change = abs(current[field] - median) / median
+                anomaly_info = {
+                    'index': int(i),
+                    'timestamp': current.get('timestamp', i),
+                    'field': field,
+                    'value': float(current[field]),
+                    'neighbor_median': float(median),
+                    'mad_score': float(mad_score),
+                    'relative_change': float(relative_change),
+                    'reason': [],
+                    'method': 'MAD'
+                }
                 
-                # 相对变化
-                if high_median > 0:
-                    relative_change = abs(current['high'] - high_median) / high_median
-                else:
-                    relative_change = 0
+                anomaly_info['reason'].append(f'MAD={mad_score:.2f} > {self.MAD_THRESHOLD}')
+                if relative_change > 0.05:
+                    anomaly_info['reason'].append(f'change={relative_change:.1%}')
                 
-                # 判断异常
-                is_anomaly_mad = mad_score > self.MAD_THRESHOLD
-                
-                if is_anomaly_mad and relative_change > 0.01:  # 至少 1% 的变化才记录
-                    anomaly_info = {
-                        'index': i,
-                        'timestamp': current.get('timestamp', i),
-                        'field': 'high',
-                        'value': float(current['high']),
-                        'neighbor_median': float(high_median),
-                        'mad_score': float(mad_score),
-                        'relative_change': float(relative_change),
-                        'reason': [],
-                        'method': 'MAD'
-                    }
-                    
-                    anomaly_info['reason'].append(f'MAD={mad_score:.2f} > {self.MAD_THRESHOLD}')
-                    if relative_change > 0.05:
-                        anomaly_info['reason'].append(f'change={relative_change:.1%}')
-                    
-                    anomalies.append(anomaly_info)
-                    continue  # 已检测到异常，不再检查其他字段
-            
-            # === 方法 2: MAD 检测 low 异常 ===
-            if 'low' in df.columns:
-                low_median = neighbors['low'].median()
-                low_mad = np.median(np.abs(neighbors['low'] - low_median))
-                
-                if low_mad > 0:
-                    mad_score = abs(current['low'] - low_median) / low_mad
-                else:
-                    mad_score = 0
-                
-                if low_median > 0:
-                    relative_change = abs(current['low'] - low_median) / low_median
-                else:
-                    relative_change = 0
-                
-                is_anomaly_mad = mad_score > self.MAD_THRESHOLD
-                
-                if is_anomaly_mad and relative_change > 0.01:
-                    anomaly_info = {
-                        'index': i,
-                        'timestamp': current.get('timestamp', i),
-                        'field': 'low',
-                        'value': float(current['low']),
-                        'neighbor_median': float(low_median),
-                        'mad_score': float(mad_score),
-                        'relative_change': float(relative_change),
-                        'reason': [],
-                        'method': 'MAD'
-                    }
-                    
-                    anomaly_info['reason'].append(f'MAD={mad_score:.2f} > {self.MAD_THRESHOLD}')
-                    if relative_change > 0.05:
-                        anomaly_info['reason'].append(f'change={relative_change:.1%}')
-                    
-                    anomalies.append(anomaly_info)
-                    continue
+                anomalies.append(anomaly_info)
             
             # === 方法 3: Returns-based 检测 ===
-            if 'returns' in df.columns and i > 0:
-                if pd.notna(current['returns']) and abs(current['returns']) > self.RETURNS_THRESHOLD:
-                    anomaly_info = {
-                        'index': i,
-                        'timestamp': current.get('timestamp', i),
-                        'field': 'close',
-                        'value': float(current['close']),
-                        'prev_close': float(df.iloc[i-1]['close']),
-                        'returns': float(current['returns']),
-                        'reason': [f'异常涨跌幅={current["returns"]:.2%}'],
-                        'method': 'Returns'
-                    }
-                    anomalies.append(anomaly_info)
-                    continue
+            elif 'close' in flags and flags['close'][i]:
+                anomalies.append({
+                    'index': int(i),
+                    'timestamp': current.get('timestamp', i),
+                    'field': 'close',
+                    'value': float(current['close']),
+                    'prev_close': float(df.iloc[i-1]['close']),
+                    'returns': float(current['returns']),
+                    'reason': [f'异常涨跌幅={current["returns"]:.2%}'],
+                    'method': 'Returns'
+                })
             
             # === 方法 4: High-Low Range 检测 ===
-            if all(f in df.columns for f in ['high', 'low', 'close']):
-                if current['close'] > 0:
-                    hl_range = (current['high'] - current['low']) / current['close']
-                    
-                    if hl_range > self.HL_RANGE_THRESHOLD:
-                        anomaly_info = {
-                            'index': i,
-                            'timestamp': current.get('timestamp', i),
-                            'field': 'high_low_range',
-                            'high': float(current['high']),
-                            'low': float(current['low']),
-                            'close': float(current['close']),
-                            'hl_range_pct': float(hl_range * 100),
-                            'reason': [f'High-Low波动={hl_range:.1%} > {self.HL_RANGE_THRESHOLD:.1%}'],
-                            'method': 'HL-Range'
-                        }
-                        anomalies.append(anomaly_info)
+            else:
+                hl_range = (current['high'] - current['low']) / current['close']
+                anomalies.append({
+                    'index': int(i),
+                    'timestamp': current.get('timestamp', i),
+                    'field': 'high_low_range',
+                    'high': float(current['high']),
+                    'low': float(current['low']),
+                    'close': float(current['close']),
+                    'hl_range_pct': float(hl_range * 100),
+                    'reason': [f'High-Low波动={hl_range:.1%} > {self.HL_RANGE_THRESHOLD:.1%}'],
+                    'method': 'HL-Range'
+                })
         
         return anomalies
     
+    def _neighbor_median_mad(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        每行邻近窗口（前后各 NEIGHBOR_WINDOW 根，排除自身）的中位数与 MAD
+        
+        中位数跳过 NaN（同 Series.median）；邻近值含 NaN 时 MAD 为 NaN（同 np.median）。
+        """
+        w = self.NEIGHBOR_WINDOW
+        n = len(values)
+        padded = np.concatenate([np.full(w, np.nan), values, np.full(w, np.nan)])
+        inside = np.concatenate([np.zeros(w, dtype=bool), np.ones(n, dtype=bool), np.zeros(w, dtype=bool)])
+        neighbors = np.delete(sliding_window_view(padded, 2 * w + 1), w, axis=1)
+        inside = np.delete(sliding_window_view(inside, 2 * w + 1), w, axis=1)
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            median = np.nanmedian(neighbors, axis=1)
+            mad = np.nanmedian(np.abs(neighbors - median[:, None]), axis=1)
+        mad[(np.isnan(neighbors) & inside).any(axis=1)] = np.nan
+        return median, mad
+    
     def _handle_anomalies_safe(
         self, 
         df: pd.DataFrame, 
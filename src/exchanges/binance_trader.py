@@ -429,7 +429,7 @@ class BinanceTrader(BaseTrader):
             cache = get_kline_cache()
             
             # Check cache first
-            cached_df = cache.get_cached_data(normalized_symbol, interval)
+            cached_df = cache.get_cached_data(normalized_symbol, interval, limit=limit)
             
             if cached_df is not None and len(cached_df) >= limit:
                 # Cache sufficient - return cached data
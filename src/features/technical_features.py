@@ -15,16 +15,105 @@
 
 import pandas as pd
 import numpy as np
+from functools import lru_cache
 from typing import Dict, List, Optional
 from src.utils.logger import log
 
 
+def rolling_slope_pct(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    滚动线性回归斜率 / 窗口最新值 × 100（向量化）
+
+    与 rolling(window).apply(np.polyfit 斜率) 等价：最小二乘斜率的闭式解
+    slope = Σ (x - x̄) · y / Σ (x - x̄)²，用 stride 视图对所有窗口一次矩阵乘完成。
+    窗口含 NaN 时为 NaN；最新值为 0 或窗口含 inf 时为 0。
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(values), np.nan)
+    if len(values) < window:
+        return result
+
+    weights = _slope_weights(window)
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        slope = windows @ weights
+        last = windows[:, -1]
+        pct = np.where(last != 0, slope / last * 100, 0.0)
+
+    has_nan = np.isnan(windows).any(axis=1)
+    has_inf = np.isinf(windows).any(axis=1)
+    pct[has_inf & ~has_nan] = 0.0
+    pct[has_nan] = np.nan
+    result[window - 1:] = pct
+    return result
+
+
+def rolling_up_ratio(diff: pd.Series, window: int) -> pd.Series:
+    """
+    滚动窗口内上涨（diff > 0）根数占比 (%)
+
+    与 rolling(window).apply(lambda x: (x > 0).sum() / len(x) * 100) 等价，
+    用 0/1 序列的滚动求和实现；窗口含 NaN 时为 NaN。
+    """
+    up = (diff > 0).astype(float).where(diff.notna())
+    return up.rolling(window).sum() / window * 100
+
+
+@lru_cache(maxsize=None)
+def _slope_weights(window: int) -> np.ndarray:
+    x = np.arange(window, dtype=float)
+    return (x - x.mean()) / ((x - x.mean()) ** 2).sum()
+
+
+def _latest_slope_pct(values: np.ndarray, window: int) -> float:
+    """rolling_slope_pct 在最后一行的值"""
+    if len(values) < window:
+        return np.nan
+    tail = values[-window:]
+    if np.isnan(tail).any():
+        return np.nan
+    if np.isinf(tail).any() or tail[-1] == 0:
+        return 0.0
+    return float(tail @ _slope_weights(window) / tail[-1] * 100)
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """向前填充 NaN（pct_change 默认的 pad 语义）"""
+    mask = np.isnan(values)
+    if not mask.any():
+        return values
+    idx = np.where(mask, 0, np.arange(len(values)))
+    return values[np.maximum.accumulate(idx)]
+
+
+def _lag(values: np.ndarray, k: int) -> float:
+    """shift(k) 在最后一行的值"""
+    return float(values[-1 - k]) if len(values) > k else np.nan
+
+
+def _tail(values: np.ndarray, n: int) -> Optional[np.ndarray]:
+    """rolling(n) 最后一个窗口；不足 n 个或含 NaN（min_periods=n）时返回 None"""
+    if len(values) < n:
+        return None
+    window = values[-n:]
+    return None if np.isnan(window).any() else window
+
+
+def _tail_mean(values: np.ndarray, n: int) -> float:
+    window = _tail(values, n)
+    return float(window.mean()) if window is not None else np.nan
+
+
 class TechnicalFeatureEngineer:
     """技术特征工程器"""
     
     # 特征版本（用于追踪特征定义变更）
     FEATURE_VERSION = 'v1.0'
     
+    # 最后一行特征所需的最长回看（return_20 / volatility_20 / price_volume_trend：21 根）
+    LATEST_LOOKBACK = 21
+    _LATEST_INPUTS = ['close', 'high', 'low', 'volume', 'rsi', 'macd', 'bb_width', 'obv', 'vwap', 'high_low_range']
+    
     def __init__(self):
         self.feature_count = 0
         self.feature_names = []
@@ -152,29 +241,15 @@ class TechnicalFeatureEngineer:
             )
         )
         
-        # 5. 价格趋势斜率（线性回归斜率）
-        def calc_slope(series):
-            if len(series) < 2:
-                return 0
-            x = np.arange(len(series))
-            try:
-                slope = np.polyfit(x, series, 1)[0]
-                return slope / series.iloc[-1] * 100 if series.iloc[-1] != 0 else 0
-            except:
-                return 0
-        
-        df['price_slope_5'] = df['close'].rolling(5).apply(calc_slope, raw=False)
-        df['price_slope_10'] = df['close'].rolling(10).apply(calc_slope, raw=False)
-        df['price_slope_20'] = df['close'].rolling(20).apply(calc_slope, raw=False)
+        # 5. 价格趋势斜率（线性回归斜率，按最新价归一化为 %）
+        close = df['close'].to_numpy(dtype=float)
+        df['price_slope_5'] = rolling_slope_pct(close, 5)
+        df['price_slope_10'] = rolling_slope_pct(close, 10)
+        df['price_slope_20'] = rolling_slope_pct(close, 20)
         
         # 6. ADX 替代指标：方向性强度
-        # 使用价格变化的方向一致性来衡量趋势强度
-        df['directional_strength'] = (
-            df['close'].diff().rolling(14).apply(
-                lambda x: (x > 0).sum() / len(x) * 100 if len(x) > 0 else 50,
-                raw=False
-            )
-        )
+        # 使用价格变化的方向一致性来衡量趋势强度（窗口内上涨根数占比 %）
+        df['directional_strength'] = rolling_up_ratio(df['close'].diff(), 14)
         
         return df
     
@@ -328,6 +403,130 @@ class TechnicalFeatureEngineer:
         
         return df
     
+    def build_latest_features(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        只计算最后一行的特征（实时推理用）
+
+        每个特征只读取所需的最少尾部 K 线（最多 LATEST_LOOKBACK 行），用 numpy 标量运算完成，
+        不复制整个 DataFrame。结果与 build_features(df).iloc[-1] 的数值列一致
+        （含输入的 K 线 / 指标列；离散的 rsi_zone 不输出）。
+        """
+        if df is None or df.empty:
+            return {}
+
+        # 整表一次转 ndarray 再取尾部（指标表全是 float64 时是视图），避免 pandas 的行/列索引开销
+        names = df.columns.tolist()
+        tail = df.to_numpy()[-self.LATEST_LOOKBACK:]
+        out: Dict[str, float] = {
+            k: float(v) for k, v in zip(names, tail[-1].tolist())
+            if isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_))
+        }
+
+        position = {name: i for i, name in enumerate(names)}
+        columns = tail[:, [position[name] for name in self._LATEST_INPUTS]].astype(float).T
+        close, high, low, volume, rsi, macd, bb_width, obv, vwap, high_low_range = columns
+        c = close[-1]
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            f64 = np.float64
+            c64 = f64(c)
+
+            # 1. 价格相对位置
+            for name, ref in (('sma20', 'sma_20'), ('sma50', 'sma_50'), ('ema12', 'ema_12'), ('ema26', 'ema_26')):
+                value = f64(out[ref])
+                out[f'price_to_{name}_pct'] = float((c64 - value) / value * 100)
+            band = f64(out['bb_upper']) - f64(out['bb_lower'])
+            out['bb_position'] = float((c64 - f64(out['bb_lower'])) / band * 100) if band > 0 else 50.0
+            price_to_vwap = np.where(vwap > 0, (close - vwap) / vwap * 100, 0.0)
+            out['price_to_vwap_pct'] = float(price_to_vwap[-1])
+            window = _tail(high, 20)
+            recent_high = f64(window.max()) if window is not None else np.nan
+            window = _tail(low, 20)
+            recent_low = f64(window.min()) if window is not None else np.nan
+            out['price_to_recent_high_pct'] = float((c64 - recent_high) / recent_high * 100)
+            out['price_to_recent_low_pct'] = float((c64 - recent_low) / recent_low * 100)
+
+            # 2. 趋势强度
+            ema_cross = float((f64(out['ema_12']) - f64(out['ema_26'])) / c64 * 100)
+            sma_cross = float((f64(out['sma_20']) - f64(out['sma_50'])) / c64 * 100)
+            out['ema_cross_strength'] = ema_cross
+            out['sma_cross_strength'] = sma_cross
+            out['macd_momentum_5'] = float(macd[-1] - _lag(macd, 5))
+            out['macd_momentum_10'] = float(macd[-1] - _lag(macd, 10))
+            out['trend_alignment'] = 1 if (ema_cross > 0 and sma_cross > 0) else (
+                -1 if (ema_cross < 0 and sma_cross < 0) else 0)
+            for n in (5, 10, 20):
+                out[f'price_slope_{n}'] = _latest_slope_pct(close, n)
+            diffs = np.diff(close[-15:])
+            out['directional_strength'] = (
+                float((diffs > 0).sum() / 14 * 100) if len(diffs) == 14 and not np.isnan(diffs).any() else np.nan
+            )
+
+            # 3. 动量
+            out['rsi_momentum_5'] = float(rsi[-1] - _lag(rsi, 5))
+            out['rsi_momentum_10'] = float(rsi[-1] - _lag(rsi, 10))
+            r = rsi[-1]
+            zone = np.nan
+            for upper, value in ((30, -2.0), (40, -1.0), (60, 0.0), (70, 1.0), (100, 2.0)):
+                if 0 < r <= upper:
+                    zone = value
+                    break
+            out['rsi_zone_numeric'] = zone
+            close_ff = _ffill(close)
+            for k in (1, 5, 10, 20):
+                out[f'return_{k}'] = float((f64(close_ff[-1]) / f64(_lag(close_ff, k)) - 1) * 100)
+            return_5_prev = (f64(_lag(close_ff, 5)) / f64(_lag(close_ff, 10)) - 1) * 100
+            out['momentum_acceleration'] = float(out['return_5'] - return_5_prev)
+
+            # 4. 波动率
+            atr_normalized = float(f64(out['atr']) / c64 * 100)
+            out['atr_normalized'] = atr_normalized
+            out['bb_width_change'] = float(bb_width[-1] - _lag(bb_width, 5))
+            bb_width_ff = _ffill(bb_width)
+            out['bb_width_pct_change'] = float((f64(bb_width_ff[-1]) / f64(_lag(bb_width_ff, 5)) - 1) * 100)
+            returns = close_ff[1:] / close_ff[:-1] - 1
+            for n in (5, 10, 20):
+                window = _tail(returns, n)
+                out[f'volatility_{n}'] = float(window.std(ddof=1) * 100 * np.sqrt(n)) if window is not None else np.nan
+            hl_ma5 = _tail_mean(high_low_range, 5)
+            out['hl_range_ma5'] = hl_ma5
+            out['hl_range_expansion'] = float(f64(high_low_range[-1]) / f64(hl_ma5))
+
+            # 5. 成交量
+            volume_sma = f64(out['volume_sma'])
+            out['volume_trend_5'] = float(f64(_tail_mean(volume, 5)) / volume_sma)
+            out['volume_trend_10'] = float(f64(_tail_mean(volume, 10)) / volume_sma)
+            volume_ff = _ffill(volume)
+            volume_change = (volume_ff[1:] / volume_ff[:-1] - 1) * 100
+            out['volume_change_pct'] = float(volume_change[-1]) if len(volume_change) else np.nan
+            out['volume_acceleration'] = float(out['volume_change_pct'] - _lag(volume_change, 5))
+            flow = volume[1:] * np.sign(np.diff(close))
+            window = _tail(flow, 20)
+            out['price_volume_trend'] = float(window.sum()) if window is not None else np.nan
+            obv_ma20 = _tail_mean(obv, 20)
+            out['obv_ma20'] = obv_ma20
+            out['obv_trend'] = float((f64(obv[-1]) - obv_ma20) / abs(f64(obv_ma20)) * 100) if obv_ma20 != 0 else 0.0
+            out['vwap_deviation_ma5'] = _tail_mean(price_to_vwap, 5)
+
+            # 6. 组合特征
+            rsi_value, bb_position = out['rsi'], out['bb_position']
+            volume_ratio, volatility_20 = out['volume_ratio'], out['volatility_20']
+            trend_score = float(np.sign(ema_cross) + np.sign(sma_cross) + np.sign(out['macd']))
+            out['trend_confirmation_score'] = trend_score
+            out['overbought_score'] = int(rsi_value > 70) + int(bb_position > 80) + int(out['price_to_sma20_pct'] > 5)
+            out['oversold_score'] = int(rsi_value < 30) + int(bb_position < 20) + int(out['price_to_sma20_pct'] < -5)
+            out['market_strength'] = float(abs(f64(ema_cross)) * volume_ratio * (1 + atr_normalized / 100))
+            out['risk_signal'] = float(f64(volatility_20) * (1 / f64(volume_ratio if volume_ratio != 0 else 1)))
+            out['reversal_probability'] = (
+                int(rsi_value > 80 or rsi_value < 20) * 2 +
+                int(bb_position > 95 or bb_position < 5) * 2 +
+                int(out['macd_momentum_5'] * out['macd'] < 0)
+            )
+            out['trend_sustainability'] = float(
+                abs(trend_score) * np.clip(volume_ratio, 0.5, 2) * (1 - np.clip(f64(volatility_20) / 10, 0, 1))
+            )
+
+        return out
+    
     def get_feature_importance_groups(self) -> Dict[str, List[str]]:
         """
         返回特征的重要性分组
@@ -28,9 +28,23 @@ LLM 模块
         user_prompt="Hello!"
     )
     print(response.content)
+
+    # 异步管线中（共享连接池，不阻塞事件循环）
+    response = await client.async_chat(
+        system_prompt="You are a helpful assistant",
+        user_prompt="Hello!"
+    )
 """
 
-from .base import LLMConfig, BaseLLMClient, ChatMessage, LLMResponse
+from .base import (
+    LLMConfig,
+    BaseLLMClient,
+    ChatMessage,
+    LLMResponse,
+    get_async_http_client,
+    close_async_http_client,
+)
+from .cache import LLMResponseCache, CachedLLMClient, LLMCacheMiss
 from .factory import create_client, get_supported_providers, register_provider
 
 # 导出具体客户端类（便于类型检查和直接实例化）
@@ -49,6 +63,11 @@ __all__ = [
     "BaseLLMClient",
     "ChatMessage",
     "LLMResponse",
+    "get_async_http_client",
+    "close_async_http_client",
+    "LLMResponseCache",
+    "CachedLLMClient",
+    "LLMCacheMiss",
     "create_client",
     "get_supported_providers",
     "register_provider",
@@ -3,17 +3,74 @@ LLM 抽象基类和配置
 ==================
 
 提供统一的 LLM 客户端接口，支持多种 LLM 提供商。
+
+同步调用使用 `chat` / `chat_messages`；异步管线中使用 `async_chat` /
+`async_chat_messages`，共享每个事件循环一个的 httpx.AsyncClient 连接池，
+重试退避使用 asyncio.sleep，不会阻塞事件循环。
 """
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Dict, Any, Optional, List
+import asyncio
 import httpx
+import random
 import time
+import weakref
 
 from src.llm.metrics import record_error, record_request, record_success
 import re
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+
+# 可重试的 HTTP 状态码
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 网络连接错误（需要重试）
+NETWORK_ERRORS = (
+    httpx.ConnectError, httpx.ReadError, httpx.WriteError,
+    ConnectionResetError, ConnectionError, OSError
+)
+
+# 异步退避上限（秒）
+MAX_BACKOFF_SECONDS = 30.0
+
+# 共享异步连接池：每个事件循环一个 AsyncClient，所有提供商复用 keep-alive 连接
+_ASYNC_POOL_LIMITS = httpx.Limits(
+    max_connections=32,
+    max_keepalive_connections=16,
+    keepalive_expiry=60.0
+)
+_async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """获取当前事件循环的共享 httpx.AsyncClient（不存在或已关闭则创建）"""
+    loop = asyncio.get_running_loop()
+    client = _async_pools.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=HAS_HTTP2, limits=_ASYNC_POOL_LIMITS)
+        _async_pools[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    """关闭当前事件循环的共享连接池"""
+    client = _async_pools.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def backoff_delay(attempt: int, cap: float = MAX_BACKOFF_SECONDS) -> float:
+    """指数退避 + 抖动（equal jitter），避免多个请求同时重试"""
+    base = min(cap, float(2 ** attempt))
+    return base / 2 + random.uniform(0, base / 2)
+
 
 @dataclass
 class LLMConfig:
@@ -113,6 +170,24 @@ class BaseLLMClient(ABC):
             total += self._estimate_tokens(msg.content)
         return total
     
+    def _fill_usage(self, parsed: LLMResponse, est_prompt_tokens: int) -> None:
+        """提供商未返回 usage 时用估算值补齐"""
+        usage = parsed.usage or {}
+        prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
+        completion_tokens = int(usage.get("completion_tokens", 0) or 0)
+        total_tokens = int(usage.get("total_tokens", 0) or 0)
+        if total_tokens <= 0:
+            if prompt_tokens <= 0:
+                prompt_tokens = est_prompt_tokens
+            if completion_tokens <= 0:
+                completion_tokens = self._estimate_tokens(parsed.content or "")
+            total_tokens = prompt_tokens + completion_tokens
+            parsed.usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": total_tokens
+            }
+    
     def chat(
         self, 
         system_prompt: str, 
@@ -164,36 +239,21 @@ class BaseLLMClient(ABC):
                 response = self.client.post(url, json=body, headers=headers)
                 response.raise_for_status()
                 parsed = self._parse_response(response.json())
-                usage = parsed.usage or {}
-                prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
-                completion_tokens = int(usage.get("completion_tokens", 0) or 0)
-                total_tokens = int(usage.get("total_tokens", 0) or 0)
-                if total_tokens <= 0:
-                    if prompt_tokens <= 0:
-                        prompt_tokens = est_prompt_tokens
-                    if completion_tokens <= 0:
-                        completion_tokens = self._estimate_tokens(parsed.content or "")
-                    total_tokens = prompt_tokens + completion_tokens
-                    parsed.usage = {
-                        "prompt_tokens": prompt_tokens,
-                        "completion_tokens": completion_tokens,
-                        "total_tokens": total_tokens
-                    }
+                self._fill_usage(parsed, est_prompt_tokens)
                 latency_ms = int((time.time() - start_ts) * 1000)
                 record_success(self.PROVIDER, self.model, latency_ms, parsed.usage)
                 return parsed
             except httpx.HTTPStatusError as e:
                 last_error = e
                 record_error(self.PROVIDER, self.model, f"HTTP {e.response.status_code}")
-                if e.response.status_code in [429, 500, 502, 503, 504]:
+                if e.response.status_code in RETRYABLE_STATUS_CODES:
                     # 可重试的 HTTP 错误
                     wait_time = 2 ** attempt
                     print(f"⚠️ LLM HTTP Error {e.response.status_code}, retrying in {wait_time}s (attempt {attempt + 1}/{self.config.max_retries})")
                     time.sleep(wait_time)
                     continue
                 raise
-            except (httpx.ConnectError, httpx.ReadError, httpx.WriteError, 
-                    ConnectionResetError, ConnectionError, OSError) as e:
+            except NETWORK_ERRORS as e:
                 # 网络连接错误，需要重试
                 last_error = e
                 record_error(self.PROVIDER, self.model, type(e).__name__)
@@ -214,6 +274,87 @@ class BaseLLMClient(ABC):
         
         raise last_error or Exception("Max retries exceeded")
 
+    async def async_chat(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        **kwargs
+    ) -> LLMResponse:
+        """
+        统一调用入口（异步版）
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            **kwargs: 额外参数（temperature, max_tokens 等）
+            
+        Returns:
+            LLMResponse 对象
+        """
+        messages = [
+            ChatMessage(role="system", content=system_prompt),
+            ChatMessage(role="user", content=user_prompt)
+        ]
+        return await self.async_chat_messages(messages, **kwargs)
+
+    async def async_chat_messages(
+        self,
+        messages: List[ChatMessage],
+        **kwargs
+    ) -> LLMResponse:
+        """
+        多轮对话调用（异步版）
+        
+        使用共享连接池发送请求；重试退避为 asyncio.sleep + 抖动。
+        调用方取消任务时 CancelledError 直接向上传播，不会被重试吞掉。
+        
+        Args:
+            messages: 消息列表
+            **kwargs: 额外参数
+            
+        Returns:
+            LLMResponse 对象
+        """
+        url = self._build_url()
+        headers = self._build_headers()
+        body = self._build_request_body(messages, **kwargs)
+        est_prompt_tokens = self._estimate_prompt_tokens(messages)
+        
+        last_error = None
+        for attempt in range(self.config.max_retries):
+            is_last_attempt = attempt >= self.config.max_retries - 1
+            try:
+                record_request(self.PROVIDER, self.model)
+                start_ts = time.time()
+                response = await get_async_http_client().post(
+                    url, json=body, headers=headers, timeout=self.config.timeout
+                )
+                response.raise_for_status()
+                parsed = self._parse_response(response.json())
+                self._fill_usage(parsed, est_prompt_tokens)
+                latency_ms = int((time.time() - start_ts) * 1000)
+                record_success(self.PROVIDER, self.model, latency_ms, parsed.usage)
+                return parsed
+            except httpx.HTTPStatusError as e:
+                last_error = e
+                record_error(self.PROVIDER, self.model, f"HTTP {e.response.status_code}")
+                if e.response.status_code not in RETRYABLE_STATUS_CODES or is_last_attempt:
+                    raise
+                reason = f"HTTP Error {e.response.status_code}"
+            except Exception as e:
+                # 网络错误 / 超时 / 其他未知错误；CancelledError 不是 Exception，会直接传播
+                last_error = e
+                record_error(self.PROVIDER, self.model, type(e).__name__)
+                if is_last_attempt:
+                    raise
+                kind = "Connection Error" if isinstance(e, (httpx.TimeoutException, *NETWORK_ERRORS)) else "Unexpected Error"
+                reason = f"{kind}: {type(e).__name__}"
+            
+            wait_time = backoff_delay(attempt)
+            print(f"⚠️ LLM {reason}, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{self.config.max_retries})")
+            await asyncio.sleep(wait_time)
+        
+        raise last_error or Exception("Max retries exceeded")
     
     def close(self):
         """关闭 HTTP 客户端"""
@@ -0,0 +1,244 @@
+"""
+LLM 响应缓存
+============
+
+内容寻址的持久化 LLM 响应缓存，用于回测和回放：相同的
+provider / model / temperature / max_tokens / prompts 直接返回磁盘上的响应，
+重复运行同一回测窗口不再重复付费，结果完全确定。
+
+存储结构（按 key 前两位分桶）：
+
+    data/llm_cache/
+    ├── 3f/
+    │   └── 3fa1...e9.json
+    └── ...
+
+模式：
+- read_write: 命中返回缓存，未命中调用 LLM 并写入
+- replay_only: 只读，未命中抛出 LLMCacheMiss（保证回放不产生任何 API 调用）
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.utils.atomic_file import atomic_write
+
+from .base import BaseLLMClient, ChatMessage, LLMResponse
+from .metrics import record_cache_hit, record_cache_miss
+
+
+CACHE_MODES = ("read_write", "replay_only")
+
+
+class LLMCacheMiss(LookupError):
+    """replay_only 模式下缓存未命中"""
+
+
+class LLMResponseCache:
+    """
+    磁盘 LLM 响应缓存（按总大小 LRU 淘汰）
+
+    命中时更新文件 mtime，淘汰时按 mtime 从旧到新删除，直到总大小低于上限。
+    """
+
+    DEFAULT_CACHE_DIR = "data/llm_cache"
+    DEFAULT_MAX_SIZE_MB = 256
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+        mode: str = "read_write"
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"mode must be one of {CACHE_MODES}, got {mode}")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._size_bytes: Optional[int] = None
+
+    @property
+    def replay_only(self) -> bool:
+        return self.mode == "replay_only"
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        temperature: Any,
+        max_tokens: Any,
+        messages: List[ChatMessage]
+    ) -> str:
+        """根据请求参数与 prompts 生成内容地址 (sha256)"""
+        payload = json.dumps(
+            {
+                "provider": provider,
+                "model": model,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "messages": [[m.role, m.content] for m in messages],
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """读取缓存，未命中返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path, None)  # LRU: 命中即刷新
+        except (OSError, ValueError):
+            return None
+        return LLMResponse(
+            content=data.get("content", ""),
+            model=data.get("model", ""),
+            provider=data.get("provider", ""),
+            usage=data.get("usage", {}),
+        )
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """写入缓存（原子替换），必要时触发淘汰"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(
+            {
+                "content": response.content,
+                "model": response.model,
+                "provider": response.provider,
+                "usage": response.usage,
+            },
+            ensure_ascii=False,
+        )
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        # 每次写入用独立的临时文件：并发写同一 key（多个回测进程 / 线程）不会互相覆盖或替换失败
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+        with self._lock:
+            if self._size_bytes is None:
+                self._size_bytes = self._scan_size()
+            else:
+                # 覆盖已有 key 时只计大小差
+                self._size_bytes += len(data.encode("utf-8")) - old_size
+            if self._size_bytes > self.max_size_bytes:
+                self._evict()
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*/*.json"))
+
+    def _evict(self) -> None:
+        """按最近访问时间淘汰，直到总大小降到上限的 90%"""
+        entries = []
+        for p in self.cache_dir.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_size_bytes * 0.9)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._size_bytes = total
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._scan_size()
+            self._size_bytes = size
+        return {
+            "entries": sum(1 for _ in self.cache_dir.glob("*/*.json")),
+            "size_mb": round(size / (1024 * 1024), 2),
+            "max_size_mb": round(self.max_size_bytes / (1024 * 1024), 2),
+            "mode": self.mode,
+        }
+
+
+class CachedLLMClient:
+    """
+    为任意 BaseLLMClient 加上响应缓存
+
+    暴露与 BaseLLMClient 相同的 chat / chat_messages / async_chat /
+    async_chat_messages 接口，其余属性透传给被包装的客户端。
+    """
+
+    def __init__(self, client: BaseLLMClient, cache: LLMResponseCache):
+        self.inner = client
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    def _key(self, messages: List[ChatMessage], kwargs: Dict[str, Any]) -> str:
+        config = self.inner.config
+        return self.cache.make_key(
+            provider=self.inner.PROVIDER,
+            model=self.inner.model,
+            temperature=kwargs.get("temperature", config.temperature),
+            max_tokens=kwargs.get("max_tokens", config.max_tokens),
+            messages=messages,
+        )
+
+    def _lookup(self, key: str) -> Optional[LLMResponse]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            record_cache_hit(self.inner.PROVIDER, self.inner.model)
+            return cached
+        record_cache_miss(self.inner.PROVIDER, self.inner.model)
+        if self.cache.replay_only:
+            raise LLMCacheMiss(f"LLM cache miss in replay_only mode (key={key[:12]})")
+        return None
+
+    def chat(self, system_prompt: str, user_prompt: str, **kwargs) -> LLMResponse:
+        messages = [
+            ChatMessage(role="system", content=system_prompt),
+            ChatMessage(role="user", content=user_prompt)
+        ]
+        return self.chat_messages(messages, **kwargs)
+
+    def chat_messages(self, messages: List[ChatMessage], **kwargs) -> LLMResponse:
+        key = self._key(messages, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.inner.chat_messages(messages, **kwargs)
+        self.cache.put(key, response)
+        return response
+
+    async def async_chat(self, system_prompt: str, user_prompt: str, **kwargs) -> LLMResponse:
+        messages = [
+            ChatMessage(role="system", content=system_prompt),
+            ChatMessage(role="user", content=user_prompt)
+        ]
+        return await self.async_chat_messages(messages, **kwargs)
+
+    async def async_chat_messages(self, messages: List[ChatMessage], **kwargs) -> LLMResponse:
+        key = self._key(messages, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.inner.async_chat_messages(messages, **kwargs)
+        self.cache.put(key, response)
+        return response
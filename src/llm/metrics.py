@@ -18,6 +18,8 @@ class LLMStats:
     total_input_tokens: int = 0
     total_output_tokens: int = 0
     total_tokens: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         avg_latency_ms = 0
@@ -26,10 +28,13 @@ class LLMStats:
         token_speed_tps = 0.0
         if self.total_latency_ms > 0 and self.total_tokens > 0:
             token_speed_tps = self.total_tokens / (self.total_latency_ms / 1000.0)
+        cache_lookups = self.cache_hits + self.cache_misses
+        cache_hit_rate = self.cache_hits / cache_lookups if cache_lookups > 0 else 0.0
         data = asdict(self)
         data.update({
             "avg_latency_ms": avg_latency_ms,
-            "token_speed_tps": round(token_speed_tps, 2)
+            "token_speed_tps": round(token_speed_tps, 2),
+            "cache_hit_rate": round(cache_hit_rate, 4)
         })
         return data
 
@@ -88,6 +93,18 @@ def record_error(provider: str, model: str, error: str):
             stat.last_error = error
 
 
+def record_cache_hit(provider: str, model: str):
+    with _lock:
+        for key, store in ((provider, _stats_by_provider), (model, _stats_by_model)):
+            _get_or_create(store, key).cache_hits += 1
+
+
+def record_cache_miss(provider: str, model: str):
+    with _lock:
+        for key, store in ((provider, _stats_by_provider), (model, _stats_by_model)):
+            _get_or_create(store, key).cache_misses += 1
+
+
 def snapshot() -> Dict[str, Any]:
     with _lock:
         return {
@@ -11,6 +11,7 @@ Date: 2025-12-21
 
 import os
 import pickle
+import threading
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import numpy as np
@@ -166,6 +167,7 @@ class ProphetMLModel:
             self.model.fit(X_train, y_train)
         
         self.is_trained = True
+        self._top_factors = None
         
         # 计算训练指标
         train_pred = self.model.predict_proba(X_train)[:, 1]
@@ -220,7 +222,7 @@ class ProphetMLModel:
         feature_vector = self._prepare_features(features)
         
         # 预测概率 (5 classes)
-        probs = self.model.predict_proba(feature_vector)[0]
+        probs = self._raw_predict(feature_vector)[0]
         
         # Map to class names
         # LightGBM multiclass uses 0-indexed classes, but our labels are -2 to 2
@@ -233,7 +235,37 @@ class ProphetMLModel:
             'strong_up': float(probs[4]),    # class 2 → index 4
         }
     
-    def _prepare_features(self, features: Dict[str, float]) -> pd.DataFrame:
+    def _raw_predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        直接调用 LightGBM Booster 预测（跳过 sklearn 封装的 DataFrame 校验开销）
+        
+        二分类返回 (n,) 的上涨概率；多分类返回 (n, n_classes)。
+        """
+        booster = getattr(self.model, 'booster_', None)
+        if booster is None:
+            probs = self.model.predict_proba(X)
+            return probs[:, 1] if probs.shape[1] == 2 else probs
+        return booster.predict(X)
+    
+    def predict_up_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        批量预测上涨概率
+        
+        Args:
+            X: (n_samples, n_features) 数组，列顺序为 feature_names
+        
+        Returns:
+            (n_samples,) 上涨概率；多分类模型为 weak_up + strong_up
+        """
+        if not self.is_trained or self.model is None:
+            raise ValueError("模型未训练，请先调用 train() 或 load()")
+        
+        probs = self._raw_predict(np.asarray(X, dtype=float).reshape(-1, len(self.feature_names)))
+        if probs.ndim == 1:
+            return probs
+        return probs[:, 3] + probs[:, 4]
+    
+    def _prepare_features(self, features: Dict[str, float]) -> np.ndarray:
         """
         准备特征向量
         
@@ -241,7 +273,7 @@ class ProphetMLModel:
             features: 原始特征字典
         
         Returns:
-            DataFrame 格式的特征向量
+            (1, n_features) 数组，按训练时的特征顺序
         """
         # 使用训练时的特征顺序
         feature_names = self.feature_names if self.feature_names else self.REQUIRED_FEATURES
@@ -256,7 +288,16 @@ class ProphetMLModel:
                 value = 100.0 if value > 0 else -100.0
             feature_values.append(float(value))
         
-        return pd.DataFrame([feature_values], columns=feature_names)
+        return np.array([feature_values], dtype=float)
+    
+    def get_top_factors(self, n: int = 5) -> Dict[str, float]:
+        """重要性最高的 n 个特征（按模型缓存，预测时不再每次排序）"""
+        cached = getattr(self, '_top_factors', None)
+        if cached is None or len(cached) != min(n, len(self.feature_names)):
+            importance = self.get_feature_importance()
+            cached = dict(sorted(importance.items(), key=lambda x: abs(x[1]), reverse=True)[:n])
+            self._top_factors = cached
+        return cached
     
     def _calculate_auc(self, y_true: pd.Series, y_pred: np.ndarray) -> float:
         """计算 AUC 分数 (多分类使用 macro-average)"""
@@ -320,6 +361,7 @@ class ProphetMLModel:
         self.is_trained = model_data.get('is_trained', True)
         self.val_auc_score = model_data.get('val_auc', 0.5) # Load AUC
         self.model_path = path
+        self._top_factors = None
         log.info(f"✅ 模型已加载: {path}")
     
     def get_feature_importance(self) -> Dict[str, float]:
@@ -336,6 +378,34 @@ class ProphetMLModel:
         return dict(zip(self.feature_names, importance))
 
 
+# ========== 共享模型实例 ==========
+# 同一模型文件只加载一次，多个 symbol / horizon 的 PredictAgent 共用同一个实例，
+# 批量推理时可以合并为一次模型调用。文件被重训覆盖（mtime 变化）后重新加载。
+_shared_models: Dict[str, Tuple[int, ProphetMLModel]] = {}
+_shared_models_lock = threading.Lock()
+
+
+def get_shared_model(model_path: str) -> ProphetMLModel:
+    """
+    获取模型文件对应的共享 ProphetMLModel 实例
+
+    Args:
+        model_path: 模型文件路径
+
+    Returns:
+        该文件当前版本的共享实例
+    """
+    key = os.path.realpath(model_path)
+    mtime = os.stat(key).st_mtime_ns
+    with _shared_models_lock:
+        cached = _shared_models.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        model = ProphetMLModel(model_path)
+        _shared_models[key] = (mtime, model)
+        return model
+
+
 class LabelGenerator:
     """
     标签生成器
@@ -466,6 +536,7 @@ class ProphetAutoTrainer:
         self._thread = None
         self.last_train_time = None
         self.train_count = 0
+        self.training_data = None  # TrainingDataManager（首次训练时创建）
         
     def start(self):
         """启动自动训练线程"""
@@ -516,26 +587,16 @@ class ProphetAutoTrainer:
         """执行训练"""
         log.info(f"🔮 开始自动训练 Prophet ML 模型...")
         
-        # 1. 获取历史数据
-        df = self._fetch_data()
-        if df is None or len(df) < 500:
-            log.warning(f"数据不足，跳过训练 (当前: {len(df) if df is not None else 0})")
+        # 1-3. 增量更新训练数据（仓库 K 线 + 新 K 线的指标 / 特征）
+        features_df = self._fetch_data()
+        if features_df is None or len(features_df) < 500:
+            log.warning(f"数据不足，跳过训练 (当前: {len(features_df) if features_df is not None else 0})")
             return
         
-        # 2. 计算指标
-        from src.data.processor import MarketDataProcessor
-        processor = MarketDataProcessor()
-        df_with_indicators = processor._calculate_indicators(df.copy())
-        
-        # 3. 构建特征
-        from src.features.technical_features import TechnicalFeatureEngineer
-        feature_engineer = TechnicalFeatureEngineer()
-        features_df = feature_engineer.build_features(df_with_indicators)
-        
         # 4. 生成标签
         label_generator = LabelGenerator(horizon_minutes=30, up_threshold=0.001)
         numeric_features = features_df.select_dtypes(include=[np.number])
-        X, y = label_generator.prepare_training_data(numeric_features, df, 'close')
+        X, y = label_generator.prepare_training_data(numeric_features, features_df, 'close')
         
         if len(X) < 100:
             log.warning(f"有效样本不足，跳过训练 (当前: {len(X)})")
@@ -561,46 +622,22 @@ class ProphetAutoTrainer:
         log.info(f"   验证 AUC: {metrics.get('val_auc', 0):.4f}")
     
     def _fetch_data(self) -> pd.DataFrame:
-        """获取历史数据"""
+        """
+        获取训练数据（K 线 + 指标 + 特征）
+        
+        历史读自本地 K 线仓库，只下载增量；特征矩阵持久化，只为新 K 线计算特征。
+        """
         try:
-            limit = self.training_days * 24 * 12  # 5分钟K线
-            
-            all_klines = []
-            remaining = limit
-            end_time = None
-            
-            while remaining > 0:
-                batch_size = min(remaining, 1000)
-                klines = self.client.client.futures_klines(
-                    symbol=self.symbol,
+            if self.training_data is None:
+                from src.api.history_downloader import HistoryDownloader
+                from src.models.training_data import TrainingDataManager
+                self.training_data = TrainingDataManager(
+                    self.symbol,
                     interval='5m',
-                    limit=batch_size,
-                    endTime=end_time
+                    training_days=self.training_days,
+                    downloader=HistoryDownloader(testnet=getattr(self.client, 'testnet', None))
                 )
-                
-                if not klines:
-                    break
-                
-                all_klines = klines + all_klines
-                end_time = klines[0][0] - 1
-                remaining -= batch_size
-            
-            # 转换为 DataFrame
-            df = pd.DataFrame(all_klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
-            
-            df.set_index('timestamp', inplace=True)
-            df = df.sort_index()
-            
-            log.info(f"📥 获取 {len(df)} 条历史 K 线")
-            return df
+            return self.training_data.refresh()
             
         except Exception as e:
             log.error(f"获取历史数据失败: {e}")
@@ -0,0 +1,218 @@
+"""
+增量训练数据管理 (Incremental Training Data)
+============================================
+
+ProphetAutoTrainer 的训练数据来源：
+- 历史 K 线读自本地 KlineStore，每次只向交易所下载上次之后的增量
+- 指标状态 (IncrementalIndicatorEngine) 与特征矩阵持久化到 data/ml_training/
+- 新 K 线只推进指标状态，特征只对「回看尾部 + 新行」重算后追加
+
+每次重训的数据准备开销与新增 K 线数量成正比，而不是整个 70 天窗口。
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import pickle
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.incremental_indicators import IncrementalIndicatorEngine
+from src.features.technical_features import TechnicalFeatureEngineer
+from src.utils.atomic_file import atomic_write
+from src.utils.kline_store import KlineStore, get_kline_store
+from src.utils.logger import log
+
+
+class TrainingDataManager:
+    """
+    滚动训练窗口的特征矩阵（增量维护）
+    """
+
+    DEFAULT_DIR = "data/ml_training"
+
+    # 缓存格式版本；与 TechnicalFeatureEngineer.FEATURE_VERSION 任一变化都全量重建
+    CACHE_VERSION = 1
+
+    # build_features 的最长回看（bb_width.pct_change(5)、volatility_20 等 < 30 根），留足余量
+    FEATURE_LOOKBACK = 64
+
+    # 从仓库读入指标引擎的 K 线列
+    CANDLE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']
+
+    def __init__(
+        self,
+        symbol: str,
+        interval: str = '5m',
+        training_days: int = 70,
+        store: Optional[KlineStore] = None,
+        downloader=None,
+        root: str = DEFAULT_DIR
+    ):
+        """
+        Args:
+            symbol: 交易对
+            interval: K 线周期
+            training_days: 训练窗口天数
+            store: K 线仓库（默认全局 KlineStore）
+            downloader: HistoryDownloader（默认按配置创建）
+            root: 特征缓存目录
+        """
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.training_days = training_days
+        self.store = store or get_kline_store()
+        self._downloader = downloader
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.step_ms = KlineStore.INTERVAL_MS[interval]
+
+    @property
+    def downloader(self):
+        if self._downloader is None:
+            from src.api.history_downloader import HistoryDownloader
+            self._downloader = HistoryDownloader()
+        return self._downloader
+
+    @property
+    def path(self) -> Path:
+        return self.root / f"{self.symbol}_{self.interval}.pkl"
+
+    # ========== 持久化 ==========
+
+    def _load(self) -> Optional[Dict]:
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            log.warning(f"⚠️ Failed to load training cache {self.path}: {e}")
+            return None
+        if state.get('version') != (self.CACHE_VERSION, TechnicalFeatureEngineer.FEATURE_VERSION):
+            log.info(f"🔁 Training cache version changed, rebuilding {self.symbol}/{self.interval}")
+            return None
+        return state
+
+    def _save(self, state: Dict):
+        # 独立临时文件：自动重训线程与手动训练同时保存时互不覆盖
+        with atomic_write(self.path) as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def clear(self):
+        """删除持久化的特征矩阵（下次全量重建）"""
+        if self.path.exists():
+            self.path.unlink()
+
+    # ========== 增量更新 ==========
+
+    def _window(self, now_ms: int):
+        """训练窗口 [start_ms, end_ms]：end 为最后一根已收盘 K 线的开盘时间"""
+        end_ms = now_ms // self.step_ms * self.step_ms - self.step_ms
+        start_ms = end_ms - self.training_days * 86_400_000 + self.step_ms
+        return start_ms, end_ms
+
+    def _candles(self, start_ms: int, end_ms: int) -> List[Dict]:
+        arrays = self.store.read_arrays(self.symbol, self.interval, start_ms, end_ms)
+        columns = {col: np.asarray(arrays[col], dtype=np.float64).tolist() for col in self.CANDLE_COLUMNS}
+        timestamps = np.asarray(arrays['timestamp'], dtype=np.int64).tolist()
+        return [
+            {'timestamp': ts, **{col: columns[col][i] for col in self.CANDLE_COLUMNS}}
+            for i, ts in enumerate(timestamps)
+        ]
+
+    def _indicator_frame(self, engine: IncrementalIndicatorEngine, candles: List[Dict]) -> pd.DataFrame:
+        """推进指标状态，返回新 K 线的指标行"""
+        rows = [row for row in (engine.update(self.symbol, self.interval, c) for c in candles) if row is not None]
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df.set_index('timestamp')
+
+    def _rebase_obv(self, state: Dict):
+        """
+        OBV 是从第一根 K 线起的累计量：窗口滚动后以保留的第一行为 0 重新起算，
+        与对当前窗口全量构建的数值一致（指标引擎与回看尾部同步平移，后续增量保持衔接）
+        """
+        features = state['features']
+        if features.empty or 'obv' not in features:
+            return
+        offset = float(features['obv'].iloc[0])
+        if offset == 0 or np.isnan(offset):
+            return
+        features = features.copy()
+        features['obv'] -= offset
+        if 'obv_ma20' in features:
+            features['obv_ma20'] -= offset
+            obv_ma20 = features['obv_ma20']
+            features['obv_trend'] = np.where(
+                obv_ma20 != 0, (features['obv'] - obv_ma20) / abs(obv_ma20) * 100, 0
+            )
+        state['features'] = features
+        tail = state['indicator_tail'].copy()
+        tail['obv'] -= offset
+        state['indicator_tail'] = tail
+        state['engine'].rebase_obv(self.symbol, self.interval, offset)
+
+    def refresh(self, now_ms: Optional[int] = None) -> pd.DataFrame:
+        """
+        下载增量 K 线并更新特征矩阵
+
+        Returns:
+            训练窗口内的特征矩阵（K 线 + 指标 + 特征列，DatetimeIndex）
+        """
+        start_ms, end_ms = self._window(now_ms if now_ms is not None else int(time.time() * 1000))
+
+        # 1. 只下载仓库缺口（首次为整个窗口，之后只有新收盘的 K 线）
+        self.downloader.download_klines_sync(self.symbol, self.interval, start_ms, end_ms, store=self.store)
+
+        # 2. 恢复状态；过期（与新窗口不衔接）则全量重建
+        state = self._load()
+        if state is not None and state['last_timestamp'] < start_ms - self.step_ms:
+            log.info(f"🔁 Training cache for {self.symbol}/{self.interval} is stale, rebuilding")
+            state = None
+        if state is None:
+            state = {
+                'version': (self.CACHE_VERSION, TechnicalFeatureEngineer.FEATURE_VERSION),
+                'engine': IncrementalIndicatorEngine(max_rows=1),
+                'last_timestamp': None,
+                'indicator_tail': pd.DataFrame(),
+                'features': pd.DataFrame(),
+            }
+            first_ms = start_ms
+        else:
+            first_ms = state['last_timestamp'] + 1
+
+        # 3. 新 K 线 -> 指标 -> 特征（只算尾部回看 + 新行）
+        candles = self._candles(first_ms, end_ms)
+        new_rows = 0
+        if candles:
+            t0 = time.perf_counter()
+            new_indicators = self._indicator_frame(state['engine'], candles)
+            tail = state['indicator_tail']
+            combined = pd.concat([tail, new_indicators]) if not tail.empty else new_indicators
+            new_features = TechnicalFeatureEngineer().build_features(combined).iloc[len(tail):]
+            new_features.attrs = {}
+
+            features = state['features']
+            state['features'] = pd.concat([features, new_features]) if not features.empty else new_features
+            state['indicator_tail'] = combined.iloc[-self.FEATURE_LOOKBACK:]
+            state['last_timestamp'] = candles[-1]['timestamp']
+            new_rows = len(new_features)
+            log.info(f"🧮 Training features +{new_rows} rows in {time.perf_counter() - t0:.2f}s")
+
+        # 4. 裁剪到训练窗口（OBV 从窗口第一根重新起算）并持久化
+        features = state['features']
+        if not features.empty:
+            state['features'] = features[features.index >= pd.Timestamp(start_ms, unit='ms')]
+            self._rebase_obv(state)
+        if new_rows:
+            self._save(state)
+
+        log.info(f"📚 Training data {self.symbol}/{self.interval}: {len(state['features'])} rows (+{new_rows} new)")
+        return state['features']
@@ -3,6 +3,9 @@ from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import re
+import time
+import asyncio
 import secrets
 import json
 from typing import Optional, Dict, List, Any
@@ -144,33 +147,38 @@ async def check_auth_status(request: Request):
     except HTTPException:
         return {"status": "unauthenticated"}
 
-# API Endpoints
-@app.get("/api/status")
-async def get_status(authenticated: bool = Depends(verify_auth)):
-    import time
-    import re
+# ========== Dashboard Status ==========
 
-    def _get_strategy_timeframes():
-        try:
-            config_path = Path(__file__).resolve().parents[2] / 'config' / 'data_alignment.yaml'
-            if not config_path.exists():
-                return ['5m', '15m', '1h']
-            with open(config_path, 'r', encoding='utf-8') as f:
-                cfg = yaml.safe_load(f) or {}
-            mode = cfg.get('mode', 'backtest')
-            tf_map = (cfg.get(mode, {}) or {}).get('timeframes', {}) or {}
-            timeframes = list(tf_map.keys())
-            if timeframes:
-                return timeframes
+_DEFAULT_TIMEFRAMES = ['5m', '15m', '1h']
+_timeframes_cache: Dict[str, Any] = {'mtime': None, 'timeframes': _DEFAULT_TIMEFRAMES}
+
+
+def _get_strategy_timeframes() -> List[str]:
+    """Strategy timeframes from config/data_alignment.yaml (re-parsed only when the file changes)"""
+    config_path = Path(BASE_DIR) / 'config' / 'data_alignment.yaml'
+    try:
+        mtime = config_path.stat().st_mtime_ns
+    except OSError:
+        return _DEFAULT_TIMEFRAMES
+    if _timeframes_cache['mtime'] == mtime:
+        return _timeframes_cache['timeframes']
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            cfg = yaml.safe_load(f) or {}
+        mode = cfg.get('mode', 'backtest')
+        tf_map = (cfg.get(mode, {}) or {}).get('timeframes', {}) or {}
+        timeframes = list(tf_map.keys())
+        if not timeframes:
             fallback_map = cfg.get('timeframe_settings', {}) or {}
-            timeframes = list(fallback_map.keys())
-            return timeframes if timeframes else ['5m', '15m', '1h']
-        except Exception:
-            return ['5m', '15m', '1h']
+            timeframes = list(fallback_map.keys()) or _DEFAULT_TIMEFRAMES
+    except Exception:
+        return _DEFAULT_TIMEFRAMES
+    _timeframes_cache.update(mtime=mtime, timeframes=timeframes)
+    return timeframes
 
-    timeframes = _get_strategy_timeframes()
-    
-    # Check and update demo expiration status
+
+def _check_demo_expiry() -> float:
+    """Stop the bot when the demo window is over; returns the demo seconds remaining"""
     if global_state.demo_mode_active and global_state.demo_start_time:
         elapsed = time.time() - global_state.demo_start_time
         if elapsed >= global_state.demo_limit_seconds:
@@ -178,162 +186,218 @@ async def get_status(authenticated: bool = Depends(verify_auth)):
             if global_state.execution_mode == "Running":
                 global_state.execution_mode = "Stopped"
                 global_state.add_log("⏰ Demo 时间已到 (20分钟限制)，系统已自动停止。请配置您自己的 API Key 继续使用。")
-    
-    # Calculate demo time remaining
+
     demo_time_remaining = 0
     if global_state.demo_mode_active and global_state.demo_start_time and not global_state.demo_expired:
         elapsed = time.time() - global_state.demo_start_time
         demo_time_remaining = max(0, global_state.demo_limit_seconds - elapsed)
-    
-    def _filter_simplified_logs(logs: List[str]) -> List[str]:
-        agent_tags = [
-            '[📊 SYSTEM]',
-            '[🔄 CONFIG]',
-            '[🎯 SYSTEM]',
-            '[🕵️ ORACLE]',
-            '[👨‍🔬 STRATEGIST]',
-            '[🔮 PROPHET]',
-            '[🐂 Long Case]',
-            '[🐻 Short Case]',
-            '[⚖️ CRITIC]',
-            '[⚖️ Final Decision]',
-            '[🛡️ GUARDIAN]',
-            '[🚀 EXECUTOR]',
-            '[Execution]',
-            '[🧠 REFLECTION]'
-        ]
-        agent_keywords = [
-            'DataSyncAgent',
-            'QuantAnalystAgent',
-            'PredictAgent',
-            'DecisionCoreAgent',
-            'RiskAuditAgent',
-            'ExecutionEngine',
-            'StrategyEngine',
-            'ReflectionAgent',
-            'ReflectionAgentLLM',
-            'TrendAgent',
-            'TrendAgentLLM',
-            'SetupAgent',
-            'SetupAgentLLM',
-            'TriggerAgent',
-            'TriggerAgentLLM'
-        ]
-        status_keywords = [
-            '⏹️', '⏸️', '▶️',
-            'STOPPED', 'PAUSED', 'RESUMED', 'START'
-        ]
-        
-        def _clean_log_line(line: str) -> str:
-            """Remove file:function patterns like 'src.api.binance_websocket:__init__' from log lines"""
-            # Remove ANSI color codes first
-            clean = re.sub(r'\x1b\[[0-9;]*m', '', line or '')
-            # Remove timestamp pattern: 2026-01-08 00:00:00 | LEVEL    | module:func -
-            # This captures everything up to and including the " - " after the function name
-            clean = re.sub(r'^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s*\|\s*\w+\s*\|\s*[\w\.]+:[\w_]+\s*-\s*', '', clean)
-            # Fallback: if the above didn't match, try to remove just the module:func part
-            clean = re.sub(r'^[\w\.]+:[\w_]+\s*-\s*', '', clean)
-            return clean.strip()
-        
-        filtered = []
-        for line in logs:
-            clean_line = re.sub(r'\x1b\[[0-9;]*m', '', line or '')
-            if ('WARNING' in clean_line or
-                'ERROR' in clean_line or
-                re.search(r'\bwarn\b', clean_line, re.IGNORECASE) or
-                re.search(r'\berror\b', clean_line, re.IGNORECASE) or
-                '⚠️' in clean_line or
-                '❌' in clean_line):
-                filtered.append(_clean_log_line(line))
-                continue
-            if any(tag in clean_line for tag in agent_tags):
-                filtered.append(_clean_log_line(line))
-                continue
-            if any(keyword in clean_line for keyword in agent_keywords):
-                filtered.append(_clean_log_line(line))
-                continue
-            if any(keyword in clean_line for keyword in status_keywords):
-                filtered.append(_clean_log_line(line))
-                continue
-            if '━━━' in clean_line or 'Cycle #' in clean_line:
-                filtered.append(_clean_log_line(line))
-                continue
-        return filtered
-
-    with global_state.locked():
-        log_tail = 200
-        simplified_tail = 300
-        logs_tail = global_state.recent_logs[-log_tail:]
-        simplified_logs = _filter_simplified_logs(global_state.recent_logs[-simplified_tail:])
-        if len(simplified_logs) > log_tail:
-            simplified_logs = simplified_logs[-log_tail:]
-
-        account_payload = dict(global_state.account_overview or {})
-        realized_pnl = float(getattr(global_state, 'cumulative_realized_pnl', 0.0) or 0.0)
-        unrealized_pnl = float(account_payload.get('total_pnl', 0.0) or 0.0)
-        account_payload['realized_pnl'] = realized_pnl
-        account_payload['unrealized_pnl'] = unrealized_pnl
-        account_payload['total_pnl'] = realized_pnl + unrealized_pnl
-
-        data = {
-            "system": {
-                "running": global_state.is_running,
-                "mode": global_state.execution_mode,
-                "is_test_mode": global_state.is_test_mode,
-                "cycle_counter": global_state.cycle_counter,
-                "cycle_interval": global_state.cycle_interval,
-                "current_cycle_id": global_state.current_cycle_id,
-                "uptime_start": global_state.start_time,
-                "last_heartbeat": global_state.last_update,
-                "symbols": global_state.symbols,  # 🆕 Active trading symbols (AI500 Top5 support)
-                "timeframes": timeframes,
-                "current_symbol": getattr(global_state, 'current_symbol', '')
-            },
-            "demo": {
-                "demo_mode_active": global_state.demo_mode_active,
-                "demo_expired": global_state.demo_expired,
-                "demo_time_remaining": int(demo_time_remaining)
-            },
-            "market": {
-                "price": global_state.current_price,
-                "regime": global_state.market_regime,
-                "position": global_state.price_position
-            },
-            "agents": {
-                "critic_confidence": global_state.critic_confidence,
-                "guardian_status": global_state.guardian_status,
-                "symbol_selector": getattr(global_state, 'symbol_selector', {}),
-                "agent_messages": global_state.agent_messages,  # [NEW] Chatroom messages
-                "agent_events": global_state.agent_events
-            },
-            "account": account_payload,
-            "virtual_account": {
-                "is_test_mode": global_state.is_test_mode,
-                "initial_balance": global_state.virtual_initial_balance,
-                "current_balance": global_state.virtual_balance,
-                "available_balance": global_state.virtual_balance - sum((pos.get('position_value', 0) / pos.get('leverage', 1)) for pos in global_state.virtual_positions.values()),
-                "positions": global_state.virtual_positions,
-                "total_unrealized_pnl": sum(pos.get('unrealized_pnl', 0) for pos in global_state.virtual_positions.values()),
-                "cumulative_realized_pnl": global_state.cumulative_realized_pnl  # Total realized PnL from closed trades
-            },
-            "account_alert": {
-                "active": global_state.account_alert_active,
-                "failure_count": global_state.account_failure_count
-            },
-            "chart_data": {
-                "equity": global_state.equity_history,
-                "balance_history": global_state.balance_history,
-                "initial_balance": global_state.initial_balance
-            },
-            "decision": global_state.latest_decision,
-            "decision_history": global_state.decision_history[:10],
-            "trade_history": global_state.trade_history[:200],
-            "logs": logs_tail,
-            "logs_simplified": simplified_logs,
-            "llm_info": global_state.llm_info,
-            "agent_prompts": global_state.agent_prompts
-        }
-        return clean_nans(global_state._serialize_obj(data))
+    return demo_time_remaining
+
+
+def _status_header(demo_time_remaining: float) -> List[tuple]:
+    """
+    Small dashboard sections, rebuilt on every status read / stream tick: (path, value).
+    Size depends on the number of symbols and positions, not on history length.
+    """
+    account_payload = dict(global_state.account_overview or {})
+    realized_pnl = float(getattr(global_state, 'cumulative_realized_pnl', 0.0) or 0.0)
+    unrealized_pnl = float(account_payload.get('total_pnl', 0.0) or 0.0)
+    account_payload['realized_pnl'] = realized_pnl
+    account_payload['unrealized_pnl'] = unrealized_pnl
+    account_payload['total_pnl'] = realized_pnl + unrealized_pnl
+
+    return [
+        (('system',), {
+            "running": global_state.is_running,
+            "mode": global_state.execution_mode,
+            "is_test_mode": global_state.is_test_mode,
+            "cycle_counter": global_state.cycle_counter,
+            "cycle_interval": global_state.cycle_interval,
+            "current_cycle_id": global_state.current_cycle_id,
+            "uptime_start": global_state.start_time,
+            "last_heartbeat": global_state.last_update,
+            "symbols": list(global_state.symbols),  # 🆕 Active trading symbols (AI500 Top5 support)
+            "timeframes": _get_strategy_timeframes(),
+            "current_symbol": getattr(global_state, 'current_symbol', '')
+        }),
+        (('demo',), {
+            "demo_mode_active": global_state.demo_mode_active,
+            "demo_expired": global_state.demo_expired,
+            "demo_time_remaining": int(demo_time_remaining)
+        }),
+        (('market',), {
+            "price": global_state.current_price,
+            "regime": global_state.market_regime,
+            "position": global_state.price_position
+        }),
+        (('agents', 'critic_confidence'), global_state.critic_confidence),
+        (('agents', 'guardian_status'), global_state.guardian_status),
+        (('agents', 'symbol_selector'), getattr(global_state, 'symbol_selector', {})),
+        (('account',), account_payload),
+        (('virtual_account',), {
+            "is_test_mode": global_state.is_test_mode,
+            "initial_balance": global_state.virtual_initial_balance,
+            "current_balance": global_state.virtual_balance,
+            "available_balance": global_state.virtual_balance - sum((pos.get('position_value', 0) / pos.get('leverage', 1)) for pos in global_state.virtual_positions.values()),
+            "positions": global_state.virtual_positions,
+            "total_unrealized_pnl": sum(pos.get('unrealized_pnl', 0) for pos in global_state.virtual_positions.values()),
+            "cumulative_realized_pnl": global_state.cumulative_realized_pnl  # Total realized PnL from closed trades
+        }),
+        (('account_alert',), {
+            "active": global_state.account_alert_active,
+            "failure_count": global_state.account_failure_count
+        }),
+        (('chart_data', 'initial_balance'), global_state.initial_balance),
+        (('llm_info',), global_state.llm_info),
+        (('agent_prompts',), global_state.agent_prompts),
+    ]
+
+
+def _status_history():
+    """
+    History sections, kept current on stream clients by the change feed
+
+    Returns:
+        (change-feed version, [(path, value)])
+    """
+    version, history, latest_decision = global_state.history_snapshot()
+    sections = [(('decision',), latest_decision)]
+    for name, items in history.items():
+        sections.append((global_state.FEED_SECTIONS[name][0], items))
+    return version, sections
+
+
+def _clean_payload(value):
+    return clean_nans(global_state._serialize_obj(value))
+
+
+def _nest(sections: List[tuple]) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    for path, value in sections:
+        node = data
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return data
+
+
+def _current_header() -> List[tuple]:
+    """Serialized header sections, read without blocking the trading loop"""
+    demo_time_remaining = _check_demo_expiry()
+    return global_state.snapshot_read(
+        lambda: [(path, _clean_payload(value)) for path, value in _status_header(demo_time_remaining)])
+
+
+def _status_snapshot():
+    """
+    Full /api/status payload
+
+    Returns:
+        (change-feed version of the payload, header sections, payload)
+    """
+    version, history = _status_history()
+    history = [(path, _clean_payload(value)) for path, value in history]
+    header = _current_header()
+    return version, header, _nest(header + history)
+
+
+@app.get("/api/status")
+async def get_status(authenticated: bool = Depends(verify_auth)):
+    return _status_snapshot()[2]
+
+
+# ========== Dashboard Stream (SSE) ==========
+
+STREAM_TICK_SECONDS = 1.0       # header sections (prices, account, demo timer) refresh
+STREAM_MIN_INTERVAL = 0.2       # coalesce bursts of log lines into one push
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+
+def _feed_op(path, op: str, value, limit: Optional[int] = None) -> Dict[str, Any]:
+    item = {'path': list(path), 'op': op, 'value': value}
+    if limit is not None:
+        item['limit'] = limit
+    return item
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _encode_feed_event(event) -> str:
+    """One change-feed event -> SSE message (encoded once, shared by all clients)"""
+    ops = [_feed_op(event.path, event.op, _clean_payload(event.value), event.limit)]
+    return _sse('delta', {'ops': ops}, f"{global_state.feed.epoch}:{event.version}")
+
+
+def _parse_stream_cursor(value: Optional[str]) -> Optional[int]:
+    """'<epoch>:<version>' from Last-Event-ID / ?since=; None unless it belongs to this process"""
+    if not value:
+        return None
+    epoch, _, version = value.partition(':')
+    if epoch != global_state.feed.epoch or not version.isdigit():
+        return None
+    return int(version)
+
+
+async def _dashboard_stream(cursor: Optional[int], is_disconnected):
+    """
+    Dashboard push stream: a snapshot when the client has no usable cursor (first connect,
+    server restart, fell too far behind), afterwards only change-feed deltas plus the small
+    header sections that changed.
+    """
+    feed = global_state.feed
+    version = cursor
+    events = feed.since(version) if version is not None else None
+    sent_header: Dict[tuple, Any] = {}  # empty after a reconnect: the first tick resends every header section
+    last_sent = time.monotonic()
+
+    while True:
+        chunks = []
+        if events is None:
+            version, header, snapshot = _status_snapshot()
+            chunks.append(_sse('snapshot', snapshot, f"{feed.epoch}:{version}"))
+        else:
+            chunks.extend(feed.encode(event, _encode_feed_event) for event in events)
+            if events:
+                version = events[-1].version
+            header = _current_header()
+            changed = [_feed_op(path, 'set', value) for path, value in header
+                       if path not in sent_header or sent_header[path] != value]
+            if changed:
+                chunks.append(_sse('delta', {'ops': changed}))
+        sent_header = dict(header)
+
+        now = time.monotonic()
+        if chunks:
+            last_sent = now
+            yield ''.join(chunks)
+        elif now - last_sent >= STREAM_KEEPALIVE_SECONDS:
+            last_sent = now
+            yield ': keepalive\n\n'
+
+        if await is_disconnected():
+            return
+        await asyncio.sleep(STREAM_MIN_INTERVAL)
+        await feed.wait(version, timeout=STREAM_TICK_SECONDS)
+        events = feed.since(version)
+
+
+@app.get("/api/stream")
+async def stream_status(request: Request, since: Optional[str] = None, authenticated: bool = Depends(verify_auth)):
+    """Server-sent dashboard updates; reconnects resume from Last-Event-ID without a new snapshot"""
+    from fastapi.responses import StreamingResponse
+
+    cursor = _parse_stream_cursor(request.headers.get('last-event-id') or since)
+    return StreamingResponse(
+        _dashboard_stream(cursor, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/api/control")
 async def control_bot(cmd: ControlCommand, authenticated: bool = Depends(verify_admin)):
@@ -385,9 +449,7 @@ async def control_bot(cmd: ControlCommand, authenticated: bool = Depends(verify_
             global_state.current_cycle_id = ""
             global_state.cycle_positions_opened = 0
             # 🆕 清空交易记录，防止使用历史数据进行复盘
-            global_state.trade_history = []
-            global_state.decision_history = []
-            global_state.balance_history = []
+            global_state.clear_history('trade_history', 'decision_history', 'balance_history')
             global_state.add_log("🔁 Cycle counter reset after stop (history cleared)")
         global_state.add_log("▶️ System Resumed by User")
         
@@ -464,7 +526,7 @@ async def test_log(authenticated: bool = Depends(verify_auth)):
     return {
         "status": "success",
         "logs_count": len(global_state.recent_logs),
-        "latest_logs": global_state.recent_logs[-5:] if global_state.recent_logs else []
+        "latest_logs": list(global_state.recent_logs)[-5:]
     }
 
 @app.get("/api/symbol_stats")
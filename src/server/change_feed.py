@@ -0,0 +1,121 @@
+"""
+📡 Change Feed
+==============
+
+SharedState 的版本化变更流，供 Dashboard 推送使用：
+
+- 每次状态变更 publish 一条事件（路径 + 操作 + 值），版本号单调递增
+- 最近 capacity 条事件保存在环形缓冲中；客户端带着上次的版本号续传，
+  只拿到之后的增量；版本过旧 / 服务重启（epoch 变化）时才需要全量快照
+- 事件的序列化结果缓存在事件上，多个连接的 Dashboard 共享同一份编码
+- 发布方可在任意线程（交易循环 / loguru sink），等待方在 Web Server 的事件循环中
+- publish(apply=...) 在同一把短锁内修改对应的环形缓冲并分配版本号，
+  读方在 locked() 内拷贝缓冲即得到与版本号一致的快照
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Sequence, Set, Tuple
+
+
+class FeedEvent:
+    """一次状态变更"""
+
+    __slots__ = ('version', 'path', 'op', 'value', 'limit', 'encoded')
+
+    def __init__(self, version: int, path: Tuple[str, ...], op: str, value: Any, limit: Optional[int]):
+        self.version = version
+        self.path = path
+        self.op = op            # set | merge | append | prepend
+        self.value = value
+        self.limit = limit      # append / prepend 后列表保留的最大长度
+        self.encoded: Optional[str] = None
+
+
+class ChangeFeed:
+    """
+    版本化变更流（环形缓冲）
+    """
+
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        # 进程级标识：服务重启后旧的版本号不可续传
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events: Deque[FeedEvent] = deque(maxlen=capacity)
+        self._version = 0
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def locked(self):
+        """版本号与随之修改的缓冲在该锁内保持一致（只覆盖 O(1) 的追加，持有时间极短）"""
+        return self._lock
+
+    def publish(self, path: Sequence[str], op: str, value: Any = None, limit: Optional[int] = None,
+                apply: Optional[Callable[[], None]] = None) -> int:
+        """
+        记录一次变更并唤醒等待中的连接，返回新版本号
+
+        Args:
+            apply: 在锁内执行的状态修改（如环形缓冲追加），与版本号原子生效
+        """
+        with self._lock:
+            if apply is not None:
+                apply()
+            self._version += 1
+            self._events.append(FeedEvent(self._version, tuple(path), op, value, limit))
+            waiters, self._waiters = self._waiters, set()
+            version = self._version
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+        return version
+
+    def since(self, version: int) -> Optional[List[FeedEvent]]:
+        """
+        version 之后的全部事件（旧 -> 新）
+
+        Returns:
+            事件列表；version 已滚出缓冲区（或来自未来）时返回 None，调用方需重发快照
+        """
+        with self._lock:
+            missing = self._version - version
+            if missing < 0 or missing > len(self._events):
+                return None
+            # 只从尾部取，与缓冲区大小无关
+            return [self._events[-i] for i in range(missing, 0, -1)]
+
+    async def wait(self, version: int, timeout: Optional[float] = None) -> bool:
+        """等待出现 version 之后的事件；超时返回 False"""
+        if self._version > version:
+            return True
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._version > version:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    @staticmethod
+    def encode(event: FeedEvent, encoder: Callable[[FeedEvent], str]) -> str:
+        """序列化事件（每个事件只编码一次，所有连接共用）"""
+        if event.encoded is None:
+            event.encoded = encoder(event)
+        return event.encoded
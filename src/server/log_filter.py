@@ -0,0 +1,83 @@
+"""
+📜 Dashboard Log Filter
+=======================
+
+"Simplified" 日志视图的分类规则：保留告警 / 错误、Agent 标签与关键字、
+运行状态变化和周期分隔行，并去掉 loguru 的时间 / 模块前缀。
+
+SharedState 在日志写入时分类一次（simplified_logs 环形缓冲），
+Dashboard 读取时不再逐行过滤。
+"""
+
+import re
+from typing import List, Optional
+
+_LOG_AGENT_TAGS = [
+    '[📊 SYSTEM]',
+    '[🔄 CONFIG]',
+    '[🎯 SYSTEM]',
+    '[🕵️ ORACLE]',
+    '[👨‍🔬 STRATEGIST]',
+    '[🔮 PROPHET]',
+    '[🐂 Long Case]',
+    '[🐻 Short Case]',
+    '[⚖️ CRITIC]',
+    '[⚖️ Final Decision]',
+    '[🛡️ GUARDIAN]',
+    '[🚀 EXECUTOR]',
+    '[Execution]',
+    '[🧠 REFLECTION]'
+]
+_LOG_AGENT_KEYWORDS = [
+    'DataSyncAgent',
+    'QuantAnalystAgent',
+    'PredictAgent',
+    'DecisionCoreAgent',
+    'RiskAuditAgent',
+    'ExecutionEngine',
+    'StrategyEngine',
+    'ReflectionAgent',
+    'ReflectionAgentLLM',
+    'TrendAgent',
+    'TrendAgentLLM',
+    'SetupAgent',
+    'SetupAgentLLM',
+    'TriggerAgent',
+    'TriggerAgentLLM'
+]
+_LOG_STATUS_KEYWORDS = [
+    '⏹️', '⏸️', '▶️',
+    'STOPPED', 'PAUSED', 'RESUMED', 'START'
+]
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+_WARN_RE = re.compile(r'\bwarn\b', re.IGNORECASE)
+_ERROR_RE = re.compile(r'\berror\b', re.IGNORECASE)
+# 2026-01-08 00:00:00 | LEVEL    | module:func -
+_LOG_PREFIX_RE = re.compile(r'^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s*\|\s*\w+\s*\|\s*[\w\.]+:[\w_]+\s*-\s*')
+_MODULE_FUNC_RE = re.compile(r'^[\w\.]+:[\w_]+\s*-\s*')
+
+
+def simplify_log_line(line: str) -> Optional[str]:
+    """Simplified-view text for one log line, or None if the line is hidden in simplified mode"""
+    clean_line = _ANSI_RE.sub('', line or '')
+    if not ('WARNING' in clean_line or
+            'ERROR' in clean_line or
+            _WARN_RE.search(clean_line) or
+            _ERROR_RE.search(clean_line) or
+            '⚠️' in clean_line or
+            '❌' in clean_line or
+            any(tag in clean_line for tag in _LOG_AGENT_TAGS) or
+            any(keyword in clean_line for keyword in _LOG_AGENT_KEYWORDS) or
+            any(keyword in clean_line for keyword in _LOG_STATUS_KEYWORDS) or
+            '━━━' in clean_line or 'Cycle #' in clean_line):
+        return None
+    # Remove file:function patterns like 'src.api.binance_websocket:__init__' from log lines
+    clean = _LOG_PREFIX_RE.sub('', clean_line)
+    # Fallback: if the above didn't match, try to remove just the module:func part
+    clean = _MODULE_FUNC_RE.sub('', clean)
+    return clean.strip()
+
+
+def filter_simplified_logs(logs: List[str]) -> List[str]:
+    simplified = (simplify_log_line(line) for line in logs)
+    return [line for line in simplified if line is not None]
@@ -1,10 +1,49 @@
 from src.utils.logger import log
-from typing import Dict, Any, List, Optional
+from typing import Callable, Deque, Dict, Any, Iterable, List, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
+from contextvars import ContextVar
+from collections import deque
+import copy
 import json
 import threading
 
+from src.server.change_feed import ChangeFeed
+from src.server.log_filter import simplify_log_line
+
+# Symbol owned by the current asyncio task (set by the concurrent multi-symbol scheduler).
+# Each task runs in its own context copy, so concurrent pipelines never see each other's symbol.
+_symbol_scope: ContextVar[Optional[str]] = ContextVar("symbol_scope", default=None)
+
+
+class _PerSymbol:
+    """
+    Agent status field kept per symbol. Concurrent pipelines read and write their own symbol's value;
+    outside a symbol scope (dashboard, scheduler) the value of `current_symbol` is used.
+    """
+
+    def __init__(self, default: Any):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def _slot(self, obj) -> Dict[str, Any]:
+        symbol = _symbol_scope.get() or obj.current_symbol
+        return obj.__dict__.setdefault('_per_symbol', {}).setdefault(symbol, {})
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        slot = self._slot(obj)
+        if self.name not in slot:
+            slot[self.name] = copy.copy(self.default)
+        return slot[self.name]
+
+    def __set__(self, obj, value):
+        self._slot(obj)[self.name] = value
+
+
 @dataclass
 class SharedState:
     """Global state shared between Trading Loop and API Server"""
@@ -33,11 +72,13 @@ class SharedState:
     market_regime: Dict[str, str] = field(default_factory=dict)
     price_position: Dict[str, str] = field(default_factory=dict)
     
-    # Agent Status
-    oracle_status: str = "Waiting"
-    prophet_probability: float = 0.0  # PredictAgent 上涨概率
+    # Agent Status (per symbol: written by the concurrent symbol pipelines)
+    oracle_status = _PerSymbol("Waiting")
+    prophet_probability = _PerSymbol(0.0)  # PredictAgent 上涨概率
+    guardian_status = _PerSymbol("Standing By")
+    semantic_analyses = _PerSymbol({})
+    four_layer_result = _PerSymbol({})
     critic_confidence: Dict[str, float] = field(default_factory=dict)
-    guardian_status: str = "Standing By"
     symbol_selector: Dict[str, Any] = field(default_factory=dict)
     
     # Account Data
@@ -65,9 +106,9 @@ class SharedState:
     demo_expired: bool = False  # True if 20 minutes exceeded
     demo_limit_seconds: int = 20 * 60  # 20 minutes in seconds
     
-    # Chart Data
-    equity_history: List[Dict] = field(default_factory=list)  # [{'time': '12:00', 'value': 1000}, ...]
-    balance_history: List[Dict] = field(default_factory=list)  # [{time, balance, pnl, action}]
+    # Chart Data (ring buffers: fixed capacity, O(1) append, oldest point dropped)
+    equity_history: Deque[Dict] = field(default_factory=lambda: deque(maxlen=200))  # [{'time': '12:00', 'value': 1000}, ...]
+    balance_history: Deque[Dict] = field(default_factory=lambda: deque(maxlen=500))  # [{time, balance, pnl, action}]
     initial_balance: float = 0.0  # Initial balance when trading started
     
     # Latest Decision & History
@@ -76,7 +117,8 @@ class SharedState:
     
     # History
     trade_history: List[Dict] = field(default_factory=list)
-    recent_logs: List[str] = field(default_factory=list)
+    recent_logs: Deque[str] = field(default_factory=lambda: deque(maxlen=500))
+    simplified_logs: Deque[str] = field(default_factory=lambda: deque(maxlen=200))  # classified once at ingest
     
     # Reflection Agent State
     reflection_count: int = 0
@@ -87,23 +129,122 @@ class SharedState:
     indicator_snapshot: Dict[str, Any] = field(default_factory=dict)
 
     # Multi-Period Parser Agent Output
-    multi_period_result: Dict[str, Any] = field(default_factory=dict)
+    multi_period_result = _PerSymbol({})
     
     # [NEW] Multi-Agent Chatroom Messages
-    agent_messages: List[Dict] = field(default_factory=list)
+    agent_messages: Deque[Dict] = field(default_factory=lambda: deque(maxlen=100))
     last_agent_message: Dict[str, str] = field(default_factory=dict)
     last_agent_message_cycle: Dict[str, int] = field(default_factory=dict)
-    agent_events: List[Dict] = field(default_factory=list)
+    agent_events: Deque[Dict] = field(default_factory=lambda: deque(maxlen=500))
     
     # [NEW] LLM Config & Prompts Display
     agent_prompts: Dict[str, str] = field(default_factory=dict)
     llm_info: Dict[str, str] = field(default_factory=dict)
     agent_settings: Dict[str, Any] = field(default_factory=dict)
+    # Serializes multi-field writers (trading loop, account monitor). The web server does not take it:
+    # history is read through the change feed's short lock, small sections via snapshot_read().
     _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    # Versioned change feed for pushed dashboard updates (/api/stream)
+    feed: ChangeFeed = field(default_factory=ChangeFeed, init=False, repr=False)
+
+    # Dashboard list sections: name -> (payload path, items sent to the UI, newest first)
+    FEED_SECTIONS = {
+        'recent_logs': (('logs',), 200, False),
+        'simplified_logs': (('logs_simplified',), 200, False),
+        'agent_messages': (('agents', 'agent_messages'), 100, False),
+        'agent_events': (('agents', 'agent_events'), 500, False),
+        'equity_history': (('chart_data', 'equity'), 200, False),
+        'balance_history': (('chart_data', 'balance_history'), 500, False),
+        'decision_history': (('decision_history',), 10, True),
+        'trade_history': (('trade_history',), 200, True),
+    }
 
     def locked(self):
-        """Expose state lock for atomic external read/write blocks."""
+        """Expose state lock for atomic external write blocks."""
         return self._lock
+
+    def snapshot_read(self, reader: Callable[[], Any], retries: int = 3):
+        """
+        Read without the state lock (web server side). Writers may resize a dict while it is being
+        copied ("changed size during iteration"); retry, and only take the lock as a last resort.
+        """
+        for _ in range(retries):
+            try:
+                return reader()
+            except RuntimeError:
+                continue
+        with self._lock:
+            return reader()
+
+    def history_snapshot(self):
+        """
+        Dashboard history sections, consistent with the change-feed version
+
+        Returns:
+            (feed version, {section: items sent to the UI}, latest decision per symbol)
+        """
+        with self.feed.locked():
+            sections = {name: self._ui_items(name) for name in self.FEED_SECTIONS}
+            return self.feed.version, sections, dict(self.latest_decision)
+
+    @staticmethod
+    def enter_symbol_scope(symbol: str) -> None:
+        """Bind `symbol` to the current asyncio task/context."""
+        _symbol_scope.set(symbol)
+
+    @staticmethod
+    def scoped_symbol() -> Optional[str]:
+        """Symbol bound to the current task, or None outside a symbol scope."""
+        return _symbol_scope.get()
+
+    def active_symbol(self) -> str:
+        """Symbol for the current context, falling back to the dashboard's current_symbol."""
+        return _symbol_scope.get() or self.current_symbol
+
+    def _ui_items(self, section: str) -> List:
+        _, limit, newest_first = self.FEED_SECTIONS[section]
+        items = list(getattr(self, section))  # one C-level copy, safe against concurrent appends
+        return items[:limit] if newest_first else items[-limit:]
+
+    def _push(self, section: str, item: Any, capacity: Optional[int] = None):
+        """
+        Add one item to a dashboard section and publish it (buffer update and feed version in one step).
+        Ring buffers drop their oldest item by themselves; newest-first lists are cut to `capacity`.
+        """
+        path, limit, newest_first = self.FEED_SECTIONS[section]
+        items = getattr(self, section)
+        if newest_first:
+            def apply():
+                items.insert(0, item)
+                del items[capacity:]
+            self.feed.publish(path, 'prepend', item, limit, apply=apply)
+        else:
+            self.feed.publish(path, 'append', item, limit, apply=lambda: items.append(item))
+
+    def _reset(self, section: str, items: Iterable = ()):
+        """Replace the contents of a dashboard section in place and publish it"""
+        path, limit, newest_first = self.FEED_SECTIONS[section]
+        buffer = getattr(self, section)
+        items = list(items)
+
+        def apply():
+            buffer.clear()
+            buffer.extend(items)
+        self.feed.publish(path, 'set', items[:limit] if newest_first else items[-limit:], apply=apply)
+
+    def mark_changed(self, *sections: str):
+        """
+        Republish whole list sections after they were replaced or edited in place
+        (e.g. `global_state.trade_history = [...]`, PnL sync on an existing trade).
+        """
+        for section in sections:
+            path = self.FEED_SECTIONS[section][0]
+            self.feed.publish(path, 'set', self._ui_items(section))
+
+    def clear_history(self, *sections: str):
+        """Empty dashboard history sections (e.g. on restart after stop)"""
+        for section in sections:
+            self._reset(section)
     
     def update_market(self, symbol: str, price: float, regime: str, position: str):
         with self._lock:
@@ -123,17 +264,14 @@ class SharedState:
             # Add to history (Real-time PnL tracking)
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+            # Ring keeps the last 200 points (e.g. ~10-20 mins of real-time data or 200 minutes of slow data)
             if not self.equity_history or self.equity_history[-1]['time'] != timestamp:
-                self.equity_history.append({
+                self._push('equity_history', {
                     'time': timestamp,
                     'value': equity,
                     'cycle': self.cycle_counter
                 })
 
-                # Keep last 200 points (e.g. ~10-20 mins of real-time data or 200 minutes of slow data)
-                if len(self.equity_history) > 200:
-                    self.equity_history.pop(0)
-
     def _serialize_obj(self, obj):
         """Recursively serialize non-JSON-compatible types (datetime, numpy, pd.Timestamp)"""
         import numpy as np
@@ -165,17 +303,16 @@ class SharedState:
         decision = self._serialize_obj(decision)
         with self._lock:
             symbol = decision.get('symbol', 'UNKNOWN')
-            self.latest_decision[symbol] = decision
             self.critic_confidence[symbol] = decision.get('confidence', 0.0)
 
             # Add timestamp to decision if not present
             if 'timestamp' not in decision:
                 decision['timestamp'] = datetime.now().strftime("%H:%M:%S")
 
-            # Add to history
-            self.decision_history.insert(0, decision)  # Prepend
-            if len(self.decision_history) > 100:
-                self.decision_history.pop()
+            self.feed.publish(('decision',), 'merge', {symbol: decision},
+                              apply=lambda: self.latest_decision.__setitem__(symbol, decision))
+            # Add to history (prepend, keep 100)
+            self._push('decision_history', decision, capacity=100)
 
             self.last_update = datetime.now().strftime("%H:%M:%S")
 
@@ -195,13 +332,10 @@ class SharedState:
                 "content": content,
                 "role": role,
                 "level": level,
-                "symbol": symbol or self.current_symbol,
+                "symbol": symbol or self.active_symbol(),
                 "cycle": self.cycle_counter
             }
-            self.agent_messages.append(message)
-            # Keep last 100 messages
-            if len(self.agent_messages) > 100:
-                self.agent_messages.pop(0)
+            self._push('agent_messages', message)  # ring keeps the last 100
 
             self.last_agent_message[agent] = content
             self.last_agent_message_cycle[agent] = self.cycle_counter
@@ -212,21 +346,22 @@ class SharedState:
     def clear_agent_messages(self):
         """Clear chatroom messages for a new cycle"""
         with self._lock:
-            self.agent_messages = []
+            self._reset('agent_messages')
             self.last_agent_message = {}
             self.last_agent_message_cycle = {}
 
+    def drop_agent_messages(self, symbol: str):
+        """Remove one symbol's chatroom messages (new analysis round for that symbol)"""
+        with self._lock:
+            self._reset('agent_messages', [msg for msg in list(self.agent_messages) if msg.get('symbol') != symbol])
+
     def add_agent_event(self, event: Dict[str, Any]):
         """Append structured runtime event for debugging/observability."""
-        with self._lock:
-            self.agent_events.append(self._serialize_obj(event))
-            if len(self.agent_events) > 500:
-                self.agent_events.pop(0)
+        self._push('agent_events', self._serialize_obj(event))  # ring keeps the last 500
 
     def clear_agent_events(self):
         """Clear runtime events for a new cycle."""
-        with self._lock:
-            self.agent_events = []
+        self._reset('agent_events')
     
     def init_balance(self, balance: float, initial_balance: Optional[float] = None):
         """Initialize the starting balance for tracking."""
@@ -239,7 +374,7 @@ class SharedState:
                 self.virtual_balance = balance
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             # Add initial point to balance history
-            self.balance_history.append({
+            self._push('balance_history', {
                 'time': timestamp,
                 'balance': balance,
                 'pnl': 0.0,
@@ -248,7 +383,7 @@ class SharedState:
                 'cycle': 0
             })
             # Add initial point to equity history (for Net Value Curve)
-            self.equity_history.append({
+            self._push('equity_history', {
                 'time': timestamp,
                 'value': balance,
                 'cycle': 0
@@ -261,11 +396,8 @@ class SharedState:
             # Add to trade history
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             trade['recorded_at'] = timestamp
-            self.trade_history.insert(0, trade)  # Prepend (newest first)
-
-            # Keep last 100 trades
-            if len(self.trade_history) > 100:
-                self.trade_history.pop()
+            # Prepend (newest first), keep last 100 trades
+            self._push('trade_history', trade, capacity=100)
 
             # Update balance based on trade result
             current_balance = self.virtual_balance if self.is_test_mode else self.account_overview.get('total_equity', 0)
@@ -280,8 +412,8 @@ class SharedState:
             cumulative_pnl = current_balance - self.initial_balance if self.initial_balance > 0 else 0
             pnl_pct = (cumulative_pnl / self.initial_balance * 100) if self.initial_balance > 0 else 0
 
-            # Add to balance history
-            self.balance_history.append({
+            # Add to balance history (ring keeps the last 500 points)
+            self._push('balance_history', {
                 'time': timestamp,
                 'balance': current_balance,
                 'pnl': cumulative_pnl,
@@ -290,10 +422,6 @@ class SharedState:
                 'symbol': trade.get('symbol', ''),
                 'cycle': self.cycle_counter
             })
-
-            # Keep last 500 balance points
-            if len(self.balance_history) > 500:
-                self.balance_history.pop(0)
     
     def record_account_success(self):
         """Record successful account info fetch"""
@@ -316,24 +444,27 @@ class SharedState:
                     self.account_alert_active = True
                     log.error(f"⚠️ 账户信息获取失败已超过 5 分钟！连续失败次数: {self.account_failure_count}")
     
+    def _append_log(self, line: str):
+        """Log rings: raw line, plus its simplified form when the line is shown in simplified mode"""
+        self._push('recent_logs', line)
+        simplified = simplify_log_line(line)
+        if simplified is not None:
+            self._push('simplified_logs', simplified)
+
     def add_log(self, message: str):
-        with self._lock:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            # Ensure message has timestamp if not present
-            if not message.startswith("["):
-                message = f"[{timestamp}] {message}"
-                
-            self.recent_logs.append(message)
-            if len(self.recent_logs) > 500:
-                self.recent_logs.pop(0)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Ensure message has timestamp if not present
+        if not message.startswith("["):
+            message = f"[{timestamp}] {message}"
+        self._append_log(message)
     
     def clear_init_logs(self):
         """Clear initialization logs when Cycle 1 starts to sync with Recent Decisions."""
-        with self._lock:
-            self.recent_logs.clear()
-            # Log the fresh start
-            msg = "[📊 SYSTEM] Cleared initialization logs - starting fresh from Cycle 1"
-            self.recent_logs.append(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+        # Log the fresh start
+        msg = "[📊 SYSTEM] Cleared initialization logs - starting fresh from Cycle 1"
+        line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}"
+        self._reset('recent_logs', [line])
+        self._reset('simplified_logs', [simplify_log_line(line)])
         log.info(msg)
     
     def register_log_sink(self):
@@ -350,11 +481,8 @@ class SharedState:
             
             formatted = f"{time_str} | {level:<8} | {module}:{func} - {msg}"
             
-            # Directly append to recent_logs
-            with self._lock:
-                self.recent_logs.append(formatted)
-                if len(self.recent_logs) > 500:
-                    self.recent_logs.pop(0)
+            # Directly append to the log rings (no state lock: the sink runs on every log line)
+            self._append_log(formatted)
         
         # Add sink for INFO and above
         log.add(sink, level="INFO")
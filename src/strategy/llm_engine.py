@@ -4,9 +4,12 @@ LLM 策略推理引擎 (Multi-Provider Support)
 
 支持多种 LLM 提供商: OpenAI, DeepSeek, Claude, Qwen, Gemini, Kimi, MiniMax, GLM
 """
+import asyncio
 import json
 import re
-from typing import Dict, Optional
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
+from typing import Dict, Optional, Tuple
 import os
 import httpx
 from src.config import config
@@ -15,6 +18,48 @@ from src.utils.action_protocol import VALID_ACTIONS
 from src.strategy.llm_parser import LLMOutputParser
 from src.strategy.decision_validator import DecisionValidator
 from src.llm import create_client, LLMConfig
+from src.llm.cache import CachedLLMClient, LLMCacheMiss, LLMResponseCache
+
+
+BULL_SYSTEM_PROMPT = """You are a BULLISH market analyst. Your job is to find reasons WHY the market could go UP.
+
+Analyze the provided 'Four-Layer Strategy Analysis' and identify:
+1. Bullish Trend & Fuel signals (Layer 1)
+2. Bullish AI Resonance (Layer 2)
+3. Bullish Setup patterns (Layer 3/4)
+
+Output your analysis in this EXACT JSON format:
+```json
+{
+  "stance": "STRONGLY_BULLISH",
+  "bullish_reasons": "Your 3-5 key bullish observations, separated by semicolons",
+  "bull_confidence": 75
+}
+```
+
+stance must be one of: STRONGLY_BULLISH, SLIGHTLY_BULLISH, NEUTRAL, UNCERTAIN
+bull_confidence should be 0-100 based on how strong the bullish case is.
+Focus ONLY on bullish factors. Ignore bearish signals."""
+
+BEAR_SYSTEM_PROMPT = """You are a BEARISH market analyst. Your job is to find reasons WHY the market could go DOWN.
+
+Analyze the provided 'Four-Layer Strategy Analysis' and identify:
+1. Bearish Trend & Fuel signals (Layer 1)
+2. Bearish AI Resonance (Layer 2)
+3. Bearish Setup patterns (Layer 3/4)
+
+Output your analysis in this EXACT JSON format:
+```json
+{
+  "stance": "STRONGLY_BEARISH",
+  "bearish_reasons": "Your 3-5 key bearish observations, separated by semicolons",
+  "bear_confidence": 60
+}
+```
+
+stance must be one of: STRONGLY_BEARISH, SLIGHTLY_BEARISH, NEUTRAL, UNCERTAIN
+bear_confidence should be 0-100 based on how strong the bearish case is.
+Focus ONLY on bearish factors. Ignore bullish signals."""
 
 
 def _extract_json_robust(text: str) -> Optional[Dict]:
@@ -56,9 +101,20 @@ def _extract_json_robust(text: str) -> Optional[Dict]:
     return None
 
 
+def _timed_out_perspective(side: str) -> Dict:
+    """Placeholder for a perspective that did not arrive in time (degraded debate)."""
+    if side == 'bull':
+        return {"stance": "NEUTRAL", "bullish_reasons": "Perspective timeout", "bull_confidence": 50, "timed_out": True}
+    return {"stance": "NEUTRAL", "bearish_reasons": "Perspective timeout", "bear_confidence": 50, "timed_out": True}
+
+
 class StrategyEngine:
     """多 LLM 提供商策略决策引擎"""
     
+    # Bull/Bear 辩论：整体超时，以及一方返回后等待另一方的宽限期（秒）
+    DEFAULT_PERSPECTIVE_TIMEOUT = 45.0
+    DEFAULT_PERSPECTIVE_GRACE = 10.0
+    
     def __init__(self):
         # 获取 LLM 配置
         llm_config = config.llm
@@ -80,6 +136,8 @@ class StrategyEngine:
             self.model = config.deepseek.get('model', 'deepseek-chat')
         self.temperature = llm_config.get('temperature', config.deepseek.get('temperature', 0.3))
         self.max_tokens = llm_config.get('max_tokens', config.deepseek.get('max_tokens', 2000))
+        self.perspective_timeout = float(llm_config.get('perspective_timeout', self.DEFAULT_PERSPECTIVE_TIMEOUT))
+        self.perspective_grace = float(llm_config.get('perspective_grace', self.DEFAULT_PERSPECTIVE_GRACE))
         
         # 初始化解析器和验证器
         self.parser = LLMOutputParser()
@@ -91,6 +149,7 @@ class StrategyEngine:
 
         self.client = None
         self.is_ready = False
+        self.response_cache: Optional[LLMResponseCache] = None
 
         disable_env = os.getenv('LLM_DISABLED', '').lower() in ('1', 'true', 'yes', 'on')
         if provider.lower() in ('none', 'disabled', 'off') or disable_env:
@@ -114,12 +173,20 @@ class StrategyEngine:
         )
         try:
             self.client = create_client(self.provider, llm_cfg)
+            if self.response_cache is not None:
+                self.client = CachedLLMClient(self.client, self.response_cache)
             self.is_ready = True
             log.info(f"🤖 Strategy Engine initialized (Provider: {self.provider}, Model: {self.model})")
         except Exception as e:
             log.error(f"Failed to create LLM client: {e}")
             self.is_ready = False
     
+    def enable_response_cache(self, cache: LLMResponseCache) -> None:
+        """Serve repeated prompts from `cache` (backtests/replays); survives client re-init."""
+        self.response_cache = cache
+        if self.client is not None and not isinstance(self.client, CachedLLMClient):
+            self.client = CachedLLMClient(self.client, cache)
+    
     def reload_config(self):
         """Reload configuration from global config"""
         # Re-fetch config
@@ -161,16 +228,14 @@ class StrategyEngine:
         Returns:
             决策结果字典
         """
-        if self.disable_llm:
+        if not self._ensure_ready():
             return self._get_fallback_decision(market_context_data)
-
-        # Ensure client is initialized
-        if not self.is_ready:
-            if not self.reload_config():
-                log.warning("🚫 LLM Strategy Engine not ready (No API Key). Returning fallback.")
-                return self._get_fallback_decision(market_context_data)
         
         # 🐂🐻 Get adversarial perspectives if not provided
+        if bull_perspective is None and bear_perspective is None:
+            log.info("🐂🐻 Gathering Bull/Bear perspectives in parallel (on-demand)...")
+            bull_perspective, bear_perspective = self.debate(market_context_text)
+        
         if bull_perspective is None:
             log.info("🐂 Gathering Bull perspective (on-demand)...")
             bull_perspective = self.get_bull_perspective(market_context_text)
@@ -179,6 +244,154 @@ class StrategyEngine:
             log.info("🐻 Gathering Bear perspective (on-demand)...")
             bear_perspective = self.get_bear_perspective(market_context_text)
         
+        system_prompt, user_prompt = self._prepare_decision_prompts(
+            market_context_text, market_context_data, reflection, bull_perspective, bear_perspective
+        )
+        
+        try:
+            response = self.client.chat(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens
+            )
+            return self._build_decision(
+                response.content, market_context_data, system_prompt, user_prompt,
+                bull_perspective, bear_perspective
+            )
+        except Exception as e:
+            return self._handle_decision_error(e, market_context_data)
+    
+    async def async_make_decision(self, market_context_text: str, market_context_data: Dict, reflection: str = None, bull_perspective: Dict = None, bear_perspective: Dict = None) -> Dict:
+        """
+        基于市场上下文做出交易决策（异步版，不阻塞事件循环）
+        
+        参数与返回值同 make_decision。
+        """
+        if not self._ensure_ready():
+            return self._get_fallback_decision(market_context_data)
+        
+        if bull_perspective is None and bear_perspective is None:
+            log.info("🐂🐻 Gathering Bull/Bear perspectives in parallel (on-demand)...")
+            bull_perspective, bear_perspective = await self.async_debate(market_context_text)
+        
+        if bull_perspective is None:
+            log.info("🐂 Gathering Bull perspective (on-demand)...")
+            bull_perspective = await self.async_get_bull_perspective(market_context_text)
+            
+        if bear_perspective is None:
+            log.info("🐻 Gathering Bear perspective (on-demand)...")
+            bear_perspective = await self.async_get_bear_perspective(market_context_text)
+        
+        system_prompt, user_prompt = self._prepare_decision_prompts(
+            market_context_text, market_context_data, reflection, bull_perspective, bear_perspective
+        )
+        
+        try:
+            response = await self.client.async_chat(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens
+            )
+            return self._build_decision(
+                response.content, market_context_data, system_prompt, user_prompt,
+                bull_perspective, bear_perspective
+            )
+        except Exception as e:
+            return self._handle_decision_error(e, market_context_data)
+    
+    def debate(self, market_context_text: str, timeout: Optional[float] = None, grace: Optional[float] = None) -> Tuple[Dict, Dict]:
+        """
+        🐂🐻 并发获取 Bull/Bear 观点（同步版，使用线程）
+        
+        两个请求同时发出，双方都返回后立即返回。若一方已返回而另一方在
+        `grace` 秒内仍未返回（或总耗时超过 `timeout`），降级为单方观点，
+        缺失一方使用超时占位结果。
+        
+        Returns:
+            (bull_perspective, bear_perspective)
+        """
+        timeout = self.perspective_timeout if timeout is None else timeout
+        grace = self.perspective_grace if grace is None else grace
+        
+        deadline = time.monotonic() + timeout
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="debate")
+        try:
+            futures = {
+                'bull': executor.submit(self.get_bull_perspective, market_context_text),
+                'bear': executor.submit(self.get_bear_perspective, market_context_text),
+            }
+            done, pending = wait_futures(futures.values(), timeout=timeout, return_when=FIRST_COMPLETED)
+            if done and pending:
+                remaining = max(0.0, deadline - time.monotonic())
+                wait_futures(pending, timeout=min(grace, remaining))
+            
+            results = {
+                side: (future.result() if future.done() else _timed_out_perspective(side))
+                for side, future in futures.items()
+            }
+        finally:
+            # 不等待超时的线程（无法中断同步 HTTP 请求），让其在后台结束
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        self._log_degraded_debate(results)
+        return results['bull'], results['bear']
+    
+    async def async_debate(self, market_context_text: str, timeout: Optional[float] = None, grace: Optional[float] = None) -> Tuple[Dict, Dict]:
+        """
+        🐂🐻 并发获取 Bull/Bear 观点（异步版）
+        
+        语义同 debate；超时的一方会被取消。
+        
+        Returns:
+            (bull_perspective, bear_perspective)
+        """
+        timeout = self.perspective_timeout if timeout is None else timeout
+        grace = self.perspective_grace if grace is None else grace
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        tasks = {
+            'bull': asyncio.create_task(self.async_get_bull_perspective(market_context_text)),
+            'bear': asyncio.create_task(self.async_get_bear_perspective(market_context_text)),
+        }
+        try:
+            done, pending = await asyncio.wait(tasks.values(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if done and pending:
+                remaining = max(0.0, deadline - loop.time())
+                await asyncio.wait(pending, timeout=min(grace, remaining))
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+        
+        results = {
+            side: (task.result() if task.done() and not task.cancelled() else _timed_out_perspective(side))
+            for side, task in tasks.items()
+        }
+        self._log_degraded_debate(results)
+        return results['bull'], results['bear']
+    
+    def _log_degraded_debate(self, results: Dict[str, Dict]) -> None:
+        missing = [side for side, result in results.items() if result.get('timed_out')]
+        if missing:
+            log.warning(f"⏱️ Bull/Bear debate degraded: {', '.join(missing)} perspective timed out")
+    
+    def _ensure_ready(self) -> bool:
+        """LLM 可用时返回 True（必要时尝试重新加载配置）"""
+        if self.disable_llm:
+            return False
+
+        # Ensure client is initialized
+        if not self.is_ready:
+            if not self.reload_config():
+                log.warning("🚫 LLM Strategy Engine not ready (No API Key). Returning fallback.")
+                return False
+        return True
+    
+    def _prepare_decision_prompts(self, market_context_text: str, market_context_data: Dict, reflection: Optional[str], bull_perspective: Dict, bear_perspective: Dict) -> Tuple[str, str]:
+        """保存 Bull/Bear 日志并构建决策 prompt"""
         # 🆕 保存Bull/Bear日志 (if they were generated here or passed in)
         try:
             from src.server.state import global_state
@@ -197,82 +410,72 @@ class StrategyEngine:
         
         # 记录 LLM 输入
         log.llm_input(f"正在发送市场数据到 {self.provider}...", market_context_text)
-
-        
-        try:
-            response = self.client.chat(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
-            
-            # 获取原始响应
-            content = response.content
-            
-            # 使用新解析器解析结构化输出
-            parsed = self.parser.parse(content)
-            decision = parsed['decision']
-            reasoning = parsed['reasoning']
-            
-            # 标准化 action 字段
-            if 'action' in decision:
-                decision['action'] = self.parser.normalize_action(
-                    decision['action'],
-                    position_side=market_context_data.get('position_side')
-                )
-            
-            # 验证决策
-            is_valid, errors = self.validator.validate(decision)
-            if not is_valid:
-                log.warning(f"LLM 决策验证失败: {errors}")
-                log.warning(f"原始决策: {decision}")
-                return self._get_fallback_decision(market_context_data)
-            
-            # 记录 LLM 输出
-            log.llm_output(f"{self.provider} 返回决策结果", decision)
-            if reasoning:
-                log.info(f"推理过程:\n{reasoning}")
-            
-            # 记录决策
-            log.llm_decision(
-                action=decision.get('action', 'wait'),
-                confidence=decision.get('confidence', 0),
-                reasoning=decision.get('reasoning', reasoning)
+        return system_prompt, user_prompt
+    
+    def _build_decision(self, content: str, market_context_data: Dict, system_prompt: str, user_prompt: str, bull_perspective: Dict, bear_perspective: Dict) -> Dict:
+        """解析并验证 LLM 原始输出，返回决策字典（验证失败时返回兜底决策）"""
+        # 使用新解析器解析结构化输出
+        parsed = self.parser.parse(content)
+        decision = parsed['decision']
+        reasoning = parsed['reasoning']
+        
+        # 标准化 action 字段
+        if 'action' in decision:
+            decision['action'] = self.parser.normalize_action(
+                decision['action'],
+                position_side=market_context_data.get('position_side')
             )
-            
-            # 添加元数据
-            decision['timestamp'] = market_context_data['timestamp']
-            decision['symbol'] = market_context_data['symbol']
-            decision['model'] = self.model
-            decision['raw_response'] = content
-            decision['reasoning_detail'] = reasoning
-            decision['validation_passed'] = True
-            
-            # ✅ Return full prompt for logging
-            decision['system_prompt'] = system_prompt
-            decision['user_prompt'] = user_prompt
-            
-            # 🐂🐻 Add Bull/Bear perspectives for dashboard
-            decision['bull_perspective'] = bull_perspective
-            decision['bear_perspective'] = bear_perspective
-            
-            return decision
-            
-        except httpx.HTTPStatusError as e:
-            if e.response is not None and e.response.status_code in (401, 402, 403):
-                self.disable_llm = True
-                self.is_ready = False
-                self.client = None
-                log.error(f"LLM decision failed: {e} (LLM disabled)")
-            else:
-                log.error(f"LLM decision failed: {e}")
-            # 返回保守决策
+        
+        # 验证决策
+        is_valid, errors = self.validator.validate(decision)
+        if not is_valid:
+            log.warning(f"LLM 决策验证失败: {errors}")
+            log.warning(f"原始决策: {decision}")
             return self._get_fallback_decision(market_context_data)
-        except Exception as e:
+        
+        # 记录 LLM 输出
+        log.llm_output(f"{self.provider} 返回决策结果", decision)
+        if reasoning:
+            log.info(f"推理过程:\n{reasoning}")
+        
+        # 记录决策
+        log.llm_decision(
+            action=decision.get('action', 'wait'),
+            confidence=decision.get('confidence', 0),
+            reasoning=decision.get('reasoning', reasoning)
+        )
+        
+        # 添加元数据
+        decision['timestamp'] = market_context_data['timestamp']
+        decision['symbol'] = market_context_data['symbol']
+        decision['model'] = self.model
+        decision['raw_response'] = content
+        decision['reasoning_detail'] = reasoning
+        decision['validation_passed'] = True
+        
+        # ✅ Return full prompt for logging
+        decision['system_prompt'] = system_prompt
+        decision['user_prompt'] = user_prompt
+        
+        # 🐂🐻 Add Bull/Bear perspectives for dashboard
+        decision['bull_perspective'] = bull_perspective
+        decision['bear_perspective'] = bear_perspective
+        
+        return decision
+    
+    def _handle_decision_error(self, e: Exception, market_context_data: Dict) -> Dict:
+        """LLM 调用失败：鉴权类错误禁用 LLM，统一返回保守决策（回放缓存未命中直接抛出）"""
+        if isinstance(e, LLMCacheMiss):
+            raise e
+        if isinstance(e, httpx.HTTPStatusError) and e.response is not None and e.response.status_code in (401, 402, 403):
+            self.disable_llm = True
+            self.is_ready = False
+            self.client = None
+            log.error(f"LLM decision failed: {e} (LLM disabled)")
+        else:
             log.error(f"LLM decision failed: {e}")
-            # 返回保守决策
-            return self._get_fallback_decision(market_context_data)
+        # 返回保守决策
+        return self._get_fallback_decision(market_context_data)
     
     def get_bull_perspective(self, market_context_text: str) -> Dict:
         """
@@ -287,49 +490,49 @@ class StrategyEngine:
         if not self.is_ready or not self.client:
              return {"bullish_reasons": "LLM not ready", "bull_confidence": 50}
 
-        bull_prompt = """You are a BULLISH market analyst. Your job is to find reasons WHY the market could go UP.
-
-Analyze the provided 'Four-Layer Strategy Analysis' and identify:
-1. Bullish Trend & Fuel signals (Layer 1)
-2. Bullish AI Resonance (Layer 2)
-3. Bullish Setup patterns (Layer 3/4)
-
-Output your analysis in this EXACT JSON format:
-```json
-{
-  "stance": "STRONGLY_BULLISH",
-  "bullish_reasons": "Your 3-5 key bullish observations, separated by semicolons",
-  "bull_confidence": 75
-}
-```
-
-stance must be one of: STRONGLY_BULLISH, SLIGHTLY_BULLISH, NEUTRAL, UNCERTAIN
-bull_confidence should be 0-100 based on how strong the bullish case is.
-Focus ONLY on bullish factors. Ignore bearish signals."""
-
         try:
             response = self.client.chat(
-                system_prompt=bull_prompt,
+                system_prompt=BULL_SYSTEM_PROMPT,
                 user_prompt=market_context_text,
                 temperature=0.3,
                 max_tokens=500
             )
-            
-            content = response.content
-            
-            # Parse JSON from response using robust extraction
-            result = _extract_json_robust(content)
-            if result:
-                stance = result.get('stance', 'UNKNOWN')
-                log.info(f"🐂 Bull Agent: [{stance}] {result.get('bullish_reasons', '')[:40]}... (Conf: {result.get('bull_confidence', 0)}%)")
-                return result
-            
-            return {"bullish_reasons": "Unable to analyze", "bull_confidence": 50}
-            
+            return self._parse_bull_perspective(response.content)
+        except LLMCacheMiss:
+            raise
+        except Exception as e:
+            log.warning(f"Bull Agent failed: {e}")
+            return {"bullish_reasons": "Analysis unavailable", "bull_confidence": 50}
+    
+    async def async_get_bull_perspective(self, market_context_text: str) -> Dict:
+        """🐂 Bull Agent（异步版），返回值同 get_bull_perspective"""
+        if not self.is_ready or not self.client:
+             return {"bullish_reasons": "LLM not ready", "bull_confidence": 50}
+
+        try:
+            response = await self.client.async_chat(
+                system_prompt=BULL_SYSTEM_PROMPT,
+                user_prompt=market_context_text,
+                temperature=0.3,
+                max_tokens=500
+            )
+            return self._parse_bull_perspective(response.content)
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             log.warning(f"Bull Agent failed: {e}")
             return {"bullish_reasons": "Analysis unavailable", "bull_confidence": 50}
     
+    def _parse_bull_perspective(self, content: str) -> Dict:
+        # Parse JSON from response using robust extraction
+        result = _extract_json_robust(content)
+        if result:
+            stance = result.get('stance', 'UNKNOWN')
+            log.info(f"🐂 Bull Agent: [{stance}] {result.get('bullish_reasons', '')[:40]}... (Conf: {result.get('bull_confidence', 0)}%)")
+            return result
+        
+        return {"bullish_reasons": "Unable to analyze", "bull_confidence": 50}
+    
     def get_bear_perspective(self, market_context_text: str) -> Dict:
         """
         🐻 Bear Agent: Analyze market from bearish perspective
@@ -343,50 +546,49 @@ Focus ONLY on bullish factors. Ignore bearish signals."""
         if not self.is_ready or not self.client:
              return {"bearish_reasons": "LLM not ready", "bear_confidence": 50}
 
-        bear_prompt = """You are a BEARISH market analyst. Your job is to find reasons WHY the market could go DOWN.
-
-Analyze the provided 'Four-Layer Strategy Analysis' and identify:
-1. Bearish Trend & Fuel signals (Layer 1)
-2. Bearish AI Resonance (Layer 2)
-3. Bearish Setup patterns (Layer 3/4)
-
-Output your analysis in this EXACT JSON format:
-```json
-{
-  "stance": "STRONGLY_BEARISH",
-  "bearish_reasons": "Your 3-5 key bearish observations, separated by semicolons",
-  "bear_confidence": 60
-}
-```
-
-stance must be one of: STRONGLY_BEARISH, SLIGHTLY_BEARISH, NEUTRAL, UNCERTAIN
-bear_confidence should be 0-100 based on how strong the bearish case is.
-Focus ONLY on bearish factors. Ignore bullish signals."""
-
-
         try:
             response = self.client.chat(
-                system_prompt=bear_prompt,
+                system_prompt=BEAR_SYSTEM_PROMPT,
                 user_prompt=market_context_text,
                 temperature=0.3,
                 max_tokens=500
             )
-            
-            content = response.content
-            
-            # Parse JSON from response using robust extraction
-            result = _extract_json_robust(content)
-            if result:
-                stance = result.get('stance', 'UNKNOWN')
-                log.info(f"🐻 Bear Agent: [{stance}] {result.get('bearish_reasons', '')[:40]}... (Conf: {result.get('bear_confidence', 0)}%)")
-                return result
-            
-            return {"bearish_reasons": "Unable to analyze", "bear_confidence": 50}
-            
+            return self._parse_bear_perspective(response.content)
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             log.warning(f"Bear Agent failed: {e}")
             return {"bearish_reasons": "Analysis unavailable", "bear_confidence": 50}
     
+    async def async_get_bear_perspective(self, market_context_text: str) -> Dict:
+        """🐻 Bear Agent（异步版），返回值同 get_bear_perspective"""
+        if not self.is_ready or not self.client:
+             return {"bearish_reasons": "LLM not ready", "bear_confidence": 50}
+
+        try:
+            response = await self.client.async_chat(
+                system_prompt=BEAR_SYSTEM_PROMPT,
+                user_prompt=market_context_text,
+                temperature=0.3,
+                max_tokens=500
+            )
+            return self._parse_bear_perspective(response.content)
+        except LLMCacheMiss:
+            raise
+        except Exception as e:
+            log.warning(f"Bear Agent failed: {e}")
+            return {"bearish_reasons": "Analysis unavailable", "bear_confidence": 50}
+    
+    def _parse_bear_perspective(self, content: str) -> Dict:
+        # Parse JSON from response using robust extraction
+        result = _extract_json_robust(content)
+        if result:
+            stance = result.get('stance', 'UNKNOWN')
+            log.info(f"🐻 Bear Agent: [{stance}] {result.get('bearish_reasons', '')[:40]}... (Conf: {result.get('bear_confidence', 0)}%)")
+            return result
+        
+        return {"bearish_reasons": "Unable to analyze", "bear_confidence": 50}
+    
     def _build_system_prompt(self) -> str:
         """Build System Prompt (English Version) or Load Custom"""
         import os
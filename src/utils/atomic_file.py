@@ -0,0 +1,35 @@
+"""
+原子文件写入 - 同目录独立命名的临时文件 + os.replace
+
+多个进程 / 线程同时写同一目标文件时各自使用不同的临时文件，不会互相截断；
+读端任意时刻看到的都是某一次完整写入的结果。失败时临时文件被删除，目标文件保持原样。
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+PathLike = Union[str, Path]
+
+
+@contextmanager
+def atomic_path(path: PathLike) -> Iterator[str]:
+    """提供临时文件路径，块正常结束后原子替换 path（适用于只接受文件名的写入方，如 to_parquet）"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def atomic_write(path: PathLike, mode: str = 'wb', encoding: Optional[str] = None, newline: Optional[str] = None) -> Iterator[IO]:
+    """以文件对象写入临时文件，成功后原子替换 path"""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=encoding, newline=newline) as f:
+            yield f
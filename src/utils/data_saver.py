@@ -8,6 +8,8 @@ import numpy as np
 from datetime import datetime
 from typing import List, Dict, Optional
 from src.utils.logger import log
+from src.utils.persistence_journal import PersistenceJournal, get_journal, read_journal
+from src.utils.trade_ledger import TRADE_COLUMNS, TradeLedger, get_trade_ledger
 
 
 class CustomJSONEncoder(json.JSONEncoder):
@@ -51,18 +53,31 @@ class DataSaver:
         analytics/
         results/
         trades/
+    
+    Journal 模式 (默认): 热路径上的保存只入队，后台线程批量追加到
+    {类别目录}/{SYMBOL}/{YYYYMMDD}/{category}.jsonl（按天轮转）；
+    materialize_view() 可按需展开为原来的逐条文件。
+    订单 / 模拟账户仍同步写盘；交易记录写入 execution/trades/trades.db（TradeLedger）。
     """
     
-    def __init__(self, base_dir: str = 'data', mode: str = 'live'):
+    # 交易账本文件（位于 trades 目录）
+    TRADE_LEDGER_FILE = 'trades.db'
+    
+    def __init__(self, base_dir: str = 'data', mode: str = 'live', journal: Optional[PersistenceJournal] = None,
+                 use_journal: bool = True):
         """
         初始化数据保存工具
         
         Args:
             base_dir: 数据根目录，默认为 'data'
             mode: 运行模式 - 'live' (实盘) 或 'backtest' (回测)
+            journal: 后台写入 journal（默认全局共享实例）
+            use_journal: False 时每条记录立即写独立文件（旧行为）
         """
         self.base_dir = base_dir
         self.mode = mode
+        self.journal = (journal or get_journal(CustomJSONEncoder)) if use_journal else None
+        self._trade_ledger: Optional[TradeLedger] = None
         
         # 模式目录: data/live 或 data/backtest
         self.mode_dir = os.path.join(base_dir, mode)
@@ -113,7 +128,7 @@ class DataSaver:
         清除范围:
         - agents/     (所有Agent日志)
         - analytics/  (分析数据)
-        - execution/  (交易执行日志，包括 all_trades.csv)
+        - execution/  (交易执行日志，不含交易账本 trades.db 与 all_trades.csv)
         - market_data/(市场数据)
         - oi_history/ (持仓历史)
         - risk/       (风控审计)
@@ -143,8 +158,8 @@ class DataSaver:
             for root, dirs, files in os.walk(subdir_path, topdown=False):
                 # 删除文件
                 for file in files:
-                    # 🆕 始终保留交易历史汇总 CSV，用于反思代理
-                    if file == 'all_trades.csv':
+                    # 🆕 始终保留交易历史（账本及旧版汇总 CSV），用于反思代理
+                    if file == 'all_trades.csv' or file.startswith(self.TRADE_LEDGER_FILE):
                         continue
                         
                     file_path = os.path.join(root, file)
@@ -174,22 +189,107 @@ class DataSaver:
             
     def _get_date_folder(self, category: str, symbol: Optional[str] = None, date: Optional[str] = None) -> str:
         """获取或创建指定类别的日期文件夹 (支持按币种嵌套)"""
+        target_folder = self._date_path(category, symbol=symbol, date=date)
+        os.makedirs(target_folder, exist_ok=True)
+        return target_folder
+
+    def _date_path(self, category: str, symbol: Optional[str] = None, date: Optional[str] = None) -> str:
+        """日期文件夹路径 (不创建目录)"""
         if date is None:
             date = datetime.now().strftime('%Y%m%d')
-        
-        category_dir = self.dirs.get(category)
-        if not category_dir:
-            category_dir = os.path.join(self.base_dir, category)
-            os.makedirs(category_dir, exist_ok=True)
-            
+        category_dir = self.dirs.get(category) or os.path.join(self.base_dir, category)
         if symbol:
-            target_folder = os.path.join(category_dir, symbol, date)
+            return os.path.join(category_dir, symbol, date)
+        return os.path.join(category_dir, date)
+
+    # ========== 写入 (journal / 独立文件) ==========
+
+    def journal_path(self, category: str, symbol: Optional[str] = None, date: Optional[str] = None) -> str:
+        """类别/币种/日期 对应的 journal 文件: {date_folder}/{category}.jsonl"""
+        return os.path.join(self._date_path(category, symbol=symbol, date=date), f'{category}.jsonl')
+
+    def _persist(self, category: str, symbol: Optional[str], filename: str, fmt: str, data) -> Dict[str, str]:
+        """
+        保存一条记录
+
+        journal 模式: 入队追加到当天的 {category}.jsonl（后台线程批量写盘）
+        否则: 按原目录结构立即写独立文件
+        """
+        if self.journal is None:
+            return self._write_file(self._get_date_folder(category, symbol=symbol), filename, fmt, data)
+
+        # 浅拷贝：调用方之后修改顶层字段 / 增删列不影响待写记录
+        if isinstance(data, pd.DataFrame):
+            data = data.copy(deep=False)
+        elif isinstance(data, dict):
+            data = dict(data)
+        path = self.journal_path(category, symbol=symbol)
+        self.journal.append(path, {
+            'ts': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'file': filename,
+            'format': fmt,
+            'data': data,
+        })
+        return {'jsonl': path}
+
+    def _write_file(self, folder: str, filename: str, fmt: str, data) -> Dict[str, str]:
+        """按格式写独立文件 (json / csv / md / market = json + csv)"""
+        if fmt == 'market':
+            saved_files = {}
+            formats = data.get('formats', ['json', 'csv'])
+            if 'json' in formats:
+                path = os.path.join(folder, f'{filename}.json')
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({'metadata': data['metadata'], 'klines': data['klines']}, f, indent=2, cls=CustomJSONEncoder)
+                saved_files['json'] = path
+            if 'csv' in formats:
+                path = os.path.join(folder, f'{filename}.csv')
+                pd.DataFrame(data['klines']).to_csv(path, index=False)
+                saved_files['csv'] = path
+            return saved_files
+
+        path = os.path.join(folder, filename)
+        if fmt == 'csv':
+            data.to_csv(path, index=False)
+        elif fmt == 'md':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(data)
         else:
-            target_folder = os.path.join(category_dir, date)
-            
-        os.makedirs(target_folder, exist_ok=True)
-        return target_folder
-    
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
+        return {fmt: path}
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已入队的记录全部写盘"""
+        return self.journal.flush(timeout) if self.journal is not None else True
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """退出前调用：写完 journal 并停止后台写线程"""
+        if self.journal is not None:
+            self.journal.close(timeout)
+
+    def read_journal(self, category: str, symbol: Optional[str] = None, date: Optional[str] = None) -> List[Dict]:
+        """读取某类别某天的 journal 记录（DataFrame 字段还原为 DataFrame）"""
+        self.flush()
+        records = read_journal(self.journal_path(category, symbol=symbol, date=date))
+        for record in records:
+            if record.get('format') == 'csv':
+                record['data'] = pd.DataFrame(**record['data'])
+        return records
+
+    def materialize_view(self, category: str, symbol: Optional[str] = None, date: Optional[str] = None) -> List[str]:
+        """
+        把 journal 展开为原目录结构下的独立文件（按需生成的视图，供人工查看 / 旧工具读取）
+
+        Returns:
+            写出的文件路径列表
+        """
+        folder = self._get_date_folder(category, symbol=symbol, date=date)
+        paths = []
+        for record in self.read_journal(category, symbol=symbol, date=date):
+            paths.extend(self._write_file(folder, record['file'], record['format'], record['data']).values())
+        return paths
+
     def save_market_data(
         self,
         klines: List[Dict],
@@ -203,18 +303,9 @@ class DataSaver:
             log.warning("K线数据为空，跳过保存")
             return {}
         
-        date_folder = self._get_date_folder('market_data', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # 元数据
-        df = pd.DataFrame(klines)
-        try:
-            first_ts = pd.to_datetime(klines[0]['timestamp'], unit='ms')
-            last_ts = pd.to_datetime(klines[-1]['timestamp'], unit='ms')
-        except:
-            first_ts = "unknown"
-            last_ts = "unknown"
-            
         metadata = {
             'symbol': symbol,
             'timeframe': timeframe,
@@ -222,26 +313,17 @@ class DataSaver:
             'timestamp': timestamp
         }
         
-        saved_files = {}
         if cycle_id:
             filename_base = f'market_data_{symbol}_{timeframe}_{timestamp}_cycle_{cycle_id}'
         else:
             filename_base = f'market_data_{symbol}_{timeframe}_{timestamp}'
         
-        if 'json' in save_formats:
-            path = os.path.join(date_folder, f'{filename_base}.json')
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump({'metadata': metadata, 'klines': klines}, f, indent=2, cls=CustomJSONEncoder)
-            saved_files['json'] = path
-            
-        if 'csv' in save_formats:
-            path = os.path.join(date_folder, f'{filename_base}.csv')
-            df.to_csv(path, index=False)
-            saved_files['csv'] = path
-            
-            
-            
         # Parquet usage removed by user request
+        saved_files = self._persist('market_data', symbol, filename_base, 'market', {
+            'metadata': metadata,
+            'klines': list(klines),
+            'formats': list(save_formats),
+        })
 
         log.debug(f"保存市场数据: {symbol} {timeframe}")
         return saved_files
@@ -255,19 +337,17 @@ class DataSaver:
         cycle_id: str = None
     ) -> Dict[str, str]:
         """保存技术指标数据 (原 save_step2_indicators)"""
-        date_folder = self._get_date_folder('indicators', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if cycle_id:
             filename = f'indicators_{symbol}_{timeframe}_{timestamp}_cycle_{cycle_id}_snap_{snapshot_id}.csv'
         else:
             filename = f'indicators_{symbol}_{timeframe}_{timestamp}_{snapshot_id}.csv'
-        path = os.path.join(date_folder, filename)
         
         try:
-            df.to_csv(path, index=False)
-            log.debug(f"保存技术指标: {path}")
-            return {'csv': path}
+            saved = self._persist('indicators', symbol, filename, 'csv', df)
+            log.debug(f"保存技术指标: {filename}")
+            return saved
         except Exception as e:
             log.error(f"Failed to save indicators: {e}")
             return {}
@@ -282,19 +362,17 @@ class DataSaver:
         cycle_id: str = None
     ) -> Dict[str, str]:
         """保存特征数据 (原 save_step3_features)"""
-        date_folder = self._get_date_folder('features', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if cycle_id:
             filename = f'features_{symbol}_{timeframe}_{timestamp}_cycle_{cycle_id}_snap_{snapshot_id}_{version}.csv'
         else:
             filename = f'features_{symbol}_{timeframe}_{timestamp}_{snapshot_id}_{version}.csv'
-        path = os.path.join(date_folder, filename)
         
         try:
-            features.to_csv(path, index=False)
-            log.debug(f"保存特征数据: {path}")
-            return {'csv': path}
+            saved = self._persist('features', symbol, filename, 'csv', features)
+            log.debug(f"保存特征数据: {filename}")
+            return saved
         except Exception as e:
             log.error(f"Failed to save features: {e}")
             return {}
@@ -308,20 +386,16 @@ class DataSaver:
         cycle_id: str = None
     ) -> Dict[str, str]:
         """保存Agent上下文/分析结果 (原 save_step4_context)"""
-        date_folder = self._get_date_folder('agent_context', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if cycle_id:
             filename = f'context_{symbol}_{identifier}_{timestamp}_cycle_{cycle_id}_snap_{snapshot_id}.json'
         else:
             filename = f'context_{symbol}_{identifier}_{timestamp}_{snapshot_id}.json'
-        path = os.path.join(date_folder, filename)
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(context, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-            
-        log.debug(f"保存Agent上下文: {path}")
-        return {'json': path}
+        saved = self._persist('agent_context', symbol, filename, 'json', context)
+        log.debug(f"保存Agent上下文: {filename}")
+        return saved
 
     def save_llm_log(
         self,
@@ -334,37 +408,30 @@ class DataSaver:
         
         路径结构: data/agents/strategy_engine/{SYMBOL}/{YYYYMMDD}/llm_log_{timestamp}.md
         """
-        # Get symbol-specific subfolder using central helper
-        symbol_date_folder = self._get_date_folder('llm_logs', symbol=symbol)
-        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         # Include cycle_id in filename if provided
         if cycle_id:
             filename = f'llm_log_{timestamp}_{cycle_id}_{snapshot_id}.md'
         else:
             filename = f'llm_log_{timestamp}_{snapshot_id}.md'
-        path = os.path.join(symbol_date_folder, filename)
         
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
-            
-        log.debug(f"保存LLM日志: {path}")
-        return {'md': path}
+        saved = self._persist('llm_logs', symbol, filename, 'md', content)
+        log.debug(f"保存LLM日志: {filename}")
+        return saved
     
-    def save_trend_analysis(
+    def _save_agent_analysis(
         self,
+        category: str,
+        prefix: str,
         analysis: str,
         input_data: Dict,
         symbol: str,
         cycle_id: str,
-        model: str = 'deepseek-chat'
+        model: str
     ) -> Dict[str, str]:
-        """保存TrendAgent分析日志"""
-        symbol_date_folder = self._get_date_folder('trend_agent', symbol=symbol)
-        
+        """保存 Trend / Setup / Trigger Agent 分析日志"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'trend_{timestamp}_{cycle_id}.json'
-        path = os.path.join(symbol_date_folder, filename)
+        filename = f'{prefix}_{timestamp}_{cycle_id}.json'
         
         data = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -376,11 +443,20 @@ class DataSaver:
             'temperature': 0.3
         }
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-        
-        log.debug(f"保存Trend分析: {path}")
-        return {'json': path}
+        return self._persist(category, symbol, filename, 'json', data)
+    
+    def save_trend_analysis(
+        self,
+        analysis: str,
+        input_data: Dict,
+        symbol: str,
+        cycle_id: str,
+        model: str = 'deepseek-chat'
+    ) -> Dict[str, str]:
+        """保存TrendAgent分析日志"""
+        saved = self._save_agent_analysis('trend_agent', 'trend', analysis, input_data, symbol, cycle_id, model)
+        log.debug(f"保存Trend分析: {saved}")
+        return saved
     
     def save_setup_analysis(
         self,
@@ -391,27 +467,9 @@ class DataSaver:
         model: str = 'deepseek-chat'
     ) -> Dict[str, str]:
         """保存SetupAgent分析日志"""
-        symbol_date_folder = self._get_date_folder('setup_agent', symbol=symbol)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'setup_{timestamp}_{cycle_id}.json'
-        path = os.path.join(symbol_date_folder, filename)
-        
-        data = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'cycle_id': cycle_id,
-            'symbol': symbol,
-            'input_data': input_data,
-            'analysis': analysis,
-            'model': model,
-            'temperature': 0.3
-        }
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-        
-        log.debug(f"保存Setup分析: {path}")
-        return {'json': path}
+        saved = self._save_agent_analysis('setup_agent', 'setup', analysis, input_data, symbol, cycle_id, model)
+        log.debug(f"保存Setup分析: {saved}")
+        return saved
     
     def save_trigger_analysis(
         self,
@@ -422,27 +480,9 @@ class DataSaver:
         model: str = 'deepseek-chat'
     ) -> Dict[str, str]:
         """保存TriggerAgent分析日志"""
-        symbol_date_folder = self._get_date_folder('trigger_agent', symbol=symbol)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'trigger_{timestamp}_{cycle_id}.json'
-        path = os.path.join(symbol_date_folder, filename)
-        
-        data = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'cycle_id': cycle_id,
-            'symbol': symbol,
-            'input_data': input_data,
-            'analysis': analysis,
-            'model': model,
-            'temperature': 0.3
-        }
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-        
-        log.debug(f"保存Trigger分析: {path}")
-        return {'json': path}
+        saved = self._save_agent_analysis('trigger_agent', 'trigger', analysis, input_data, symbol, cycle_id, model)
+        log.debug(f"保存Trigger分析: {saved}")
+        return saved
     
     def save_bull_bear_perspectives(
         self,
@@ -452,11 +492,8 @@ class DataSaver:
         cycle_id: str
     ) -> Dict[str, str]:
         """保存Bull/Bear对抗分析日志"""
-        symbol_date_folder = self._get_date_folder('bull_bear', symbol=symbol)
-        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'perspectives_{timestamp}_{cycle_id}.json'
-        path = os.path.join(symbol_date_folder, filename)
         
         data = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -466,11 +503,9 @@ class DataSaver:
             'bear_perspective': bear
         }
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-        
-        log.debug(f"保存Bull/Bear分析: {path}")
-        return {'json': path}
+        saved = self._persist('bull_bear', symbol, filename, 'json', data)
+        log.debug(f"保存Bull/Bear分析: {filename}")
+        return saved
     
     def save_reflection(
         self,
@@ -479,10 +514,7 @@ class DataSaver:
         timestamp: str
     ) -> Dict[str, str]:
         """保存ReflectionAgent反思日志"""
-        date_folder = self._get_date_folder('reflection')
-        
         filename = f'reflection_{timestamp}.json'
-        path = os.path.join(date_folder, filename)
         
         data = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -490,11 +522,9 @@ class DataSaver:
             'reflection': reflection
         }
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-        
-        log.debug(f"保存Reflection: {path}")
-        return {'json': path}
+        saved = self._persist('reflection', None, filename, 'json', data)
+        log.debug(f"保存Reflection: {filename}")
+        return saved
 
     def save_decision(
         self,
@@ -504,7 +534,6 @@ class DataSaver:
         cycle_id: str = None
     ) -> Dict[str, str]:
         """保存决策结果 (原 save_step6_decision)"""
-        date_folder = self._get_date_folder('decisions', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # Use cycle_id if provided, otherwise fall back to snapshot_id
@@ -513,13 +542,10 @@ class DataSaver:
             decision['cycle_id'] = cycle_id  # Ensure it's in the content too
         else:
             filename = f'decision_{symbol}_{timestamp}_{snapshot_id}.json'
-        path = os.path.join(date_folder, filename)
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(decision, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-            
-        log.debug(f"保存决策结果: {path}")
-        return {'json': path}
+        saved = self._persist('decisions', symbol, filename, 'json', decision)
+        log.debug(f"保存决策结果: {filename}")
+        return saved
 
     def save_execution(
         self,
@@ -527,7 +553,7 @@ class DataSaver:
         symbol: str,
         cycle_id: str = None
     ) -> Dict[str, str]:
-        """保存执行记录"""
+        """保存执行记录 (订单记录始终同步写盘)"""
         date_folder = self._get_date_folder('orders', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
@@ -560,7 +586,6 @@ class DataSaver:
         cycle_id: str = None
     ) -> Dict[str, str]:
         """保存风控审计结果"""
-        date_folder = self._get_date_folder('risk_audits', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if cycle_id:
@@ -568,13 +593,10 @@ class DataSaver:
             audit_result['cycle_id'] = cycle_id
         else:
             filename = f'risk_audit_{symbol}_{timestamp}_{snapshot_id}.json'
-        path = os.path.join(date_folder, filename)
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(audit_result, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-            
-        log.debug(f"保存风控审计记录: {path}")
-        return {'json': path}
+        saved = self._persist('risk_audits', symbol, filename, 'json', audit_result)
+        log.debug(f"保存风控审计记录: {filename}")
+        return saved
 
     def save_prediction(
         self,
@@ -584,7 +606,6 @@ class DataSaver:
         cycle_id: str = None
     ) -> Dict[str, str]:
         """保存预测预言家(The Prophet)的预测结果"""
-        date_folder = self._get_date_folder('predictions', symbol=symbol)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if cycle_id:
@@ -592,13 +613,10 @@ class DataSaver:
             prediction['cycle_id'] = cycle_id
         else:
             filename = f'prediction_{symbol}_{timestamp}_{snapshot_id}.json'
-        path = os.path.join(date_folder, filename)
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(prediction, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
-            
-        log.debug(f"保存预测结果: {path}")
-        return {'json': path}
+        saved = self._persist('predictions', symbol, filename, 'json', prediction)
+        log.debug(f"保存预测结果: {filename}")
+        return saved
 
     def list_files(self, category: str, symbol: Optional[str] = None, date: Optional[str] = None) -> List[str]:
         """列出文件"""
@@ -617,21 +635,22 @@ class DataSaver:
     save_step7_execution = save_execution
 
     # --- 交易历史记录扩展 ---
-    TRADE_COLUMNS = [
-        'record_time', 'open_cycle', 'close_cycle', 'action', 'symbol', 'price', 'quantity', 
-        'cost', 'exit_price', 'pnl', 'confidence', 'status'
-    ]
+    TRADE_COLUMNS = TRADE_COLUMNS
+
+    @property
+    def trade_ledger(self) -> TradeLedger:
+        """交易账本 (SQLite)；首次使用时导入已有的 all_trades.csv"""
+        if self._trade_ledger is None:
+            base_path = self.dirs['trades']
+            self._trade_ledger = get_trade_ledger(
+                os.path.join(base_path, self.TRADE_LEDGER_FILE),
+                import_csv=os.path.join(base_path, 'all_trades.csv')
+            )
+        return self._trade_ledger
 
     def save_trade(self, trade_data: Dict):
-        """保存交易记录（持久化追加至单一CSV，标准化 Schema）"""
+        """保存交易记录（追加到交易账本，标准化 Schema）"""
         try:
-            category = 'trades'
-            base_path = self.dirs.get(category)
-            if not os.path.exists(base_path):
-                os.makedirs(base_path, exist_ok=True)
-            
-            file_path = os.path.join(base_path, 'all_trades.csv')
-            
             # 1. 完善基础字段
             trade_data['record_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             if 'cycle_id' not in trade_data and 'cycle' in trade_data:
@@ -642,16 +661,10 @@ class DataSaver:
                 if col not in trade_data:
                     trade_data[col] = 0.0 if col in ['cost', 'pnl', 'exit_price', 'price', 'quantity'] else 'N/A'
             
-            # 3. 按标准顺序转换为 DataFrame
-            df = pd.DataFrame([{col: trade_data[col] for col in self.TRADE_COLUMNS}])
-            
-            # 4. 保存
-            if os.path.exists(file_path):
-                df.to_csv(file_path, mode='a', header=False, index=False)
-            else:
-                df.to_csv(file_path, mode='w', header=True, index=False)
+            # 3. 按标准字段追加
+            self.trade_ledger.append({col: trade_data[col] for col in self.TRADE_COLUMNS})
             
-            log.debug(f"交易记录已保存 (标准化): {file_path}")
+            log.debug(f"交易记录已保存 (标准化): {self.trade_ledger.db_path}")
         except Exception as e:
             log.error(f"保存标准化交易记录失败: {e}")
 
@@ -663,26 +676,8 @@ class DataSaver:
             days: 只返回最近N天内的记录（默认30天）
         """
         try:
-            file_path = os.path.join(self.dirs.get('trades'), 'all_trades.csv')
-            if not os.path.exists(file_path):
-                return []
-            
-            df = pd.read_csv(file_path)
-            if df.empty:
-                return []
-            
-            # 时间过滤: 只保留最近 N 天内的数据
-            if 'record_time' in df.columns:
-                df['record_time'] = pd.to_datetime(df['record_time'], errors='coerce')
-                cutoff_time = datetime.now() - pd.Timedelta(days=days)
-                df = df[df['record_time'] >= cutoff_time]
-            
-            if df.empty:
-                return []
-            
-            # 获取最后N条并按时间反序（或者保持原序由展示层决定）
-            recent = df.tail(limit).to_dict('records')
-            return recent
+            cutoff_time = (datetime.now() - pd.Timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+            return self.trade_ledger.recent(limit=limit, since=cutoff_time)
         except Exception as e:
             log.error(f"获取最近交易记录失败: {e}")
             return []
@@ -698,54 +693,31 @@ class DataSaver:
         """
         更新交易记录的平仓信息 (原地更新)
         
-        查找该 symbol 最近一条非 CLOSED 状态的记录，更新其 Exit Price 和 PnL。
+        查找该 symbol 最近一条未平仓 (exit_price 为 0) 的记录，更新其 Exit Price 和 PnL。
         这样可以保持 Trade History 表格的一致性（Round-Trip View）。
         """
         try:
-            file_path = os.path.join(self.dirs.get('trades'), 'all_trades.csv')
-            if not os.path.exists(file_path):
-                log.warning("交易记录文件不存在，无法更新平仓信息")
-                return False
-            
-            df = pd.read_csv(file_path)
-            if df.empty:
-                return False
-            
-            # 反向查找该 symbol 的 Open 记录
-            # 假设 Open 记录的 status 通常为 SENT, EXECUTED, SIMULATED 等，且 exit_price 为 0 或 NaN
-            # 我们查找 exit_price <= 0 或 NaN 的行
-            
-            # convert exit_price to numeric just in case
-            df['exit_price'] = pd.to_numeric(df['exit_price'], errors='coerce').fillna(0)
-            
-            # Find matching rows: symbol match AND (exit_price is 0)
-            mask = (df['symbol'] == symbol) & (df['exit_price'] == 0)
-            
-            if not mask.any():
+            if not self.trade_ledger.close_open_trade(symbol, exit_price, pnl, close_cycle):
                 log.warning(f"未找到 {symbol} 的活跃持仓记录，无法更新平仓")
                 return False
             
-            # Get index of the LAST matching row
-            target_idx = df[mask].index[-1]
-            
-            # Update values
-            df.at[target_idx, 'exit_price'] = exit_price
-            df.at[target_idx, 'pnl'] = pnl
-            df.at[target_idx, 'close_cycle'] = close_cycle
-            df.at[target_idx, 'status'] = 'CLOSED'
-            
-            # Save back
-            df.to_csv(file_path, index=False)
             log.info(f"✅ 已更新交易记录: {symbol} Closed @ ${exit_price:.2f}, PnL: ${pnl:.2f}, Cycle: {close_cycle}")
             return True
             
         except Exception as e:
             log.error(f"更新交易记录失败: {e}")
             return False
-            
-        except Exception as e:
-            log.error(f"更新交易记录失败: {e}")
-            return False
+
+    def get_trade_summary(self, symbol: Optional[str] = None) -> Dict:
+        """交易汇总统计（账本增量维护）"""
+        return self.trade_ledger.summary(symbol)
+
+    def export_trades_csv(self, path: Optional[str] = None) -> str:
+        """导出交易账本为 all_trades.csv（派生视图）"""
+        path = path or os.path.join(self.dirs['trades'], 'all_trades.csv')
+        self.trade_ledger.export_csv(path)
+        return path
+
     def save_virtual_account(self, balance: float, positions: Dict):
         """持久化模拟账户状态"""
         try:
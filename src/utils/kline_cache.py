@@ -6,6 +6,8 @@ Provides incremental parquet-based caching for K-line data to reduce API calls.
 
 Features:
 - Local parquet storage per symbol/interval
+- In-memory hot tier (latest rows + last timestamp) per symbol/interval
+- Append-only segment files with background compaction
 - Incremental fetch (only new data since last cache)
 - Automatic cache cleanup (keeps last 30 days)
 - Thread-safe operations
@@ -15,15 +17,29 @@ Date: 2026-01-10
 """
 
 import os
+import time
+import uuid
 import pandas as pd
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set, Tuple
 import threading
 
+from src.utils.atomic_file import atomic_path
 from src.utils.logger import log
 
 
+@dataclass
+class _HotTier:
+    """单个 symbol/interval 的内存热层"""
+    df: pd.DataFrame                      # 最近 hot_rows 根 K 线（按 timestamp 升序）
+    last_timestamp: Optional[int] = None  # 全量数据中的最大时间戳
+    truncated: bool = False               # 热层之外磁盘上还有更早的数据
+    pending_segments: int = 0             # 尚未合并的段文件数量
+    retention_days: int = 0
+
+
 class KlineCache:
     """
     K-line data cache with parquet storage
@@ -31,16 +47,31 @@ class KlineCache:
     Storage structure:
     data/kline_cache/
     ├── BTCUSDT/
-    │   ├── 5m.parquet
+    │   ├── 5m.parquet              # 压缩后的主文件
+    │   ├── 5m.segments/            # 追加段（只包含新增 K 线）
+    │   │   ├── {time_ns:020d}-{uuid}.parquet
+    │   │   └── ...
     │   ├── 15m.parquet
     │   └── 1h.parquet
     └── ETHUSDT/
         └── ...
+    
+    Tiers:
+    - 内存热层: 每个 symbol/interval 保留最近 hot_rows 根及最后时间戳，
+      首次访问时从磁盘加载一次，之后读取不再触盘
+    - 追加段: append_data 只把新增行写成小 parquet 段文件，O(新增行数)
+    - 后台合并: 段文件累积到阈值后由后台线程合并进主文件（去重、排序、保留期裁剪）
     """
     
     # Default retention period (days)
     DEFAULT_RETENTION_DAYS = 30
     
+    # 内存热层每个 symbol/interval 保留的行数
+    DEFAULT_HOT_ROWS = 5000
+    
+    # 段文件数达到该值时触发后台合并
+    COMPACT_SEGMENT_THRESHOLD = 24
+    
     # Interval to milliseconds mapping
     INTERVAL_MS = {
         '1m': 60 * 1000,
@@ -51,16 +82,29 @@ class KlineCache:
         '1d': 24 * 60 * 60 * 1000,
     }
     
-    def __init__(self, cache_dir: str = "data/kline"):
+    def __init__(
+        self,
+        cache_dir: str = "data/kline",
+        hot_rows: int = DEFAULT_HOT_ROWS,
+        compact_threshold: int = COMPACT_SEGMENT_THRESHOLD
+    ):
         """
         Initialize K-line cache
         
         Args:
             cache_dir: Directory for parquet cache files
+            hot_rows: Rows kept in memory per symbol/interval
+            compact_threshold: Segment count that triggers background compaction
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self._lock = threading.Lock()
+        self.hot_rows = hot_rows
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._hot: Dict[Tuple[str, str], _HotTier] = {}
+        self._compacting: Set[Tuple[str, str]] = set()
+        self._compact_threads: Dict[Tuple[str, str], threading.Thread] = {}
+        self._last_segment_ns = 0
         
         log.info(f"📦 KlineCache initialized | Dir: {self.cache_dir}")
     
@@ -70,25 +114,107 @@ class KlineCache:
         symbol_dir.mkdir(parents=True, exist_ok=True)
         return symbol_dir / f"{interval}.parquet"
     
-    def get_cached_data(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+    def _get_segment_dir(self, symbol: str, interval: str) -> Path:
+        """Get append-only segment directory for symbol/interval"""
+        return self._get_cache_path(symbol, interval).with_suffix(".segments")
+    
+    def _segment_name(self) -> str:
+        """
+        新段文件名: 纳秒时间戳（进程内单调递增）+ 随机后缀
+
+        按文件名排序即按写入时间排序；多个进程写同一目录时文件名不会重复，不会互相覆盖。
+        """
+        self._last_segment_ns = max(time.time_ns(), self._last_segment_ns + 1)
+        return f"{self._last_segment_ns:020d}-{uuid.uuid4().hex[:12]}.parquet"
+    
+    def _list_segments(self, symbol: str, interval: str) -> List[Path]:
+        """段文件按文件名（写入时间）升序（后写入的覆盖先写入的）"""
+        seg_dir = self._get_segment_dir(symbol, interval)
+        if not seg_dir.exists():
+            return []
+        return sorted(seg_dir.glob("*.parquet"))
+    
+    @staticmethod
+    def _merge(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """合并多个 K 线 DataFrame：按 timestamp 去重（后者优先）并排序"""
+        frames = [f for f in frames if f is not None and not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        normalized = []
+        for f in frames:
+            if f.index.name == 'timestamp':
+                f = f.reset_index()
+            normalized.append(f)
+        combined = normalized[0] if len(normalized) == 1 else pd.concat(normalized, ignore_index=True)
+        combined = combined.drop_duplicates(subset=['timestamp'], keep='last')
+        return combined.sort_values('timestamp').reset_index(drop=True)
+    
+    def _read_disk(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        """读取主文件 + 全部段文件并合并（O(history)，仅冷启动 / 全量读取时使用）"""
+        cache_path = self._get_cache_path(symbol, interval)
+        segments = self._list_segments(symbol, interval)
+        if not cache_path.exists() and not segments:
+            return None
+        
+        frames = []
+        for path in [cache_path] + segments:
+            if not path.exists():
+                continue
+            try:
+                frames.append(pd.read_parquet(path))
+            except Exception as e:
+                log.warning(f"⚠️ Failed to read cache {path}: {e}")
+        return self._merge(frames)
+    
+    def _load_hot(self, symbol: str, interval: str) -> _HotTier:
+        """获取内存热层，首次访问时从磁盘加载（调用方需持有 _lock）"""
+        key = (symbol.upper(), interval)
+        tier = self._hot.get(key)
+        if tier is not None:
+            return tier
+        
+        df = self._read_disk(symbol, interval)
+        if df is None:
+            df = pd.DataFrame()
+        segments = self._list_segments(symbol, interval)
+        tier = _HotTier(
+            df=df.tail(self.hot_rows).reset_index(drop=True),
+            last_timestamp=int(df['timestamp'].max()) if not df.empty and 'timestamp' in df.columns else None,
+            truncated=len(df) > self.hot_rows,
+            pending_segments=len(segments),
+        )
+        self._hot[key] = tier
+        log.debug(f"📦 Cache loaded: {symbol}/{interval} ({len(df)} rows, {len(segments)} segments)")
+        return tier
+    
+    def get_cached_data(
+        self,
+        symbol: str,
+        interval: str,
+        limit: Optional[int] = None
+    ) -> Optional[pd.DataFrame]:
         """
         Get cached data for symbol/interval
         
+        Args:
+            limit: 只需要最近 limit 行时直接由内存热层返回，不触盘；
+                   None 表示需要完整历史（合并主文件与段文件）
+        
         Returns:
             DataFrame with cached K-lines or None if no cache
         """
-        cache_path = self._get_cache_path(symbol, interval)
-        
-        if not cache_path.exists():
-            return None
-        
         try:
             with self._lock:
-                df = pd.read_parquet(cache_path)
-                log.debug(f"📦 Cache loaded: {symbol}/{interval} ({len(df)} rows)")
-                return df
+                tier = self._load_hot(symbol, interval)
+                if tier.df.empty and tier.last_timestamp is None:
+                    return None
+                if not tier.truncated or (limit is not None and len(tier.df) >= limit):
+                    df = tier.df if limit is None else tier.df.tail(limit)
+                    return df.copy()
+                df = self._read_disk(symbol, interval)
+                return df if limit is None or df is None else df.tail(limit).reset_index(drop=True)
         except Exception as e:
-            log.warning(f"⚠️ Failed to read cache {cache_path}: {e}")
+            log.warning(f"⚠️ Failed to read cache {symbol}/{interval}: {e}")
             return None
     
     def get_last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
@@ -98,18 +224,8 @@ class KlineCache:
         Returns:
             Last timestamp in ms or None if no cache
         """
-        df = self.get_cached_data(symbol, interval)
-        
-        if df is None or df.empty:
-            return None
-        
-        # Assume 'timestamp' column exists
-        if 'timestamp' in df.columns:
-            return int(df['timestamp'].max())
-        elif df.index.name == 'timestamp':
-            return int(df.index.max())
-        
-        return None
+        with self._lock:
+            return self._load_hot(symbol, interval).last_timestamp
     
     def append_data(
         self,
@@ -121,6 +237,9 @@ class KlineCache:
         """
         Append new K-line data to cache
         
+        新增行写入一个追加段文件并并入内存热层，不再重写整个主文件；
+        段文件达到阈值后在后台合并。
+        
         Args:
             symbol: Trading pair
             interval: Timeframe (5m, 15m, 1h)
@@ -128,10 +247,10 @@ class KlineCache:
             retention_days: Days to keep in cache
             
         Returns:
-            Combined DataFrame (cached + new)
+            内存热层中的最新数据（最多 hot_rows 行，cached + new）
         """
         if not new_data:
-            cached = self.get_cached_data(symbol, interval)
+            cached = self.get_cached_data(symbol, interval, limit=self.hot_rows)
             return cached if cached is not None else pd.DataFrame()
         
         # Convert new data to DataFrame
@@ -140,38 +259,112 @@ class KlineCache:
         # Ensure timestamp is int64
         if 'timestamp' in new_df.columns:
             new_df['timestamp'] = new_df['timestamp'].astype('int64')
+        new_df = self._merge([new_df])
         
-        # Load existing cache
-        cached_df = self.get_cached_data(symbol, interval)
+        cutoff_ms = None
+        if retention_days > 0:
+            cutoff_ms = int((datetime.now() - timedelta(days=retention_days)).timestamp() * 1000)
         
-        if cached_df is not None and not cached_df.empty:
-            # Reset index if timestamp is index
-            if cached_df.index.name == 'timestamp':
-                cached_df = cached_df.reset_index()
+        with self._lock:
+            tier = self._load_hot(symbol, interval)
+            tier.retention_days = retention_days
             
-            # Combine and deduplicate
-            combined = pd.concat([cached_df, new_df], ignore_index=True)
-            combined = combined.drop_duplicates(subset=['timestamp'], keep='last')
-            combined = combined.sort_values('timestamp').reset_index(drop=True)
-        else:
-            combined = new_df.sort_values('timestamp').reset_index(drop=True)
+            combined = self._merge([tier.df, new_df])
+            if cutoff_ms is not None:
+                combined = combined[combined['timestamp'] >= cutoff_ms]
+            tier.truncated = tier.truncated or len(combined) > self.hot_rows
+            tier.df = combined.tail(self.hot_rows).reset_index(drop=True)
+            new_last = int(new_df['timestamp'].max())
+            tier.last_timestamp = new_last if tier.last_timestamp is None else max(tier.last_timestamp, new_last)
+            if cutoff_ms is not None and tier.last_timestamp < cutoff_ms:
+                tier.last_timestamp = None
+            
+            # Save new rows as an append-only segment
+            seg_dir = self._get_segment_dir(symbol, interval)
+            seg_path = seg_dir / self._segment_name()
+            try:
+                seg_dir.mkdir(parents=True, exist_ok=True)
+                with atomic_path(seg_path) as tmp_path:
+                    new_df.to_parquet(tmp_path, index=False)
+                tier.pending_segments += 1
+                log.info(f"📦 Cache updated: {symbol}/{interval} | +{len(new_df)} new | {tier.pending_segments} pending segments")
+            except Exception as e:
+                log.error(f"❌ Failed to save cache segment {seg_path}: {e}")
+            
+            if tier.pending_segments >= self.compact_threshold:
+                self._schedule_compaction(symbol, interval)
+            
+            return tier.df.copy()
+    
+    def _schedule_compaction(self, symbol: str, interval: str):
+        """在后台线程中合并段文件（同一 symbol/interval 同时只有一个合并任务）"""
+        key = (symbol.upper(), interval)
+        if key in self._compacting:
+            return
+        self._compacting.add(key)
+        thread = threading.Thread(
+            target=self._compact_worker,
+            args=(symbol, interval),
+            name=f"kline-compact-{key[0]}-{interval}",
+            daemon=True
+        )
+        self._compact_threads[key] = thread
+        thread.start()
+    
+    def _compact_worker(self, symbol: str, interval: str):
+        try:
+            self.compact(symbol, interval)
+        finally:
+            with self._lock:
+                self._compacting.discard((symbol.upper(), interval))
+    
+    def compact(self, symbol: str, interval: str) -> int:
+        """
+        将段文件合并进主文件（去重、排序、保留期裁剪）
         
-        # Apply retention policy
-        if retention_days > 0:
+        合并期间新写入的段文件不受影响，留待下一次合并。
+        
+        Returns:
+            合并的段文件数量
+        """
+        cache_path = self._get_cache_path(symbol, interval)
+        segments = self._list_segments(symbol, interval)
+        if not segments:
+            return 0
+        
+        with self._lock:
+            retention_days = self._load_hot(symbol, interval).retention_days
+        
+        frames = []
+        for path in [cache_path] + segments:
+            if path.exists():
+                frames.append(pd.read_parquet(path))
+        combined = self._merge(frames)
+        if retention_days > 0 and not combined.empty:
             cutoff_ms = int((datetime.now() - timedelta(days=retention_days)).timestamp() * 1000)
             combined = combined[combined['timestamp'] >= cutoff_ms]
         
-        # Save to cache
-        cache_path = self._get_cache_path(symbol, interval)
         try:
+            # 先替换主文件再删段文件：中间状态下已合并的段与新主文件内容一致，任意时刻读到的数据都是完整的
+            with atomic_path(cache_path) as tmp_path:
+                combined.to_parquet(tmp_path, index=False)
             with self._lock:
-                combined.to_parquet(cache_path, index=False)
-            
-            log.info(f"📦 Cache updated: {symbol}/{interval} | {len(combined)} rows | +{len(new_data)} new")
+                for path in segments:
+                    path.unlink(missing_ok=True)
+                tier = self._hot.get((symbol.upper(), interval))
+                if tier is not None:
+                    tier.pending_segments = max(tier.pending_segments - len(segments), 0)
+                    tier.truncated = len(combined) > len(tier.df)
+            log.info(f"📦 Cache compacted: {symbol}/{interval} | {len(combined)} rows | {len(segments)} segments merged")
         except Exception as e:
-            log.error(f"❌ Failed to save cache {cache_path}: {e}")
-        
-        return combined
+            log.error(f"❌ Failed to compact cache {cache_path}: {e}")
+            return 0
+        return len(segments)
+    
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        """等待所有后台合并完成（测试 / 退出前使用）"""
+        for thread in list(self._compact_threads.values()):
+            thread.join(timeout)
     
     def get_with_incremental_fetch(
         self,
@@ -194,7 +387,7 @@ class KlineCache:
             DataFrame with at least `limit` rows
         """
         # Check cache
-        cached_df = self.get_cached_data(symbol, interval)
+        cached_df = self.get_cached_data(symbol, interval, limit=limit)
         last_ts = self.get_last_timestamp(symbol, interval)
         
         if cached_df is not None and len(cached_df) >= limit and last_ts:
@@ -235,6 +428,14 @@ class KlineCache:
         Args:
             symbol: Specific symbol to clear, or None for all
         """
+        self.wait_for_compaction()
+        with self._lock:
+            if symbol:
+                for key in [k for k in self._hot if k[0] == symbol.upper()]:
+                    del self._hot[key]
+            else:
+                self._hot.clear()
+        
         if symbol:
             symbol_dir = self.cache_dir / symbol.upper()
             if symbol_dir.exists():
@@ -265,14 +466,18 @@ class KlineCache:
                     interval = cache_file.stem
                     size_mb = cache_file.stat().st_size / (1024 * 1024)
                     
+                    segments = self._list_segments(symbol, interval)
+                    size_mb += sum(p.stat().st_size for p in segments) / (1024 * 1024)
+                    
                     try:
-                        df = pd.read_parquet(cache_file)
-                        rows = len(df)
+                        df = self._read_disk(symbol, interval)
+                        rows = len(df) if df is not None else 0
                     except:
                         rows = 0
                     
                     stats['symbols'][symbol][interval] = {
                         'rows': rows,
+                        'segments': len(segments),
                         'size_mb': round(size_mb, 2)
                     }
                     stats['total_files'] += 1
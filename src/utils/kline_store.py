@@ -0,0 +1,455 @@
+"""
+🗄️ Columnar K-line Store
+========================
+
+Long-horizon historical K-line storage for backtests.
+
+Features:
+- Partitioned per symbol / interval / UTC month
+- One .npy file per column (timestamp int64, prices & volumes float32, trades int64)
+- Memory-mapped reads: multi-year range queries only touch the needed pages,
+  and worker processes share the OS page cache
+- Deduplicated writes (same timestamp: newer row wins), no retention window
+- Gap detection on the interval grid and gap-only backfill
+  (HistoryDownloader writes each downloaded window here, so interrupted downloads resume)
+- Known exchange outages are remembered so they are not re-requested
+- Read-merge-write of a partition holds an exclusive lock file (fcntl), so several
+  backtest / training processes can fill the same symbol without losing rows
+
+KlineCache (data/kline) stays the short-window cache for live trading;
+this store keeps everything a backtest has ever fetched.
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows: only the in-process lock
+    HAS_FCNTL = False
+
+from src.utils.atomic_file import atomic_write
+from src.utils.kline_cache import KlineCache
+from src.utils.logger import log
+
+# fetch(start_ms, end_ms) -> DataFrame（DatetimeIndex 或 timestamp(ms) 列）
+FetchFunc = Callable[[int, int], Awaitable[Optional[pd.DataFrame]]]
+
+
+class KlineStoreError(RuntimeError):
+    """分区文件不完整或损坏（不能当作空分区处理，否则合并写入会覆盖已有数据）"""
+
+
+class KlineStore:
+    """
+    Columnar K-line store
+
+    Storage structure:
+    data/kline_store/
+    ├── BTCUSDT/
+    │   ├── 5m/
+    │   │   ├── 2024-01.timestamp.npy
+    │   │   ├── 2024-01.open.npy
+    │   │   ├── ...
+    │   │   └── _holes.json       # 已确认交易所无数据的区间
+    │   └── 1h/
+    └── ETHUSDT/
+    """
+
+    DEFAULT_DIR = "data/kline_store"
+
+    # 列及其存储类型；timestamp 为 K 线开盘时间 (UTC ms)
+    COLUMNS: Dict[str, type] = {
+        'timestamp': np.int64,
+        'open': np.float32,
+        'high': np.float32,
+        'low': np.float32,
+        'close': np.float32,
+        'volume': np.float32,
+        'quote_volume': np.float32,
+        'trades': np.int64,
+    }
+
+    INTERVAL_MS = KlineCache.INTERVAL_MS
+
+    def __init__(self, root: str = DEFAULT_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        log.info(f"🗄️ KlineStore initialized | Dir: {self.root}")
+
+    # ========== 路径 / 分区 ==========
+
+    def _partition_dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / interval
+
+    @staticmethod
+    def _month_of(ts_ms: np.ndarray) -> np.ndarray:
+        return np.asarray(ts_ms, dtype=np.int64).astype('datetime64[ms]').astype('datetime64[M]')
+
+    def _column_path(self, symbol: str, interval: str, month: np.datetime64, column: str) -> Path:
+        return self._partition_dir(symbol, interval) / f"{month}.{column}.npy"
+
+    def _months(self, symbol: str, interval: str) -> List[np.datetime64]:
+        """已存储的月份（升序）"""
+        part = self._partition_dir(symbol, interval)
+        if not part.exists():
+            return []
+        return sorted(np.datetime64(p.name.split('.')[0], 'M') for p in part.glob("*.timestamp.npy"))
+
+    @contextmanager
+    def _partition_lock(self, symbol: str, interval: str, shared: bool = False):
+        """
+        分区级跨进程锁（partition/_lock 文件上的 flock）+ 进程内锁
+
+        写端（读-合并-写）持排他锁；读端只在列不一致时持共享锁重读，等待写端完成。
+        """
+        part = self._partition_dir(symbol, interval)
+        part.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if not HAS_FCNTL:
+                yield
+                return
+            with open(part / "_lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _interval_ms(self, interval: str) -> int:
+        if interval not in self.INTERVAL_MS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        return self.INTERVAL_MS[interval]
+
+    # ========== 读 ==========
+
+    def _load_month(self, symbol: str, interval: str, month: np.datetime64) -> Optional[Dict[str, np.ndarray]]:
+        """
+        内存映射读取一个月的全部列
+
+        Returns:
+            None: 该月不存在（timestamp 列最后写入，没有它即没有这个月）
+            列长度不一致或缺列时返回 {}（写入进行中或已损坏）
+        """
+        try:
+            arrays = {'timestamp': np.load(self._column_path(symbol, interval, month, 'timestamp'), mmap_mode='r')}
+        except FileNotFoundError:
+            return None
+        try:
+            for col in self.COLUMNS:
+                if col != 'timestamp':
+                    arrays[col] = np.load(self._column_path(symbol, interval, month, col), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return {}
+        return arrays if len({len(a) for a in arrays.values()}) == 1 else {}
+
+    def _read_month(
+        self,
+        symbol: str,
+        interval: str,
+        month: np.datetime64,
+        locked: bool = False
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        读取一个月；列不一致时持分区共享锁重读（等待写端完成）
+
+        locked=True 表示调用方已持有分区排他锁，此时不一致即为损坏。
+
+        Raises:
+            KlineStoreError: 重读后仍不完整
+        """
+        arrays = self._load_month(symbol, interval, month)
+        if arrays == {} and not locked:
+            with self._partition_lock(symbol, interval, shared=True):
+                arrays = self._load_month(symbol, interval, month)
+        if arrays == {}:
+            raise KlineStoreError(f"Inconsistent store partition {symbol}/{interval}/{month}")
+        return arrays
+
+    def read_arrays(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        读取 [start_ms, end_ms] 区间（闭区间）内的列数组
+
+        只跨一个月时直接返回内存映射视图（只读、零拷贝）；跨月时拼接所需切片。
+        """
+        months = self._months(symbol, interval)
+        if start_ms is not None:
+            months = [m for m in months if m >= self._month_of(start_ms)]
+        if end_ms is not None:
+            months = [m for m in months if m <= self._month_of(end_ms)]
+
+        pieces: List[Dict[str, np.ndarray]] = []
+        for month in months:
+            arrays = self._read_month(symbol, interval, month)
+            if arrays is None:
+                continue
+            ts = arrays['timestamp']
+            lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side='left'))
+            hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side='right'))
+            if hi > lo:
+                pieces.append({col: a[lo:hi] for col, a in arrays.items()})
+
+        if not pieces:
+            return {col: np.empty(0, dtype=dtype) for col, dtype in self.COLUMNS.items()}
+        if len(pieces) == 1:
+            return pieces[0]
+        return {col: np.concatenate([p[col] for p in pieces]) for col in self.COLUMNS}
+
+    def read_range(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        读取区间为回测使用的 DataFrame（DatetimeIndex 'timestamp'，价格列为 float64）
+        """
+        arrays = self.read_arrays(symbol, interval, start_ms, end_ms)
+        index = pd.DatetimeIndex(pd.to_datetime(arrays['timestamp'], unit='ms'), name='timestamp')
+        data = {
+            col: arrays[col].astype(np.float64 if dtype is np.float32 else dtype)
+            for col, dtype in self.COLUMNS.items() if col != 'timestamp'
+        }
+        return pd.DataFrame(data, index=index)
+
+    def coverage(self, symbol: str, interval: str) -> Optional[Tuple[int, int]]:
+        """已存储数据的 (首个, 最后) 时间戳 (ms)"""
+        months = self._months(symbol, interval)
+        if not months:
+            return None
+        first = self._read_month(symbol, interval, months[0])
+        last = self._read_month(symbol, interval, months[-1])
+        if first is None or last is None or not len(first['timestamp']):
+            return None
+        return int(first['timestamp'][0]), int(last['timestamp'][-1])
+
+    # ========== 写 ==========
+
+    def _normalize(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """DataFrame（DatetimeIndex 或 timestamp 列）-> 存储列数组"""
+        if 'timestamp' in df.columns:
+            ts = df['timestamp']
+            if pd.api.types.is_datetime64_any_dtype(ts):
+                ts = pd.DatetimeIndex(ts).as_unit('ms').asi8
+            ts = np.asarray(ts, dtype=np.int64)
+        else:
+            ts = pd.DatetimeIndex(df.index).as_unit('ms').asi8
+        arrays = {'timestamp': ts}
+        for col, dtype in self.COLUMNS.items():
+            if col == 'timestamp':
+                continue
+            if col in df.columns:
+                values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+                if dtype is np.int64:
+                    values = np.nan_to_num(values, nan=0.0)
+                arrays[col] = values.astype(dtype)
+            else:
+                arrays[col] = np.zeros(len(ts), dtype=dtype)
+        return arrays
+
+    @staticmethod
+    def _dedupe(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """按 timestamp 排序去重，同一时间戳保留最后写入的行"""
+        order = np.argsort(arrays['timestamp'], kind='stable')
+        ts = arrays['timestamp'][order]
+        keep = np.append(ts[1:] != ts[:-1], True) if len(ts) else np.zeros(0, dtype=bool)
+        return {col: a[order][keep] for col, a in arrays.items()}
+
+    def _write_month(self, symbol: str, interval: str, month: np.datetime64, arrays: Dict[str, np.ndarray]):
+        """原子替换一个月的列文件（timestamp 最后替换，读端据列长度判断完整性）"""
+        part = self._partition_dir(symbol, interval)
+        part.mkdir(parents=True, exist_ok=True)
+        for col in [c for c in self.COLUMNS if c != 'timestamp'] + ['timestamp']:
+            path = self._column_path(symbol, interval, month, col)
+            with atomic_write(path) as f:
+                np.save(f, np.ascontiguousarray(arrays[col], dtype=self.COLUMNS[col]))
+
+    def write(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """
+        写入 K 线（与已有数据合并去重）
+
+        Returns:
+            新增的行数（已存在的时间戳被覆盖，不计入）
+        """
+        if df is None or df.empty:
+            return 0
+        new = self._dedupe(self._normalize(df))
+        months = self._month_of(new['timestamp'])
+
+        added = 0
+        with self._partition_lock(symbol, interval):
+            for month in np.unique(months):
+                mask = months == month
+                chunk = {col: a[mask] for col, a in new.items()}
+                existing = self._read_month(symbol, interval, month, locked=True)
+                if existing is not None:
+                    before = len(existing['timestamp'])
+                    chunk = self._dedupe({
+                        col: np.concatenate([np.asarray(existing[col]), chunk[col]]) for col in self.COLUMNS
+                    })
+                    added += len(chunk['timestamp']) - before
+                else:
+                    added += len(chunk['timestamp'])
+                self._write_month(symbol, interval, month, chunk)
+
+        log.debug(f"🗄️ Store updated: {symbol}/{interval} | +{added} rows ({len(new['timestamp'])} written)")
+        return added
+
+    # ========== 缺口检测 / 回补 ==========
+
+    def _holes_path(self, symbol: str, interval: str) -> Path:
+        return self._partition_dir(symbol, interval) / "_holes.json"
+
+    def _load_holes(self, symbol: str, interval: str) -> List[Tuple[int, int]]:
+        path = self._holes_path(symbol, interval)
+        if not path.exists():
+            return []
+        try:
+            return [tuple(h) for h in json.loads(path.read_text())]
+        except Exception as e:
+            log.warning(f"⚠️ Failed to read {path}: {e}")
+            return []
+
+    def _add_holes(self, symbol: str, interval: str, holes: List[Tuple[int, int]]):
+        if not holes:
+            return
+        with self._partition_lock(symbol, interval):
+            merged = sorted(self._load_holes(symbol, interval) + list(holes))
+            path = self._holes_path(symbol, interval)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(path) as f:
+                f.write(json.dumps([list(h) for h in merged]).encode())
+
+    @staticmethod
+    def _subtract(gaps: List[Tuple[int, int]], holes: List[Tuple[int, int]], step: int) -> List[Tuple[int, int]]:
+        """从缺口中去掉已知空洞（均为闭区间，对齐到 step）"""
+        result = []
+        for start, end in gaps:
+            pieces = [(start, end)]
+            for h_start, h_end in holes:
+                next_pieces = []
+                for s, e in pieces:
+                    if h_end < s or h_start > e:
+                        next_pieces.append((s, e))
+                        continue
+                    if h_start > s:
+                        next_pieces.append((s, h_start - step))
+                    if h_end < e:
+                        next_pieces.append((h_end + step, e))
+                pieces = next_pieces
+            result.extend(pieces)
+        return result
+
+    def find_gaps(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+        """
+        找出 [start_ms, end_ms] 内缺失的 K 线区间
+
+        Returns:
+            [(首根缺失开盘时间, 末根缺失开盘时间), ...]，均为 ms 闭区间
+        """
+        step = self._interval_ms(interval)
+        first = -(-start_ms // step) * step
+        last = end_ms // step * step
+        if last < first:
+            return []
+
+        ts = self.read_arrays(symbol, interval, first, last)['timestamp']
+        bounds = np.concatenate([[first - step], np.asarray(ts, dtype=np.int64), [last + step]])
+        jumps = np.flatnonzero(np.diff(bounds) > step)
+        gaps = [(int(bounds[j] + step), int(bounds[j + 1] - step)) for j in jumps]
+        return self._subtract(gaps, self._load_holes(symbol, interval), step)
+
+    async def backfill(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: int,
+        end_ms: int,
+        fetch: FetchFunc
+    ) -> int:
+        """
+        只回补缺口：对每个缺失区间调用 fetch(gap_start, gap_end) 并写入
+
+        回补后仍然缺失且已收盘的区间记为空洞（交易所停机等），以后不再请求。
+        fetch 抛出异常时跳过该缺口，不记录空洞，下次重试。
+
+        Returns:
+            新增的行数
+        """
+        step = self._interval_ms(interval)
+        gaps = self.find_gaps(symbol, interval, start_ms, end_ms)
+        if not gaps:
+            log.info(f"🗄️ Store hit: {symbol}/{interval} | range fully covered")
+            return 0
+
+        log.info(f"🗄️ Store backfill: {symbol}/{interval} | {len(gaps)} gap(s), "
+                 f"{sum((e - s) // step + 1 for s, e in gaps)} candles")
+        added = 0
+        closed_before = int(time.time() * 1000) - step
+        for gap_start, gap_end in gaps:
+            try:
+                df = await fetch(gap_start, gap_end)
+            except Exception as e:
+                log.warning(f"⚠️ Backfill failed for {symbol}/{interval} [{gap_start}, {gap_end}]: {e}")
+                continue
+            if df is not None and not df.empty:
+                added += self.write(symbol, interval, df)
+            self.mark_fetched(symbol, interval, gap_start, gap_end, closed_before)
+        return added
+
+    def mark_fetched(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: int,
+        end_ms: int,
+        closed_before: Optional[int] = None
+    ):
+        """
+        [start_ms, end_ms] 已成功向交易所请求过：其中仍缺失且已收盘的部分记为空洞
+        """
+        if closed_before is None:
+            closed_before = int(time.time() * 1000) - self._interval_ms(interval)
+        if start_ms <= closed_before:
+            self._add_holes(symbol, interval,
+                            self.find_gaps(symbol, interval, start_ms, min(end_ms, closed_before)))
+
+    def clear(self, symbol: Optional[str] = None):
+        """删除某个 symbol（或全部）的存储"""
+        import shutil
+        with self._lock:
+            target = self.root / symbol.upper() if symbol else self.root
+            if target.exists():
+                shutil.rmtree(target)
+            self.root.mkdir(parents=True, exist_ok=True)
+
+
+# Global instance
+_kline_store: Optional[KlineStore] = None
+
+
+def get_kline_store() -> KlineStore:
+    """Get global KlineStore instance (singleton)"""
+    global _kline_store
+    if _kline_store is None:
+        _kline_store = KlineStore()
+    return _kline_store
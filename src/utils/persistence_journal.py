@@ -0,0 +1,200 @@
+"""
+📝 Persistence Journal (Write-Behind)
+=====================================
+
+交易热路径上的落盘改为后台批量追加：
+
+- append() 只把 (路径, 记录) 放入内存队列，O(1)，不做序列化和磁盘 IO
+- 后台写线程每 flush_interval 秒（或队列达到 max_batch）取出整批，
+  按目标文件分组序列化为 JSON Lines，每个文件一次追加写入
+- DataFrame 记录用 to_json(orient='split') 序列化（C 实现，避免逐行转换）
+- flush() 阻塞到调用前入队的记录全部写盘；close() 在退出时 flush 并停止写线程
+  （进程退出时 atexit 兜底）
+
+文件按 DataSaver 的 类别/币种/日期 目录组织，日期目录即按天轮转。
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.logger import log
+
+
+class PersistenceJournal:
+    """
+    后台批量追加写入的 JSONL 日志
+    """
+
+    def __init__(self, flush_interval: float = 0.2, max_batch: int = 1000, encoder: Optional[type] = None):
+        """
+        Args:
+            flush_interval: 写线程两次写盘的最长间隔（秒）
+            max_batch: 队列达到该长度时立即唤醒写线程
+            encoder: json.JSONEncoder 子类（处理 datetime / numpy 类型）
+        """
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.encoder = encoder
+        self._queue: Deque[Tuple[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._known_dirs = set()
+        # 入队 / 写完的序号，flush() 据此等待
+        self._enqueued = 0
+        self._written = 0
+        self.batches = 0
+        self.errors = 0
+
+    # ========== 热路径 ==========
+
+    def append(self, path: str, record: Any):
+        """追加一条记录到 path（JSONL）；只入队，不阻塞"""
+        with self._cond:
+            self._queue.append((path, record))
+            self._enqueued += 1
+            if self._thread is None:
+                self._start()
+            elif len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        return self._enqueued - self._written
+
+    # ========== 控制 ==========
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待调用前入队的记录全部写盘
+
+        Returns:
+            是否在 timeout 内完成
+        """
+        with self._cond:
+            target = self._enqueued
+            if self._written >= target:
+                return True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """写完剩余记录并停止写线程（之后再 append 会重新启动写线程）"""
+        self.flush(timeout)
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._stopping = False
+
+    # ========== 写线程 ==========
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="persistence-journal", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._queue and not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                if not self._queue:
+                    if self._stopping:
+                        return
+                    continue
+                batch = list(self._queue)
+                self._queue.clear()
+            try:
+                self._write_batch(batch)
+            finally:
+                with self._cond:
+                    self._written += len(batch)
+                    self.batches += 1
+                    self._cond.notify_all()
+
+    def _write_batch(self, batch: List[Tuple[str, Any]]):
+        lines_by_path: Dict[str, List[str]] = {}
+        for path, record in batch:
+            try:
+                lines_by_path.setdefault(path, []).append(self._encode(record))
+            except Exception as e:
+                self.errors += 1
+                log.error(f"❌ Journal encode failed for {path}: {e}")
+        for path, lines in lines_by_path.items():
+            try:
+                directory = os.path.dirname(path)
+                if directory not in self._known_dirs:
+                    os.makedirs(directory, exist_ok=True)
+                    self._known_dirs.add(directory)
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            except Exception as e:
+                self.errors += len(lines)
+                self._known_dirs.discard(os.path.dirname(path))
+                log.error(f"❌ Journal write failed for {path}: {e}")
+
+    def _encode(self, record: Any) -> str:
+        """一条记录 -> 一行 JSON；顶层的 DataFrame 字段以 split 格式原样拼接"""
+        if not isinstance(record, dict):
+            return json.dumps(record, ensure_ascii=False, cls=self.encoder)
+        frames = {k: v for k, v in record.items() if isinstance(v, pd.DataFrame)}
+        if not frames:
+            return json.dumps(record, ensure_ascii=False, cls=self.encoder)
+        rest = {k: v for k, v in record.items() if k not in frames}
+        parts = [json.dumps(rest, ensure_ascii=False, cls=self.encoder)[1:-1]] if rest else []
+        for key, df in frames.items():
+            parts.append(f'{json.dumps(key)}: {df.to_json(orient="split", date_format="iso", default_handler=str)}')
+        return '{' + ', '.join(parts) + '}'
+
+
+def read_journal(path: str) -> List[Dict]:
+    """读取 JSONL 日志（跳过写到一半的末行）"""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                log.warning(f"⚠️ Skipping truncated journal line in {path}")
+    return records
+
+
+# ========== 全局实例 ==========
+
+_journal: Optional[PersistenceJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_journal(encoder: Optional[type] = None) -> PersistenceJournal:
+    """Get global PersistenceJournal instance (singleton, shared by all DataSavers)"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = PersistenceJournal(encoder=encoder)
+        return _journal
+
+
+@atexit.register
+def _close_journal():
+    if _journal is not None and _journal.pending:
+        started = time.perf_counter()
+        _journal.close()
+        log.info(f"📝 Journal flushed on exit in {time.perf_counter() - started:.2f}s")
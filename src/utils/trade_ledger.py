@@ -0,0 +1,285 @@
+"""
+📒 Trade Ledger
+===============
+
+实盘 / 模拟交易记录的嵌入式账本（SQLite, WAL 模式），替代 all_trades.csv 的整文件读写：
+
+- 追加一笔交易: 单条 INSERT，O(1)
+- 最近 N 笔: 按主键倒序 LIMIT N，不读取整个历史
+- 按币种查找未平仓记录: (symbol, exit_price, id) 索引，O(log n)
+- 汇总统计 (笔数 / 胜负 / 已实现盈亏) 按币种增量维护，与交易写入在同一事务中
+- all_trades.csv 作为派生视图按需导出；首次启动时自动导入已有 CSV
+
+Author: AI Trader Team
+Date: 2026-01-20
+"""
+
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.utils.atomic_file import atomic_write
+from src.utils.logger import log
+
+# 交易记录的标准字段（与 DataSaver.TRADE_COLUMNS 一致）
+TRADE_COLUMNS = [
+    'record_time', 'open_cycle', 'close_cycle', 'action', 'symbol', 'price', 'quantity',
+    'cost', 'exit_price', 'pnl', 'confidence', 'status'
+]
+
+NUMERIC_DEFAULTS = ['cost', 'pnl', 'exit_price', 'price', 'quantity']
+
+
+def _as_float(value) -> float:
+    """与 pd.to_numeric(errors='coerce').fillna(0) 相同的数值化"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value
+
+
+def _sql_value(value):
+    """SQLite 可存储的值（numpy 标量 -> Python 标量，NaN -> NULL）"""
+    if value is None or isinstance(value, (str, int, float)):
+        if isinstance(value, float) and value != value:
+            return None
+        return value
+    if hasattr(value, 'item'):
+        return _sql_value(value.item())
+    return str(value)
+
+
+class TradeLedger:
+    """
+    交易账本 (SQLite)
+    """
+
+    SUMMARY_FIELDS = ['total_trades', 'open_trades', 'closed_trades', 'winning_trades', 'losing_trades', 'realized_pnl']
+
+    def __init__(self, db_path: str, import_csv: Optional[str] = None):
+        """
+        Args:
+            db_path: 数据库文件路径
+            import_csv: 账本为空时导入的旧版 all_trades.csv（可选）
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_database()
+        if import_csv and os.path.exists(import_csv) and self.count() == 0:
+            self.import_csv(import_csv)
+
+    def _init_database(self):
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            columns = ', '.join(TRADE_COLUMNS)
+            self._conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS trades (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {columns}
+                )
+            ''')
+            # 未平仓查找: symbol + exit_price(=0) 最新一条
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_trades_open ON trades(symbol, exit_price, id)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS trade_summary (
+                    symbol TEXT PRIMARY KEY,
+                    total_trades INTEGER NOT NULL DEFAULT 0,
+                    open_trades INTEGER NOT NULL DEFAULT 0,
+                    closed_trades INTEGER NOT NULL DEFAULT 0,
+                    winning_trades INTEGER NOT NULL DEFAULT 0,
+                    losing_trades INTEGER NOT NULL DEFAULT 0,
+                    realized_pnl REAL NOT NULL DEFAULT 0
+                )
+            ''')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ========== 写入 ==========
+
+    def _normalize(self, trade: Dict) -> Dict:
+        """补全标准字段；exit_price 数值化（非数值视为 0 = 未平仓）"""
+        row = {}
+        for col in TRADE_COLUMNS:
+            if col in trade:
+                row[col] = _sql_value(trade[col])
+            else:
+                row[col] = 0.0 if col in NUMERIC_DEFAULTS else 'N/A'
+        row['exit_price'] = _as_float(row['exit_price'])
+        if not row.get('record_time'):
+            row['record_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return row
+
+    def _insert(self, cursor: sqlite3.Cursor, row: Dict):
+        placeholders = ', '.join('?' for _ in TRADE_COLUMNS)
+        cursor.execute(
+            f'INSERT INTO trades ({", ".join(TRADE_COLUMNS)}) VALUES ({placeholders})',
+            [row[col] for col in TRADE_COLUMNS]
+        )
+        is_open = row['exit_price'] == 0
+        self._bump_summary(cursor, row['symbol'], total=1, opened=1 if is_open else 0,
+                           closed=0 if is_open else 1, pnl=None if is_open else _as_float(row['pnl']))
+
+    def _bump_summary(self, cursor: sqlite3.Cursor, symbol, total: int = 0, opened: int = 0,
+                      closed: int = 0, pnl: Optional[float] = None):
+        """增量更新币种汇总（pnl 为本次平仓的已实现盈亏）"""
+        won = 1 if pnl is not None and pnl > 0 else 0
+        lost = 1 if pnl is not None and pnl < 0 else 0
+        cursor.execute('INSERT OR IGNORE INTO trade_summary (symbol) VALUES (?)', (symbol,))
+        cursor.execute('''
+            UPDATE trade_summary SET
+                total_trades = total_trades + ?, open_trades = open_trades + ?,
+                closed_trades = closed_trades + ?, winning_trades = winning_trades + ?,
+                losing_trades = losing_trades + ?, realized_pnl = realized_pnl + ?
+            WHERE symbol = ?
+        ''', (total, opened, closed, won, lost, pnl or 0.0, symbol))
+
+    def append(self, trade: Dict) -> Dict:
+        """
+        追加一笔交易
+
+        Returns:
+            写入的标准化记录
+        """
+        row = self._normalize(trade)
+        with self._lock, self._conn:
+            self._insert(self._conn.cursor(), row)
+        return row
+
+    def close_open_trade(self, symbol: str, exit_price: float, pnl: float, close_cycle: int = 0) -> bool:
+        """
+        更新该 symbol 最近一条未平仓记录 (exit_price = 0) 的平仓信息
+
+        Returns:
+            是否找到并更新
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            found = cursor.execute(
+                'SELECT id FROM trades WHERE symbol = ? AND exit_price = 0 ORDER BY id DESC LIMIT 1',
+                (symbol,)
+            ).fetchone()
+            if found is None:
+                return False
+            cursor.execute(
+                "UPDATE trades SET exit_price = ?, pnl = ?, close_cycle = ?, status = 'CLOSED' WHERE id = ?",
+                (_sql_value(exit_price), _sql_value(pnl), _sql_value(close_cycle), found['id'])
+            )
+            # exit_price 写回 0 时仍是未平仓
+            if _as_float(exit_price) != 0:
+                self._bump_summary(cursor, symbol, opened=-1, closed=1, pnl=_as_float(pnl))
+        return True
+
+    def import_csv(self, path: str) -> int:
+        """导入旧版 all_trades.csv（单事务）"""
+        df = pd.read_csv(path)
+        if df.empty:
+            return 0
+        records = df.to_dict('records')
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            for record in records:
+                self._insert(cursor, self._normalize(record))
+        log.info(f"📒 Imported {len(records)} trades from {path} into {self.db_path}")
+        return len(records)
+
+    # ========== 查询 ==========
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM trades').fetchone()[0]
+
+    def recent(self, limit: int = 10, since: Optional[str] = None) -> List[Dict]:
+        """
+        最近 limit 笔交易（按写入顺序，旧 -> 新）
+
+        Args:
+            since: 只返回 record_time >= since 的记录 ('%Y-%m-%d %H:%M:%S')
+        """
+        query = f'SELECT {", ".join(TRADE_COLUMNS)} FROM trades'
+        params: list = []
+        if since is not None:
+            query += ' WHERE record_time >= ?'
+            params.append(since)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def open_trade(self, symbol: str) -> Optional[Dict]:
+        """该 symbol 最近一条未平仓记录"""
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {", ".join(TRADE_COLUMNS)} FROM trades '
+                'WHERE symbol = ? AND exit_price = 0 ORDER BY id DESC LIMIT 1',
+                (symbol,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def summary(self, symbol: Optional[str] = None) -> Dict:
+        """
+        汇总统计（增量维护，不扫描交易表）
+
+        Args:
+            symbol: 指定币种；None 为全部币种合计
+        """
+        fields = ', '.join(f'COALESCE(SUM({f}), 0)' for f in self.SUMMARY_FIELDS)
+        query = f'SELECT {fields} FROM trade_summary'
+        params = ()
+        if symbol is not None:
+            query += ' WHERE symbol = ?'
+            params = (symbol,)
+        with self._lock:
+            values = self._conn.execute(query, params).fetchone()
+        summary = dict(zip(self.SUMMARY_FIELDS, values))
+        closed = summary['closed_trades']
+        summary['win_rate'] = summary['winning_trades'] / closed * 100 if closed else 0.0
+        summary['avg_pnl'] = summary['realized_pnl'] / closed if closed else 0.0
+        return summary
+
+    # ========== 派生视图 ==========
+
+    def to_frame(self) -> pd.DataFrame:
+        """全部交易记录（写入顺序，TRADE_COLUMNS 列），供离线分析脚本使用"""
+        with self._lock:
+            rows = self._conn.execute(f'SELECT {", ".join(TRADE_COLUMNS)} FROM trades ORDER BY id').fetchall()
+        return pd.DataFrame([tuple(row) for row in rows], columns=TRADE_COLUMNS)
+
+    def export_csv(self, path: str) -> int:
+        """导出为 all_trades.csv 格式（TRADE_COLUMNS 表头）"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        count = 0
+        with atomic_write(path, 'w', encoding='utf-8', newline='') as f, self._lock:
+            cursor = self._conn.execute(f'SELECT {", ".join(TRADE_COLUMNS)} FROM trades ORDER BY id')
+            writer = csv.writer(f)
+            writer.writerow(TRADE_COLUMNS)
+            for row in cursor:
+                writer.writerow(['' if v is None else v for v in row])
+                count += 1
+        return count
+
+
+_ledgers: Dict[str, TradeLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_trade_ledger(db_path: str, import_csv: Optional[str] = None) -> TradeLedger:
+    """同一数据库文件共享一个 TradeLedger"""
+    key = os.path.realpath(db_path)
+    with _ledgers_lock:
+        if key not in _ledgers:
+            _ledgers[key] = TradeLedger(db_path, import_csv=import_csv)
+        return _ledgers[key]
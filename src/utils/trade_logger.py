@@ -6,6 +6,7 @@ import os
 from datetime import datetime
 from typing import Dict, Optional
 from pathlib import Path
+from src.utils.atomic_file import atomic_write
 from src.utils.json_utils import safe_json_dump, safe_json_dumps
 
 
@@ -26,6 +27,9 @@ class TradeLogger:
         (self.log_dir / "daily").mkdir(exist_ok=True)
         (self.log_dir / "positions").mkdir(exist_ok=True)
         (self.log_dir / "summary").mkdir(exist_ok=True)
+        
+        # 交易汇总只在首次使用时从文件读取，之后在内存中增量更新
+        self._summary: Optional[Dict] = None
     
     def log_open_position(
         self,
@@ -233,25 +237,30 @@ class TradeLogger:
         
         return potential_profit
     
+    def _load_summary(self) -> Dict:
+        """读取交易汇总（仅首次）"""
+        if self._summary is None:
+            summary_file = self.log_dir / "summary" / "trading_summary.json"
+            if summary_file.exists():
+                with open(summary_file, 'r', encoding='utf-8') as f:
+                    self._summary = json.load(f)
+            else:
+                self._summary = {
+                    "total_trades": 0,
+                    "winning_trades": 0,
+                    "losing_trades": 0,
+                    "total_pnl": 0,
+                    "total_pnl_pct": 0,
+                    "best_trade": None,
+                    "worst_trade": None,
+                    "last_updated": None
+                }
+        return self._summary
+    
     def _update_summary(self, trade_record: Dict):
-        """更新交易汇总统计"""
+        """更新交易汇总统计（内存增量更新，写出汇总文件）"""
         summary_file = self.log_dir / "summary" / "trading_summary.json"
-        
-        # 读取现有汇总
-        if summary_file.exists():
-            with open(summary_file, 'r', encoding='utf-8') as f:
-                summary = json.load(f)
-        else:
-            summary = {
-                "total_trades": 0,
-                "winning_trades": 0,
-                "losing_trades": 0,
-                "total_pnl": 0,
-                "total_pnl_pct": 0,
-                "best_trade": None,
-                "worst_trade": None,
-                "last_updated": None
-            }
+        summary = self._load_summary()
         
         # 只统计已平仓的交易
         if trade_record["status"] == "CLOSED" and trade_record["close_info"]:
@@ -291,8 +300,8 @@ class TradeLogger:
             
             summary["last_updated"] = datetime.now().isoformat()
         
-        # 保存更新后的汇总
-        with open(summary_file, 'w', encoding='utf-8') as f:
+        # 保存更新后的汇总（先写独立命名的临时文件再替换）
+        with atomic_write(summary_file, 'w', encoding='utf-8') as f:
             safe_json_dump(summary, f, indent=2, ensure_ascii=False)
     
     def get_open_positions(self) -> list:
@@ -0,0 +1,44 @@
+"""
+Tests for the shared temp-file + os.replace writers
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+
+from src.utils.atomic_file import atomic_path, atomic_write
+
+
+def test_atomic_write_replaces_target(tmp_path):
+    target = tmp_path / "summary.json"
+    target.write_text("old")
+    with atomic_write(target, 'w', encoding='utf-8') as f:
+        f.write("new")
+        # The target is untouched until the block completes
+        assert target.read_text() == "old"
+    assert target.read_text() == "new"
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_failed_write_keeps_target_and_removes_temp_file(tmp_path):
+    target = tmp_path / "data.bin"
+    target.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(target) as f:
+            f.write(b"partial")
+            raise RuntimeError("boom")
+    assert target.read_bytes() == b"old"
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_atomic_path_for_filename_writers(tmp_path):
+    target = tmp_path / "5m.parquet"
+    df = pd.DataFrame({'timestamp': [1, 2], 'close': [1.0, 2.0]})
+    with atomic_path(target) as tmp:
+        assert os.path.dirname(tmp) == str(tmp_path)
+        df.to_parquet(tmp, index=False)
+    pd.testing.assert_frame_equal(pd.read_parquet(target), df)
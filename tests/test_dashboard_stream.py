@@ -0,0 +1,171 @@
+"""
+Tests for the SharedState change feed and the pushed dashboard stream (/api/stream)
+"""
+
+import os
+import sys
+import json
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import src.server.app as server
+from src.server.change_feed import ChangeFeed
+from src.server.state import global_state
+
+
+@pytest.fixture(autouse=True)
+def fast_stream(monkeypatch):
+    monkeypatch.setattr(server, 'STREAM_MIN_INTERVAL', 0)
+    monkeypatch.setattr(server, 'STREAM_TICK_SECONDS', 0.01)
+
+
+def _parse(chunk):
+    """SSE chunk -> [(event, id, data)]"""
+    messages = []
+    for block in chunk.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+        if fields:
+            messages.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return messages
+
+
+def _apply(state, ops):
+    """Python mirror of applyDashboardOps in web/app.js"""
+    for op in ops:
+        node = state
+        for key in op['path'][:-1]:
+            node = node.setdefault(key, {})
+        key, value, limit = op['path'][-1], op['value'], op.get('limit')
+        if op['op'] == 'set':
+            node[key] = value
+        elif op['op'] == 'merge':
+            node[key] = {**node.get(key, {}), **value}
+        elif op['op'] == 'append':
+            node[key] = (node.get(key, []) + [value])[-limit:]
+        elif op['op'] == 'prepend':
+            node[key] = ([value] + node.get(key, []))[:limit]
+
+
+def _mutate(i):
+    global_state.add_log(f"[🚀 EXECUTOR] order {i}")
+    global_state.add_log(f"plain debug line {i}")
+    global_state.record_trade({'symbol': 'BTCUSDT', 'action': 'OPEN_LONG', 'pnl': np.float64(0.5 * i)})
+    global_state.update_decision({'symbol': 'BTCUSDT', 'action': 'wait', 'confidence': np.float64(41.5 + i)})
+    global_state.add_agent_message('critic', f"msg {i}")
+    global_state.update_account(1000.0 + i, 900.0, 950.0, float('nan'))
+    global_state.current_price['BTCUSDT'] = 60000.0 + i
+
+
+async def _no_disconnect():
+    return False
+
+
+def test_change_feed_resumes_only_within_buffer():
+    feed = ChangeFeed(capacity=4)
+    for i in range(10):
+        feed.publish(('logs',), 'append', i, 200)
+    assert [e.value for e in feed.since(7)] == [7, 8, 9]
+    assert feed.since(10) == []
+    assert feed.since(5) is None       # rolled out of the buffer -> snapshot
+    assert feed.since(11) is None      # cursor from a different process lifetime
+
+    async def waiter():
+        assert not await feed.wait(10, timeout=0.01)
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, feed.publish, ('logs',), 'append', 10, 200)
+        assert await feed.wait(10, timeout=5)
+    asyncio.run(waiter())
+
+
+def test_deltas_reproduce_status_payload():
+    async def run():
+        stream = server._dashboard_stream(None, _no_disconnect)
+        [(event, event_id, state)] = _parse(await stream.__anext__())
+        assert event == 'snapshot' and event_id == f"{global_state.feed.epoch}:{global_state.feed.version}"
+
+        for i in range(5):
+            _mutate(i)
+            for _, _, data in _parse(await stream.__anext__()):
+                _apply(state, data['ops'])
+        await stream.aclose()
+        return state
+
+    state = asyncio.run(run())
+    expected = server._status_snapshot()[2]
+    assert state['logs_simplified'][-5:] == expected['logs_simplified'][-5:]
+    state.pop('logs_simplified'), expected.pop('logs_simplified')
+    assert state == expected
+    # NaN cleaned in the header, direct attribute writes picked up on the next tick
+    assert state['account']['unrealized_pnl'] is None and state['market']['price']['BTCUSDT'] == 60004.0
+
+
+def test_reconnect_resumes_from_last_event_id_without_snapshot(monkeypatch):
+    encoded = []
+    encode = server._encode_feed_event
+    monkeypatch.setattr(server, '_encode_feed_event', lambda event: encoded.append(event.version) or encode(event))
+
+    cursor = f"{global_state.feed.epoch}:{global_state.feed.version}"
+    _mutate(7)
+    missed = global_state.feed.version - int(cursor.split(':')[1])
+
+    async def first_chunk(value):
+        stream = server._dashboard_stream(server._parse_stream_cursor(value), _no_disconnect)
+        try:
+            return _parse(await stream.__anext__())
+        finally:
+            await stream.aclose()
+
+    resumed = asyncio.run(first_chunk(cursor))
+    assert [m[0] for m in resumed] == ['delta'] * (missed + 1)
+    assert resumed[missed - 1][1] == f"{global_state.feed.epoch}:{global_state.feed.version}"
+    # Header sections are resent once after a reconnect (no id: the cursor does not move)
+    assert resumed[-1][1] is None and {tuple(op['path']) for op in resumed[-1][2]['ops']} >= {('system',), ('account',)}
+
+    # A second client reuses the encoded events
+    assert asyncio.run(first_chunk(cursor)) == resumed
+    assert len(encoded) == missed
+
+    # Stale process epoch or a cursor that fell out of the buffer -> snapshot
+    assert asyncio.run(first_chunk('deadbeef:1'))[0][0] == 'snapshot'
+    for _ in range(global_state.feed.capacity):
+        global_state.add_log("filler")
+    assert asyncio.run(first_chunk(cursor))[0][0] == 'snapshot'
+
+
+def test_delta_ticks_do_not_rebuild_history(monkeypatch):
+    for i in range(300):
+        global_state.record_trade({'symbol': 'ETHUSDT', 'pnl': 0.0})
+
+    async def run():
+        stream = server._dashboard_stream(None, _no_disconnect)
+        await stream.__anext__()
+
+        def fail():
+            raise AssertionError("history rebuilt on a delta tick")
+        monkeypatch.setattr(server, '_status_history', fail)
+        global_state.add_log("[📊 SYSTEM] tick")
+        messages = _parse(await stream.__anext__())
+        await stream.aclose()
+        return messages
+
+    messages = asyncio.run(run())
+    assert {event for event, _, _ in messages} == {'delta'}
+    assert [op['path'] for _, _, data in messages for op in data['ops']] == [['logs'], ['logs_simplified']]
+
+
+def test_status_endpoint_and_timeframes_cache(monkeypatch):
+    app = server.app
+    app.dependency_overrides[server.verify_auth] = lambda: True
+    try:
+        status = TestClient(app).get('/api/status').json()
+    finally:
+        app.dependency_overrides.pop(server.verify_auth, None)
+    assert status['system']['timeframes'] and 'agent_messages' in status['agents']
+
+    monkeypatch.setattr(server.yaml, 'safe_load', lambda f: pytest.fail("config re-parsed"))
+    assert server._get_strategy_timeframes() == status['system']['timeframes']
@@ -0,0 +1,114 @@
+"""
+Tests for the cursor-based replay index in DataReplayAgent.get_snapshot_at
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.data_replay import DataCache, DataReplayAgent
+
+
+def _synthetic_klines(start, periods, freq):
+    index = pd.date_range(start, periods=periods, freq=freq)
+    rng = np.random.default_rng(7)
+    close = 50000 + rng.standard_normal(periods).cumsum() * 10
+    return pd.DataFrame(
+        {
+            'open': close - 5,
+            'high': close + 20,
+            'low': close - 20,
+            'close': close,
+            'volume': rng.uniform(1, 100, periods),
+        },
+        index=index,
+    )
+
+
+def _make_replay(days):
+    start = datetime(2024, 1, 1)
+    replay = DataReplayAgent.__new__(DataReplayAgent)
+    replay.symbol = "BTCUSDT"
+    replay.start_date = start + timedelta(days=3)
+    replay.end_date = start + timedelta(days=days)
+    replay.latest_snapshot = None
+    replay.current_idx = 0
+    replay._replay_index = None
+    replay._cursor = 0
+    replay._cursor_step = 1
+
+    df_5m = _synthetic_klines(start, days * 288, '5min')
+    replay.data_cache = DataCache(
+        symbol=replay.symbol,
+        df_5m=df_5m,
+        df_15m=_synthetic_klines(start, days * 96, '15min'),
+        df_1h=_synthetic_klines(start, days * 24, '1h'),
+        start_date=replay.start_date,
+        end_date=replay.end_date,
+    )
+    replay.timestamps = [ts for ts in df_5m.index if replay.start_date <= ts < replay.end_date]
+    return replay
+
+
+def _mask_snapshot(cache, timestamp, lookback=1000):
+    """Reference implementation: full-history boolean masks"""
+    return (
+        cache.df_5m[cache.df_5m.index <= timestamp].tail(lookback),
+        cache.df_15m[cache.df_15m.index <= timestamp].tail(max(lookback // 3, 100)),
+        cache.df_1h[cache.df_1h.index <= timestamp].tail(max(lookback // 12, 100)),
+    )
+
+
+def test_snapshot_matches_boolean_mask_slicing():
+    replay = _make_replay(days=10)
+    checked = 0
+    for ts in replay.iterate_timestamps(step=7):
+        snapshot = replay.get_snapshot_at(ts)
+        ref_5m, ref_15m, ref_1h = _mask_snapshot(replay.data_cache, ts)
+
+        pd.testing.assert_frame_equal(snapshot.stable_5m, ref_5m.iloc[:-1])
+        pd.testing.assert_frame_equal(snapshot.stable_15m, ref_15m.iloc[:-1])
+        pd.testing.assert_frame_equal(snapshot.stable_1h, ref_1h.iloc[:-1])
+        assert snapshot.live_5m == ref_5m.iloc[-1].to_dict()
+        assert snapshot.live_1h == ref_1h.iloc[-1].to_dict()
+        checked += 1
+    assert checked > 100
+
+
+def test_out_of_order_and_off_grid_timestamps():
+    replay = _make_replay(days=10)
+    # Random access (cursor miss) and timestamps between 5m bars
+    for ts in [replay.timestamps[-1], replay.timestamps[0], replay.timestamps[500] + timedelta(minutes=2)]:
+        snapshot = replay.get_snapshot_at(ts, lookback=300)
+        ref_5m, _, ref_1h = _mask_snapshot(replay.data_cache, ts, lookback=300)
+        pd.testing.assert_frame_equal(snapshot.stable_5m, ref_5m.iloc[:-1])
+        pd.testing.assert_frame_equal(snapshot.stable_1h, ref_1h.iloc[:-1])
+        assert snapshot.live_5m == ref_5m.iloc[-1].to_dict()
+
+
+def test_per_step_cost_stays_flat_over_90_days():
+    """Benchmark: 90 days of 5m data; late steps must cost about the same as early ones"""
+    replay = _make_replay(days=90)
+    timestamps = list(replay.iterate_timestamps())
+    replay._cursor = 0
+    window = 300
+
+    def cost(chunk):
+        replay._cursor = timestamps.index(chunk[0])
+        started = time.perf_counter()
+        for ts in chunk:
+            replay.get_snapshot_at(ts)
+        return (time.perf_counter() - started) / len(chunk)
+
+    cost(timestamps[:50])  # warm-up
+    early = min(cost(timestamps[:window]) for _ in range(7))
+    late = min(cost(timestamps[-window:]) for _ in range(7))
+
+    # A cost that grows with history would be orders of magnitude slower at the end of 90 days
+    assert late < early * 3, (early, late)
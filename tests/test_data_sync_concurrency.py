@@ -0,0 +1,98 @@
+"""
+DataSyncAgent 并发获取测试 (fan-out fetch)
+
+使用注入延迟的本地 mock BinanceClient 验证:
+1. 所有数据源并发请求，墙钟时间接近最慢的单个请求而不是总和
+2. 单个数据源超时/失败时返回部分结果
+3. MarketSnapshot.fetch_latencies 记录各数据源耗时
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+
+import pytest
+
+from src.agents import data_sync_agent as dsa
+from src.agents.data_sync_agent import DataSyncAgent
+from src.utils.kline_cache import KlineCache
+
+LATENCY = 0.2
+INTERVAL_MS = {'5m': 300_000, '15m': 900_000, '1h': 3_600_000}
+
+
+class _SlowBinanceClient:
+    """Mock BinanceClient: every request sleeps `latency` seconds"""
+
+    def __init__(self, latency=LATENCY, slow_intervals=None):
+        self.latency = latency
+        self.slow_intervals = slow_intervals or {}
+
+    def get_klines(self, symbol, interval, limit=500, start_time=None):
+        time.sleep(self.slow_intervals.get(interval, self.latency))
+        step = INTERVAL_MS[interval]
+        end = 1_700_000_000_000 - (1_700_000_000_000 % 3_600_000)
+        return [
+            {
+                'timestamp': end - (limit - 1 - i) * step,
+                'open': 100.0, 'high': 101.0, 'low': 99.0, 'close': 100.5,
+                'volume': 10.0, 'close_time': end - (limit - 1 - i) * step + step - 1,
+                'is_closed': True,
+            }
+            for i in range(limit)
+        ]
+
+    def get_funding_rate_with_cache(self, symbol):
+        time.sleep(self.latency)
+        return {'symbol': symbol, 'funding_rate': 0.0001, 'is_cached': False}
+
+
+@pytest.fixture
+def patched_quant(monkeypatch):
+    async def _fake_fetch_coin_data(symbol="BTCUSDT"):
+        await asyncio.sleep(LATENCY)
+        return {'symbol': symbol}
+
+    monkeypatch.setattr(dsa.quant_client, 'fetch_coin_data', _fake_fetch_coin_data)
+
+
+def _make_agent(tmp_path, client, **kwargs):
+    agent = DataSyncAgent(client=client, **kwargs)
+    agent._kline_cache = KlineCache(cache_dir=str(tmp_path / "kline"))
+    return agent
+
+
+def test_fan_out_fetch_runs_sources_concurrently(tmp_path, patched_quant):
+    agent = _make_agent(tmp_path, _SlowBinanceClient())
+
+    snapshot = asyncio.run(agent.fetch_all_timeframes("BTCUSDT", limit=50))
+
+    # 5 sources x LATENCY serially would be ~1.0s; concurrent should be ~LATENCY
+    serial_cost = 5 * LATENCY
+    assert snapshot.fetch_duration < serial_cost * 0.6
+    assert set(snapshot.fetch_latencies) == {'5m', '15m', '1h', 'quant', 'funding'}
+    assert all(v >= LATENCY * 0.9 for v in snapshot.fetch_latencies.values())
+    assert len(snapshot.raw_5m) == 50
+    assert snapshot.binance_funding['funding_rate'] == 0.0001
+    assert snapshot.quant_data == {'symbol': 'BTCUSDT'}
+
+
+def test_fan_out_fetch_returns_partial_results_on_timeout(tmp_path, patched_quant):
+    client = _SlowBinanceClient(slow_intervals={'1h': 2.0})
+    agent = _make_agent(tmp_path, client, kline_timeout=0.5)
+
+    snapshot = asyncio.run(agent.fetch_all_timeframes("BTCUSDT", limit=50))
+
+    assert snapshot.fetch_duration < 1.5
+    assert snapshot.raw_1h == []
+    assert snapshot.alignment_ok is False
+    assert len(snapshot.raw_5m) == 50
+    assert len(snapshot.raw_15m) == 50
+    assert snapshot.fetch_latencies['1h'] >= 0.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+"""
+Tests and benchmark for the binary-searched funding-rate index in DataReplayAgent
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.data_replay import DataCache, DataReplayAgent, FundingRateRecord
+
+
+def _records(start, periods, seed=0, jitter=True):
+    """8-hour funding records; settlement times drift by a few seconds like real API data"""
+    rng = np.random.default_rng(seed)
+    records = []
+    for k in range(periods):
+        ts = start + timedelta(hours=8 * k)
+        if jitter:
+            ts += timedelta(seconds=int(rng.integers(0, 900)))
+        records.append(FundingRateRecord(ts, float(rng.normal(0, 0.0003)), float(rng.uniform(0, 2) > 0.5) * 100.0))
+    return records
+
+
+def _replay(records):
+    replay = DataReplayAgent(symbol="BTCUSDT", start_date="2024-01-01", end_date="2024-01-02")
+    replay.data_cache = DataCache(
+        symbol="BTCUSDT", df_5m=pd.DataFrame(), df_15m=pd.DataFrame(), df_1h=pd.DataFrame(),
+        start_date=None, end_date=None, funding_rates=records,
+    )
+    return replay
+
+
+def _scan_at(records, timestamp):
+    """Reference implementation: linear scan over the whole history"""
+    latest = None
+    for fr in records:
+        if fr.timestamp <= timestamp:
+            latest = fr
+        else:
+            break
+    return latest
+
+
+def _scan_settlement(replay, records, timestamp):
+    if not replay.is_funding_settlement_time(timestamp):
+        return None
+    fr = _scan_at(records, timestamp)
+    if fr and abs((fr.timestamp - timestamp).total_seconds()) < 600:
+        return fr
+    return None
+
+
+def test_lookup_matches_linear_scan():
+    start = datetime(2024, 1, 1)
+    records = _records(start, 60)
+    records.insert(10, FundingRateRecord(records[10].timestamp, 0.5, 1.0))  # duplicate time: last one wins
+    replay = _replay(records)
+    steps = [start - timedelta(hours=1) + timedelta(minutes=5 * i) for i in range(60 * 96 + 30)]
+
+    for ts in steps:
+        assert replay.get_funding_rate_at(ts) is _scan_at(records, ts)
+        expected = _scan_settlement(replay, records, ts)
+        assert replay.get_funding_rate_for_settlement(ts) == (expected.funding_rate if expected else None)
+
+
+def test_schedule_matches_per_step_settlement_check():
+    start = datetime(2024, 1, 1)
+    records = _records(start, 45, seed=3)
+    replay = _replay(records)
+    steps = [start + timedelta(minutes=5 * i) for i in range(15 * 288)]
+
+    schedule = replay.funding_schedule(steps)
+    expected = [(i, _scan_settlement(replay, records, ts)) for i, ts in enumerate(steps)]
+    expected = [(i, fr) for i, fr in expected if fr is not None]
+
+    assert [s.step for s in schedule] == [i for i, _ in expected]
+    assert [(s.funding_rate, s.mark_price) for s in schedule] == [(fr.funding_rate, fr.mark_price) for _, fr in expected]
+    assert all(steps[s.step] == s.timestamp for s in schedule)
+    # Jittered records > 10 minutes late are not settled; the rest are
+    assert 0 < len(schedule) < len(records)
+
+
+def test_index_rebuilds_when_history_is_replaced():
+    start = datetime(2024, 1, 1)
+    replay = _replay(_records(start, 5, jitter=False))
+    assert replay.get_funding_rate_at(start + timedelta(hours=20)).timestamp == start + timedelta(hours=16)
+
+    replay.data_cache.funding_rates = _records(start + timedelta(days=1), 3, jitter=False)
+    assert replay.get_funding_rate_at(start + timedelta(hours=20)) is None
+    assert replay.funding_schedule([]) == []
+
+
+def test_benchmark_year_of_funding_with_5m_steps():
+    start = datetime(2024, 1, 1)
+    records = _records(start, 3 * 365, seed=1, jitter=False)
+    replay = _replay(records)
+    steps = list(pd.date_range(start, periods=365 * 288, freq="5min").to_pydatetime())
+
+    t0 = time.perf_counter()
+    schedule = replay.funding_schedule(steps)
+    schedule_time = time.perf_counter() - t0
+    assert {s.timestamp.replace(minute=0) for s in schedule} == {fr.timestamp for fr in records}
+    assert schedule_time < 2.0, schedule_time
+
+    sample = steps[-2000:]
+    t0 = time.perf_counter()
+    indexed = [replay.get_funding_rate_at(ts) for ts in sample]
+    indexed_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scanned = [_scan_at(records, ts) for ts in sample]
+    scan_time = time.perf_counter() - t0
+
+    assert indexed == scanned
+    assert indexed_time * 5 < scan_time, (indexed_time, scan_time)
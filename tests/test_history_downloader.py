@@ -0,0 +1,249 @@
+"""
+Tests for the concurrent, rate-limit-aware HistoryDownloader against a local fake exchange
+"""
+
+import os
+import sys
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.api.history_downloader import HistoryDownloader, KlineDownloadError, WeightRateLimiter
+from src.backtest.data_replay import DataReplayAgent
+from src.utils.kline_store import KlineStore
+
+STEP = {'5m': 300_000, '15m': 900_000, '1h': 3_600_000}
+FUNDING_STEP = 8 * 3_600_000
+
+
+def _ms(value):
+    return int(pd.Timestamp(value).value // 10**6)
+
+
+class FakeExchange:
+    """Binance futures history endpoints served over local HTTP, with injectable failures"""
+
+    def __init__(self):
+        self.requests = []
+        self.rate_limit_every = 0      # every N-th request gets a 429
+        self.retry_after = "0.2"
+        self.failing_starts = set()    # kline window starts answered with 500
+        self.latency = 0.02
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rate_limited = 0
+        self.rate_limited_at = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def kline_row(ts, interval):
+        close = 100 + np.sin(ts / 1e9)
+        return [ts, str(close - 0.5), str(close + 1), str(close - 1), str(close), "10.0",
+                ts + STEP[interval] - 1, str(close * 10), 7, "0", "0", "0"]
+
+    def klines(self, q):
+        interval, limit = q['interval'], int(q['limit'])
+        step = STEP[interval]
+        first = -(-int(q['startTime']) // step) * step
+        ts = range(first, int(q['endTime']) + 1, step)
+        return [self.kline_row(t, interval) for t in list(ts)[:limit]]
+
+    def funding(self, q):
+        first = -(-int(q['startTime']) // FUNDING_STEP) * FUNDING_STEP
+        ts = list(range(first, int(q['endTime']) + 1, FUNDING_STEP))[:int(q['limit'])]
+        return [{'symbol': q['symbol'], 'fundingTime': t, 'fundingRate': f"{(t // FUNDING_STEP) % 7 * 1e-5:.8f}",
+                 'markPrice': "100.0"} for t in ts]
+
+    def handle(self, path, q):
+        with self._lock:
+            self.requests.append((path, q))
+            count = len(self.requests)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if self.rate_limit_every and count % self.rate_limit_every == 0:
+                with self._lock:
+                    self.rate_limited += 1
+                    self.rate_limited_at.append(time.monotonic())
+                return 429, {'Retry-After': self.retry_after}, {'code': -1003, 'msg': 'Too many requests'}
+            if path == '/fapi/v1/klines':
+                if int(q['startTime']) in self.failing_starts:
+                    return 500, {}, {'msg': 'internal error'}
+                return 200, {'X-MBX-USED-WEIGHT-1M': str(5 * count)}, self.klines(q)
+            if path == '/fapi/v1/fundingRate':
+                return 200, {}, self.funding(q)
+            return 404, {}, {}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def kline_starts(self, interval=None):
+        return sorted(int(q['startTime']) for p, q in self.requests
+                      if p == '/fapi/v1/klines' and (interval is None or q['interval'] == interval))
+
+
+@pytest.fixture
+def exchange():
+    fake = FakeExchange()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            status, headers, body = fake.handle(url.path, query)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def _downloader(exchange, **kwargs):
+    kwargs.setdefault('rate_limiter', WeightRateLimiter(10_000))
+    return HistoryDownloader(base_url=exchange.url, **kwargs)
+
+
+def test_windows_are_fetched_concurrently_and_assembled_in_order(exchange):
+    start, end = _ms("2024-01-01"), _ms("2024-01-31 23:55")
+    downloader = _downloader(exchange, max_concurrency=4)
+
+    rows = asyncio.run(downloader.fetch_klines("btcusdt", "5m", start, end))
+
+    expected = list(range(start, end + 1, STEP['5m']))
+    assert [r[0] for r in rows] == expected
+    # 31 days of 5m candles -> 9 disjoint one-page windows, 4 at a time
+    assert len(exchange.requests) == 9
+    assert exchange.max_in_flight == 4
+    assert all(q['symbol'] == "BTCUSDT" and q['limit'] == "1000" for _, q in exchange.requests)
+    # Server-reported weight is folded into the limiter
+    assert downloader.rate_limiter.used_weight >= 45
+
+    df = asyncio.run(downloader.download_klines("BTCUSDT", "5m", start, _ms("2024-01-01 01:00")))
+    assert len(df) == 13 and df.index.is_monotonic_increasing
+    assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']
+
+
+def test_rate_limit_responses_pause_and_retry(exchange):
+    exchange.rate_limit_every = 3
+    start, end = _ms("2024-01-01"), _ms("2024-01-21")
+    downloader = _downloader(exchange, max_concurrency=3)
+
+    t0 = time.monotonic()
+    rows = asyncio.run(downloader.fetch_klines("BTCUSDT", "5m", start, end))
+    elapsed = time.monotonic() - t0
+
+    assert [r[0] for r in rows] == list(range(start, end + 1, STEP['5m']))
+    assert exchange.rate_limited >= 2
+    # A 429 pauses all workers for Retry-After before anyone retries
+    assert elapsed >= 0.2
+    assert exchange.rate_limited_at[-1] - exchange.rate_limited_at[0] >= 0.2 * 0.9
+
+
+def test_weight_limiter_blocks_until_window_frees():
+    limiter = WeightRateLimiter(max_weight_per_minute=10, window_seconds=0.3)
+
+    async def burst():
+        t0 = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire(5)
+        return time.monotonic() - t0
+
+    elapsed = asyncio.run(burst())
+    assert 0.25 <= elapsed < 1.0
+    limiter.observe_used_weight(10)
+    assert limiter.used_weight == 10
+
+
+def test_funding_rates_are_windowed_and_ordered(exchange):
+    start, end = _ms("2023-01-01"), _ms("2024-12-31")
+    downloader = _downloader(exchange)
+
+    records = asyncio.run(downloader.fetch_funding_rates("BTCUSDT", start, end))
+
+    expected = list(range(-(-start // FUNDING_STEP) * FUNDING_STEP, end + 1, FUNDING_STEP))
+    assert [r['fundingTime'] for r in records] == expected
+    assert len(exchange.requests) == len(HistoryDownloader.split_windows(start, end, HistoryDownloader.FUNDING_WINDOW_MS))
+
+
+def test_interrupted_download_resumes_from_store(tmp_path, exchange):
+    store = KlineStore(str(tmp_path))
+    start, end = _ms("2024-02-01"), _ms("2024-02-20 23:55")
+    windows = HistoryDownloader.split_windows(start, end, 1000 * STEP['5m'])
+    broken = {windows[2][0], windows[4][0]}
+    exchange.failing_starts = broken
+
+    downloader = _downloader(exchange, max_retries=1)
+    # An incomplete range is an error; the windows that did succeed are already stored
+    with pytest.raises(KlineDownloadError) as failure:
+        asyncio.run(downloader.download_klines("BTCUSDT", "5m", start, end, store=store))
+    assert failure.value.windows == [windows[2], windows[4]]
+
+    missing = sum((w[1] - w[0]) // STEP['5m'] + 1 for w in windows if w[0] in broken)
+    assert len(store.read_range("BTCUSDT", "5m", start, end)) == 20 * 288 - missing
+    # Failed windows stay as gaps (last candle of each window = window end + 1 - step)
+    assert store.find_gaps("BTCUSDT", "5m", start, end) == [(s, e + 1 - STEP['5m']) for s, e in (windows[2], windows[4])]
+
+    # Exchange recovers: only the two missing windows are requested again
+    exchange.failing_starts = set()
+    exchange.requests.clear()
+    full = asyncio.run(downloader.download_klines("BTCUSDT", "5m", start, end, store=store))
+
+    assert exchange.kline_starts() == sorted(broken)
+    assert len(full) == 20 * 288 and full.index.is_unique
+    exchange.requests.clear()
+    asyncio.run(downloader.download_klines("BTCUSDT", "5m", start, end, store=store))
+    assert exchange.requests == []
+
+
+def _replay(store, exchange, start, end):
+    replay = DataReplayAgent(symbol="BTCUSDT", start_date=start, end_date=end, client=SimpleNamespace(testnet=False))
+    replay._kline_store = store
+    replay._downloader = _downloader(exchange)
+    return replay
+
+
+def test_overlapping_backtests_do_not_redownload(tmp_path, exchange):
+    store = KlineStore(str(tmp_path))
+
+    first = _replay(store, exchange, "2024-03-10 00:00", "2024-03-12 00:00")
+    assert asyncio.run(first.load_data())
+    assert {q['interval'] for p, q in exchange.requests if p == '/fapi/v1/klines'} == {'5m', '15m', '1h'}
+    assert len(first.timestamps) == 2 * 288
+    assert first.data_cache.funding_rates and first.data_cache.funding_rates[0].mark_price == 100.0
+
+    exchange.requests.clear()
+    second = _replay(store, exchange, "2024-03-11 00:00", "2024-03-13 00:00")
+    assert asyncio.run(second.load_data())
+    # Only the one extra day per interval is fetched
+    first_end = first._utc_timestamp_ms(first.end_date)
+    for interval in STEP:
+        assert exchange.kline_starts(interval) and all(s > first_end - STEP[interval] for s in exchange.kline_starts(interval))
+    pd.testing.assert_frame_equal(
+        second.data_cache.df_5m.loc["2024-03-11":"2024-03-11 23:55"],
+        first.data_cache.df_5m.loc["2024-03-11":"2024-03-11 23:55"],
+    )
@@ -0,0 +1,160 @@
+"""
+Equivalence tests: IncrementalIndicatorEngine vs MarketDataProcessor._calculate_indicators
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.incremental_indicators import INDICATOR_COLUMNS, IncrementalIndicatorEngine
+from src.data.processor import MarketDataProcessor
+
+
+def _synthetic_klines(n=400, seed=11, start_ms=1704067200000, step_ms=300_000):
+    rng = np.random.default_rng(seed)
+    close = 40000 + rng.standard_normal(n).cumsum() * 25
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = rng.uniform(1, 60, n)
+    klines = []
+    for i in range(n):
+        high = max(open_[i], close[i]) + spread[i]
+        low = min(open_[i], close[i]) - spread[i] * rng.uniform(0.2, 1.0)
+        klines.append({
+            'timestamp': start_ms + i * step_ms,
+            'open': float(open_[i]),
+            'high': float(high),
+            'low': float(low),
+            'close': float(close[i]),
+            'volume': float(rng.uniform(0, 500)),
+        })
+    return klines
+
+
+def _batch(klines):
+    df = pd.DataFrame(klines)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    processor = MarketDataProcessor.__new__(MarketDataProcessor)
+    return processor._calculate_indicators(df)
+
+
+def _assert_equivalent(batch, incremental):
+    assert list(incremental.index) == list(batch.index)
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            incremental[col].to_numpy(dtype=float),
+            batch[col].to_numpy(dtype=float),
+            rtol=1e-9,
+            atol=1e-9,
+            equal_nan=True,
+            err_msg=col,
+        )
+
+
+def test_columns_match_batch_implementation():
+    klines = _synthetic_klines(n=120)
+    batch = _batch(klines)
+    indicator_cols = [c for c in batch.columns if c not in klines[0]]
+    assert indicator_cols == INDICATOR_COLUMNS
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_streaming_matches_batch_every_bar(seed):
+    klines = _synthetic_klines(n=400, seed=seed)
+    engine = IncrementalIndicatorEngine(max_rows=len(klines))
+    for candle in klines:
+        engine.update("BTCUSDT", "5m", candle)
+
+    _assert_equivalent(_batch(klines), engine.get_frame("BTCUSDT", "5m"))
+
+
+def test_seed_then_stream_matches_batch_tail():
+    klines = _synthetic_klines(n=300)
+    engine = IncrementalIndicatorEngine(max_rows=50)
+
+    engine.seed("ETHUSDT", "15m", klines[:250])
+    for candle in klines[250:]:
+        engine.update("ETHUSDT", "15m", candle)
+
+    frame = engine.get_frame("ETHUSDT", "15m")
+    assert len(frame) == 50
+    _assert_equivalent(_batch(klines).iloc[-50:], frame)
+
+
+def test_ingest_only_applies_new_candles_and_isolates_keys():
+    klines = _synthetic_klines(n=200)
+    engine = IncrementalIndicatorEngine()
+
+    assert engine.ingest("BTCUSDT", "5m", klines[:150]) == 150
+    # The next cycle re-sends the whole window; only the new tail is applied
+    assert engine.ingest("BTCUSDT", "5m", klines) == 50
+    assert engine.ingest("BTCUSDT", "1h", klines[:10]) == 10
+
+    latest = engine.latest("BTCUSDT", "5m")
+    expected = _batch(klines).iloc[-1]
+    assert latest['rsi'] == pytest.approx(expected['rsi'], rel=1e-9)
+    assert latest['adx'] == pytest.approx(expected['adx'], rel=1e-9)
+    assert engine.last_timestamp("BTCUSDT", "1h") == klines[9]['timestamp']
+
+
+def test_flat_market_edge_cases():
+    klines = _synthetic_klines(n=80)
+    for candle in klines[30:60]:
+        candle.update(open=100.0, high=100.0, low=100.0, close=100.0, volume=0.0)
+
+    engine = IncrementalIndicatorEngine(max_rows=len(klines))
+    engine.ingest("FLAT", "5m", klines)
+    _assert_equivalent(_batch(klines), engine.get_frame("FLAT", "5m"))
+
+
+def _processor():
+    processor = MarketDataProcessor.__new__(MarketDataProcessor)
+    processor.indicator_engine = IncrementalIndicatorEngine(max_rows=MarketDataProcessor.INCREMENTAL_MAX_ROWS)
+    return processor
+
+
+def _rebased(frame):
+    frame = frame.copy()
+    frame['obv'] -= frame['obv'].iloc[0]
+    return frame
+
+
+def test_process_klines_path_advances_only_new_candles():
+    klines = _synthetic_klines(n=400)
+    processor = _processor()
+    engine = processor.indicator_engine
+
+    # Cold start: seeded from the window, identical to the batch computation
+    first = processor._incremental_indicators(klines[:300], "BTCUSDT", "5m")
+    _assert_equivalent(_batch(klines[:300]), first)
+    assert list(first.columns) == list(_batch(klines[:300]).columns)
+
+    # Sliding windows: one new candle per cycle, state carried from the seed
+    full = _batch(klines)
+    for end in range(301, 311):
+        frame = processor._incremental_indicators(klines[end - 300:end], "BTCUSDT", "5m")
+        assert engine.last_timestamp("BTCUSDT", "5m") == klines[end - 1]['timestamp']
+        _assert_equivalent(_rebased(full.iloc[end - 300:end]), frame)
+
+
+def test_process_klines_path_reseeds_when_window_does_not_follow():
+    klines = _synthetic_klines(n=400)
+    processor = _processor()
+    processor._incremental_indicators(klines[:300], "ETHUSDT", "15m")
+
+    # A candle dropped by validation, a jump back in time and a gap all re-seed from the window
+    dropped = klines[1:150] + klines[151:301]
+    for window in (dropped, klines[50:250], klines[380:400] + _synthetic_klines(n=60, start_ms=2_000_000_000_000)):
+        _assert_equivalent(_batch(window), processor._incremental_indicators(window, "ETHUSDT", "15m"))
+
+    # Still-forming last candle or a window longer than the kept rows: batch path
+    forming = [dict(k) for k in klines[:300]]
+    forming[-1]['is_closed'] = False
+    assert processor._incremental_indicators(forming, "ETHUSDT", "5m") is None
+    long_window = _synthetic_klines(n=MarketDataProcessor.INCREMENTAL_MAX_ROWS + 1)
+    assert processor._incremental_indicators(long_window, "ETHUSDT", "5m") is None
@@ -0,0 +1,117 @@
+"""
+Tests for the tiered KlineCache (memory hot tier + append-only segments)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+
+from src.utils import kline_cache as kc
+from src.utils.kline_cache import KlineCache
+
+STEP = 5 * 60 * 1000
+BASE_TS = (int(time.time() * 1000) // STEP - 2000) * STEP
+
+
+def _klines(start, count, close=100.0):
+    return [
+        {
+            'timestamp': BASE_TS + (start + i) * STEP,
+            'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+            'volume': 1.0,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def parquet_reads(monkeypatch):
+    calls = {'n': 0}
+    real = pd.read_parquet
+
+    def counting(*args, **kwargs):
+        calls['n'] += 1
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(kc.pd, 'read_parquet', counting)
+    return calls
+
+
+def test_hot_tier_serves_reads_without_disk_io(tmp_path, parquet_reads):
+    cache = KlineCache(cache_dir=str(tmp_path), hot_rows=500)
+    cache.append_data("BTCUSDT", "5m", _klines(0, 300))
+    parquet_reads['n'] = 0
+
+    for i in range(20):
+        cache.append_data("BTCUSDT", "5m", _klines(300 + i, 1))
+        assert cache.get_last_timestamp("BTCUSDT", "5m") == BASE_TS + (300 + i) * STEP
+        assert len(cache.get_cached_data("BTCUSDT", "5m", limit=300)) == 300
+
+    assert parquet_reads['n'] == 0
+    segments = cache._list_segments("BTCUSDT", "5m")
+    assert len(segments) == 21
+    # Each append persisted only the new rows
+    assert len(pd.read_parquet(segments[-1])) == 1
+
+
+def test_segments_survive_restart_with_last_write_wins(tmp_path):
+    cache = KlineCache(cache_dir=str(tmp_path))
+    cache.append_data("ETHUSDT", "1h", _klines(0, 10, close=100.0))
+    cache.append_data("ETHUSDT", "1h", _klines(5, 10, close=200.0))
+
+    reopened = KlineCache(cache_dir=str(tmp_path))
+    df = reopened.get_cached_data("ETHUSDT", "1h")
+
+    assert len(df) == 15
+    assert df['timestamp'].is_monotonic_increasing
+    assert list(df['close'][:5]) == [100.0] * 5
+    assert list(df['close'][5:]) == [200.0] * 10
+    assert reopened.get_last_timestamp("ETHUSDT", "1h") == BASE_TS + 14 * STEP
+
+
+def test_background_compaction_merges_segments(tmp_path):
+    cache = KlineCache(cache_dir=str(tmp_path), compact_threshold=5)
+    for i in range(12):
+        cache.append_data("SOLUSDT", "5m", _klines(i * 10, 10))
+    cache.wait_for_compaction(timeout=10)
+    cache.compact("SOLUSDT", "5m")
+
+    assert cache._list_segments("SOLUSDT", "5m") == []
+    base = pd.read_parquet(cache._get_cache_path("SOLUSDT", "5m"))
+    assert len(base) == 120
+    assert base['timestamp'].is_unique
+
+    reopened = KlineCache(cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(reopened.get_cached_data("SOLUSDT", "5m"), base)
+
+
+def test_full_history_read_beyond_hot_tier(tmp_path):
+    cache = KlineCache(cache_dir=str(tmp_path), hot_rows=50)
+    cache.append_data("BNBUSDT", "5m", _klines(0, 200))
+    cache.append_data("BNBUSDT", "5m", _klines(200, 5))
+
+    assert len(cache.get_cached_data("BNBUSDT", "5m", limit=50)) == 50
+    assert len(cache.get_cached_data("BNBUSDT", "5m", limit=120)) == 120
+    assert len(cache.get_cached_data("BNBUSDT", "5m")) == 205
+
+
+def test_segment_names_do_not_collide_across_instances(tmp_path):
+    # Separate instances stand in for separate processes starting from the same directory
+    first = KlineCache(cache_dir=str(tmp_path))
+    second = KlineCache(cache_dir=str(tmp_path))
+    first.get_cached_data("ADAUSDT", "5m")
+    second.get_cached_data("ADAUSDT", "5m")
+    first.append_data("ADAUSDT", "5m", _klines(0, 10, close=100.0))
+    second.append_data("ADAUSDT", "5m", _klines(5, 10, close=200.0))
+
+    segments = first._list_segments("ADAUSDT", "5m")
+    assert len(segments) == 2
+    df = KlineCache(cache_dir=str(tmp_path)).get_cached_data("ADAUSDT", "5m")
+    assert len(df) == 15
+    # Name order is write order: the later segment wins on overlap
+    assert list(df['close'][5:]) == [200.0] * 10
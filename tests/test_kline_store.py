@@ -0,0 +1,182 @@
+"""
+Tests for the columnar, month-partitioned KlineStore and gap-only backfill
+"""
+
+import os
+import sys
+import asyncio
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.kline_store import HAS_FCNTL, KlineStore, KlineStoreError
+
+STEP = {'5m': 300_000, '15m': 900_000, '1h': 3_600_000}
+
+
+def _candles(start_ms, end_ms, interval='5m', price_offset=0.0):
+    ts = np.arange(-(-start_ms // STEP[interval]) * STEP[interval], end_ms + 1, STEP[interval], dtype=np.int64)
+    close = 100 + np.sin(ts / 1e9) + price_offset
+    return pd.DataFrame({
+        'timestamp': ts, 'open': close - 0.5, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.full(len(ts), 10.0), 'quote_volume': close * 10, 'trades': np.full(len(ts), 7),
+    })
+
+
+def _ms(value):
+    return int(pd.Timestamp(value).value // 10**6)
+
+
+def test_write_read_across_months_with_dedupe(tmp_path):
+    store = KlineStore(str(tmp_path))
+    first = _candles(_ms("2024-01-31 20:00"), _ms("2024-02-01 04:00"))
+    assert store.write("btcusdt", "5m", first) == len(first)
+
+    # Overlapping rewrite: newer rows win, only genuinely new rows count
+    second = _candles(_ms("2024-02-01 00:00"), _ms("2024-02-01 08:00"), price_offset=1.0)
+    assert store.write("BTCUSDT", "5m", second) == 48
+
+    df = store.read_range("BTCUSDT", "5m")
+    assert df.index.is_monotonic_increasing and df.index.is_unique
+    assert len(df) == 12 * 12 + 1
+    assert df.index[0] == pd.Timestamp("2024-01-31 20:00") and df.index[-1] == pd.Timestamp("2024-02-01 08:00")
+    assert df['close'].dtype == np.float64
+    np.testing.assert_allclose(df.loc["2024-02-01 02:00", 'close'], 101 + np.sin(_ms("2024-02-01 02:00") / 1e9), rtol=1e-6)
+    assert sorted(p.name for p in (tmp_path / "BTCUSDT" / "5m").glob("*.timestamp.npy")) == \
+        ["2024-01.timestamp.npy", "2024-02.timestamp.npy"]
+    assert np.load(tmp_path / "BTCUSDT" / "5m" / "2024-02.close.npy").dtype == np.float32
+
+    # Range queries are inclusive on both ends; single-month reads are memory-mapped views
+    arrays = store.read_arrays("BTCUSDT", "5m", _ms("2024-02-01 01:00"), _ms("2024-02-01 02:00"))
+    assert len(arrays['timestamp']) == 13
+    assert isinstance(arrays['close'], np.memmap)
+    assert store.coverage("BTCUSDT", "5m") == (_ms("2024-01-31 20:00"), _ms("2024-02-01 08:00"))
+
+
+def test_find_gaps_on_interval_grid(tmp_path):
+    store = KlineStore(str(tmp_path))
+    df = _candles(_ms("2024-03-01 00:00"), _ms("2024-03-01 12:00"))
+    df = df[(df['timestamp'] < _ms("2024-03-01 03:00")) | (df['timestamp'] > _ms("2024-03-01 04:00"))]
+    store.write("ETHUSDT", "5m", df)
+
+    gaps = store.find_gaps("ETHUSDT", "5m", _ms("2024-02-29 23:00"), _ms("2024-03-01 13:02"))
+    assert gaps == [
+        (_ms("2024-02-29 23:00"), _ms("2024-02-29 23:55")),
+        (_ms("2024-03-01 03:00"), _ms("2024-03-01 04:00")),
+        (_ms("2024-03-01 12:05"), _ms("2024-03-01 13:00")),
+    ]
+    assert store.find_gaps("ETHUSDT", "5m", _ms("2024-03-01 05:00"), _ms("2024-03-01 12:00")) == []
+
+
+def test_backfill_fetches_only_gaps_and_remembers_outages(tmp_path):
+    store = KlineStore(str(tmp_path))
+    outage = (_ms("2024-03-02 10:00"), _ms("2024-03-02 10:55"))
+    calls = []
+
+    async def fetch(start_ms, end_ms):
+        calls.append((start_ms, end_ms))
+        df = _candles(start_ms, end_ms)
+        return df[(df['timestamp'] < outage[0]) | (df['timestamp'] > outage[1])]
+
+    start, end = _ms("2024-03-01"), _ms("2024-03-03")
+    added = asyncio.run(store.backfill("SOLUSDT", "5m", start, end, fetch))
+    assert calls == [(start, end)]
+    assert added == 2 * 288 + 1 - 12
+
+    # Overlapping window: only the uncovered tail is requested; the outage is not retried
+    calls.clear()
+    asyncio.run(store.backfill("SOLUSDT", "5m", _ms("2024-03-02"), _ms("2024-03-04"), fetch))
+    assert calls == [(end + STEP['5m'], _ms("2024-03-04"))]
+    calls.clear()
+    asyncio.run(store.backfill("SOLUSDT", "5m", start, _ms("2024-03-04"), fetch))
+    assert calls == []
+
+
+def test_backfill_failure_is_retried(tmp_path):
+    store = KlineStore(str(tmp_path))
+
+    async def broken(start_ms, end_ms):
+        raise ConnectionError("boom")
+
+    start, end = _ms("2024-03-01"), _ms("2024-03-01 06:00")
+    assert asyncio.run(store.backfill("XRPUSDT", "1h", start, end, broken)) == 0
+    assert store.find_gaps("XRPUSDT", "1h", start, end) == [(start, end)]
+
+
+def test_multi_year_range_loads_fast(tmp_path):
+    store = KlineStore(str(tmp_path))
+    store.write("BTCUSDT", "5m", _candles(_ms("2022-01-01"), _ms("2023-12-31 23:55")))
+
+    t0 = time.perf_counter()
+    df = store.read_range("BTCUSDT", "5m", _ms("2022-01-01"), _ms("2023-12-31 23:55"))
+    elapsed = time.perf_counter() - t0
+
+    assert len(df) == 730 * 288
+    assert elapsed < 0.5, elapsed
+
+
+def test_concurrent_writers_use_separate_temp_files(tmp_path):
+    import threading
+
+    # Separate instances stand in for separate processes (no shared in-process lock)
+    stores = [KlineStore(str(tmp_path)) for _ in range(4)]
+    df = _candles(_ms("2024-04-01 00:00"), _ms("2024-04-02 00:00"))
+    errors = []
+
+    def writer(store):
+        try:
+            for _ in range(20):
+                store.write("BTCUSDT", "5m", df)
+                store.mark_fetched("BTCUSDT", "5m", _ms("2024-03-31 00:00"), _ms("2024-04-02 00:00"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert list(tmp_path.rglob("*.tmp")) == []
+    assert len(KlineStore(str(tmp_path)).read_range("BTCUSDT", "5m")) == len(df)
+
+
+def _write_hours(root, hours):
+    store = KlineStore(root)
+    for hour in hours:
+        start = _ms("2024-05-01") + hour * 3_600_000
+        store.write("BTCUSDT", "5m", _candles(start, start + 55 * 60_000))
+
+
+@pytest.mark.skipif(not HAS_FCNTL, reason="inter-process lock needs fcntl")
+def test_concurrent_processes_do_not_lose_rows(tmp_path):
+    import multiprocessing
+
+    # Each process merges disjoint hours into the same month partition
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_write_hours, args=(str(tmp_path), range(i, 48, 4))) for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    assert all(p.exitcode == 0 for p in procs)
+    assert len(KlineStore(str(tmp_path)).read_range("BTCUSDT", "5m")) == 48 * 12
+
+
+def test_inconsistent_partition_raises_instead_of_overwriting(tmp_path):
+    store = KlineStore(str(tmp_path))
+    store.write("BTCUSDT", "5m", _candles(_ms("2024-06-01"), _ms("2024-06-02")))
+    part = tmp_path / "BTCUSDT" / "5m"
+    np.save(part / "2024-06.close.npy", np.zeros(3, dtype=np.float32))
+
+    with pytest.raises(KlineStoreError):
+        store.read_range("BTCUSDT", "5m")
+    with pytest.raises(KlineStoreError):
+        store.write("BTCUSDT", "5m", _candles(_ms("2024-06-03"), _ms("2024-06-03 01:00")))
+    assert len(np.load(part / "2024-06.timestamp.npy")) == 289
@@ -0,0 +1,107 @@
+"""
+Tests for latest-row feature computation and the vectorized ML path of PredictAgent
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.predict_agent import PredictAgent
+from src.data.processor import MarketDataProcessor
+from src.features.technical_features import TechnicalFeatureEngineer
+
+
+def _indicator_frame(n=400, seed=21):
+    rng = np.random.default_rng(seed)
+    close = 3000 + rng.standard_normal(n).cumsum() * 4
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    df = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.uniform(0.5, 6, n),
+        'low': np.minimum(open_, close) - rng.uniform(0.5, 6, n),
+        'close': close,
+        'volume': rng.uniform(10, 500, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="15min"))
+    df.iloc[200:205, df.columns.get_loc('volume')] = 0.0
+    processor = MarketDataProcessor.__new__(MarketDataProcessor)
+    return processor._calculate_indicators(df)
+
+
+def _expected_latest(df):
+    row = TechnicalFeatureEngineer().build_features(df).iloc[-1]
+    return {k: v for k, v in row.items()
+            if isinstance(v, (int, float, np.number)) and not isinstance(v, bool) and k != 'rsi_zone'}
+
+
+@pytest.mark.parametrize("length", [3, 15, 21, 22, 60, 203, 207, 400])
+def test_latest_features_match_full_build(length):
+    df = _indicator_frame().iloc[:length]
+    expected = _expected_latest(df)
+    actual = TechnicalFeatureEngineer().build_latest_features(df)
+
+    assert set(actual) == set(expected)
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(float(value), rel=1e-9, abs=1e-12, nan_ok=True), key
+
+
+def _trained_model_path(tmp_path):
+    pytest.importorskip("lightgbm")
+    from src.models.prophet_model import ProphetMLModel
+
+    df = _indicator_frame(3000, seed=4)
+    features = TechnicalFeatureEngineer().build_features(df).select_dtypes(include=[np.number]).dropna()
+    y = (features['close'].shift(-2) > features['close']).astype(int)
+    split = int(len(features) * 0.8)
+    model = ProphetMLModel(model_path=str(tmp_path / "missing.pkl"))
+    model.train(features.iloc[:split], y.iloc[:split], features.iloc[split:], y.iloc[split:],
+                params={'n_estimators': 60})
+    path = str(tmp_path / "prophet_lgb_TEST.pkl")
+    model.save(path)
+    return path, model
+
+
+def test_ml_prediction_uses_feature_vector(tmp_path, monkeypatch):
+    path, model = _trained_model_path(tmp_path)
+    agent = PredictAgent(symbol="TEST", model_path=path)
+    assert agent.ml_model is not None
+
+    df = _indicator_frame(500, seed=8)
+    latest = TechnicalFeatureEngineer().build_latest_features(df)
+    result = asyncio.run(agent.predict(latest))
+
+    # Same probability as the sklearn wrapper on a one-row DataFrame
+    clean = agent._preprocess_features(latest)
+    frame = pd.DataFrame([[clean.get(n, 0.0) for n in model.feature_names]], columns=model.feature_names)
+    expected = float(model.model.predict_proba(frame)[0, 1])
+    assert result.model_type == 'ml_lightgbm'
+    assert result.probability_up == pytest.approx(round(expected, 4))
+    assert result.factors == model.get_top_factors(5) and len(result.factors) == 5
+
+    # Structure instead of wall clock: the booster gets a (1, n_features) array, no DataFrame is built
+    booster = agent.ml_model.model.booster_
+    calls, frames = [], []
+    predict, init = booster.predict, pd.DataFrame.__init__
+
+    def spy_predict(X, *args, **kwargs):
+        calls.append(X)
+        return predict(X, *args, **kwargs)
+
+    def spy_init(self, *args, **kwargs):
+        frames.append(1)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(booster, 'predict', spy_predict)
+    monkeypatch.setattr(pd.DataFrame, '__init__', spy_init)
+    ml = asyncio.run(agent._predict_with_ml(latest))
+    monkeypatch.undo()
+
+    assert ml.probability_up == result.probability_up
+    assert frames == []
+    assert len(calls) == 1
+    assert isinstance(calls[0], np.ndarray) and calls[0].shape == (1, len(model.feature_names))
@@ -0,0 +1,105 @@
+"""
+Tests for the async LLM client path (BaseLLMClient.async_chat)
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import pytest
+
+from src.llm import LLMConfig, create_client, get_async_http_client
+from src.llm import base as llm_base
+
+
+def _openai_payload(content="ok"):
+    return {
+        "model": "deepseek-chat",
+        "choices": [{"message": {"content": content}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+    }
+
+
+def _install_transport(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_base, "get_async_http_client", lambda: client)
+    return client
+
+
+def _make_client(max_retries=3):
+    return create_client("deepseek", LLMConfig(api_key="sk-test", max_retries=max_retries))
+
+
+def test_async_chat_retries_without_blocking_loop(monkeypatch):
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        if calls["n"] < 3:
+            return httpx.Response(503, json={})
+        return httpx.Response(200, json=_openai_payload("hello"))
+
+    _install_transport(monkeypatch, handler)
+    monkeypatch.setattr(llm_base, "backoff_delay", lambda attempt: 0.05)
+    client = _make_client()
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick_task = asyncio.create_task(ticker())
+        response = await client.async_chat("sys", "user")
+        tick_task.cancel()
+        return response, ticks
+
+    response, ticks = asyncio.run(scenario())
+
+    assert response.content == "hello"
+    assert calls["n"] == 3
+    # The loop kept running other tasks while the client backed off
+    assert ticks >= 5
+
+
+def test_async_chat_raises_non_retryable_status(monkeypatch):
+    _install_transport(monkeypatch, lambda request: httpx.Response(401, json={}))
+    client = _make_client()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(client.async_chat("sys", "user"))
+
+
+def test_async_chat_cancellation_propagates(monkeypatch):
+    _install_transport(monkeypatch, lambda request: httpx.Response(503, json={}))
+    monkeypatch.setattr(llm_base, "backoff_delay", lambda attempt: 10.0)
+    client = _make_client(max_retries=5)
+
+    async def scenario():
+        task = asyncio.create_task(client.async_chat("sys", "user"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
+
+
+def test_shared_pool_is_reused_per_loop():
+    async def scenario():
+        return get_async_http_client() is get_async_http_client()
+
+    assert asyncio.run(scenario())
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    delays = [llm_base.backoff_delay(3) for _ in range(50)]
+    assert all(4.0 <= d <= 8.0 for d in delays)
+    assert len(set(delays)) > 1
+    assert llm_base.backoff_delay(20) <= llm_base.MAX_BACKOFF_SECONDS
@@ -0,0 +1,118 @@
+"""
+Tests for the content-addressed LLM response cache
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from src.llm import LLMConfig, LLMResponse, CachedLLMClient, LLMCacheMiss, LLMResponseCache, create_client
+from src.llm import metrics as llm_metrics
+
+
+class _CountingClient:
+    """Minimal stand-in for a provider client that counts real calls."""
+
+    PROVIDER = "deepseek"
+
+    def __init__(self, model="cache-test-model"):
+        inner = create_client("deepseek", LLMConfig(api_key="sk-test", model=model))
+        self.config = inner.config
+        self.model = inner.model
+        self.calls = 0
+
+    def chat_messages(self, messages, **kwargs):
+        self.calls += 1
+        return LLMResponse(content=f"answer #{self.calls}", model=self.model, provider=self.PROVIDER)
+
+    async def async_chat_messages(self, messages, **kwargs):
+        return self.chat_messages(messages, **kwargs)
+
+
+def test_cache_hit_skips_llm_and_is_deterministic(tmp_path):
+    inner = _CountingClient()
+    client = CachedLLMClient(inner, LLMResponseCache(cache_dir=str(tmp_path)))
+
+    first = client.chat("sys", "user", temperature=0.3)
+    second = client.chat("sys", "user", temperature=0.3)
+    third = asyncio.run(client.async_chat("sys", "user", temperature=0.3))
+
+    assert inner.calls == 1
+    assert first.content == second.content == third.content == "answer #1"
+
+    stats = llm_metrics.snapshot()["models"]["cache-test-model"]
+    assert stats["cache_hits"] == 2
+    assert stats["cache_misses"] == 1
+
+
+def test_cache_key_covers_params_and_prompts(tmp_path):
+    inner = _CountingClient()
+    client = CachedLLMClient(inner, LLMResponseCache(cache_dir=str(tmp_path)))
+
+    client.chat("sys", "user", temperature=0.3)
+    client.chat("sys", "user", temperature=0.7)
+    client.chat("sys", "other user", temperature=0.3)
+    client.chat("other sys", "user", temperature=0.3)
+
+    assert inner.calls == 4
+
+
+def test_replay_only_fails_on_miss(tmp_path):
+    CachedLLMClient(_CountingClient(), LLMResponseCache(cache_dir=str(tmp_path))).chat("sys", "seen")
+
+    inner = _CountingClient()
+    replay = CachedLLMClient(inner, LLMResponseCache(cache_dir=str(tmp_path), mode="replay_only"))
+
+    assert replay.chat("sys", "seen").content == "answer #1"
+    with pytest.raises(LLMCacheMiss):
+        replay.chat("sys", "unseen")
+    assert inner.calls == 0
+
+
+def test_size_based_eviction_drops_least_recently_used(tmp_path):
+    cache = LLMResponseCache(cache_dir=str(tmp_path), max_size_mb=0.01)
+    payload = LLMResponse(content="x" * 2000, model="m", provider="p")
+
+    keys = [f"{i:02d}" + "0" * 62 for i in range(10)]
+    for key in keys:
+        cache.put(key, payload)
+
+    assert cache.get_stats()["size_mb"] <= 0.01
+    assert cache.get(keys[-1]) is not None
+    assert cache.get(keys[0]) is None
+
+
+def test_concurrent_writers_of_one_key_do_not_collide(tmp_path):
+    import threading
+
+    cache = LLMResponseCache(cache_dir=str(tmp_path))
+    errors = []
+
+    def writer(i):
+        try:
+            for n in range(50):
+                cache.put("same-key", LLMResponse(content=f"w{i}-{n}", model="m", provider="p"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert cache.get("same-key").content.endswith("-49")
+    assert list(tmp_path.rglob("*.tmp")) == []
+
+
+def test_overwriting_a_key_counts_only_the_size_difference(tmp_path):
+    cache = LLMResponseCache(cache_dir=str(tmp_path))
+    cache.put("other-key", LLMResponse(content="seed", model="m", provider="p"))
+    for size in (3000, 10, 500, 500):
+        cache.put("same-key", LLMResponse(content="x" * size, model="m", provider="p"))
+        assert cache._size_bytes == cache._scan_size()
@@ -0,0 +1,193 @@
+"""
+Tests for the concurrent multi-symbol scheduler in MultiAgentTradingBot
+"""
+
+import os
+import sys
+import asyncio
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import MultiAgentTradingBot
+from src.server.state import global_state
+
+
+class _Config:
+    def __init__(self, values=None):
+        self.values = values or {}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+def _make_bot(concurrency=3):
+    bot = MultiAgentTradingBot.__new__(MultiAgentTradingBot)
+    bot._current_symbol = "BTCUSDT"
+    bot.config = _Config({'trading.symbol_concurrency': concurrency})
+    return bot
+
+
+def test_symbols_analyzed_concurrently_with_isolated_symbol():
+    bot = _make_bot(concurrency=3)
+    seen = {}
+
+    async def fake_cycle(analyze_only=False):
+        symbol = bot.current_symbol
+        await asyncio.sleep(0.2)
+        # Another pipeline ran in between; our symbol must be unchanged
+        seen[symbol] = bot.current_symbol
+        return {'status': 'wait', 'action': 'wait', 'symbol': bot.current_symbol}
+
+    bot.run_trading_cycle = fake_cycle
+    symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+
+    started = time.perf_counter()
+    results = asyncio.run(bot._analyze_symbols_concurrently(symbols))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.45
+    assert list(results) == symbols
+    assert all(results[s]['symbol'] == s for s in symbols)
+    assert seen == {s: s for s in symbols}
+    # Outside the scheduler the bot-level symbol is untouched
+    assert bot.current_symbol == "BTCUSDT"
+
+
+def test_concurrency_cap_and_error_isolation():
+    bot = _make_bot(concurrency=2)
+    active = {'now': 0, 'peak': 0}
+
+    async def fake_cycle(analyze_only=False):
+        active['now'] += 1
+        active['peak'] = max(active['peak'], active['now'])
+        try:
+            await asyncio.sleep(0.05)
+            if bot.current_symbol == "BADUSDT":
+                raise RuntimeError("boom")
+            return {'status': 'wait'}
+        finally:
+            active['now'] -= 1
+
+    bot.run_trading_cycle = fake_cycle
+    results = asyncio.run(bot._analyze_symbols_concurrently(["A", "BADUSDT", "C", "D"]))
+
+    assert active['peak'] == 2
+    assert results["BADUSDT"]['status'] == 'error'
+    assert results["A"]['status'] == 'wait'
+
+
+def test_agent_messages_tagged_with_task_symbol():
+    bot = _make_bot()
+    global_state.agent_messages = []
+
+    async def fake_cycle(analyze_only=False):
+        await asyncio.sleep(0)
+        global_state.add_agent_message("scheduler_test", f"hello {bot.current_symbol}")
+        return {'status': 'wait'}
+
+    bot.run_trading_cycle = fake_cycle
+    asyncio.run(bot._analyze_symbols_concurrently(["XUSDT", "YUSDT"]))
+
+    tagged = {m['content']: m['symbol'] for m in global_state.agent_messages if m['agent'] == 'scheduler_test'}
+    assert tagged == {"hello XUSDT": "XUSDT", "hello YUSDT": "YUSDT"}
+
+
+def test_fan_out_leaves_shared_current_symbol_to_the_scheduler():
+    bot = _make_bot()
+    global_state.current_symbol = "BTCUSDT"
+    observed = []
+
+    async def fake_cycle(analyze_only=False):
+        context = bot._begin_cycle_context()
+        await asyncio.sleep(0.01)
+        observed.append((context.symbol, global_state.current_symbol))
+        return {'status': 'wait'}
+
+    bot._emit_runtime_event = lambda **kwargs: None
+    bot.run_trading_cycle = fake_cycle
+    asyncio.run(bot._analyze_symbols_concurrently(["XUSDT", "YUSDT", "ZUSDT"]))
+
+    assert sorted(observed) == [("XUSDT", "BTCUSDT"), ("YUSDT", "BTCUSDT"), ("ZUSDT", "BTCUSDT")]
+    assert global_state.current_symbol == "BTCUSDT"
+
+
+def test_reflection_runs_once_across_concurrent_pipelines():
+    bot = _make_bot()
+    calls = []
+
+    class _Reflection:
+        insight = "ok"
+        raw_response = "{}"
+
+        def to_prompt_text(self):
+            return "reflection"
+
+    class _Agent:
+        reflection_count = 0
+        last_reflected_trade_count = 0
+
+        def should_reflect(self, total_trades):
+            return total_trades - self.last_reflected_trade_count >= 10
+
+        async def generate_reflection(self, trades):
+            calls.append(len(trades))
+            await asyncio.sleep(0.05)
+            self.reflection_count += 1
+            self.last_reflected_trade_count += len(trades)
+            return _Reflection()
+
+    bot.reflection_agent = _Agent()
+    global_state.trade_history = [{'pnl': 1.0}] * 10
+
+    async def fake_cycle(analyze_only=False):
+        res = await bot._reflect_once()
+        return {'status': 'wait', 'reflection': res}
+
+    bot.run_trading_cycle = fake_cycle
+    results = asyncio.run(bot._analyze_symbols_concurrently(["XUSDT", "YUSDT", "ZUSDT"]))
+
+    assert calls == [10]
+    assert bot.reflection_agent.last_reflected_trade_count == 10
+    # Every pipeline sees the shared result
+    assert all(r['reflection'] is not None for r in results.values())
+    assert asyncio.run(bot._reflect_once()) is None
+    global_state.trade_history = []
+
+
+def test_agent_status_fields_kept_per_symbol():
+    bot = _make_bot()
+    global_state.current_symbol = "BTCUSDT"
+    seen = {}
+
+    async def fake_cycle(analyze_only=False):
+        symbol = bot.current_symbol
+        global_state.prophet_probability = {"XUSDT": 0.1, "YUSDT": 0.9}[symbol]
+        global_state.four_layer_result = {'symbol': symbol}
+        global_state.guardian_status = f"PASSED {symbol}"
+        await asyncio.sleep(0.01)
+        seen[symbol] = (global_state.prophet_probability, global_state.four_layer_result['symbol'],
+                        global_state.guardian_status)
+        return {'status': 'wait'}
+
+    bot.run_trading_cycle = fake_cycle
+    asyncio.run(bot._analyze_symbols_concurrently(["XUSDT", "YUSDT"]))
+
+    assert seen == {"XUSDT": (0.1, "XUSDT", "PASSED XUSDT"), "YUSDT": (0.9, "YUSDT", "PASSED YUSDT")}
+    # Outside the pipelines the dashboard reads the fields of current_symbol
+    assert global_state.guardian_status == "Standing By"
+    global_state.current_symbol = "YUSDT"
+    assert global_state.prophet_probability == 0.9
+    assert global_state.four_layer_result == {'symbol': "YUSDT"}
+    global_state.current_symbol = "BTCUSDT"
+
+
+def test_cycle_focus_symbol():
+    class _Trade:
+        def __init__(self, symbol, confidence):
+            self.symbol, self.confidence = symbol, confidence
+
+    bot = _make_bot()
+    assert bot._cycle_focus_symbol(["A", "B"], [_Trade("A", 60.0), _Trade("B", 80.0)]) == "B"
+    assert bot._cycle_focus_symbol(["BTCUSDT", "B"], []) == "BTCUSDT"
+    assert bot._cycle_focus_symbol(["A", "B"], []) == "A"
@@ -0,0 +1,151 @@
+"""
+Tests for the process-parallel ParameterSweep (grid / random / successive halving)
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.data_replay import DataCache
+from src.backtest.engine import BacktestConfig
+from src.backtest.storage import BacktestStorage
+from src.backtest.sweep import ParameterSweep
+
+SPACE = {
+    'stop_loss_pct': [0.5, 1.0, 2.0],
+    'take_profit_pct': [1.0, 3.0],
+}
+
+
+def _frame(freq, seed=0):
+    index = pd.date_range("2024-03-05", "2024-03-12", freq=freq, inclusive="left")
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.choice([-0.002, 0.002], size=len(index) // 48 + 1), 48)[:len(index)]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.004, len(index))))
+    return pd.DataFrame(
+        {
+            'open': np.concatenate([[close[0]], close[:-1]]),
+            'high': close * 1.003,
+            'low': close * 0.997,
+            'close': close,
+            'volume': rng.uniform(100, 1000, len(index)),
+        },
+        index=index,
+    )
+
+
+def _cache():
+    return DataCache(
+        symbol="AAAUSDT",
+        df_5m=_frame("5min"),
+        df_15m=_frame("15min"),
+        df_1h=_frame("1h"),
+        start_date=None,
+        end_date=None,
+    )
+
+
+def _base_config():
+    return BacktestConfig(
+        symbol="AAAUSDT",
+        start_date="2024-03-10 00:00",
+        end_date="2024-03-11 00:00",
+        step=12,
+        strategy_mode="technical",
+    )
+
+
+def _sweep(space=SPACE, **kwargs):
+    kwargs.setdefault('data_cache', _cache())
+    return ParameterSweep(_base_config(), space, **kwargs)
+
+
+def _summary(trials):
+    return [(t.params, t.metrics['total_return'], t.metrics['total_trades']) for t in trials]
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError):
+        ParameterSweep(_base_config(), {'not_a_field': [1, 2]})
+
+
+def test_parallel_grid_matches_sequential():
+    sequential = asyncio.run(_sweep(workers=1).grid())
+    parallel = asyncio.run(_sweep(workers=2).grid())
+
+    assert len(sequential) == 6
+    assert all(t.success for t in sequential)
+    assert _summary(parallel) == _summary(sequential)
+    assert any(t.metrics['total_trades'] > 0 for t in sequential)
+
+
+def test_random_search_is_seeded():
+    space = {'stop_loss_pct': (0.5, 3.0), 'take_profit_pct': [1.0, 2.0, 4.0]}
+    first = asyncio.run(_sweep(space, workers=1).random(n_trials=3, seed=5))
+    second = asyncio.run(_sweep(space, workers=1).random(n_trials=3, seed=5))
+
+    assert _summary(first) == _summary(second)
+    assert all(0.5 <= t.params['stop_loss_pct'] <= 3.0 for t in first)
+
+
+def test_successive_halving_promotes_best_to_full_window():
+    sweep = _sweep({'stop_loss_pct': [0.5, 1.0, 1.5, 2.0], 'take_profit_pct': [1.0, 3.0]}, workers=1)
+    final = asyncio.run(sweep.successive_halving(n_trials=9, eta=3, seed=1))
+
+    assert 1 <= len(final) <= 3
+    assert all(t.budget == 1.0 for t in final)
+    # 9 trials on 1/9 of the window, 3 on 1/3, 1 on the full window
+    assert sweep._next_trial_id == 13
+
+
+def test_trials_are_batched_into_storage_and_session(tmp_path):
+    storage = BacktestStorage(db_path=str(tmp_path / "sweep.db"))
+    sweep = _sweep(workers=1, storage=storage, batch_size=4, objective="total_return")
+    trials = asyncio.run(sweep.grid())
+
+    stored = storage.list_backtests(symbol="AAAUSDT")
+    assert len(stored) == len(trials)
+
+    best = trials[0]
+    record = storage.get_backtest(best.run_id)
+    assert record['config']['stop_loss_pct'] == best.params['stop_loss_pct']
+    assert float(record['metrics']['total_return']) == pytest.approx(best.metrics['total_return'])
+
+    session = storage.get_optimization_session(sweep.session_id)
+    assert session['status'] == 'completed'
+    assert session['best_run_id'] == best.run_id
+    assert session['optimization_target'] == 'total_return'
+    assert session['parameter_space']['mode'] == 'grid'
+
+
+def test_equity_curves_and_failed_trials_are_stored(tmp_path, monkeypatch):
+    import src.backtest.sweep as sweep_module
+
+    run = sweep_module.BacktestEngine.run
+
+    async def flaky_run(engine, *args, **kwargs):
+        if engine.config.stop_loss_pct == 2.0:
+            raise RuntimeError("bad params")
+        return await run(engine, *args, **kwargs)
+
+    monkeypatch.setattr(sweep_module.BacktestEngine, 'run', flaky_run)
+    storage = BacktestStorage(db_path=str(tmp_path / "sweep.db"))
+    sweep = _sweep(workers=1, storage=storage, batch_size=4, objective="total_return")
+    trials = asyncio.run(sweep.grid())
+
+    failed = [t for t in trials if not t.success]
+    assert len(failed) == 2 and len(storage.list_backtests(symbol="AAAUSDT")) == len(trials)
+    record = storage.get_backtest(failed[0].run_id)
+    assert record['config']['status'] == 'failed'
+    assert record['config']['error'] == "RuntimeError: bad params"
+
+    best = trials[0]
+    equity = storage.get_backtest(best.run_id)['equity_curve']
+    assert len(equity) > 1 and all(point['total_equity'] > 0 for point in equity)
+    assert storage.get_backtest(best.run_id)['config']['status'] == 'completed'
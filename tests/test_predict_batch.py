@@ -0,0 +1,179 @@
+"""
+Tests for batched multi-symbol PredictAgent inference and shared model instances
+"""
+
+import os
+import sys
+import asyncio
+import shutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agents.predict_agent import PredictAgent, PredictBatcher
+from src.data.processor import MarketDataProcessor
+from src.features.technical_features import TechnicalFeatureEngineer
+
+
+def _indicator_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 3000 + rng.standard_normal(n).cumsum() * 4
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    df = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.uniform(0.5, 6, n),
+        'low': np.minimum(open_, close) - rng.uniform(0.5, 6, n),
+        'close': close,
+        'volume': rng.uniform(10, 500, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="15min"))
+    processor = MarketDataProcessor.__new__(MarketDataProcessor)
+    return processor._calculate_indicators(df)
+
+
+def _trained_model_path(tmp_path):
+    pytest.importorskip("lightgbm")
+    from src.models.prophet_model import ProphetMLModel
+
+    features = TechnicalFeatureEngineer().build_features(_indicator_frame(3000, seed=4))
+    features = features.select_dtypes(include=[np.number]).dropna()
+    y = (features['close'].shift(-2) > features['close']).astype(int)
+    split = int(len(features) * 0.8)
+    model = ProphetMLModel(model_path=str(tmp_path / "missing.pkl"))
+    model.train(features.iloc[:split], y.iloc[:split], features.iloc[split:], y.iloc[split:],
+                params={'n_estimators': 60})
+    path = str(tmp_path / "prophet_lgb_SHARED.pkl")
+    model.save(path)
+    return path, model
+
+
+def _latest(seed):
+    return TechnicalFeatureEngineer().build_latest_features(_indicator_frame(300, seed=seed))
+
+
+def _count_model_calls(model):
+    calls = []
+    original = model.predict_up_proba
+
+    def counting(X):
+        calls.append(X.shape)
+        return original(X)
+
+    model.predict_up_proba = counting
+    return calls
+
+
+def test_agents_share_model_instance_and_reload_after_retrain(tmp_path):
+    from src.models.prophet_model import get_shared_model
+
+    path, _ = _trained_model_path(tmp_path)
+    btc = PredictAgent(symbol="BTCUSDT", model_path=path)
+    eth = PredictAgent(symbol="ETHUSDT", model_path=path)
+    assert btc.ml_model is eth.ml_model
+    assert get_shared_model(path) is btc.ml_model
+
+    # Retrain overwrites the file: the next load gets a fresh instance
+    copy = str(tmp_path / "copy.pkl")
+    shutil.copy(path, copy)
+    os.replace(copy, path)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    eth.load_ml_model(path)
+    assert eth.ml_model is not btc.ml_model
+
+
+def test_predict_batch_runs_one_model_call_and_matches_single(tmp_path):
+    path, _ = _trained_model_path(tmp_path)
+    agents = [PredictAgent(symbol=s, model_path=path) for s in ("BTCUSDT", "ETHUSDT", "SOLUSDT")]
+    agents.append(PredictAgent(symbol="BNBUSDT", horizon='1h', model_path=path))
+    rules_agent = PredictAgent(symbol="XRPUSDT", model_path=str(tmp_path / "none.pkl"))
+    features = [_latest(seed) for seed in range(len(agents) + 1)]
+
+    single = [asyncio.run(a.predict(f)) for a, f in zip(agents + [rules_agent], features)]
+
+    calls = _count_model_calls(agents[0].ml_model)
+    batch = asyncio.run(PredictAgent.predict_batch(list(zip(agents + [rules_agent], features))))
+
+    assert calls == [(4, len(agents[0].ml_model.feature_names))]
+    assert [r.probability_up for r in batch] == [r.probability_up for r in single]
+    assert [r.model_type for r in batch] == ['ml_lightgbm'] * 4 + ['rule_based']
+    assert batch[3].horizon == '1h'
+    assert all(len(a.history) == 2 for a in agents + [rules_agent])
+
+
+def test_batcher_coalesces_concurrent_symbol_predictions(tmp_path):
+    path, _ = _trained_model_path(tmp_path)
+    agents = [PredictAgent(symbol=f"S{i}USDT", model_path=path) for i in range(6)]
+    features = [_latest(seed) for seed in range(6)]
+    expected = [asyncio.run(a.predict(f)).probability_up for a, f in zip(agents, features)]
+    calls = _count_model_calls(agents[0].ml_model)
+
+    async def run(batcher):
+        return await asyncio.gather(*(batcher.predict(a, f) for a, f in zip(agents, features)))
+
+    batcher = PredictBatcher(max_delay=0.01)
+    results = asyncio.run(run(batcher))
+    assert [r.probability_up for r in results] == expected
+    assert batcher.batches == 1 and len(calls) == 1
+
+    # A full batch is dispatched immediately
+    calls.clear()
+    batcher = PredictBatcher(max_delay=10, max_batch=3)
+    results = asyncio.run(asyncio.wait_for(run(batcher), timeout=2))
+    assert [r.probability_up for r in results] == expected
+    assert batcher.batches == 2 and [shape[0] for shape in calls] == [3, 3]
+
+
+def test_batcher_holds_batch_tasks_and_cancels_waiters(monkeypatch):
+    agents = [PredictAgent.__new__(PredictAgent) for _ in range(2)]
+    shared = object()
+    for agent in agents:
+        agent.ml_model = shared
+
+    async def never(requests):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(PredictAgent, 'predict_batch', staticmethod(never))
+    batcher = PredictBatcher(max_delay=0.001)
+
+    async def run():
+        calls = [asyncio.ensure_future(batcher.predict(a, {})) for a in agents]
+        await asyncio.sleep(0.05)
+        # The in-flight batch is referenced by the batcher, not left to the GC
+        [task] = batcher._tasks
+        task.cancel()
+        # A cancelled batch cancels its callers instead of leaving them waiting forever
+        return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), timeout=2)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert batcher._tasks == set()
+
+
+def test_batcher_does_not_wait_when_requests_cannot_merge(tmp_path):
+    path, _ = _trained_model_path(tmp_path)
+    # Production layout: one model file per symbol, so no two agents share a model instance
+    own = []
+    for i in range(3):
+        own_path = str(tmp_path / f"prophet_lgb_S{i}USDT.pkl")
+        shutil.copy(path, own_path)
+        own.append(PredictAgent(symbol=f"S{i}USDT", model_path=own_path))
+    shared = [PredictAgent(symbol=f"T{i}USDT", model_path=path) for i in range(2)]
+    rules = PredictAgent(symbol="RULEUSDT", model_path=str(tmp_path / "none.pkl"))
+    agents = own + shared + [rules]
+    features = [_latest(seed) for seed in range(len(agents))]
+    expected = [asyncio.run(a.predict(f)).probability_up for a, f in zip(agents, features)]
+
+    async def run(batcher, subset):
+        return await asyncio.gather(*(batcher.predict(agents[i], features[i]) for i in subset))
+
+    # max_delay is long: only the two agents sharing a model wait for the window
+    batcher = PredictBatcher(max_delay=0.3, peers=lambda: agents)
+    results = asyncio.run(asyncio.wait_for(run(batcher, [0, 1, 2, 5]), timeout=0.2))
+    assert [r.probability_up for r in results] == [expected[i] for i in (0, 1, 2, 5)]
+    assert batcher.batches == 0
+
+    results = asyncio.run(run(batcher, [3, 4]))
+    assert [r.probability_up for r in results] == expected[3:5]
+    assert batcher.batches == 1
@@ -0,0 +1,136 @@
+"""
+Tests for incremental RunningStats and throttled backtest progress
+"""
+
+import os
+import sys
+import asyncio
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.data_replay import DataCache
+from src.backtest.engine import BacktestConfig, BacktestEngine
+from src.backtest.metrics import PerformanceMetrics
+from src.backtest.portfolio import Side, Trade
+from src.backtest.running_stats import RunningStats
+
+
+def _curve_and_trades(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=n, freq="6h")
+    equity = 10000 * np.cumprod(1 + rng.normal(0.0005, 0.01, n))
+    curve = pd.DataFrame({'total_equity': equity, 'drawdown': 0.0, 'drawdown_pct': 0.0}, index=index)
+
+    trades = []
+    for k in range(60):
+        ts = index[k * 6].to_pydatetime()
+        side = Side.LONG if k % 3 else Side.SHORT
+        trades.append(Trade(k * 2 + 1, "BTCUSDT", side, "open", 0.1, 100.0, ts))
+        pnl = float(rng.normal(5, 40)) if k != 7 else 0.0
+        action = "liquidation" if k == 11 else "close"
+        trades.append(Trade(k * 2 + 2, "BTCUSDT", side, action, 0.1, 100.0, ts, pnl=pnl,
+                            holding_time=float(rng.uniform(1, 30))))
+    return curve, trades
+
+
+def _stats_for(curve, trades):
+    stats = RunningStats()
+    for ts, equity in curve['total_equity'].items():
+        stats.record_equity(ts.to_pydatetime(), float(equity))
+    for trade in trades:
+        stats.record_trade(trade)
+    return stats
+
+
+def _assert_same(fast, slow):
+    fast, slow = asdict(fast), asdict(slow)
+    assert fast.keys() == slow.keys()
+    for key in fast:
+        if isinstance(slow[key], str):
+            assert fast[key] == slow[key], key
+        else:
+            assert fast[key] == pytest.approx(slow[key], rel=1e-9, nan_ok=True), key
+
+
+def test_finalize_matches_full_recompute():
+    curve, trades = _curve_and_trades()
+    stats = _stats_for(curve, trades)
+
+    slow = PerformanceMetrics.calculate(curve, trades, 10000)
+    fast = PerformanceMetrics.calculate(curve, trades, 10000, running_stats=stats)
+
+    assert slow.max_drawdown > 0 and slow.max_drawdown_duration > 0
+    assert slow.sortino_ratio != 0 and slow.winning_trades > 0 and slow.losing_trades > 0
+    _assert_same(fast, slow)
+
+
+def test_unrecovered_drawdown_and_short_curves():
+    index = pd.date_range("2024-01-01", periods=6, freq="D")
+    for values in ([10000.0], [10000.0, 9000.0], [10000, 11000, 9000, 10500, 10999, 10000]):
+        curve = pd.DataFrame({'total_equity': values}, index=index[:len(values)])
+        stats = _stats_for(curve, [])
+        _assert_same(PerformanceMetrics.calculate(curve, [], 10000, running_stats=stats),
+                     PerformanceMetrics.calculate(curve, [], 10000))
+
+
+def test_inconsistent_stats_fall_back_to_full_recompute():
+    curve, trades = _curve_and_trades()
+    stats = _stats_for(curve.iloc[:-5], trades)
+
+    fast = PerformanceMetrics.calculate(curve, trades, 10000, running_stats=stats)
+    _assert_same(fast, PerformanceMetrics.calculate(curve, trades, 10000))
+
+
+def _frame(freq, seed=0):
+    index = pd.date_range("2024-03-05", "2024-03-12", freq=freq, inclusive="left")
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.choice([-0.002, 0.002], size=len(index) // 48 + 1), 48)[:len(index)]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.004, len(index))))
+    return pd.DataFrame(
+        {
+            'open': np.concatenate([[close[0]], close[:-1]]),
+            'high': close * 1.003,
+            'low': close * 0.997,
+            'close': close,
+            'volume': rng.uniform(100, 1000, len(index)),
+        },
+        index=index,
+    )
+
+
+def _run(interval):
+    cache = DataCache(symbol="AAAUSDT", df_5m=_frame("5min"), df_15m=_frame("15min"), df_1h=_frame("1h"),
+                      start_date=None, end_date=None)
+    config = BacktestConfig(symbol="AAAUSDT", start_date="2024-03-10 00:00", end_date="2024-03-11 00:00",
+                            step=3, strategy_mode="technical", progress_interval_sec=interval)
+    engine = BacktestEngine(config, data_cache=cache)
+    updates = []
+    result = asyncio.run(engine.run(progress_callback=updates.append))
+    return engine, result, updates
+
+
+def test_engine_progress_is_throttled_and_metrics_use_stats():
+    engine, result, every_step = _run(0.0)
+    _, throttled_result, throttled = _run(3600.0)
+
+    assert len(every_step) == len(engine.decisions)
+    # First step and the final step only
+    assert [u['current_timepoint'] for u in throttled] == [1, every_step[-1]['current_timepoint']]
+    assert throttled[-1]['progress'] == pytest.approx(100.0)
+    assert throttled[-1]['metrics'] == every_step[-1]['metrics']
+
+    trades = engine.portfolio.trades
+    assert engine.portfolio.stats.trade_count == len(trades) > 0
+    # The last progress update is emitted before the end-of-backtest close
+    seen = [t for t in trades if t.close_reason != 'backtest_end']
+    wins = sum(1 for t in seen if t.pnl > 0 and t.action == 'close')
+    assert every_step[-1]['metrics']['total_trades'] == len(seen)
+    assert every_step[-1]['metrics']['win_rate'] == pytest.approx(wins / len(seen) * 100)
+
+    _assert_same(result.metrics, PerformanceMetrics.calculate(result.equity_curve, result.trades, 10000.0))
+    assert throttled_result.metrics == result.metrics
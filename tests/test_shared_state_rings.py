@@ -0,0 +1,134 @@
+"""
+Tests for the SharedState ring buffers, ingest-time log classification and lock-free dashboard reads
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.server.app as server
+import src.server.state as state_module
+from src.server.log_filter import filter_simplified_logs
+from src.server.state import SharedState, global_state
+
+
+def test_rings_keep_fixed_capacity_and_classify_logs_once(monkeypatch):
+    calls = []
+    simplify = state_module.simplify_log_line
+    monkeypatch.setattr(state_module, 'simplify_log_line', lambda line: calls.append(line) or simplify(line))
+
+    state = SharedState()
+    lines = [f"[🚀 EXECUTOR] order {i}" if i % 3 == 0 else f"[debug] line {i}" for i in range(2000)]
+    for line in lines:
+        state.add_log(line)
+    for i in range(700):
+        state.add_agent_event({'type': 'tick', 'n': i})
+        state.update_account(1000.0 + i, 0.0, 0.0, 0.0)
+
+    assert list(state.recent_logs) == lines[-500:]
+    assert list(state.simplified_logs) == filter_simplified_logs(lines)[-200:]
+    assert len(calls) == len(lines)
+    assert len(state.agent_events) == 500 and state.agent_events[0]['n'] == 200
+    assert len(state.equity_history) <= 200
+
+    version, sections, _ = state.history_snapshot()
+    assert version == state.feed.version
+    assert sections['recent_logs'] == lines[-200:]
+    assert sections['simplified_logs'] == list(state.simplified_logs)
+    # Reading the dashboard sections does not classify again
+    assert len(calls) == len(lines)
+
+
+def test_clear_and_drop_replace_ring_contents():
+    state = SharedState()
+    state.add_agent_message('oracle', 'btc', symbol='BTCUSDT')
+    state.add_agent_message('oracle', 'eth', symbol='ETHUSDT')
+    state.drop_agent_messages('BTCUSDT')
+    assert [m['content'] for m in state.agent_messages] == ['eth']
+    assert state.agent_messages.maxlen == 100
+
+    state.add_log("[📊 SYSTEM] boot")
+    state.clear_init_logs()
+    assert len(state.recent_logs) == 1 and len(state.simplified_logs) == 1
+    assert state.recent_logs.maxlen == 500
+    [event] = state.feed.since(state.feed.version - 1)
+    assert event.path == ('logs_simplified',) and event.op == 'set'
+
+
+def test_dashboard_reads_do_not_wait_for_the_state_lock():
+    global_state.add_log("[📊 SYSTEM] before")
+    held = threading.Event()
+    release = threading.Event()
+
+    def trading_loop():
+        # A long critical section on the writer side
+        with global_state.locked():
+            held.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=trading_loop)
+    writer.start()
+    held.wait(5)
+    try:
+        t0 = time.perf_counter()
+        version, _, payload = server._status_snapshot()
+        global_state.add_log("[📊 SYSTEM] during")
+        elapsed = time.perf_counter() - t0
+    finally:
+        release.set()
+        writer.join()
+
+    assert elapsed < 1.0, elapsed
+    assert payload['logs'][-1].endswith("before") and global_state.feed.version > version
+
+
+def test_snapshot_version_matches_ring_contents_under_concurrent_writes():
+    stop = threading.Event()
+
+    def writer(tag):
+        i = 0
+        while not stop.is_set():
+            global_state.add_log(f"[🚀 EXECUTOR] {tag} {i}")
+            i += 1
+            time.sleep(0)
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in ('a', 'b')]
+    for t in threads:
+        t.start()
+    checked = 0
+    try:
+        for _ in range(50):
+            v1, first, _ = global_state.history_snapshot()
+            v2, second, _ = global_state.history_snapshot()
+            events = global_state.feed.since(v1)
+            if events is None:
+                continue
+            # Snapshot at v1 + the events in (v1, v2] == snapshot at v2: nothing lost or duplicated
+            logs = first['recent_logs']
+            for event in events:
+                if event.version <= v2 and event.path == ('logs',):
+                    logs = (logs + [event.value])[-200:]
+            assert logs == second['recent_logs']
+            checked += 1
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    assert checked > 0
+
+
+def test_snapshot_read_retries_when_a_dict_is_resized():
+    state = SharedState()
+    attempts = []
+
+    def reader():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("dictionary changed size during iteration")
+        return 'ok'
+
+    assert state.snapshot_read(reader) == 'ok'
+    assert len(attempts) == 3
@@ -0,0 +1,118 @@
+"""
+Parity and speed tests for whole-run quant signal precomputation
+"""
+
+import os
+import sys
+import asyncio
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.agents.quant_analyst_agent import QuantAnalystAgent
+from src.backtest.data_replay import DataCache, DataReplayAgent
+from src.backtest.engine import BacktestConfig, BacktestEngine
+from src.backtest.signal_precompute import PrecomputedQuantSignals
+
+WINDOW = ("2024-03-10 00:00", "2024-03-10 12:00")
+
+
+def _frame(freq, seed=0):
+    index = pd.date_range("2024-03-05", "2024-03-12", freq=freq, inclusive="left")
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.choice([-0.002, 0.002], size=len(index) // 48 + 1), 48)[:len(index)]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.004, len(index))))
+    return pd.DataFrame(
+        {
+            'open': np.concatenate([[close[0]], close[:-1]]),
+            'high': close * 1.003,
+            'low': close * 0.997,
+            'close': close,
+            'volume': rng.uniform(100, 1000, len(index)),
+        },
+        index=index,
+    )
+
+
+def _cache():
+    return DataCache(
+        symbol="AAAUSDT",
+        df_5m=_frame("5min"),
+        df_15m=_frame("15min"),
+        df_1h=_frame("1h"),
+        start_date=None,
+        end_date=None,
+    )
+
+
+def _replay(cache):
+    replay = DataReplayAgent(symbol="AAAUSDT", start_date=WINDOW[0], end_date=WINDOW[1])
+    assert replay.attach_data_cache(cache)
+    return replay
+
+
+def test_precomputed_analysis_matches_per_step_and_is_faster():
+    cache = _cache()
+    replay = _replay(cache)
+    analyst = QuantAnalystAgent()
+    timestamps = list(replay.iterate_timestamps(step=1))
+    snapshots = [replay.get_snapshot_at(ts) for ts in timestamps]
+
+    t0 = time.perf_counter()
+    signals = PrecomputedQuantSignals.build(cache, analyst, timestamps=timestamps)
+    precomputed = [signals.analysis_at(s) for s in snapshots]
+    precompute_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    per_step = [asyncio.run(analyst.analyze_all_timeframes(s)) for s in snapshots]
+    per_step_time = time.perf_counter() - t0
+
+    assert len(snapshots) == 144
+    for ts, fast, slow in zip(timestamps, precomputed, per_step):
+        assert fast == slow, ts
+    # The lookup path must include non-trivial signals to be a meaningful check
+    assert any(a['trend']['trend_1h_score'] != 0 for a in precomputed)
+    assert any(a['oscillator']['osc_5m_score'] != 0 for a in precomputed)
+    assert precompute_time < per_step_time / 3, (precompute_time, per_step_time)
+
+
+def test_mismatched_snapshot_falls_back():
+    cache = _cache()
+    replay = _replay(cache)
+    signals = PrecomputedQuantSignals(data_cache=cache, quant_analyst=QuantAnalystAgent())
+    ts = next(replay.iterate_timestamps(step=1))
+
+    assert signals.analysis_at(replay.get_snapshot_at(ts)) is not None
+    # A different lookback produces different windows: never served from the table
+    assert signals.analysis_at(replay.get_snapshot_at(ts, lookback=500)) is None
+
+
+def _agent_config(**overrides):
+    return BacktestConfig(
+        symbol="AAAUSDT",
+        start_date=WINDOW[0],
+        end_date=WINDOW[1],
+        step=3,
+        strategy_mode="agent",
+        **overrides,
+    )
+
+
+def test_engine_decisions_identical_with_precompute():
+    fast = asyncio.run(BacktestEngine(_agent_config(), data_cache=_cache()).run())
+    slow = asyncio.run(BacktestEngine(_agent_config(precompute_signals=False), data_cache=_cache()).run())
+
+    def summary(result):
+        return [(d['action'], d.get('confidence'), d.get('weighted_score')) for d in result.decisions]
+
+    assert summary(fast) == summary(slow)
+    # ATR is rebased from the full-series EWM, so it agrees to floating-point precision
+    np.testing.assert_allclose(
+        [d.get('atr_pct') or 0.0 for d in fast.decisions],
+        [d.get('atr_pct') or 0.0 for d in slow.decisions],
+        rtol=1e-9,
+    )
+    assert [t.to_dict() for t in fast.trades] == [t.to_dict() for t in slow.trades]
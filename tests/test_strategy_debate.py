@@ -0,0 +1,89 @@
+"""
+Tests for the Bull/Bear debate pipeline in StrategyEngine
+"""
+
+import os
+import sys
+import asyncio
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.strategy.llm_engine import StrategyEngine
+
+
+def _make_engine(bull_delay, bear_delay, timeout=2.0, grace=0.1):
+    engine = StrategyEngine.__new__(StrategyEngine)
+    engine.perspective_timeout = timeout
+    engine.perspective_grace = grace
+
+    def bull(text):
+        time.sleep(bull_delay)
+        return {"stance": "SLIGHTLY_BULLISH", "bullish_reasons": "up", "bull_confidence": 60}
+
+    def bear(text):
+        time.sleep(bear_delay)
+        return {"stance": "SLIGHTLY_BEARISH", "bearish_reasons": "down", "bear_confidence": 40}
+
+    async def async_bull(text):
+        await asyncio.sleep(bull_delay)
+        return {"stance": "SLIGHTLY_BULLISH", "bullish_reasons": "up", "bull_confidence": 60}
+
+    async def async_bear(text):
+        await asyncio.sleep(bear_delay)
+        return {"stance": "SLIGHTLY_BEARISH", "bearish_reasons": "down", "bear_confidence": 40}
+
+    engine.get_bull_perspective = bull
+    engine.get_bear_perspective = bear
+    engine.async_get_bull_perspective = async_bull
+    engine.async_get_bear_perspective = async_bear
+    return engine
+
+
+def test_debate_runs_perspectives_concurrently():
+    engine = _make_engine(bull_delay=0.3, bear_delay=0.3, grace=1.0)
+
+    started = time.perf_counter()
+    bull, bear = engine.debate("ctx")
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    assert bull["bull_confidence"] == 60
+    assert bear["bear_confidence"] == 40
+
+
+def test_debate_degrades_to_one_perspective_when_other_is_slow():
+    engine = _make_engine(bull_delay=0.05, bear_delay=1.5, grace=0.1)
+
+    started = time.perf_counter()
+    bull, bear = engine.debate("ctx")
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    assert bull["stance"] == "SLIGHTLY_BULLISH"
+    assert bear["timed_out"] is True
+    assert bear["bear_confidence"] == 50
+
+
+def test_async_debate_concurrent_and_degraded():
+    engine = _make_engine(bull_delay=0.3, bear_delay=0.3, grace=1.0)
+
+    started = time.perf_counter()
+    bull, bear = asyncio.run(engine.async_debate("ctx"))
+    assert time.perf_counter() - started < 0.5
+    assert not bull.get("timed_out") and not bear.get("timed_out")
+
+    slow = _make_engine(bull_delay=5.0, bear_delay=0.05, grace=0.1)
+    started = time.perf_counter()
+    bull, bear = asyncio.run(slow.async_debate("ctx"))
+    assert time.perf_counter() - started < 0.5
+    assert bull["timed_out"] is True
+    assert bear["stance"] == "SLIGHTLY_BEARISH"
+
+
+def test_async_debate_overall_timeout():
+    engine = _make_engine(bull_delay=5.0, bear_delay=5.0, timeout=0.2, grace=1.0)
+
+    bull, bear = asyncio.run(engine.async_debate("ctx"))
+
+    assert bull["timed_out"] and bear["timed_out"]
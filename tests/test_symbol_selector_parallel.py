@@ -0,0 +1,95 @@
+"""
+Tests for the process-pool AUTO3 backtest runner in SymbolSelectorAgent
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.agents.symbol_selector_agent import SymbolSelectorAgent
+from src.backtest.data_replay import DataCache
+
+WINDOW = ("2024-03-10 00:00", "2024-03-11 00:00")
+SYMBOLS = ["AAAUSDT", "BBBUSDT", "CCCUSDT", "DDDUSDT"]
+
+
+def _frame(freq, seed):
+    index = pd.date_range("2024-03-05", "2024-03-12", freq=freq, inclusive="left")
+    rng = np.random.default_rng(seed)
+    # Regime-switching random walk so the technical strategy actually trades
+    drift = np.repeat(rng.choice([-0.002, 0.002], size=len(index) // 48 + 1), 48)[:len(index)]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.004, len(index))))
+    return pd.DataFrame(
+        {
+            'open': np.concatenate([[close[0]], close[:-1]]),
+            'high': close * 1.003,
+            'low': close * 0.997,
+            'close': close,
+            'volume': rng.uniform(100, 1000, len(index)),
+        },
+        index=index,
+    )
+
+
+def _cache(symbol, seed):
+    return DataCache(
+        symbol=symbol,
+        df_5m=_frame("5min", seed),
+        df_15m=_frame("15min", seed),
+        df_1h=_frame("1h", seed),
+        start_date=None,
+        end_date=None,
+    )
+
+
+def _preloaded():
+    return {symbol: _cache(symbol, seed) for seed, symbol in enumerate(SYMBOLS)}
+
+
+def _run_stage(agent, preloaded, symbols=SYMBOLS):
+    return asyncio.run(agent._run_backtests_stage(symbols, step=12, stage_name="test", window=WINDOW, preloaded=preloaded))
+
+
+def test_parallel_ranking_identical_to_sequential(tmp_path):
+    agent = SymbolSelectorAgent(cache_dir=str(tmp_path))
+    agent.early_stop_drawdown_pct = None
+
+    agent.backtest_workers = 1
+    sequential = _run_stage(agent, _preloaded())
+    agent.backtest_workers = 3
+    parallel = _run_stage(agent, _preloaded())
+
+    assert [r['symbol'] for r in sequential] == SYMBOLS
+    assert parallel == sequential
+    assert any(r['trades'] > 0 for r in parallel)
+    ranked_seq = [r['symbol'] for r in agent._rank_symbols(sequential)]
+    ranked_par = [r['symbol'] for r in agent._rank_symbols(parallel)]
+    assert ranked_par == ranked_seq
+
+
+def test_symbols_without_data_are_skipped_before_dispatch(tmp_path):
+    agent = SymbolSelectorAgent(cache_dir=str(tmp_path))
+    agent.backtest_workers = 1
+    preloaded = _preloaded()
+    preloaded["BBBUSDT"] = None
+
+    results = _run_stage(agent, preloaded)
+
+    assert [r['symbol'] for r in results] == ["AAAUSDT", "CCCUSDT", "DDDUSDT"]
+
+
+def test_early_stop_cancels_hopeless_candidates(tmp_path):
+    agent = SymbolSelectorAgent(cache_dir=str(tmp_path))
+    agent.backtest_workers = 1
+    agent.early_stop_drawdown_pct = 0.01
+
+    results = _run_stage(agent, _preloaded())
+
+    # Stopped candidates are still reported (and ranked) with their partial metrics
+    assert [r['symbol'] for r in results] == SYMBOLS
+    assert any(r.get('early_stopped') for r in results)
@@ -0,0 +1,136 @@
+"""
+Tests for the SQLite trade ledger behind DataSaver trade history
+"""
+
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+
+from src.utils.data_saver import DataSaver
+from src.utils.trade_ledger import TRADE_COLUMNS, TradeLedger
+from src.utils.trade_logger import TradeLogger
+
+
+def _trade(symbol, price, action='OPEN_LONG', **extra):
+    return {'open_cycle': 1, 'close_cycle': 0, 'action': action, 'symbol': symbol, 'price': price,
+            'quantity': 0.5, 'cost': price * 0.5, 'exit_price': 0, 'pnl': 0.0, 'confidence': 70,
+            'status': 'SIMULATED', 'cycle': 'c1', **extra}
+
+
+def test_save_update_and_recent_trades(tmp_path):
+    saver = DataSaver(base_dir=str(tmp_path), use_journal=False)
+    saver.save_trade(_trade('BTCUSDT', 60000))
+    saver.save_trade(_trade('ETHUSDT', 3000))
+    saver.save_trade(_trade('BTCUSDT', 61000))
+
+    assert saver.update_trade_exit('BTCUSDT', 62000.0, 50.0, '12:00:00', close_cycle=4)
+    assert not saver.update_trade_exit('SOLUSDT', 150.0, 1.0, '12:00:00')
+
+    recent = saver.get_recent_trades(limit=2)
+    assert [t['symbol'] for t in recent] == ['ETHUSDT', 'BTCUSDT']
+    # The most recent open BTC trade was closed, the older one is still open
+    assert recent[-1]['price'] == 61000 and recent[-1]['exit_price'] == 62000.0
+    assert recent[-1]['status'] == 'CLOSED' and recent[-1]['close_cycle'] == 4
+    assert saver.trade_ledger.open_trade('BTCUSDT')['price'] == 60000
+    assert set(recent[0]) == set(TRADE_COLUMNS)
+
+    summary = saver.get_trade_summary()
+    assert summary['total_trades'] == 3 and summary['open_trades'] == 2 and summary['closed_trades'] == 1
+    assert summary['winning_trades'] == 1 and summary['realized_pnl'] == 50.0
+    assert saver.get_trade_summary('ETHUSDT')['open_trades'] == 1
+
+
+def test_existing_csv_is_imported_and_exported_as_view(tmp_path):
+    saver = DataSaver(base_dir=str(tmp_path), use_journal=False)
+    csv_path = os.path.join(saver.dirs['trades'], 'all_trades.csv')
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    rows = [
+        dict(_trade('BTCUSDT', 50000), record_time='2099-01-01 00:00:00'),
+        dict(_trade('BTCUSDT', 51000), record_time='2099-01-02 00:00:00', exit_price=52000, pnl=-3.5,
+             status='CLOSED'),
+    ]
+    pd.DataFrame([{c: r[c] for c in TRADE_COLUMNS} for r in rows]).to_csv(csv_path, index=False)
+
+    assert saver.trade_ledger.count() == 2
+    assert saver.get_trade_summary()['losing_trades'] == 1
+    assert saver.update_trade_exit('BTCUSDT', 50500.0, 2.0, '00:00:00')
+
+    saver.export_trades_csv()
+    exported = pd.read_csv(csv_path)
+    assert list(exported.columns) == TRADE_COLUMNS
+    assert exported['exit_price'].tolist() == [50500.0, 52000.0]
+    assert exported['status'].tolist() == ['CLOSED', 'CLOSED']
+
+    # Live-data cleanup keeps the ledger
+    saver.clear_live_data()
+    assert os.path.exists(saver.trade_ledger.db_path)
+    assert saver.trade_ledger.count() == 2
+
+
+def test_open_trade_lookup_uses_index_and_stays_fast(tmp_path):
+    ledger = TradeLedger(str(tmp_path / 'trades.db'))
+    symbols = [f'S{i}USDT' for i in range(50)]
+    with ledger._conn:
+        cursor = ledger._conn.cursor()
+        for i in range(50_000):
+            row = ledger._normalize(_trade(symbols[i % 50], 100.0 + i, exit_price=101.0 + i, pnl=1.0))
+            ledger._insert(cursor, row)
+    ledger.append(_trade('S7USDT', 1.0))
+
+    plan = ledger._conn.execute(
+        'EXPLAIN QUERY PLAN SELECT id FROM trades WHERE symbol = ? AND exit_price = 0 ORDER BY id DESC LIMIT 1',
+        ('S7USDT',)).fetchall()
+    assert any('idx_trades_open' in row[-1] for row in plan)
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        ledger.recent(limit=10, since='2000-01-01 00:00:00')
+        ledger.open_trade('S7USDT')
+    elapsed = (time.perf_counter() - t0) / 100
+    assert elapsed < 2e-3, elapsed
+
+    assert ledger.close_open_trade('S7USDT', 2.0, -0.5)
+    summary = ledger.summary()
+    assert summary['total_trades'] == 50_001 and summary['open_trades'] == 0
+    assert summary['realized_pnl'] == pytest.approx(50_000 - 0.5)
+
+
+def test_trade_logger_summary_is_read_once(tmp_path, monkeypatch):
+    logger = TradeLogger(str(tmp_path / 'tracking'))
+    loads = []
+    original = logger._load_summary.__func__
+
+    def counting(self):
+        loads.append(self._summary is None)
+        return original(self)
+
+    monkeypatch.setattr(TradeLogger, '_load_summary', counting)
+    for i, pnl in enumerate([5.0, -2.0, 7.5]):
+        logger._update_summary({
+            'trade_id': f't{i}', 'status': 'CLOSED',
+            'close_info': {'pnl': pnl, 'pnl_pct': pnl / 10, 'close_timestamp': '2026-01-01T00:00:00'},
+        })
+
+    assert loads == [True, False, False]
+    summary = json.load(open(tmp_path / 'tracking' / 'summary' / 'trading_summary.json'))
+    assert summary['total_trades'] == 3 and summary['total_pnl'] == 10.5
+    assert summary['best_trade']['trade_id'] == 't2' and summary['worst_trade']['trade_id'] == 't1'
+
+
+def test_ledger_frame_matches_csv_export(tmp_path):
+    saver = DataSaver(base_dir=str(tmp_path), use_journal=False)
+    saver.save_trade(_trade('BTCUSDT', 60000))
+    saver.save_trade(_trade('ETHUSDT', 3000))
+    saver.update_trade_exit('ETHUSDT', 3100.0, 50.0, '12:00:00', close_cycle=2)
+
+    frame = saver.trade_ledger.to_frame()
+    exported = pd.read_csv(saver.export_trades_csv())
+    assert list(frame.columns) == TRADE_COLUMNS
+    assert frame['status'].tolist() == exported['status'].tolist() == ['SIMULATED', 'CLOSED']
+    assert frame['exit_price'].tolist() == [0.0, 3100.0]
@@ -0,0 +1,132 @@
+"""
+Tests for incremental ProphetAutoTrainer training data (store delta + persisted features)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from src.data.processor import MarketDataProcessor
+from src.features.technical_features import TechnicalFeatureEngineer
+from src.models.training_data import TrainingDataManager
+from src.utils.kline_store import KlineStore
+
+STEP = 300_000
+NOW = int(pd.Timestamp("2024-05-10 12:02").value // 10**6)
+OBV_COLUMNS = ['obv', 'obv_ma20', 'obv_trend']
+
+
+def _candles(start_ms, end_ms):
+    ts = np.arange(start_ms, end_ms + 1, STEP, dtype=np.int64)
+    t = ts / 1e6
+    close = 60000 + 800 * np.sin(t / 97) + 120 * np.sin(t / 7.3) + 30 * np.cos(t / 1.9)
+    open_ = close - 15 * np.sin(t / 2.3)
+    return pd.DataFrame({
+        'timestamp': ts, 'open': open_,
+        'high': np.maximum(open_, close) + 20 + 10 * np.sin(t / 3.1) ** 2,
+        'low': np.minimum(open_, close) - 20 - 10 * np.cos(t / 4.7) ** 2,
+        'close': close, 'volume': 100 + 60 * np.sin(t / 5.9) ** 2,
+        'quote_volume': close * 100, 'trades': np.full(len(ts), 50),
+    })
+
+
+class _FakeDownloader:
+    """Stands in for HistoryDownloader: fills store gaps with deterministic candles"""
+
+    def __init__(self):
+        self.requests = []
+
+    def download_klines_sync(self, symbol, interval, start_ms, end_ms, store=None):
+        for gap_start, gap_end in store.find_gaps(symbol, interval, start_ms, end_ms):
+            self.requests.append((gap_start, gap_end))
+            store.write(symbol, interval, _candles(gap_start, gap_end))
+        return store.read_range(symbol, interval, start_ms, end_ms)
+
+
+def _manager(tmp_path, downloader):
+    store = KlineStore(str(tmp_path / "store"))
+    return TrainingDataManager("BTCUSDT", training_days=3, store=store, downloader=downloader,
+                               root=str(tmp_path / "ml"))
+
+
+def _reference(store, start_ms, end_ms):
+    """Full batch recompute over the whole continuous history"""
+    df = store.read_range("BTCUSDT", "5m", start_ms, end_ms)
+    processor = MarketDataProcessor.__new__(MarketDataProcessor)
+    return TechnicalFeatureEngineer().build_features(processor._calculate_indicators(df.copy()))
+
+
+def test_retrain_fetches_delta_and_recomputes_only_new_rows(tmp_path, monkeypatch):
+    downloader = _FakeDownloader()
+    manager = _manager(tmp_path, downloader)
+
+    first = manager.refresh(NOW)
+    assert len(first) == 3 * 288
+    assert first.index[-1] == pd.Timestamp("2024-05-10 11:55")
+    assert downloader.requests == [(int(first.index[0].value // 10**6), int(first.index[-1].value // 10**6))]
+
+    built = []
+    original = TechnicalFeatureEngineer.build_features
+    monkeypatch.setattr(TechnicalFeatureEngineer, "build_features",
+                        lambda self, df: built.append(len(df)) or original(self, df))
+
+    # Two hours later, from a fresh process: only 24 candles are downloaded and featurized
+    downloader.requests.clear()
+    later = _manager(tmp_path, downloader).refresh(NOW + 2 * 3_600_000)
+    assert len(downloader.requests) == 1
+    assert (downloader.requests[0][1] - downloader.requests[0][0]) // STEP + 1 == 24
+    assert built == [TrainingDataManager.FEATURE_LOOKBACK + 24]
+    assert len(later) == 3 * 288 and later.index[-1] == pd.Timestamp("2024-05-10 13:55")
+
+    # Same values as recomputing everything over the continuous history
+    # (except the cumulative OBV columns, which restart at the window start: see below)
+    reference = _reference(manager.store, int(first.index[0].value // 10**6), int(later.index[-1].value // 10**6))
+    reference = reference.loc[later.index]
+    assert list(later.columns) == list(reference.columns)
+    numeric = reference.select_dtypes(include=[np.number]).columns.difference(OBV_COLUMNS, sort=False)
+    np.testing.assert_allclose(later[numeric].to_numpy(dtype=float), reference[numeric].to_numpy(dtype=float),
+                               rtol=1e-7, atol=1e-7, equal_nan=True)
+
+    # Nothing new: no download, no feature work
+    built.clear()
+    downloader.requests.clear()
+    again = _manager(tmp_path, downloader).refresh(NOW + 2 * 3_600_000 + 60_000)
+    assert downloader.requests == [] and built == []
+    pd.testing.assert_frame_equal(again, later)
+
+
+def test_stale_or_incompatible_cache_is_rebuilt(tmp_path):
+    downloader = _FakeDownloader()
+    manager = _manager(tmp_path, downloader)
+    manager.refresh(NOW)
+
+    # Ten days later the cached tail no longer joins the window
+    later = manager.refresh(NOW + 10 * 86_400_000)
+    assert len(later) == 3 * 288
+    assert later.index[0] == pd.Timestamp("2024-05-17 12:00")
+
+    manager.clear()
+    assert not manager.path.exists()
+    assert len(manager.refresh(NOW + 10 * 86_400_000)) == 3 * 288
+
+
+def test_obv_restarts_at_the_rolled_window_start(tmp_path):
+    downloader = _FakeDownloader()
+    manager = _manager(tmp_path, downloader)
+    manager.refresh(NOW)
+
+    # Roll the window twice so the cached OBV origin has dropped out of it
+    for hours in (2, 30):
+        later = _manager(tmp_path, downloader).refresh(NOW + hours * 3_600_000)
+        start_ms = int(later.index[0].value // 10**6)
+        fresh = _reference(manager.store, start_ms, int(later.index[-1].value // 10**6)).loc[later.index]
+
+        assert later['obv'].iloc[0] == 0
+        # obv_ma20 / obv_trend need 20 rows of history in a fresh build
+        np.testing.assert_allclose(later['obv'].to_numpy(), fresh['obv'].to_numpy(), rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(later[OBV_COLUMNS].iloc[19:].to_numpy(dtype=float),
+                                   fresh[OBV_COLUMNS].iloc[19:].to_numpy(dtype=float), rtol=1e-7, atol=1e-6)
@@ -0,0 +1,215 @@
+"""
+Equivalence tests for the vectorized kline validators and the validate-new-rows-only watermark
+"""
+
+import os
+import sys
+import copy
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.kline_validator import KlineValidator
+from src.data.validator import DataValidator
+
+
+def _klines(n, seed=1, start=1_700_000_000_000):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    klines = []
+    for i, c in enumerate(close):
+        o = c + rng.normal(0, 0.3)
+        klines.append({
+            'timestamp': start + i * 300_000,
+            'open': float(o), 'high': float(max(o, c) + rng.uniform(0, 1)),
+            'low': float(min(o, c) - rng.uniform(0, 1)), 'close': float(c),
+            'volume': float(rng.uniform(1, 100)), 'is_closed': True,
+        })
+    return klines
+
+
+def _corrupt(klines):
+    klines[3]['close'] = float('nan')
+    klines[7]['high'] = klines[7]['low'] - 1
+    klines[11]['volume'] = -5.0
+    klines[15]['open'] = float('inf')
+    klines[19]['low'] = 0.0
+    klines[23]['volume'] = None
+    del klines[27]['close']
+    klines[31]['open'] = 20_000_000
+    return klines
+
+
+def _reference_issues(validator, klines):
+    """Row-by-row checks over the whole list (previous behaviour)"""
+    return (validator._check_basic_validity(klines, 'X')
+            + validator._check_ohlc_logic(klines, 'X')
+            + validator._check_time_series(klines, 'X'))
+
+
+@pytest.mark.parametrize("corrupt", [False, True])
+def test_kline_validator_report_matches_row_checks(corrupt):
+    klines = _klines(300)
+    if corrupt:
+        klines = _corrupt(klines)
+        klines.append(dict(klines[40]))  # duplicate timestamp
+
+    validator = KlineValidator()
+    expected = _reference_issues(validator, klines)
+    cleaned, report = validator.validate_and_clean_klines(klines, 'BTCUSDT', interval='5m')
+
+    assert report['issues'] == expected
+    assert [i['type'] for i in report['issues']] == [i['type'] for i in expected]
+    removed = {i['index'] for i in expected if i['action'] == 'remove'}
+    assert cleaned == [k for i, k in enumerate(klines) if i not in removed]
+
+
+def test_numeric_arrays_path_matches_row_checks():
+    klines = _corrupt(_klines(60))
+    # Keep every field present and numeric so the array path is taken
+    klines[23]['volume'] = float('-inf')
+    klines[27]['close'] = np.float64(5e7)
+    validator = KlineValidator()
+    basic, ohlc = validator._check_rows(klines, 0, 'X')
+    assert basic == validator._check_basic_validity(klines, 'X')
+    assert ohlc == validator._check_ohlc_logic(klines, 'X')
+
+
+def test_watermark_validates_only_new_rows_with_identical_reports():
+    history = _corrupt(_klines(400))
+    del history[27]  # keep timestamps strictly increasing, fields complete elsewhere
+    validator = KlineValidator()
+
+    for cycle, end in enumerate(range(300, 330)):
+        window = copy.deepcopy(history[end - 300:end])
+        _, report = validator.validate_and_clean_klines(window, 'ETHUSDT', interval='5m')
+        _, full = KlineValidator().validate_and_clean_klines(window, 'ETHUSDT')
+        assert report == full
+        assert validator.rows_checked == (300 if cycle == 0 else 1)
+
+    # The last validated candle changed (still forming): it is checked again
+    window[-1] = dict(window[-1], close=-1.0)
+    _, report = validator.validate_and_clean_klines(window, 'ETHUSDT', interval='5m')
+    assert validator.rows_checked == 1
+    assert report == KlineValidator().validate_and_clean_klines(window, 'ETHUSDT')[1]
+
+    # Other symbols / intervals have their own watermark
+    validator.validate_and_clean_klines(window, 'ETHUSDT', interval='15m')
+    assert validator.rows_checked == 300
+
+
+def test_early_windows_carry_cached_issues():
+    history = _corrupt(_klines(80))
+    del history[27]
+    validator = KlineValidator()
+    validator.validate_and_clean_klines(history[:40], 'BTCUSDT', interval='1h')
+    _, report = validator.validate_and_clean_klines(history[5:45], 'BTCUSDT', interval='1h')
+    assert report['issues'] == _reference_issues(KlineValidator(), history[5:45])
+    assert {i['index'] for i in report['issues']} >= {2, 6, 10}
+
+
+@pytest.mark.parametrize("offset, checked", [(-10, 10), (-1000, 40), (1000, 40)])
+def test_rows_outside_validated_range_are_checked(offset, checked):
+    # Backward-extending (-10), disjoint earlier (-1000) and disjoint later (+1000) windows
+    history = _corrupt(_klines(2100, start=0))
+    del history[27]
+    validator = KlineValidator()
+    validator.validate_and_clean_klines(history[1010:1050], 'X', interval='5m')
+
+    window = history[1010 + offset:1050 + offset]
+    _, report = validator.validate_and_clean_klines(window, 'X', interval='5m')
+    assert validator.rows_checked == checked
+    assert report['issues'] == _reference_issues(KlineValidator(), window)
+
+
+def test_backward_window_with_ohlc_violation_is_flagged():
+    validator = KlineValidator()
+    validator.validate_and_clean_klines(_klines(10, start=1000), 'X', interval='5m')
+    early = [dict(k, timestamp=100 + i) for i, k in enumerate(_klines(8))]
+    early[3]['high'] = early[3]['low'] - 1
+    _, report = validator.validate_and_clean_klines(early, 'X', interval='5m')
+    assert [(i['type'], i['timestamp']) for i in report['issues']] == [('ohlc_logic_violation', 103)]
+
+
+def _reference_anomalies(validator, df):
+    """Per-row neighbour loop (previous DataValidator._detect_anomalies_robust)"""
+    anomalies = []
+    df['returns'] = df['close'].pct_change()
+    w = validator.NEIGHBOR_WINDOW
+    for i in range(len(df)):
+        neighbor_indices = [j for j in range(max(0, i - w), min(len(df), i + w + 1)) if j != i]
+        if len(neighbor_indices) < 3:
+            continue
+        current = df.iloc[i]
+        neighbors = df.iloc[neighbor_indices]
+        found = False
+        for field in ('high', 'low'):
+            median = neighbors[field].median()
+            mad = np.median(np.abs(neighbors[field] - median))
+            score = abs(current[field] - median) / mad if mad > 0 else 0
+            change = abs(current[field] - median) / median if median > 0 else 0
+            if score > validator.MAD_THRESHOLD and change > 0.01:
+                reason = [f'MAD={score:.2f} > {validator.MAD_THRESHOLD}']
+                if change > 0.05:
+                    reason.append(f'change={change:.1%}')
+                anomalies.append({
+                    'index': i, 'timestamp': current.get('timestamp', i), 'field': field,
+                    'value': float(current[field]), 'neighbor_median': float(median),
+                    'mad_score': float(score), 'relative_change': float(change),
+                    'reason': reason, 'method': 'MAD'})
+                found = True
+                break
+        if found:
+            continue
+        if i > 0 and pd.notna(current['returns']) and abs(current['returns']) > validator.RETURNS_THRESHOLD:
+            anomalies.append({
+                'index': i, 'timestamp': current.get('timestamp', i), 'field': 'close',
+                'value': float(current['close']), 'prev_close': float(df.iloc[i - 1]['close']),
+                'returns': float(current['returns']), 'reason': [f'异常涨跌幅={current["returns"]:.2%}'],
+                'method': 'Returns'})
+            continue
+        if current['close'] > 0:
+            hl_range = (current['high'] - current['low']) / current['close']
+            if hl_range > validator.HL_RANGE_THRESHOLD:
+                anomalies.append({
+                    'index': i, 'timestamp': current.get('timestamp', i), 'field': 'high_low_range',
+                    'high': float(current['high']), 'low': float(current['low']),
+                    'close': float(current['close']), 'hl_range_pct': float(hl_range * 100),
+                    'reason': [f'High-Low波动={hl_range:.1%} > {validator.HL_RANGE_THRESHOLD:.1%}'],
+                    'method': 'HL-Range'})
+    return anomalies
+
+
+def _spiky_frame(n=600, seed=2):
+    df = pd.DataFrame(_klines(n, seed=seed))
+    df.loc[50, 'high'] *= 1.3       # wick spike
+    df.loc[120, 'low'] *= 0.7       # wick spike down
+    df.loc[200:, ['open', 'high', 'low', 'close']] *= 1.25  # gap -> returns anomaly
+    df.loc[300, 'high'] = df.loc[300, 'close'] * 1.4        # wide range
+    df.loc[310, 'low'] = np.nan
+    df.loc[400:410, 'high'] = df.loc[400, 'high']           # flat stretch (MAD = 0)
+    return df
+
+
+@pytest.mark.parametrize("n", [4, 5, 8, 600])
+def test_data_validator_anomalies_match_row_loop(n):
+    df = _spiky_frame().iloc[:n].reset_index(drop=True)
+    validator = DataValidator()
+    assert validator._detect_anomalies_robust(df.copy(), 'X') == _reference_anomalies(validator, df.copy())
+
+
+def test_data_validator_clean_report_and_speed():
+    klines = _spiky_frame(3000).to_dict('records')
+    validator = DataValidator()
+
+    t0 = time.perf_counter()
+    cleaned, report = validator.validate_and_clean_klines(klines, 'BTCUSDT', action='clip')
+    elapsed = time.perf_counter() - t0
+
+    assert report['raw_anomaly_count'] == len(_reference_anomalies(validator, pd.DataFrame(klines)))
+    assert report['clipped_count'] >= 2 and len(cleaned) == 3000
+    assert elapsed < 0.5, elapsed
@@ -0,0 +1,154 @@
+"""
+Golden-set parity tests: VectorizedPortfolioSimulator vs. BacktestPortfolio
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.data_replay import DataCache, DataReplayAgent, FundingRateRecord
+from src.backtest.metrics import PerformanceMetrics
+from src.backtest.portfolio import BacktestPortfolio, FeeStructure, MarginConfig, MarginMode, Side
+from src.backtest.vector_portfolio import VectorizedPortfolioSimulator
+
+CAPITAL = 10000.0
+SYMBOL = "AAAUSDT"
+
+
+def _bars(n=600, seed=0, vol=0.004):
+    index = pd.date_range("2024-03-10", periods=n, freq="5min")
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = rng.uniform(0.0005, 0.006, n)
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    return index, open_, high, low
+
+
+def _signals(n, seed=1):
+    rng = np.random.default_rng(seed)
+    entries = rng.choice([0, 1, -1], size=n, p=[0.9, 0.05, 0.05])
+    exits = rng.random(n) < 0.04
+    return entries, exits
+
+
+def _funding(index, seed=2):
+    rng = np.random.default_rng(seed)
+    records = [
+        FundingRateRecord(timestamp=ts.to_pydatetime(), funding_rate=float(rng.normal(0, 0.0005)), mark_price=0.0)
+        for ts in index if ts.hour % 8 == 0 and ts.minute == 0
+    ]
+    replay = DataReplayAgent(symbol=SYMBOL, start_date="2024-03-10", end_date="2024-03-13")
+    replay.data_cache = DataCache(
+        symbol=SYMBOL, df_5m=pd.DataFrame(), df_15m=pd.DataFrame(), df_1h=pd.DataFrame(),
+        start_date=None, end_date=None, funding_rates=records,
+    )
+    return replay
+
+
+def _reference(index, open_, high, low, entries, exits, qty, sl, tp, trail, replay,
+               margin_config, record_mask, slippage=0.001):
+    """Drive BacktestPortfolio through the same per-bar event order as BacktestEngine.run"""
+    portfolio = BacktestPortfolio(CAPITAL, slippage=slippage, margin_config=margin_config)
+    for i, ts in enumerate(index):
+        ts = ts.to_pydatetime()
+        price = float(open_[i])
+        if replay is not None:
+            rate = replay.get_funding_rate_for_settlement(ts)
+            if rate is not None:
+                record = replay.get_funding_rate_at(ts)
+                mark = record.mark_price if record and record.mark_price > 0 else price
+                for symbol in list(portfolio.positions):
+                    portfolio.apply_funding_fee(symbol, rate, mark, ts)
+        if portfolio.check_liquidation({SYMBOL: price}, ts):
+            continue
+        if SYMBOL in portfolio.positions and exits[i]:
+            portfolio.close_position(SYMBOL, price, ts, reason="signal")
+        if SYMBOL not in portfolio.positions and entries[i] != 0:
+            side = Side.LONG if entries[i] > 0 else Side.SHORT
+            portfolio.open_position(SYMBOL, side, qty, price, ts,
+                                    stop_loss_pct=sl, take_profit_pct=tp, trailing_stop_pct=trail)
+        portfolio.check_stop_loss_take_profit_intrabar(
+            {SYMBOL: {'high': float(high[i]), 'low': float(low[i])}}, ts)
+        if record_mask[i]:
+            portfolio.record_equity(ts, {SYMBOL: price})
+    if SYMBOL in portfolio.positions:
+        portfolio.close_position(SYMBOL, float(open_[-1]), index[-1].to_pydatetime(), reason="backtest_end")
+    return portfolio
+
+
+GOLDEN = [
+    # (name, qty, sl, tp, trail, leverage, mode, funding)
+    ("plain", 5.0, None, None, None, 5, MarginMode.CROSS, False),
+    ("sl_tp", 5.0, 1.0, 2.0, None, 5, MarginMode.CROSS, False),
+    ("trailing", 5.0, None, None, 0.8, 5, MarginMode.CROSS, True),
+    ("all_stops_funding", 8.0, 1.5, 3.0, 1.0, 10, MarginMode.CROSS, True),
+    ("cross_liquidation", 900.0, None, None, None, 50, MarginMode.CROSS, True),
+    ("isolated_liquidation", 40.0, None, None, None, 100, MarginMode.ISOLATED, False),
+]
+
+
+@pytest.mark.parametrize("name,qty,sl,tp,trail,leverage,mode,funding", GOLDEN, ids=[g[0] for g in GOLDEN])
+def test_matches_object_portfolio(name, qty, sl, tp, trail, leverage, mode, funding):
+    index, open_, high, low = _bars(vol=0.008 if "liquidation" in name else 0.004)
+    entries, exits = _signals(len(index))
+    replay = _funding(index) if funding else None
+    record_mask = (np.arange(len(index)) % 12 == 0) | (entries != 0) | exits
+    margin_config = MarginConfig(mode=mode, leverage=leverage)
+
+    expected = _reference(index, open_, high, low, entries, exits, qty, sl, tp, trail, replay,
+                          margin_config, record_mask)
+
+    rates, marks = (VectorizedPortfolioSimulator.funding_arrays(replay, list(index.to_pydatetime()))
+                    if replay is not None else (None, None))
+    result = VectorizedPortfolioSimulator(CAPITAL, margin_config=margin_config).run(
+        index.to_pydatetime(), open_, high, low, entries, exits, quantity=qty,
+        stop_loss_pct=sl, take_profit_pct=tp, trailing_stop_pct=trail,
+        funding_rates=rates, mark_prices=marks, record_mask=record_mask, symbol=SYMBOL,
+    )
+
+    assert [t.to_dict() for t in result.trades] == [t.to_dict() for t in expected.trades]
+    pd.testing.assert_frame_equal(result.equity_curve, expected.get_equity_dataframe(), check_freq=False)
+    assert result.final_cash == expected.cash
+    assert result.peak_equity == expected.peak_equity
+    assert result.total_funding_paid == expected.total_funding_paid
+    assert result.liquidation_count == expected.liquidation_count
+
+    fast = PerformanceMetrics.calculate(result.equity_curve, result.trades, CAPITAL)
+    slow = PerformanceMetrics.calculate(expected.get_equity_dataframe(), expected.trades, CAPITAL)
+    assert fast.to_dict() == slow.to_dict()
+
+    # Every golden case must actually exercise the feature it is named after
+    reasons = {t.close_reason for t in expected.trades}
+    if name == "sl_tp":
+        assert {"stop_loss", "take_profit"} <= reasons
+    if name == "trailing":
+        assert "trailing_stop" in reasons and expected.total_funding_paid != 0
+    if "liquidation" in name:
+        assert expected.liquidation_count > 0
+
+
+def test_commission_defaults_to_taker_fee():
+    fees = FeeStructure(maker_fee=0.0001, taker_fee=0.0007)
+    assert VectorizedPortfolioSimulator(CAPITAL, fee_structure=fees).commission == 0.0007
+    assert VectorizedPortfolioSimulator(CAPITAL, commission=0.0002, fee_structure=fees).commission == 0.0002
+
+
+def test_rejects_entries_without_cash_and_checks_lengths():
+    index, open_, high, low = _bars(n=20)
+    entries = np.zeros(20, dtype=int)
+    entries[3] = 1
+    sim = VectorizedPortfolioSimulator(100.0, margin_config=MarginConfig(leverage=1))
+    result = sim.run(index, open_, high, low, entries, quantity=5.0)
+    assert result.trades == []
+    assert result.final_cash == 100.0
+    assert len(result.equity_curve) == 20
+
+    with pytest.raises(ValueError):
+        sim.run(index, open_, high[:-1], low, entries, quantity=1.0)
@@ -397,7 +397,84 @@ function buildDecisionMap(decision, history) {
     return merged;
 }
 
+// 📡 Live dashboard stream (SSE): one snapshot, then only deltas; polling is the fallback
+let dashboardState = null;
+let dashboardStream = null;
+let dashboardStreamAttempt = 0;
+let dashboardRenderPending = false;
+
+function isDashboardStreamLive() {
+    return !!(dashboardStream && dashboardState && dashboardStream.readyState === EventSource.OPEN);
+}
+
+function applyDashboardOps(state, ops) {
+    for (const { path, op, value, limit } of ops) {
+        let node = state;
+        for (const key of path.slice(0, -1)) {
+            if (node[key] === undefined || node[key] === null) node[key] = {};
+            node = node[key];
+        }
+        const key = path[path.length - 1];
+        if (op === 'set') {
+            node[key] = value;
+        } else if (op === 'merge') {
+            node[key] = { ...(node[key] || {}), ...value };
+        } else if (op === 'append' || op === 'prepend') {
+            const list = Array.isArray(node[key]) ? node[key] : [];
+            if (op === 'append') {
+                list.push(value);
+                if (limit && list.length > limit) list.splice(0, list.length - limit);
+            } else {
+                list.unshift(value);
+                if (limit && list.length > limit) list.length = limit;
+            }
+            node[key] = list;
+        }
+    }
+}
+
+function scheduleDashboardRender() {
+    if (dashboardRenderPending) return;
+    dashboardRenderPending = true;
+    requestAnimationFrame(() => {
+        dashboardRenderPending = false;
+        if (dashboardState) renderDashboard(dashboardState);
+    });
+}
+
+function connectDashboardStream() {
+    if (!window.EventSource) return;
+    if (dashboardStream && dashboardStream.readyState !== EventSource.CLOSED) return;
+    // Retry a closed stream (auth failure / server error) at most every 15s
+    const now = Date.now();
+    if (now - dashboardStreamAttempt < 15000) return;
+    dashboardStreamAttempt = now;
+
+    // EventSource reconnects by itself and resumes from Last-Event-ID (no new snapshot)
+    const source = new EventSource('/api/stream', { withCredentials: true });
+    source.addEventListener('snapshot', event => {
+        dashboardState = JSON.parse(event.data);
+        scheduleDashboardRender();
+    });
+    source.addEventListener('delta', event => {
+        if (!dashboardState) return;
+        applyDashboardOps(dashboardState, JSON.parse(event.data).ops);
+        scheduleDashboardRender();
+    });
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            console.warn('📡 Dashboard stream closed, falling back to polling');
+        }
+    };
+    dashboardStream = source;
+}
+
 function updateDashboard() {
+    if (isDashboardStreamLive()) {
+        // Pushed state is current: just re-render (e.g. log mode toggle)
+        renderDashboard(dashboardState);
+        return;
+    }
     apiFetch(API_URL)
         .then(response => {
             if (response.status === 401 || response.status === 403) {
@@ -409,256 +486,261 @@ function updateDashboard() {
             return response.json();
         })
         .then(data => {
-            const decisionMap = buildDecisionMap(data.decision, data.decision_history);
-            const currentDecision = normalizeDecision(decisionMap, data.system) || data.decision_history?.[0] || null;
-            window.latestDecisionHistory = Array.isArray(data.decision_history) ? data.decision_history : [];
-            renderSystemStatus(data.system);
-            renderMarketData(data.market);
-            renderAgents(data.agents);
-            renderDecision(currentDecision);
-            renderLogs(data.logs, data.logs_simplified);
-
-            // 🆕 Update Agent Framework Visualization
-            if (data.system) {
-                updateAgentFramework(data.system, currentDecision, data.agents);
-                if (Array.isArray(data.system.timeframes) && data.system.timeframes.length > 0) {
-                    window.strategyTimeframes = data.system.timeframes;
-                }
-                const sessionKey = getBalanceSessionKey(data.system);
-                if (sessionKey && sessionKey !== balanceSessionKey) {
-                    balanceSessionKey = sessionKey;
-                    realtimeBalanceHistory = [];
-                    lastCycleCounter = null;
-                    curveBaselineBalance = null;
-                    curveBaselineTime = null;
-                    curveBaselineLabelKey = 'chart.initial';
-                    baselineLoadedFromStorage = false;
-                    const stored = loadBaselineFromStorage(balanceSessionKey);
-                    if (stored) {
-                        curveBaselineBalance = stored.balance;
-                        curveBaselineTime = stored.time;
-                        curveBaselineLabelKey = stored.labelKey || 'chart.cycle_start';
-                        baselineLoadedFromStorage = true;
-                    }
-                }
-            }
+            renderDashboard(data);
+            connectDashboardStream();
+        })
+        .catch(err => {
+            console.error('Error fetching data:', err);
+            // Optional: Show offline status in UI?
+        });
+}
 
-            // 🆕 Update K-Line symbol selector with active trading symbols
-            if (data.system && data.system.symbols) {
-                updateSymbolSelector(data.system.symbols);
-                updateDecisionFilter(data.system.symbols);  // 🆕 Also update decision filter
-            }
-            const selectorInfo = data.agents?.symbol_selector || {};
-            const selectorMode = (selectorInfo.mode || '').toUpperCase();
-            const selectorSymbol = selectorInfo.symbol && selectorInfo.symbol !== '--' ? selectorInfo.symbol : null;
-            const autoSymbol = selectorMode.startsWith('AUTO') ? selectorSymbol : null;
-            const agentSymbol = selectorSymbol || autoSymbol || null;
-
-            // Log symbol selector info for debugging
-            if (autoSymbol) {
-                console.log(`📊 Symbol Selector: mode=${selectorMode}, symbol=${autoSymbol}`);
+function renderDashboard(data) {
+    const decisionMap = buildDecisionMap(data.decision, data.decision_history);
+    const currentDecision = normalizeDecision(decisionMap, data.system) || data.decision_history?.[0] || null;
+    window.latestDecisionHistory = Array.isArray(data.decision_history) ? data.decision_history : [];
+    renderSystemStatus(data.system);
+    renderMarketData(data.market);
+    renderAgents(data.agents);
+    renderDecision(currentDecision);
+    renderLogs(data.logs, data.logs_simplified);
+
+    // 🆕 Update Agent Framework Visualization
+    if (data.system) {
+        updateAgentFramework(data.system, currentDecision, data.agents);
+        if (Array.isArray(data.system.timeframes) && data.system.timeframes.length > 0) {
+            window.strategyTimeframes = data.system.timeframes;
+        }
+        const sessionKey = getBalanceSessionKey(data.system);
+        if (sessionKey && sessionKey !== balanceSessionKey) {
+            balanceSessionKey = sessionKey;
+            realtimeBalanceHistory = [];
+            lastCycleCounter = null;
+            curveBaselineBalance = null;
+            curveBaselineTime = null;
+            curveBaselineLabelKey = 'chart.initial';
+            baselineLoadedFromStorage = false;
+            const stored = loadBaselineFromStorage(balanceSessionKey);
+            if (stored) {
+                curveBaselineBalance = stored.balance;
+                curveBaselineTime = stored.time;
+                curveBaselineLabelKey = stored.labelKey || 'chart.cycle_start';
+                baselineLoadedFromStorage = true;
             }
+        }
+    }
 
-            const symbolSelectorEl = document.getElementById('symbol-selector');
-            if (autoSymbol && symbolSelectorEl) {
-                if (Array.isArray(data.system?.symbols) && data.system.symbols.includes(autoSymbol)) {
-                    symbolSelectorEl.value = autoSymbol;
-                }
-            }
+    // 🆕 Update K-Line symbol selector with active trading symbols
+    if (data.system && data.system.symbols) {
+        updateSymbolSelector(data.system.symbols);
+        updateDecisionFilter(data.system.symbols);  // 🆕 Also update decision filter
+    }
+    const selectorInfo = data.agents?.symbol_selector || {};
+    const selectorMode = (selectorInfo.mode || '').toUpperCase();
+    const selectorSymbol = selectorInfo.symbol && selectorInfo.symbol !== '--' ? selectorInfo.symbol : null;
+    const autoSymbol = selectorMode.startsWith('AUTO') ? selectorSymbol : null;
+    const agentSymbol = selectorSymbol || autoSymbol || null;
 
-            const preferredSymbol = getPreferredSymbol(data.system, decisionMap);
-            const headerSymbol = agentSymbol
-                || (data.system && data.system.current_symbol)
-                || preferredSymbol
-                || currentDecision?.symbol
-                || (Array.isArray(data.system?.symbols) && data.system.symbols.length > 0 ? data.system.symbols[0] : null);
-            if (headerSymbol) {
-                const symbolDisplayText = document.getElementById('symbol-display-text');
-                if (symbolDisplayText) {
-                    symbolDisplayText.textContent = headerSymbol;
-                }
-            }
+    // Log symbol selector info for debugging
+    if (autoSymbol) {
+        console.log(`📊 Symbol Selector: mode=${selectorMode}, symbol=${autoSymbol}`);
+    }
 
-            // Priority: AUTO symbol > header symbol > preferred symbol
-            const chartSymbol = agentSymbol || headerSymbol || preferredSymbol;
-            if (chartSymbol
-                && typeof loadTradingViewChart === 'function'
-                && chartSymbol !== window.lastChartSymbol) {
-                console.log(`📈 Chart Update: ${window.lastChartSymbol || 'none'} → ${chartSymbol}`);
-                loadTradingViewChart(chartSymbol);
-            }
+    const symbolSelectorEl = document.getElementById('symbol-selector');
+    if (autoSymbol && symbolSelectorEl) {
+        if (Array.isArray(data.system?.symbols) && data.system.symbols.includes(autoSymbol)) {
+            symbolSelectorEl.value = autoSymbol;
+        }
+    }
 
-            updateDataSyncLabels(window.strategyTimeframes);
-
-            // New Renderers
-            // Account & Positions Logic
-            let activeAccount = data.account;
-            let activePositions = data.positions || [];
-
-            if (data.system && data.system.is_test_mode && data.virtual_account) {
-                // Construct account object compatible with renderAccount
-                const va = data.virtual_account;
-                const unrealized = va.total_unrealized_pnl || 0;
-                const realizedPnl = va.cumulative_realized_pnl || 0;  // For reference display
-                const initialBalance = va.initial_balance || 0;
-                // Total Equity = Current Balance (already includes realized PnL) + Unrealized PnL
-                const totalEquity = va.current_balance + unrealized;
-                // Total PnL = Total Equity - Initial Balance (most accurate formula)
-                // Note: current_balance already includes realized PnL from closed trades
-                const totalPnl = totalEquity - initialBalance;
-                activeAccount = {
-                    total_equity: totalEquity,
-                    wallet_balance: va.current_balance,
-                    available_balance: va.available_balance || va.current_balance,  // 可用余额 = 资金 - 持仓
-                    total_pnl: totalPnl,  // ✅ Accurate: Equity - Initial
-                    initial_balance: initialBalance, // ✅ Explicitly pass Initial Balance
-                    realized_pnl: realizedPnl,  // For potential separate display
-                    unrealized_pnl: unrealized   // For potential separate display
-                };
+    const preferredSymbol = getPreferredSymbol(data.system, decisionMap);
+    const headerSymbol = agentSymbol
+        || (data.system && data.system.current_symbol)
+        || preferredSymbol
+        || currentDecision?.symbol
+        || (Array.isArray(data.system?.symbols) && data.system.symbols.length > 0 ? data.system.symbols[0] : null);
+    if (headerSymbol) {
+        const symbolDisplayText = document.getElementById('symbol-display-text');
+        if (symbolDisplayText) {
+            symbolDisplayText.textContent = headerSymbol;
+        }
+    }
 
-                // Convert virtual positions dict to array for UI
-                if (va.positions) {
-                    activePositions = Object.entries(va.positions).map(([sym, details]) => ({
-                        symbol: sym,
-                        quantity: details.quantity,
-                        entry_price: details.entry_price,
-                        pnl: details.unrealized_pnl || 0,
-                        side: details.side,
-                        leverage: details.leverage || 1
-                    }));
-                }
-            }
+    // Priority: AUTO symbol > header symbol > preferred symbol
+    const chartSymbol = agentSymbol || headerSymbol || preferredSymbol;
+    if (chartSymbol
+        && typeof loadTradingViewChart === 'function'
+        && chartSymbol !== window.lastChartSymbol) {
+        console.log(`📈 Chart Update: ${window.lastChartSymbol || 'none'} → ${chartSymbol}`);
+        loadTradingViewChart(chartSymbol);
+    }
+
+    updateDataSyncLabels(window.strategyTimeframes);
+
+    // New Renderers
+    // Account & Positions Logic
+    let activeAccount = data.account;
+    let activePositions = data.positions || [];
+
+    if (data.system && data.system.is_test_mode && data.virtual_account) {
+        // Construct account object compatible with renderAccount
+        const va = data.virtual_account;
+        const unrealized = va.total_unrealized_pnl || 0;
+        const realizedPnl = va.cumulative_realized_pnl || 0;  // For reference display
+        const initialBalance = va.initial_balance || 0;
+        // Total Equity = Current Balance (already includes realized PnL) + Unrealized PnL
+        const totalEquity = va.current_balance + unrealized;
+        // Total PnL = Total Equity - Initial Balance (most accurate formula)
+        // Note: current_balance already includes realized PnL from closed trades
+        const totalPnl = totalEquity - initialBalance;
+        activeAccount = {
+            total_equity: totalEquity,
+            wallet_balance: va.current_balance,
+            available_balance: va.available_balance || va.current_balance,  // 可用余额 = 资金 - 持仓
+            total_pnl: totalPnl,  // ✅ Accurate: Equity - Initial
+            initial_balance: initialBalance, // ✅ Explicitly pass Initial Balance
+            realized_pnl: realizedPnl,  // For potential separate display
+            unrealized_pnl: unrealized   // For potential separate display
+        };
 
-            if (activeAccount) {
-                renderAccount(activeAccount);
-                updatePositionInfo(activeAccount, activePositions);
-            }
-            const balanceSnapshot = updateRealtimeBalance({
-                account: activeAccount,
-                system: data.system,
-                virtualAccount: data.virtual_account,
-                chartData: data.chart_data,
-                positions: activePositions,
-                trades: data.trade_history || []
-            });
-            updateAccountTradeStats(data.trade_history || []);
-
-            // Determine Initial Amount for Chart Baseline
-            let initialAmount = null;
-            if (data.system && data.system.is_test_mode && data.virtual_account) {
-                initialAmount = data.virtual_account.initial_balance;
-            } else if (activeAccount) {
-                // For live, use wallet_balance (Realized Equity) roughly as baseline, 
-                // OR if we had a stored 'starting_balance' in backend.
-                // Ideally simply using the first point of the day would be better, 
-                // but here we use Wallet Balance as the "Center" anchor if no specific starting point.
-                // Actually, let's try to trust the first point of the chart if this is null?
-                // No, user specifically asked for "Initial Amount". In Test it's clear.
-                // In Live, it changes. Let's use Wallet Balance as the "0 PnL" line for current active positions?
-                // Yes, Wallet Balance = Equity - Unrealized PnL. So Equity fluctuates around Wallet Balance.
-                initialAmount = activeAccount.wallet_balance;
-            }
+        // Convert virtual positions dict to array for UI
+        if (va.positions) {
+            activePositions = Object.entries(va.positions).map(([sym, details]) => ({
+                symbol: sym,
+                quantity: details.quantity,
+                entry_price: details.entry_price,
+                pnl: details.unrealized_pnl || 0,
+                side: details.side,
+                leverage: details.leverage || 1
+            }));
+        }
+    }
 
-            const cycleCounter = Number(data.system?.cycle_counter ?? NaN);
-            if (Number.isFinite(cycleCounter)) {
-                if (lastCycleCounter !== null && cycleCounter < lastCycleCounter) {
-                    realtimeBalanceHistory = [];
-                    curveBaselineBalance = null;
-                    curveBaselineTime = null;
-                    curveBaselineLabelKey = 'chart.initial';
-                    baselineLoadedFromStorage = false;
-                    clearBaselineFromStorage(balanceSessionKey);
-                }
+    if (activeAccount) {
+        renderAccount(activeAccount);
+        updatePositionInfo(activeAccount, activePositions);
+    }
+    const balanceSnapshot = updateRealtimeBalance({
+        account: activeAccount,
+        system: data.system,
+        virtualAccount: data.virtual_account,
+        chartData: data.chart_data,
+        positions: activePositions,
+        trades: data.trade_history || []
+    });
+    updateAccountTradeStats(data.trade_history || []);
+
+    // Determine Initial Amount for Chart Baseline
+    let initialAmount = null;
+    if (data.system && data.system.is_test_mode && data.virtual_account) {
+        initialAmount = data.virtual_account.initial_balance;
+    } else if (activeAccount) {
+        // For live, use wallet_balance (Realized Equity) roughly as baseline, 
+        // OR if we had a stored 'starting_balance' in backend.
+        // Ideally simply using the first point of the day would be better, 
+        // but here we use Wallet Balance as the "Center" anchor if no specific starting point.
+        // Actually, let's try to trust the first point of the chart if this is null?
+        // No, user specifically asked for "Initial Amount". In Test it's clear.
+        // In Live, it changes. Let's use Wallet Balance as the "0 PnL" line for current active positions?
+        // Yes, Wallet Balance = Equity - Unrealized PnL. So Equity fluctuates around Wallet Balance.
+        initialAmount = activeAccount.wallet_balance;
+    }
+
+    const cycleCounter = Number(data.system?.cycle_counter ?? NaN);
+    if (Number.isFinite(cycleCounter)) {
+        if (lastCycleCounter !== null && cycleCounter < lastCycleCounter) {
+            realtimeBalanceHistory = [];
+            curveBaselineBalance = null;
+            curveBaselineTime = null;
+            curveBaselineLabelKey = 'chart.initial';
+            baselineLoadedFromStorage = false;
+            clearBaselineFromStorage(balanceSessionKey);
+        }
 
-                if (cycleCounter === 1 && lastCycleCounter !== 1 && !baselineLoadedFromStorage) {
-                    realtimeBalanceHistory = [];
-                    curveBaselineBalance = null;
-                    curveBaselineTime = null;
-                    curveBaselineLabelKey = 'chart.cycle_start';
-                }
+        if (cycleCounter === 1 && lastCycleCounter !== 1 && !baselineLoadedFromStorage) {
+            realtimeBalanceHistory = [];
+            curveBaselineBalance = null;
+            curveBaselineTime = null;
+            curveBaselineLabelKey = 'chart.cycle_start';
+        }
 
-                if (cycleCounter === 1 && curveBaselineBalance === null && balanceSnapshot) {
-                    curveBaselineBalance = balanceSnapshot.realtimeBalance;
-                    curveBaselineTime = formatTimestamp();
-                    saveBaselineToStorage(balanceSessionKey, {
-                        balance: curveBaselineBalance,
-                        time: curveBaselineTime,
-                        labelKey: curveBaselineLabelKey
-                    });
-                }
+        if (cycleCounter === 1 && curveBaselineBalance === null && balanceSnapshot) {
+            curveBaselineBalance = balanceSnapshot.realtimeBalance;
+            curveBaselineTime = formatTimestamp();
+            saveBaselineToStorage(balanceSessionKey, {
+                balance: curveBaselineBalance,
+                time: curveBaselineTime,
+                labelKey: curveBaselineLabelKey
+            });
+        }
 
-                if (cycleCounter >= 1 && curveBaselineBalance === null && balanceSnapshot) {
-                    curveBaselineBalance = balanceSnapshot.realtimeBalance;
-                    curveBaselineTime = formatTimestamp();
-                    curveBaselineLabelKey = 'chart.cycle_start';
-                    saveBaselineToStorage(balanceSessionKey, {
-                        balance: curveBaselineBalance,
-                        time: curveBaselineTime,
-                        labelKey: curveBaselineLabelKey
-                    });
-                }
+        if (cycleCounter >= 1 && curveBaselineBalance === null && balanceSnapshot) {
+            curveBaselineBalance = balanceSnapshot.realtimeBalance;
+            curveBaselineTime = formatTimestamp();
+            curveBaselineLabelKey = 'chart.cycle_start';
+            saveBaselineToStorage(balanceSessionKey, {
+                balance: curveBaselineBalance,
+                time: curveBaselineTime,
+                labelKey: curveBaselineLabelKey
+            });
+        }
 
-                lastCycleCounter = cycleCounter;
-            }
+        lastCycleCounter = cycleCounter;
+    }
 
-            const tradeHistory = Array.isArray(data.trade_history) ? data.trade_history : [];
-            const baseline = Number.isFinite(balanceSnapshot?.initial)
-                ? balanceSnapshot.initial
-                : FIXED_INITIAL_BALANCE;
-            const tradeCurve = buildBalanceSeriesFromTrades(tradeHistory, baseline);
+    const tradeHistory = Array.isArray(data.trade_history) ? data.trade_history : [];
+    const baseline = Number.isFinite(balanceSnapshot?.initial)
+        ? balanceSnapshot.initial
+        : FIXED_INITIAL_BALANCE;
+    const tradeCurve = buildBalanceSeriesFromTrades(tradeHistory, baseline);
 
-            if (tradeCurve.length) {
-                realtimeBalanceHistory = tradeCurve;
-            } else {
-                realtimeBalanceHistory = [];
-            }
+    if (tradeCurve.length) {
+        realtimeBalanceHistory = tradeCurve;
+    } else {
+        realtimeBalanceHistory = [];
+    }
 
-            if (!realtimeBalanceHistory.length) {
-                realtimeBalanceHistory.push({
-                    time: formatTimestamp(),
-                    value: baseline
-                });
-            }
+    if (!realtimeBalanceHistory.length) {
+        realtimeBalanceHistory.push({
+            time: formatTimestamp(),
+            value: baseline
+        });
+    }
 
-            if (balanceSnapshot) {
-                const point = {
-                    time: formatTimestamp(),
-                    value: balanceSnapshot.realtimeBalance
-                };
-                if (!realtimeBalanceHistory.length || realtimeBalanceHistory[realtimeBalanceHistory.length - 1].time !== point.time) {
-                    realtimeBalanceHistory.push(point);
-                    if (realtimeBalanceHistory.length > 200) {
-                        realtimeBalanceHistory.shift();
-                    }
-                }
+    if (balanceSnapshot) {
+        const point = {
+            time: formatTimestamp(),
+            value: balanceSnapshot.realtimeBalance
+        };
+        if (!realtimeBalanceHistory.length || realtimeBalanceHistory[realtimeBalanceHistory.length - 1].time !== point.time) {
+            realtimeBalanceHistory.push(point);
+            if (realtimeBalanceHistory.length > 200) {
+                realtimeBalanceHistory.shift();
             }
+        }
+    }
 
-            if (realtimeBalanceHistory.length) {
-                renderChart(realtimeBalanceHistory, baseline);
-            }
+    if (realtimeBalanceHistory.length) {
+        renderChart(realtimeBalanceHistory, baseline);
+    }
 
-            // Layout v2 Renderers with Filtering
-            if (data.decision_history) {
-                allDecisionHistory = data.decision_history;
-                currentActivePositions = activePositions; // Update global
-                applyDecisionFilters(); // 应用当前过滤条件
-            }
-            if (data.trade_history) renderTradeHistory(data.trade_history);
+    // Layout v2 Renderers with Filtering
+    if (data.decision_history) {
+        allDecisionHistory = data.decision_history;
+        currentActivePositions = activePositions; // Update global
+        applyDecisionFilters(); // 应用当前过滤条件
+    }
+    if (data.trade_history) renderTradeHistory(data.trade_history);
 
-            // Check for account fetch failure alert
-            if (data.account_alert && data.account_alert.active) {
-                showAccountAlert(data.account_alert.failure_count);
-            }
+    // Check for account fetch failure alert
+    if (data.account_alert && data.account_alert.active) {
+        showAccountAlert(data.account_alert.failure_count);
+    }
 
-            // Handle Demo Mode Timer and Expiration
-            if (data.demo) {
-                handleDemoMode(data.demo);
-            }
-        })
-        .catch(err => {
-            console.error('Error fetching data:', err);
-            // Optional: Show offline status in UI?
-        });
+    // Handle Demo Mode Timer and Expiration
+    if (data.demo) {
+        handleDemoMode(data.demo);
+    }
 }
 
 // 决策表过滤函数
@@ -3188,8 +3270,10 @@ document.addEventListener('DOMContentLoaded', function () {
         if (typeof applyRoleRestrictions === 'function') applyRoleRestrictions();
     } catch (e) { console.error('Role Restrictions Error:', e); }
 
-    // 5. Start Polling
-    setInterval(updateDashboard, 2000);
+    // 5. Live Updates (push stream after the first snapshot; polling only while it is down)
+    setInterval(() => {
+        if (!isDashboardStreamLive()) updateDashboard();
+    }, 2000);
     updateDashboard();
 
     // 6. Symbol Ranking Update (less frequent - every 10 seconds)